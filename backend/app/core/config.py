@@ -18,6 +18,114 @@ class Settings(BaseSettings):
     EMAILS_FROM_NAME: str = "Flipboard Clone"
     GOOGLE_CLIENT_ID: str = ""
 
+    # Article search ranking: text relevance boosted by recency
+    SEARCH_RECENCY_WEIGHT: float = 1.0
+    SEARCH_RECENCY_HALF_LIFE_DAYS: float = 7.0
+
+    # Cached article list totals
+    ARTICLE_COUNT_CACHE_SIZE: int = 1024
+    ARTICLE_COUNT_CACHE_TTL_SECONDS: float = 60.0
+
+    # Per-process cache of each user's liked/saved article ids
+    INTERACTION_CACHE_MAX_USERS: int = 10000
+    INTERACTION_CACHE_TTL_SECONDS: float = 300.0
+
+    # Per-process cache of the user profiles shown next to comments
+    USER_PROFILE_CACHE_SIZE: int = 10000
+    USER_PROFILE_CACHE_TTL_SECONDS: float = 60.0
+
+    # Per-process cache of the article and magazine titles in comment lists
+    COMMENT_TITLE_CACHE_SIZE: int = 10000
+    COMMENT_TITLE_CACHE_TTL_SECONDS: float = 300.0
+
+    # Threaded comments: replies to a comment this deep are refused
+    COMMENT_MAX_DEPTH: int = 10
+
+    # Live events over Server-Sent Events. A connection with a full queue
+    # is dropped. With the change stream relay (needs a replica set), events
+    # go through the `events` collection to reach every worker.
+    EVENTS_QUEUE_SIZE: int = 100
+    EVENTS_HEARTBEAT_SECONDS: float = 15.0
+    EVENTS_CHANGE_STREAM: bool = False
+    EVENTS_TTL_SECONDS: int = 300
+    EVENTS_RELAY_RETRY_SECONDS: float = 5.0
+
+    # Background notification of magazine followers, written in chunks
+    NOTIFICATION_FANOUT_CHUNK_SIZE: int = 1000
+    NOTIFICATION_FANOUT_MAX_PENDING: int = 1000
+
+    # Background reconciliation of denormalized counters (0 disables it)
+    RECONCILE_INTERVAL_SECONDS: float = 900.0
+    RECONCILE_BATCH_SIZE: int = 500
+    RECONCILE_MAX_BATCHES_PER_RUN: int = 20
+
+    # Buffered view counting (dedupe window 0 disables deduplication)
+    VIEW_FLUSH_INTERVAL_SECONDS: float = 5.0
+    VIEW_DEDUPE_WINDOW_SECONDS: float = 0.0
+    VIEW_DEDUPE_MAX_ENTRIES: int = 100000
+
+    # Time-decayed trending scores
+    TRENDING_HALF_LIFE_HOURS: float = 6.0
+    TRENDING_REFRESH_SECONDS: float = 60.0
+    TRENDING_TOP_K: int = 50
+    TRENDING_CANDIDATES: int = 1000
+    TRENDING_MAX_TRACKED: int = 50000
+    TRENDING_SEED_HOURS: float = 48.0
+
+    # Materialized home timelines: articles of topics with more followers
+    # than the threshold are read on demand instead of fanned out
+    TIMELINE_MAX_ENTRIES: int = 800
+    TIMELINE_HOT_TOPIC_FOLLOWERS: int = 10000
+    TIMELINE_HOT_TOPICS_TTL_SECONDS: float = 300.0
+
+    # Personalized feed ranking
+    RANK_CANDIDATES: int = 300
+    RANK_AFFINITY_HISTORY: int = 200
+    RANK_RECENCY_HALF_LIFE_HOURS: float = 24.0
+    RANK_WEIGHT_RECENCY: float = 1.0
+    RANK_WEIGHT_AFFINITY: float = 1.0
+    RANK_WEIGHT_POPULARITY: float = 0.5
+    RANK_PUBLISHER_PENALTY: float = 0.2
+
+    # Per-user topic affinity profiles
+    AFFINITY_HALF_LIFE_DAYS: float = 14.0
+    AFFINITY_MAX_TOPICS: int = 64
+    AFFINITY_CACHE_MAX_USERS: int = 10000
+    AFFINITY_FLUSH_INTERVAL_SECONDS: float = 10.0
+
+    # Item-item recommendations (interval 0 disables the batch job)
+    RECOMMEND_INTERVAL_SECONDS: float = 3600.0
+    RECOMMEND_CHUNK_SIZE: int = 50000
+    RECOMMEND_BLOCK_SIZE: int = 1000
+    RECOMMEND_NEIGHBOURS: int = 50
+    RECOMMEND_SEED_ITEMS: int = 20
+
+    # Related articles (interval 0 disables the batch job)
+    RELATED_INTERVAL_SECONDS: float = 21600.0
+    RELATED_HASH_FEATURES: int = 262144
+    RELATED_MAX_TERMS: int = 64
+    RELATED_MAX_DF: float = 0.5
+    RELATED_TOP_K: int = 10
+    RELATED_CHUNK_SIZE: int = 5000
+    RELATED_BLOCK_SIZE: int = 128
+    RELATED_CANDIDATES: int = 200
+
+    # Article bodies, stored zlib-compressed in article_contents. Their
+    # first characters stay on the article for the text index.
+    CONTENT_COMPRESSION_LEVEL: int = 6
+    ARTICLE_SEARCH_TEXT_CHARS: int = 10000
+
+    # Near-duplicate news posts
+    DEDUPE_TTL_SECONDS: float = 86400.0
+    DEDUPE_MAX_ENTRIES: int = 50000
+
+    # News entity index; matches how far back the news API serves posts
+    NEWS_ENTITY_TTL_DAYS: int = 30
+
+    # Conditional GET of scraped article pages
+    NEWS_CONTENT_ETAG_TTL_SECONDS: int = 3600
+    NEWS_CONTENT_ETAG_MAX_ENTRIES: int = 10000
+
     model_config = SettingsConfigDict(env_file=".env", case_sensitive=True)
 
 
@@ -1,87 +1,395 @@
+import json
 import uuid
+import zlib
 from datetime import datetime
-from typing import List, Optional
+from typing import Dict, List, Literal, Optional
 
+from bson import Binary
+from pymongo import ReturnDocument
+
+from app.core.config import settings
 from app.db.database import db
 from app.schemas.article import ArticleCreate, ArticleUpdate
+from app.utils.cache import TTLCache
+from app.utils.near_duplicates import (
+    MAX_DISTANCE,
+    bands,
+    distance,
+    simhash,
+    to_signed,
+)
+from app.utils.pagination import apply_keyset, keyset_sort
+from app.utils.text import detect_language, has_search_terms, search_language
+
+CountMode = Literal["exact", "approx", "none"]
+
+_UINT64 = (1 << 64) - 1
+
+# Fields the Article response model needs, for queries that embed articles.
+# Bodies live in `article_contents` and are left out of every list.
+ARTICLE_PROJECTION = {
+    "_id": 0,
+    "id": 1,
+    "title": 1,
+    "excerpt": 1,
+    "author": 1,
+    "publisher": 1,
+    "source_url": 1,
+    "image_url": 1,
+    "published_at": 1,
+    "topics": 1,
+    "view_count": 1,
+    "like_count": 1,
+    "comment_count": 1,
+    "created_at": 1,
+}
+
+# Totals per filter, cleared by every article write in this process. The TTL
+# bounds how long writes made by other workers can go unnoticed.
+_count_cache = TTLCache(
+    maxsize=settings.ARTICLE_COUNT_CACHE_SIZE,
+    ttl=settings.ARTICLE_COUNT_CACHE_TTL_SECONDS,
+)
+
+
+# Single-article reads: every field except a body not yet migrated out and
+# the searchable copy of the body's start.
+WITHOUT_CONTENT = {"content": 0, "search_text": 0}
+
+
+def _decompress(doc: dict, max_chars: Optional[int] = None) -> str:
+    if max_chars is None:
+        return zlib.decompress(doc["body"]).decode()
+    # A prefix only needs the start of the stream inflated. UTF-8 takes at
+    # most 4 bytes per character; a character cut at the end is dropped.
+    raw = zlib.decompressobj().decompress(doc["body"], max_chars * 4)
+    return raw.decode(errors="ignore")[:max_chars]
+
+
+def content_document(article_id: str, content: str) -> dict:
+    body = zlib.compress(content.encode(), settings.CONTENT_COMPRESSION_LEVEL)
+    return {
+        "article_id": article_id,
+        "encoding": "zlib",
+        "body": Binary(body),
+        "length": len(content),
+    }
 
 
-async def get_article_by_id(article_id: str, increment_view: bool = False):
-    if increment_view:
-        await db.articles.update_one({"id": article_id}, {"$inc": {"view_count": 1}})
-    return await db.articles.find_one({"id": article_id})
+def search_text(content: Optional[str]) -> str:
+    """
+    The start of a body, kept on the article so the text index covers it
+    while the body itself lives in `article_contents`.
+    """
+    return (content or "")[: settings.ARTICLE_SEARCH_TEXT_CHARS]
 
 
-async def get_articles(
-    skip: int = 0,
-    limit: int = 20,
+async def save_article_content(article_id: str, content: str):
+    await db.article_contents.replace_one(
+        {"article_id": article_id},
+        content_document(article_id, content),
+        upsert=True,
+    )
+
+
+async def get_article_content(article_id: str) -> str:
+    """
+    The article's body, or "" when it has none.
+    """
+    doc = await db.article_contents.find_one({"article_id": article_id})
+    if doc:
+        return _decompress(doc)
+    # Not migrated yet: the body is still inline.
+    legacy = await db.articles.find_one({"id": article_id}, {"_id": 0, "content": 1})
+    return (legacy or {}).get("content") or ""
+
+
+async def get_article_contents(
+    article_ids: List[str], max_chars: Optional[int] = None
+) -> Dict[str, str]:
+    """
+    The bodies of `article_ids`, each cut to `max_chars` characters when
+    given. Articles without a body are left out.
+    """
+    cursor = db.article_contents.find({"article_id": {"$in": article_ids}})
+    contents = {
+        doc["article_id"]: _decompress(doc, max_chars)
+        for doc in await cursor.to_list(length=len(article_ids))
+    }
+    missing = [article_id for article_id in article_ids if article_id not in contents]
+    if missing:
+        cursor = db.articles.find(
+            {"id": {"$in": missing}, "content": {"$exists": True}},
+            {"_id": 0, "id": 1, "content": 1},
+        )
+        for doc in await cursor.to_list(length=len(missing)):
+            contents[doc["id"]] = doc["content"][:max_chars]
+    return contents
+
+
+async def get_article_by_id(article_id: str):
+    return await db.articles.find_one({"id": article_id}, WITHOUT_CONTENT)
+
+
+async def article_exists(article_id: str) -> bool:
+    return await db.articles.find_one({"id": article_id}, {"_id": 1}) is not None
+
+
+async def get_article_topics(article_id: str) -> Optional[List[str]]:
+    """
+    The article's topics, or None when the article does not exist.
+    """
+    article = await db.articles.find_one({"id": article_id}, {"_id": 0, "topics": 1})
+    return None if article is None else article.get("topics") or []
+
+
+def _text_search(search: str, language: Optional[str] = None) -> dict:
+    text = {"$search": search}
+    language = search_language(language) or detect_language(search)
+    if language:
+        text["$language"] = language
+    return {"$text": text}
+
+
+def _articles_query(
     topic: Optional[str] = None,
     search: Optional[str] = None,
-    sort_by: str = "published_at",
-):
+    language: Optional[str] = None,
+) -> dict:
     query = {}
 
     if topic:
         query["topics"] = topic
 
     if search:
-        query["$or"] = [
-            {"title": {"$regex": search, "$options": "i"}},
-            {"excerpt": {"$regex": search, "$options": "i"}},
-        ]
+        query.update(_text_search(search, language))
+
+    return query
+
+
+def _search_rank() -> dict:
+    """
+    Relevance blended with recency: the text score is boosted by up to
+    SEARCH_RECENCY_WEIGHT for fresh articles, the boost halving every
+    SEARCH_RECENCY_HALF_LIFE_DAYS.
+    """
+    half_life_ms = settings.SEARCH_RECENCY_HALF_LIFE_DAYS * 24 * 60 * 60 * 1000
+    age_ms = {"$max": [0, {"$subtract": ["$$NOW", "$published_at"]}]}
+    decay = {"$pow": [0.5, {"$divide": [age_ms, half_life_ms]}]}
+    boost = {"$add": [1, {"$multiply": [settings.SEARCH_RECENCY_WEIGHT, decay]}]}
+    return {"$multiply": [{"$meta": "textScore"}, boost]}
+
+
+async def search_articles(
+    search: str,
+    skip: int = 0,
+    limit: int = 20,
+    topic: Optional[str] = None,
+    language: Optional[str] = None,
+):
+    """
+    Rank articles matching `search` through the weighted text index.
+
+    The text index stems with the language stored on each article, so the
+    query is stemmed with the requested language or the one detected from
+    the search terms.
+    """
+    if not has_search_terms(search):
+        return []
+    pipeline = [
+        {"$match": _articles_query(topic=topic, search=search, language=language)},
+        {"$addFields": {"search_score": _search_rank()}},
+        {"$sort": {"search_score": -1, "id": -1}},
+        {"$skip": skip},
+        {"$limit": limit},
+        {"$project": WITHOUT_CONTENT},
+    ]
+    cursor = db.articles.aggregate(pipeline)
+    return await cursor.to_list(length=limit)
+
+
+async def get_articles(
+    skip: int = 0,
+    limit: int = 20,
+    topic: Optional[str] = None,
+    search: Optional[str] = None,
+    sort_by: str = "published_at",
+    cursor: Optional[str] = None,
+    language: Optional[str] = None,
+):
+    # Search results are ordered by relevance, which has no stable keyset,
+    # so they page by skip and ignore the cursor.
+    if search:
+        return await search_articles(
+            search, skip=skip, limit=limit, topic=topic, language=language
+        )
+
+    query = _articles_query(topic=topic)
 
     sort_order = -1 if sort_by in ["published_at", "view_count", "like_count"] else 1
 
-    cursor = db.articles.find(query).sort(sort_by, sort_order).skip(skip).limit(limit)
-    articles = await cursor.to_list(length=limit)
+    if cursor:
+        query = apply_keyset(query, cursor, sort_by, sort_order)
+        skip = 0
+
+    db_cursor = (
+        db.articles.find(query, ARTICLE_PROJECTION)
+        .sort(keyset_sort(sort_by, sort_order))
+        .skip(skip)
+        .limit(limit)
+    )
+    articles = await db_cursor.to_list(length=limit)
     return articles
 
 
-async def get_articles_count(topic: Optional[str] = None, search: Optional[str] = None):
-    query = {}
+async def _count_articles(query: dict, mode: CountMode) -> Optional[int]:
+    """
+    Count articles matching `query` according to `mode`:
 
-    if topic:
-        query["topics"] = topic
+    - exact: always run count_documents (and refresh the cache)
+    - approx: collection metadata for unfiltered lists, otherwise the cached
+      total for this filter, counting only on a miss
+    - none: skip counting and return None
+    """
+    if mode == "none":
+        return None
 
-    if search:
-        query["$or"] = [
-            {"title": {"$regex": search, "$options": "i"}},
-            {"excerpt": {"$regex": search, "$options": "i"}},
-        ]
+    if mode == "approx" and not query:
+        return await db.articles.estimated_document_count()
+
+    key = json.dumps(query, sort_keys=True, default=str)
+    if mode == "approx":
+        cached = _count_cache.get(key)
+        if cached is not None:
+            return cached
+
+    total = await db.articles.count_documents(query)
+    _count_cache.set(key, total)
+    return total
 
-    return await db.articles.count_documents(query)
+
+def count_cache_stats() -> dict:
+    return _count_cache.stats()
+
+
+def invalidate_counts():
+    _count_cache.clear()
+
+
+async def get_articles_count(
+    topic: Optional[str] = None,
+    search: Optional[str] = None,
+    language: Optional[str] = None,
+    mode: CountMode = "exact",
+):
+    if search and not has_search_terms(search):
+        return None if mode == "none" else 0
+    query = _articles_query(topic=topic, search=search, language=language)
+    return await _count_articles(query, mode)
+
+
+async def get_articles_count_by_topic_ids(
+    topic_ids: List[str], mode: CountMode = "exact"
+):
+    return await _count_articles({"topics": {"$in": topic_ids}}, mode)
 
 
 async def get_hero_article():
-    cursor = db.articles.find().sort("view_count", -1).limit(1)
+    cursor = db.articles.find({}, ARTICLE_PROJECTION).sort("view_count", -1).limit(1)
     articles = await cursor.to_list(length=1)
     return articles[0] if articles else None
 
 
-async def create_article(article: ArticleCreate):
+def article_fingerprint(article: ArticleCreate) -> int:
+    return simhash(article.title, f"{article.excerpt or ''} {article.content or ''}")
+
+
+async def find_near_duplicate(fingerprint: int) -> Optional[dict]:
+    """
+    An article whose SimHash is within MAX_DISTANCE bits of `fingerprint`,
+    looked up by band so only articles sharing one are compared. Every
+    article sharing a band is compared: bands are wide enough that there
+    are few, and leaving any out could miss the duplicate.
+    """
+    if not fingerprint:
+        return None
+    cursor = db.articles.find(
+        {"simhash_bands": {"$in": bands(fingerprint)}},
+        {"_id": 0, "id": 1, "title": 1, "source_url": 1, "simhash": 1},
+    )
+    for candidate in await cursor.to_list(length=None):
+        # Stored signed; compare as unsigned 64-bit.
+        if distance(candidate["simhash"] & _UINT64, fingerprint) <= MAX_DISTANCE:
+            return candidate
+    return None
+
+
+async def create_article(article: ArticleCreate, fingerprint: Optional[int] = None):
     article_doc = article.dict()
     if not article_doc.get("id"):
         article_doc["id"] = str(uuid.uuid4())
+    # The text index stems each article with the language stored here.
+    language = search_language(article_doc.pop("language", None)) or detect_language(
+        f"{article_doc['title']} {article_doc['excerpt']}"
+    )
+    if language:
+        article_doc["language"] = language
+    if fingerprint is None:
+        fingerprint = article_fingerprint(article)
+    if fingerprint:
+        article_doc["simhash"] = to_signed(fingerprint)
+        article_doc["simhash_bands"] = bands(fingerprint)
     article_doc["view_count"] = 0
     article_doc["like_count"] = 0
     article_doc["comment_count"] = 0
-    article_doc["created_at"] = datetime.utcnow()
+    article_doc["created_at"] = article_doc["updated_at"] = datetime.utcnow()
 
+    # The body first: if the article insert then fails, an orphan body is
+    # harmless, while an article without its body is not.
+    content = article_doc.pop("content")
+    await save_article_content(article_doc["id"], content)
+    article_doc["search_text"] = search_text(content)
     await db.articles.insert_one(article_doc)
-    return await get_article_by_id(article_doc["id"])
+    invalidate_counts()
+    return {**article_doc, "content": content}
 
 
 async def update_article(article_id: str, article: ArticleUpdate):
     update_data = {
         k: v for k, v in article.dict(exclude_unset=True).items() if v is not None
     }
-    if update_data:
-        await db.articles.update_one({"id": article_id}, {"$set": update_data})
-    return await get_article_by_id(article_id)
+    content = update_data.pop("content", None)
+    if content is not None:
+        # Checked first, or a missing article would be left an orphan body.
+        if not await article_exists(article_id):
+            return None
+        await save_article_content(article_id, content)
+
+    if update_data or content is not None:
+        update = {"$set": {**update_data, "updated_at": datetime.utcnow()}}
+        if content is not None:
+            update["$set"]["search_text"] = search_text(content)
+            # Drop a body not migrated yet, now superseded.
+            update["$unset"] = {"content": ""}
+        updated = await db.articles.find_one_and_update(
+            {"id": article_id},
+            update,
+            projection=WITHOUT_CONTENT,
+            return_document=ReturnDocument.AFTER,
+        )
+        invalidate_counts()
+    else:
+        updated = await get_article_by_id(article_id)
+
+    if updated is not None and content is not None:
+        updated["content"] = content
+    return updated
 
 
 async def delete_article(article_id: str):
     result = await db.articles.delete_one({"id": article_id})
+    await db.article_contents.delete_one({"article_id": article_id})
+    invalidate_counts()
     return result.deleted_count > 0
 
 
@@ -97,24 +405,15 @@ async def increment_comment_count(article_id: str, increment: int = 1):
     )
 
 
-async def get_articles_by_topic_ids(
-    topic_ids: List[str], skip: int = 0, limit: int = 20
-):
-    query = {"topics": {"$in": topic_ids}}
-    cursor = db.articles.find(query).sort("published_at", -1).skip(skip).limit(limit)
-    articles = await cursor.to_list(length=limit)
-    return articles
-
-
 async def get_article_by_url(source_url: str):
-    return await db.articles.find_one({"source_url": source_url})
+    return await db.articles.find_one({"source_url": source_url}, WITHOUT_CONTENT)
 
 
 async def get_articles_by_urls(urls: List[str]):
-    cursor = db.articles.find({"source_url": {"$in": urls}})
+    cursor = db.articles.find({"source_url": {"$in": urls}}, ARTICLE_PROJECTION)
     return await cursor.to_list(length=len(urls))
 
 
 async def get_articles_by_ids(article_ids: List[str]):
-    cursor = db.articles.find({"id": {"$in": article_ids}})
+    cursor = db.articles.find({"id": {"$in": article_ids}}, ARTICLE_PROJECTION)
     return await cursor.to_list(length=len(article_ids))
@@ -1,111 +1,262 @@
 import uuid
-from datetime import datetime
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
 
+from pymongo import ReturnDocument
+
+from app.core.config import settings
 from app.crud import user as user_crud
 from app.db.database import db
 from app.schemas.comment import CommentCreate, CommentUpdate
+from app.utils.cache import TTLCache
+from app.utils.events import publish
+from app.utils.pagination import apply_keyset, decode_cursor, keyset_sort
+
+# (collection, id) -> title of the article or magazine a comment was left
+# on, for listing a user's comments. A rename shows up once the entry expires.
+_title_cache = TTLCache(
+    maxsize=settings.COMMENT_TITLE_CACHE_SIZE,
+    ttl=settings.COMMENT_TITLE_CACHE_TTL_SECONDS,
+)
+_UNCACHED = object()
+
+# Threads: every comment stores the materialized path of its ancestors, one
+# fixed-width, time-ordered segment per level. Sorted by path, a thread or
+# any subtree is one contiguous range of the (article_id, path) index, each
+# comment followed by its replies in the order they were written.
+PATH_SEPARATOR = "/"
+# Sorts right after the separator: `path + SUBTREE_END` is past every
+# descendant of `path`, and before the next comment at its level.
+SUBTREE_END = chr(ord(PATH_SEPARATOR) + 1)
+# Tombstones keep their replies' place in a thread but no longer count as
+# comments.
+NOT_DELETED = {"deleted": {"$ne": True}}
+
+
+async def _get_titles(collection: str, field: str, ids: List[str]) -> Dict[str, str]:
+    """
+    The `field` of each distinct document of `collection` in `ids`, read in
+    one projected query for those not cached. Deleted documents are left
+    out, and cached as such.
+    """
+    titles = {}
+    missing = []
+    for doc_id in dict.fromkeys(ids):
+        title = _title_cache.get((collection, doc_id), _UNCACHED)
+        if title is _UNCACHED:
+            missing.append(doc_id)
+        elif title is not None:
+            titles[doc_id] = title
+
+    if missing:
+        cursor = getattr(db, collection).find(
+            {"id": {"$in": missing}}, {"_id": 0, "id": 1, field: 1}
+        )
+        for doc in await cursor.to_list(length=len(missing)):
+            titles[doc["id"]] = doc.get(field)
+        for doc_id in missing:
+            _title_cache.set((collection, doc_id), titles.get(doc_id))
+    return titles
+
+
+def path_segment(created_at: datetime, comment_id: str) -> str:
+    """
+    The path segment of a comment: its creation time in microseconds, so
+    siblings sort oldest first, and a piece of its id to break ties.
+    """
+    micros = int(created_at.replace(tzinfo=timezone.utc).timestamp() * 1_000_000)
+    return f"{micros:014x}{comment_id[:8]}"
+
+
+def context_of(comment: dict) -> dict:
+    """
+    The article or magazine a comment belongs to, as a query fragment.
+    """
+    if comment.get("article_id"):
+        return {"article_id": comment["article_id"]}
+    return {"magazine_id": comment.get("magazine_id")}
+
+
+def _root_fields(comment_id: str, created_at: datetime) -> dict:
+    return {
+        "parent_id": None,
+        "thread_id": comment_id,
+        "path": path_segment(created_at, comment_id),
+        "depth": 0,
+        "reply_number": 0,
+        "reply_count": 0,
+        "last_reply_number": 0,
+    }
+
+
+def _unknown_author(user_id: str) -> dict:
+    return {"id": user_id, "username": "Unknown User", "profile_pic": None}
+
+
+async def attach_authors(comments: List[dict]) -> List[dict]:
+    """
+    Set each comment's `user` to its author's profile, all authors read in
+    one query.
+    """
+    profiles = await user_crud.get_user_profiles(
+        [comment["user_id"] for comment in comments]
+    )
+    for comment in comments:
+        # A deleted comment kept for its replies no longer shows who wrote it.
+        profile = None if comment.get("deleted") else profiles.get(comment["user_id"])
+        # A copy: the profile object is shared with the cache.
+        comment["user"] = (
+            dict(profile) if profile else _unknown_author(comment["user_id"])
+        )
+    return comments
 
 
 async def get_comment_by_id(comment_id: str):
     return await db.comments.find_one({"id": comment_id})
 
 
-async def get_comments_by_article(article_id: str, skip: int = 0, limit: int = 100):
-    cursor = (
-        db.comments.find({"article_id": article_id})
-        .sort("created_at", -1)
-        .skip(skip)
-        .limit(limit)
-    )
-    comments = await cursor.to_list(length=limit)
+async def get_reply_parent(parent_id: str, context: dict) -> Optional[dict]:
+    """
+    The comment being replied to, if it is on the same article or magazine.
+    """
+    parent = await get_comment_by_id(parent_id)
+    if parent and context_of(parent) == context:
+        return parent
+    return None
 
-    for comment in comments:
-        user = await user_crud.get_user_by_id(comment["user_id"])
-        if user:
-            comment["user"] = {
-                "id": user.get("id"),
-                "username": user.get("username"),
-                "profile_pic": user.get("profile_pic"),
-            }
-        else:
-            comment["user"] = {
-                "id": comment["user_id"],
-                "username": "Unknown User",
-                "profile_pic": None,
-            }
 
-    return comments
+async def get_comments_by_article(
+    article_id: str, skip: int = 0, limit: int = 100, cursor: Optional[str] = None
+):
+    query = {"article_id": article_id}
+    if cursor:
+        query = apply_keyset(query, cursor, "created_at")
+        skip = 0
+
+    db_cursor = (
+        db.comments.find(query).sort(keyset_sort("created_at")).skip(skip).limit(limit)
+    )
+    comments = await db_cursor.to_list(length=limit)
+
+    return await attach_authors(comments)
 
 
 async def get_comments_count(article_id: str):
-    return await db.comments.count_documents({"article_id": article_id})
+    return await db.comments.count_documents({"article_id": article_id, **NOT_DELETED})
 
 
-async def get_comments_by_magazine(magazine_id: str, skip: int = 0, limit: int = 100):
-    cursor = (
-        db.comments.find({"magazine_id": magazine_id})
-        .sort("created_at", -1)
-        .skip(skip)
-        .limit(limit)
-    )
-    comments = await cursor.to_list(length=limit)
+async def get_comments_by_magazine(
+    magazine_id: str, skip: int = 0, limit: int = 100, cursor: Optional[str] = None
+):
+    query = {"magazine_id": magazine_id}
+    if cursor:
+        query = apply_keyset(query, cursor, "created_at")
+        skip = 0
 
-    for comment in comments:
-        user = await user_crud.get_user_by_id(comment["user_id"])
-        if user:
-            comment["user"] = {
-                "id": user.get("id"),
-                "username": user.get("username"),
-                "profile_pic": user.get("profile_pic"),
-            }
-        else:
-            comment["user"] = {
-                "id": comment["user_id"],
-                "username": "Unknown User",
-                "profile_pic": None,
-            }
+    db_cursor = (
+        db.comments.find(query).sort(keyset_sort("created_at")).skip(skip).limit(limit)
+    )
+    comments = await db_cursor.to_list(length=limit)
 
-    return comments
+    return await attach_authors(comments)
 
 
 async def get_magazine_comments_count(magazine_id: str):
-    return await db.comments.count_documents({"magazine_id": magazine_id})
+    return await db.comments.count_documents(
+        {"magazine_id": magazine_id, **NOT_DELETED}
+    )
 
 
-async def get_comments_by_user(user_id: str, skip: int = 0, limit: int = 100):
-    cursor = (
-        db.comments.find({"user_id": user_id})
-        .sort("created_at", -1)
-        .skip(skip)
-        .limit(limit)
+async def get_threads(
+    context: dict, limit: int = 20, replies: int = 3, cursor: Optional[str] = None
+) -> List[dict]:
+    """
+    A page of the top-level comments of an article or magazine, oldest
+    first, each with the first `replies` replies of its thread in `replies`.
+
+    One range scan of the path index reads the page: replies numbered past
+    `replies` are skipped in the index, so a page costs at most `limit`
+    threads of `replies + 1` comments however long the threads are. The
+    rest of a thread is paged with `get_replies`.
+    """
+    query = {**context, "path": {"$gt": ""}, "reply_number": {"$lte": replies}}
+    if cursor:
+        last_path, _ = decode_cursor(cursor, "path")
+        query["path"] = {"$gt": last_path + SUBTREE_END}
+
+    batch = limit * (replies + 1)
+    comments = (
+        await db.comments.find(query).sort("path", 1).limit(batch).to_list(length=batch)
     )
-    comments = await cursor.to_list(length=limit)
+    await attach_authors(comments)
 
-    user = await user_crud.get_user_by_id(user_id)
-    user_info = (
-        {
-            "id": user.get("id"),
-            "username": user.get("username"),
-            "profile_pic": user.get("profile_pic"),
-        }
-        if user
-        else {"id": user_id, "username": "Unknown User", "profile_pic": None}
+    threads: Dict[str, dict] = {}
+    for comment in comments:
+        if comment["depth"] == 0:
+            if len(threads) == limit:
+                break
+            threads[comment["id"]] = {**comment, "replies": []}
+        elif comment["thread_id"] in threads:
+            threads[comment["thread_id"]]["replies"].append(comment)
+        # else: the top-level comment was deleted with its subtree, and
+        # this reply was written meanwhile.
+    return list(threads.values())
+
+
+async def get_replies(
+    comment: dict, limit: int = 100, cursor: Optional[str] = None
+) -> List[dict]:
+    """
+    The replies under `comment`, at any depth, each right after its parent.
+    """
+    after = comment["path"]
+    if cursor:
+        after, _ = decode_cursor(cursor, "path")
+    query = {
+        **context_of(comment),
+        "path": {"$gt": after, "$lt": comment["path"] + SUBTREE_END},
+    }
+    db_cursor = db.comments.find(query).sort("path", 1).limit(limit)
+    return await attach_authors(await db_cursor.to_list(length=limit))
+
+
+async def get_comments_by_user(
+    user_id: str, skip: int = 0, limit: int = 100, cursor: Optional[str] = None
+):
+    query = {"user_id": user_id, **NOT_DELETED}
+    if cursor:
+        query = apply_keyset(query, cursor, "created_at")
+        skip = 0
+
+    db_cursor = (
+        db.comments.find(query).sort(keyset_sort("created_at")).skip(skip).limit(limit)
+    )
+    comments = await db_cursor.to_list(length=limit)
+
+    profiles = await user_crud.get_user_profiles([user_id])
+    user_info = dict(profiles.get(user_id) or _unknown_author(user_id))
+
+    article_titles = await _get_titles(
+        "articles",
+        "title",
+        [comment["article_id"] for comment in comments if comment.get("article_id")],
+    )
+    magazine_titles = await _get_titles(
+        "magazines",
+        "name",
+        [comment["magazine_id"] for comment in comments if comment.get("magazine_id")],
     )
 
     for comment in comments:
         # Add context info (Article or Magazine)
         if comment.get("article_id"):
-            article = await db.articles.find_one({"id": comment["article_id"]})
-            if article:
-                comment["article_title"] = article.get("title")
-            else:
-                comment["article_title"] = "Deleted Article"
+            comment["article_title"] = (
+                article_titles.get(comment["article_id"]) or "Deleted Article"
+            )
         elif comment.get("magazine_id"):
-            magazine = await db.magazines.find_one({"id": comment["magazine_id"]})
-            if magazine:
-                comment["magazine_title"] = magazine.get("name")
-            else:
-                comment["magazine_title"] = "Deleted Magazine"
+            comment["magazine_title"] = (
+                magazine_titles.get(comment["magazine_id"]) or "Deleted Magazine"
+            )
         else:
             # Fallback when neither article_id nor magazine_id is present
             comment["article_title"] = None
@@ -116,72 +267,129 @@ async def get_comments_by_user(user_id: str, skip: int = 0, limit: int = 100):
     return comments
 
 
-async def create_comment(article_id: str, user_id: str, comment: CommentCreate):
-    comment_doc = comment.dict()
+async def increment_reply_count(thread_id: str, amount: int):
+    """
+    Move the reply count kept on a thread's top-level comment.
+    """
+    await db.comments.update_one({"id": thread_id}, {"$inc": {"reply_count": amount}})
+
+
+async def next_reply_number(thread_id: str) -> Optional[int]:
+    """
+    Count a new reply on a thread's top-level comment and return its number
+    within the thread, or None when that comment is gone. Numbers come from
+    `last_reply_number`, which only grows: `reply_count` drops as replies
+    are deleted, and would hand out numbers already taken.
+    """
+    thread = await db.comments.find_one_and_update(
+        {"id": thread_id},
+        {"$inc": {"reply_count": 1, "last_reply_number": 1}},
+        projection={"_id": 0, "last_reply_number": 1},
+        return_document=ReturnDocument.AFTER,
+    )
+    return thread["last_reply_number"] if thread else None
+
+
+async def _thread_fields(comment_id: str, created_at: datetime, parent: dict):
+    if "path" not in parent:
+        # Written before comments were threaded: make it a thread first.
+        root = _root_fields(parent["id"], parent["created_at"])
+        await db.comments.update_one({"id": parent["id"]}, {"$set": root})
+        parent = {**parent, **root}
+
+    # Replies are numbered within their thread as they arrive. A reply comes
+    # after its parent, so the first N replies of a thread form a tree.
+    reply_number = await next_reply_number(parent["thread_id"])
+    if reply_number is None:
+        # The top-level comment was deleted while this reply was written.
+        reply_number = parent["reply_number"] + 1
+    return {
+        "parent_id": parent["id"],
+        "thread_id": parent["thread_id"],
+        "path": parent["path"] + PATH_SEPARATOR + path_segment(created_at, comment_id),
+        "depth": parent["depth"] + 1,
+        "reply_number": reply_number,
+    }
+
+
+async def _insert_comment(
+    context: dict, user_id: str, comment: CommentCreate, parent: Optional[dict]
+):
+    comment_doc = comment.dict(exclude={"parent_id"})
     comment_doc["id"] = str(uuid.uuid4())
-    comment_doc["article_id"] = article_id
+    comment_doc.update(context)
     comment_doc["user_id"] = user_id
     comment_doc["created_at"] = datetime.utcnow()
     comment_doc["updated_at"] = None
-
-    await db.comments.insert_one(comment_doc)
-    created_comment = await get_comment_by_id(comment_doc["id"])
-
-    user = await user_crud.get_user_by_id(user_id)
-    if user:
-        created_comment["user"] = {
-            "id": user.get("id"),
-            "username": user.get("username"),
-            "profile_pic": user.get("profile_pic"),
-        }
+    if parent is None:
+        comment_doc.update(_root_fields(comment_doc["id"], comment_doc["created_at"]))
     else:
-        created_comment["user"] = {
-            "id": user_id,
-            "username": "Unknown User",
-            "profile_pic": None,
-        }
+        comment_doc.update(
+            await _thread_fields(comment_doc["id"], comment_doc["created_at"], parent)
+        )
 
-    return created_comment
+    await db.comments.insert_one(comment_doc)
+    comment_doc = (await attach_authors([comment_doc]))[0]
+    # Live comment streams subscribe to "article:<id>" or "magazine:<id>".
+    [(field, value)] = context.items()
+    await publish(f"{field.removesuffix('_id')}:{value}", "comment", comment_doc)
+    return comment_doc
+
+
+async def create_comment(
+    article_id: str,
+    user_id: str,
+    comment: CommentCreate,
+    parent: Optional[dict] = None,
+):
+    return await _insert_comment({"article_id": article_id}, user_id, comment, parent)
 
 
 async def create_magazine_comment(
-    magazine_id: str, user_id: str, comment: CommentCreate
+    magazine_id: str,
+    user_id: str,
+    comment: CommentCreate,
+    parent: Optional[dict] = None,
 ):
-    comment_doc = comment.dict()
-    comment_doc["id"] = str(uuid.uuid4())
-    comment_doc["magazine_id"] = magazine_id
-    comment_doc["user_id"] = user_id
-    comment_doc["created_at"] = datetime.utcnow()
-    comment_doc["updated_at"] = None
-
-    await db.comments.insert_one(comment_doc)
-    created_comment = await get_comment_by_id(comment_doc["id"])
-
-    user = await user_crud.get_user_by_id(user_id)
-    if user:
-        created_comment["user"] = {
-            "id": user.get("id"),
-            "username": user.get("username"),
-            "profile_pic": user.get("profile_pic"),
-        }
-    else:
-        created_comment["user"] = {
-            "id": user_id,
-            "username": "Unknown User",
-            "profile_pic": None,
-        }
-
-    return created_comment
+    return await _insert_comment({"magazine_id": magazine_id}, user_id, comment, parent)
 
 
 async def update_comment(comment_id: str, comment: CommentUpdate):
     update_data = comment.dict(exclude_unset=True)
     update_data["updated_at"] = datetime.utcnow()
 
-    await db.comments.update_one({"id": comment_id}, {"$set": update_data})
-    return await get_comment_by_id(comment_id)
+    return await db.comments.find_one_and_update(
+        {"id": comment_id},
+        {"$set": update_data},
+        return_document=ReturnDocument.AFTER,
+    )
 
 
 async def delete_comment(comment_id: str):
     result = await db.comments.delete_one({"id": comment_id})
     return result.deleted_count > 0
+
+
+async def has_replies(comment: dict) -> bool:
+    reply = await db.comments.find_one(
+        {
+            **context_of(comment),
+            "path": {
+                "$gt": comment["path"],
+                "$lt": comment["path"] + SUBTREE_END,
+            },
+        },
+        {"_id": 1},
+    )
+    return reply is not None
+
+
+async def tombstone_comment(comment_id: str):
+    """
+    Blank out a comment that has replies instead of deleting it, so the
+    replies, which may be other users', keep their place in the thread.
+    """
+    await db.comments.update_one(
+        {"id": comment_id},
+        {"$set": {"content": "", "deleted": True, "updated_at": datetime.utcnow()}},
+    )
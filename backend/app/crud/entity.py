@@ -0,0 +1,261 @@
+import re
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+from app.core.config import settings
+from app.db.database import db
+from app.models.news import NewsPost
+from app.utils.text import normalize
+
+ENTITY_TYPES = {
+    "persons": "person",
+    "organizations": "organization",
+    "locations": "location",
+}
+SENTIMENTS = ("positive", "negative", "neutral")
+# Stored posts keep a snippet, not the whole text.
+SNIPPET_CHARS = 300
+
+_SPACE_RE = re.compile(r"\s+")
+
+
+def entity_key(name: str) -> str:
+    """
+    The index key of an entity name: case, accents and spacing ignored.
+    """
+    return _SPACE_RE.sub(" ", normalize(name)).strip()
+
+
+def _published_at(post: NewsPost) -> datetime:
+    try:
+        published = datetime.fromisoformat(post.published)
+    except ValueError:
+        return datetime.utcnow()
+    if published.tzinfo:
+        published = published.astimezone(timezone.utc).replace(tzinfo=None)
+    return published
+
+
+def _post_document(post: NewsPost, published_at: datetime, expires_at: datetime):
+    return {
+        "uuid": post.uuid,
+        "url": post.url,
+        "title": post.title,
+        "text": post.text[:SNIPPET_CHARS],
+        "published": post.published,
+        "language": post.language,
+        "sentiment": post.sentiment,
+        "site": post.thread.site if post.thread else "",
+        "main_image": post.thread.main_image if post.thread else None,
+        "published_at": published_at,
+        "expires_at": expires_at,
+    }
+
+
+def _from_post_document(doc: dict) -> NewsPost:
+    return NewsPost(
+        uuid=doc["uuid"],
+        url=doc["url"],
+        title=doc["title"],
+        text=doc["text"],
+        published=doc["published"],
+        language=doc["language"],
+        sentiment=doc["sentiment"],
+        thread={"site": doc["site"], "main_image": doc["main_image"]},
+    )
+
+
+async def ingest_posts(posts: List[NewsPost]) -> int:
+    """
+    Store fetched posts and index their named entities. Posts seen before
+    are not counted again, so the same post fetched by many users moves the
+    sentiment counts once. Returns the number of new posts.
+
+    Entities are counted in one document per entity and publication day;
+    posts and buckets expire NEWS_ENTITY_TTL_DAYS after publication.
+    """
+    posts = [post for post in posts if post.uuid]
+    if not posts:
+        return 0
+
+    ttl = timedelta(days=settings.NEWS_ENTITY_TTL_DAYS)
+    published = [_published_at(post) for post in posts]
+    operations = [
+        UpdateOne(
+            {"uuid": post.uuid},
+            {"$setOnInsert": _post_document(post, at, at + ttl)},
+            upsert=True,
+        )
+        for post, at in zip(posts, published)
+    ]
+    try:
+        result = await db.news_posts.bulk_write(operations, ordered=False)
+        new = sorted(result.upserted_ids)
+    except BulkWriteError as e:
+        # Two requests upserting the same new post: the one that lost the
+        # race on the unique index leaves the indexing to the winner.
+        if any(error["code"] != 11000 for error in e.details["writeErrors"]):
+            raise
+        new = sorted(upsert["index"] for upsert in e.details.get("upserted", []))
+
+    buckets: Dict[tuple, dict] = {}
+    for index in new:
+        post = posts[index]
+        if not post.entities:
+            continue
+        day = published[index].replace(hour=0, minute=0, second=0, microsecond=0)
+        for field, entity_type in ENTITY_TYPES.items():
+            for entity in getattr(post.entities, field):
+                key = entity_key(entity.name)
+                if not key:
+                    continue
+                bucket = buckets.setdefault(
+                    (key, entity_type, day),
+                    {"display": entity.name, "posts": [], "sentiment": {}},
+                )
+                if post.uuid in bucket["posts"]:
+                    continue
+                bucket["posts"].append(post.uuid)
+                if entity.sentiment in SENTIMENTS:
+                    counts = bucket["sentiment"]
+                    counts[entity.sentiment] = counts.get(entity.sentiment, 0) + 1
+
+    if buckets:
+        await db.news_entities.bulk_write(
+            [
+                UpdateOne(
+                    {"name": key, "type": entity_type, "day": day},
+                    {
+                        "$setOnInsert": {
+                            "display": bucket["display"],
+                            "expires_at": day + ttl,
+                        },
+                        "$push": {"posts": {"$each": bucket["posts"]}},
+                        "$inc": {
+                            "mentions": len(bucket["posts"]),
+                            **{
+                                f"sentiment.{sentiment}": count
+                                for sentiment, count in bucket["sentiment"].items()
+                            },
+                        },
+                    },
+                    upsert=True,
+                )
+                for (key, entity_type, day), bucket in buckets.items()
+            ],
+            ordered=False,
+        )
+    return len(new)
+
+
+def _summary(name: str, entity_type: str, display: str) -> dict:
+    return {
+        "name": display,
+        "key": name,
+        "type": entity_type,
+        "mentions": 0,
+        "sentiment": {sentiment: 0 for sentiment in SENTIMENTS},
+    }
+
+
+async def get_entity(
+    name: str, entity_type: Optional[str] = None, limit: int = 10
+) -> Optional[dict]:
+    """
+    An entity's mention and sentiment totals with its `limit` most recent
+    posts, or None when no stored post mentions it. A name shared by
+    entities of several types is merged unless `entity_type` is given.
+    """
+    key = entity_key(name)
+    query = {"name": key}
+    if entity_type:
+        query["type"] = entity_type
+    # A popular entity's buckets hold many posts: only the newest `limit` of
+    # each can make the page.
+    projection = {
+        "_id": 0,
+        "type": 1,
+        "display": 1,
+        "mentions": 1,
+        "sentiment": 1,
+        "posts": {"$slice": -limit},
+    }
+    cursor = db.news_entities.find(query, projection).sort("day", -1)
+    days = await cursor.to_list(length=None)
+    if not days:
+        return None
+
+    summary = _summary(key, days[0]["type"], days[0]["display"])
+    post_ids: Dict[str, None] = {}
+    for bucket in days:
+        summary["mentions"] += bucket.get("mentions", 0)
+        for sentiment, count in bucket.get("sentiment", {}).items():
+            summary["sentiment"][sentiment] += count
+        # Newest first within a day, too.
+        post_ids.update(dict.fromkeys(reversed(bucket["posts"])))
+
+    post_ids = list(post_ids)[:limit]
+    docs = await db.news_posts.find({"uuid": {"$in": post_ids}}, {"_id": 0}).to_list(
+        length=len(post_ids)
+    )
+    by_id = {doc["uuid"]: doc for doc in docs}
+    summary["posts"] = [
+        _from_post_document(by_id[post_id]) for post_id in post_ids if post_id in by_id
+    ]
+    return summary
+
+
+async def _entity_totals(match: dict, limit: int) -> List[dict]:
+    pipeline = [
+        {"$match": match},
+        {
+            "$group": {
+                "_id": {"name": "$name", "type": "$type"},
+                "display": {"$first": "$display"},
+                "mentions": {"$sum": "$mentions"},
+                **{
+                    sentiment: {"$sum": f"$sentiment.{sentiment}"}
+                    for sentiment in SENTIMENTS
+                },
+            }
+        },
+        {"$sort": {"mentions": -1, "_id.name": 1}},
+        {"$limit": limit},
+    ]
+    rows = await db.news_entities.aggregate(pipeline).to_list(length=limit)
+    results = []
+    for row in rows:
+        summary = _summary(row["_id"]["name"], row["_id"]["type"], row["display"])
+        summary["mentions"] = row["mentions"]
+        summary["sentiment"] = {sentiment: row[sentiment] for sentiment in SENTIMENTS}
+        results.append(summary)
+    return results
+
+
+async def get_trending_entities(
+    days: int = 1, entity_type: Optional[str] = None, limit: int = 10
+) -> List[dict]:
+    """
+    The entities mentioned by the most stored posts published in the last
+    `days` days.
+    """
+    today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+    match = {"day": {"$gte": today - timedelta(days=days - 1)}}
+    if entity_type:
+        match["type"] = entity_type
+    return await _entity_totals(match, limit)
+
+
+async def search_entities(prefix: str, limit: int = 10) -> List[dict]:
+    """
+    Entities whose normalized name starts with `prefix`, most mentioned
+    first, for autocomplete. The anchored pattern is served by the name
+    index.
+    """
+    key = entity_key(prefix)
+    if not key:
+        return []
+    return await _entity_totals({"name": {"$regex": f"^{re.escape(key)}"}}, limit)
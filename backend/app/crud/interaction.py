@@ -1,8 +1,104 @@
+import sys
 import uuid
-from datetime import datetime
-from typing import Dict, List
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
 
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+
+from app.core.config import settings
+from app.crud.article import ARTICLE_PROJECTION
 from app.db.database import db
+from app.schemas.interaction import InteractionAction
+from app.utils.cache import TTLCache
+from app.utils.pagination import apply_keyset, keyset_sort
+
+
+class InteractionState:
+    """
+    The article ids a user has liked and saved. Only ids with the flag set
+    are kept, so memory grows with a user's activity, not with the catalog.
+    """
+
+    __slots__ = ("liked", "saved")
+
+    def __init__(self, liked=(), saved=()):
+        self.liked = set(liked)
+        self.saved = set(saved)
+
+    def flags(self, article_id: str) -> Dict[str, bool]:
+        return {
+            "is_liked": article_id in self.liked,
+            "is_saved": article_id in self.saved,
+        }
+
+    def size_bytes(self) -> int:
+        ids = self.liked | self.saved
+        return (
+            sys.getsizeof(self.liked)
+            + sys.getsizeof(self.saved)
+            + sum(sys.getsizeof(article_id) for article_id in ids)
+        )
+
+
+# Bounded LRU over users. The TTL caps how long a write made through another
+# worker process can stay invisible here; writes through this process are
+# applied to the cached state directly.
+_state_cache = TTLCache(
+    maxsize=settings.INTERACTION_CACHE_MAX_USERS,
+    ttl=settings.INTERACTION_CACHE_TTL_SECONDS,
+)
+
+
+async def get_interaction_state(user_id: str) -> InteractionState:
+    """
+    Return the user's liked/saved article ids, loading them on a cache miss
+    with a query covered by the (user_id, article_id, is_liked, is_saved)
+    index.
+    """
+    state = _state_cache.get(user_id)
+    if state is not None:
+        return state
+
+    cursor = db.user_interactions.find(
+        {"user_id": user_id},
+        {"_id": 0, "article_id": 1, "is_liked": 1, "is_saved": 1},
+    )
+    rows = await cursor.to_list(length=None)
+    state = InteractionState(
+        liked=(r["article_id"] for r in rows if r.get("is_liked")),
+        saved=(r["article_id"] for r in rows if r.get("is_saved")),
+    )
+    _state_cache.set(user_id, state)
+    return state
+
+
+def _update_cached_state(user_id: str, article_id: str, flag: str, value: bool):
+    state = _state_cache.peek(user_id)
+    if state is None:
+        return
+    ids = state.liked if flag == "is_liked" else state.saved
+    if value:
+        ids.add(article_id)
+    else:
+        ids.discard(article_id)
+
+
+def invalidate_interaction_state(user_id: Optional[str] = None):
+    if user_id is None:
+        _state_cache.clear()
+    else:
+        _state_cache.pop(user_id)
+
+
+def interaction_cache_stats() -> dict:
+    states = _state_cache.values()
+    memory = sum(state.size_bytes() for state in states)
+    return {
+        **_state_cache.stats(),
+        "memory_bytes": memory,
+        "avg_bytes_per_user": round(memory / len(states)) if states else 0,
+    }
 
 
 async def get_interaction(user_id: str, article_id: str):
@@ -11,119 +107,423 @@ async def get_interaction(user_id: str, article_id: str):
     )
 
 
-async def toggle_like(user_id: str, article_id: str):
-    interaction = await get_interaction(user_id, article_id)
+def _flag_pipeline(
+    flag: str, timestamp_field: str, value: Optional[bool], new_id: str, now
+) -> list:
+    """
+    Update pipeline that sets (or, with `value=None`, flips) one interaction
+    flag. Missing fields are defaulted so the same pipeline also builds the
+    document on upsert; the flag's timestamp is kept when it was already set.
+    """
+    return [
+        {
+            "$set": {
+                "id": {"$ifNull": ["$id", {"$literal": new_id}]},
+                "is_liked": {"$eq": ["$is_liked", True]},
+                "is_saved": {"$eq": ["$is_saved", True]},
+                "liked_at": {"$ifNull": ["$liked_at", None]},
+                "saved_at": {"$ifNull": ["$saved_at", None]},
+                "_previous": {"$eq": [f"${flag}", True]},
+            }
+        },
+        {
+            "$set": {
+                flag: {"$not": ["$_previous"]} if value is None else {"$literal": value}
+            }
+        },
+        {
+            "$set": {
+                timestamp_field: {
+                    "$cond": [
+                        f"${flag}",
+                        {
+                            "$cond": [
+                                "$_previous",
+                                f"${timestamp_field}",
+                                {"$literal": now},
+                            ]
+                        },
+                        None,
+                    ]
+                }
+            }
+        },
+        {"$unset": "_previous"},
+    ]
 
-    if not interaction:
-        interaction_doc = {
-            "id": str(uuid.uuid4()),
-            "user_id": user_id,
-            "article_id": article_id,
-            "is_liked": True,
-            "is_saved": False,
-            "liked_at": datetime.utcnow(),
-            "saved_at": None,
-        }
-        await db.user_interactions.insert_one(interaction_doc)
-        return await get_interaction(user_id, article_id), 1
-    else:
-        new_is_liked = not interaction.get("is_liked", False)
-        update_data = {
-            "is_liked": new_is_liked,
-            "liked_at": datetime.utcnow() if new_is_liked else None,
-        }
-        await db.user_interactions.update_one(
-            {"user_id": user_id, "article_id": article_id}, {"$set": update_data}
-        )
-        increment = 1 if new_is_liked else -1
-        return await get_interaction(user_id, article_id), increment
 
+async def _write_flag(
+    user_id: str,
+    article_id: str,
+    flag: str,
+    timestamp_field: str,
+    value: Optional[bool] = None,
+):
+    """
+    Atomically set (or toggle, when `value` is None) `flag` on the user's
+    interaction with an article, creating the interaction if needed.
 
-async def toggle_save(user_id: str, article_id: str):
-    interaction = await get_interaction(user_id, article_id)
+    Runs as a single upsert keyed on the unique (user_id, article_id) index.
+    Returns the interaction as written and the flag's previous value.
+    """
+    new_id = str(uuid.uuid4())
+    now = datetime.utcnow()
+    query = {"user_id": user_id, "article_id": article_id}
+    pipeline = _flag_pipeline(flag, timestamp_field, value, new_id, now)
 
-    if not interaction:
-        interaction_doc = {
-            "id": str(uuid.uuid4()),
-            "user_id": user_id,
-            "article_id": article_id,
-            "is_liked": False,
-            "is_saved": True,
-            "liked_at": None,
-            "saved_at": datetime.utcnow(),
-        }
-        await db.user_interactions.insert_one(interaction_doc)
-        return await get_interaction(user_id, article_id)
-    else:
-        new_is_saved = not interaction.get("is_saved", False)
-        update_data = {
-            "is_saved": new_is_saved,
-            "saved_at": datetime.utcnow() if new_is_saved else None,
-        }
-        await db.user_interactions.update_one(
-            {"user_id": user_id, "article_id": article_id}, {"$set": update_data}
+    try:
+        before = await db.user_interactions.find_one_and_update(
+            query, pipeline, upsert=True, return_document=ReturnDocument.BEFORE
+        )
+    except DuplicateKeyError:
+        # A concurrent request inserted the interaction first; the retry
+        # now matches that document instead of inserting.
+        before = await db.user_interactions.find_one_and_update(
+            query, pipeline, upsert=True, return_document=ReturnDocument.BEFORE
         )
-        return await get_interaction(user_id, article_id)
+
+    interaction = {
+        "id": new_id,
+        "user_id": user_id,
+        "article_id": article_id,
+        "is_liked": False,
+        "is_saved": False,
+        "liked_at": None,
+        "saved_at": None,
+    }
+    if before:
+        interaction.update(before)
+    previous = interaction[flag] is True
+    current = (not previous) if value is None else value
+    interaction[flag] = current
+    _update_cached_state(user_id, article_id, flag, current)
+    if not current:
+        interaction[timestamp_field] = None
+    elif not previous:
+        interaction[timestamp_field] = now
+    return interaction, previous
 
 
-async def get_user_liked_articles(user_id: str, skip: int = 0, limit: int = 20):
-    cursor = (
-        db.user_interactions.find({"user_id": user_id, "is_liked": True})
-        .sort("liked_at", -1)
-        .skip(skip)
-        .limit(limit)
+async def toggle_like(user_id: str, article_id: str):
+    interaction, was_liked = await _write_flag(
+        user_id, article_id, "is_liked", "liked_at"
     )
+    return interaction, -1 if was_liked else 1
 
-    interactions = await cursor.to_list(length=limit)
-    article_ids = [interaction["article_id"] for interaction in interactions]
 
-    if not article_ids:
-        return []
+async def set_like(user_id: str, article_id: str, liked: bool):
+    """
+    Idempotent like/unlike. The returned increment is 0 when the interaction
+    was already in the requested state.
+    """
+    interaction, was_liked = await _write_flag(
+        user_id, article_id, "is_liked", "liked_at", liked
+    )
+    return interaction, int(liked) - int(was_liked)
 
-    articles_cursor = db.articles.find({"id": {"$in": article_ids}})
-    articles = await articles_cursor.to_list(length=len(article_ids))
 
-    return articles
+async def toggle_save(user_id: str, article_id: str):
+    interaction, was_saved = await _write_flag(
+        user_id, article_id, "is_saved", "saved_at"
+    )
+    return interaction, -1 if was_saved else 1
 
 
-async def get_user_saved_articles(user_id: str, skip: int = 0, limit: int = 20):
-    cursor = (
-        db.user_interactions.find({"user_id": user_id, "is_saved": True})
-        .sort("saved_at", -1)
-        .skip(skip)
-        .limit(limit)
+async def set_save(user_id: str, article_id: str, saved: bool):
+    """
+    Idempotent save/unsave. The returned increment is 0 when the interaction
+    was already in the requested state.
+    """
+    interaction, was_saved = await _write_flag(
+        user_id, article_id, "is_saved", "saved_at", saved
     )
+    return interaction, int(saved) - int(was_saved)
 
-    interactions = await cursor.to_list(length=limit)
-    article_ids = [interaction["article_id"] for interaction in interactions]
 
-    if not article_ids:
-        return []
+async def _get_user_interacted_articles(
+    user_id: str,
+    flag: str,
+    timestamp_field: str,
+    skip: int,
+    limit: int,
+    cursor: Optional[str],
+):
+    query = {"user_id": user_id, flag: True}
+    if cursor:
+        query = apply_keyset(query, cursor, timestamp_field)
+        skip = 0
 
-    articles_cursor = db.articles.find({"id": {"$in": article_ids}})
-    articles = await articles_cursor.to_list(length=len(article_ids))
+    # One round trip: page through the interactions in recency order and
+    # join each to its article. $lookup keeps the input order, and $unwind
+    # drops interactions whose article has since been deleted.
+    pipeline = [
+        {"$match": query},
+        {"$sort": dict(keyset_sort(timestamp_field))},
+        {"$skip": skip},
+        {"$limit": limit},
+        {
+            "$lookup": {
+                "from": "articles",
+                "localField": "article_id",
+                "foreignField": "id",
+                "pipeline": [{"$project": ARTICLE_PROJECTION}],
+                "as": "article",
+            }
+        },
+        {"$unwind": "$article"},
+        {
+            "$replaceRoot": {
+                "newRoot": {
+                    "$mergeObjects": [
+                        "$article",
+                        {
+                            timestamp_field: f"${timestamp_field}",
+                            # Exposed so the caller can build the next cursor.
+                            "interaction_id": "$id",
+                            "liked": {"$eq": ["$is_liked", True]},
+                            "saved": {"$eq": ["$is_saved", True]},
+                        },
+                    ]
+                }
+            }
+        },
+    ]
 
-    return articles
+    return await db.user_interactions.aggregate(pipeline).to_list(length=limit)
 
 
-async def get_user_interactions_for_articles(
-    user_id: str, article_ids: List[str]
-) -> Dict[str, Dict]:
-    cursor = db.user_interactions.find(
-        {"user_id": user_id, "article_id": {"$in": article_ids}}
+async def get_user_liked_articles(
+    user_id: str, skip: int = 0, limit: int = 20, cursor: Optional[str] = None
+):
+    return await _get_user_interacted_articles(
+        user_id, "is_liked", "liked_at", skip, limit, cursor
     )
 
-    interactions = await cursor.to_list(length=len(article_ids))
 
-    result = {}
-    for interaction in interactions:
-        result[interaction["article_id"]] = {
-            "is_liked": interaction.get("is_liked", False),
-            "is_saved": interaction.get("is_saved", False),
-        }
+async def get_user_saved_articles(
+    user_id: str, skip: int = 0, limit: int = 20, cursor: Optional[str] = None
+):
+    return await _get_user_interacted_articles(
+        user_id, "is_saved", "saved_at", skip, limit, cursor
+    )
+
+
+def recent_likes_and_saves(user_id: str, limit: int) -> List[dict]:
+    """
+    Aggregation stages listing the user's `limit` most recent likes and
+    `limit` most recent saves as `{"article_id", "at"}` rows, newest first
+    by when they were liked or saved. Each side is read newest first from
+    its own index, so the user's history is never sorted as a whole.
+    """
+
+    def latest(flag: str, timestamp_field: str) -> List[dict]:
+        return [
+            {"$match": {"user_id": user_id, flag: True}},
+            {"$sort": {timestamp_field: -1}},
+            {"$limit": limit},
+            {"$project": {"_id": 0, "article_id": 1, "at": f"${timestamp_field}"}},
+        ]
+
+    return [
+        *latest("is_liked", "liked_at"),
+        {
+            "$unionWith": {
+                "coll": "user_interactions",
+                "pipeline": latest("is_saved", "saved_at"),
+            }
+        },
+        {"$sort": {"at": -1}},
+    ]
+
+
+async def get_topic_affinity(user_id: str) -> Dict[str, float]:
+    """
+    Share of the user's recent likes and saves that went to each topic, from
+    their last RANK_AFFINITY_HISTORY likes and saves. A like and a save of
+    the same article both count.
+    """
+    pipeline = [
+        *recent_likes_and_saves(user_id, settings.RANK_AFFINITY_HISTORY),
+        {"$limit": settings.RANK_AFFINITY_HISTORY},
+        {
+            "$lookup": {
+                "from": "articles",
+                "localField": "article_id",
+                "foreignField": "id",
+                "pipeline": [{"$project": {"_id": 0, "topics": 1}}],
+                "as": "article",
+            }
+        },
+        {"$unwind": "$article"},
+        {"$unwind": "$article.topics"},
+        {"$group": {"_id": "$article.topics", "weight": {"$sum": 1}}},
+    ]
+    rows = await db.user_interactions.aggregate(pipeline).to_list(length=None)
+    total = sum(row["weight"] for row in rows)
+    if not total:
+        return {}
+    return {row["_id"]: row["weight"] / total for row in rows}
+
+
+# action -> (flag, value) for batched offline sync
+_BATCH_ACTIONS = {
+    "like": ("is_liked", True),
+    "unlike": ("is_liked", False),
+    "save": ("is_saved", True),
+    "unsave": ("is_saved", False),
+}
+_TIMESTAMP_FIELDS = {"is_liked": "liked_at", "is_saved": "saved_at"}
+
+
+def _as_utc(timestamp: datetime) -> datetime:
+    if timestamp.tzinfo is None:
+        return timestamp
+    return timestamp.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def collapse_actions(actions: List[InteractionAction]) -> Dict[str, Dict]:
+    """
+    Reduce an action log to the final value of each flag per article:
+    `{article_id: {flag: (value, timestamp)}}`. Actions are replayed in
+    timestamp order; ties keep the order they were sent in.
+    """
+    final: Dict[str, Dict] = {}
+    for action in sorted(actions, key=lambda a: _as_utc(a.timestamp)):
+        flag, value = _BATCH_ACTIONS[action.action]
+        final.setdefault(action.article_id, {})[flag] = (
+            value,
+            _as_utc(action.timestamp),
+        )
+    return final
 
+
+async def apply_interaction_batch(user_id: str, actions: List[InteractionAction]):
+    """
+    Apply a batch of offline like/save actions.
+
+    The actions are collapsed to one final state per article, written with a
+    single unordered bulk_write on user_interactions, and the net like delta
+    is applied with one $inc per article. Each interaction write is guarded
+    on the state it was computed from: if a concurrent request changed it
+    first, that write fails, its counter delta is dropped and the article's
+    current state is reported instead.
+
+    Returns the final states, the ids of articles that do not exist, and
+    the flips that were written: `{"article_id", "topics", "like", "save"}`
+    with the like and save changes as -1, 0 or 1, as single writes return.
+    """
+    final = collapse_actions(actions)
+    if not final:
+        return [], [], []
+
+    article_ids = list(final)
+    articles_cursor = db.articles.find(
+        {"id": {"$in": article_ids}}, {"_id": 0, "id": 1, "topics": 1}
+    )
+    topics = {
+        a["id"]: a.get("topics") or []
+        for a in await articles_cursor.to_list(length=None)
+    }
+    skipped = [article_id for article_id in article_ids if article_id not in topics]
+    article_ids = [article_id for article_id in article_ids if article_id in topics]
+    if not article_ids:
+        return [], skipped, []
+
+    interactions_cursor = db.user_interactions.find(
+        {"user_id": user_id, "article_id": {"$in": article_ids}},
+        {"_id": 0, "article_id": 1, "is_liked": 1, "is_saved": 1},
+    )
+    current = {
+        i["article_id"]: i for i in await interactions_cursor.to_list(length=None)
+    }
+
+    states = {}
+    operations = []
+    planned = []
     for article_id in article_ids:
-        if article_id not in result:
-            result[article_id] = {"is_liked": False, "is_saved": False}
+        before = current.get(article_id, {})
+        previous = {flag: before.get(flag) is True for flag in _TIMESTAMP_FIELDS}
+        after = dict(previous)
+        update_fields = {}
+        guard = {}
+        for flag, (value, timestamp) in final[article_id].items():
+            after[flag] = value
+            if value == previous[flag]:
+                continue
+            update_fields[flag] = value
+            update_fields[_TIMESTAMP_FIELDS[flag]] = timestamp if value else None
+            guard[flag] = True if previous[flag] else {"$ne": True}
+        states[article_id] = after
+
+        if not update_fields:
+            continue
+        on_insert = {"id": str(uuid.uuid4())}
+        for flag, timestamp_field in _TIMESTAMP_FIELDS.items():
+            if flag not in update_fields:
+                on_insert[flag] = False
+                on_insert[timestamp_field] = None
+        operations.append(
+            UpdateOne(
+                {"user_id": user_id, "article_id": article_id, **guard},
+                {"$set": update_fields, "$setOnInsert": on_insert},
+                upsert=True,
+            )
+        )
+        planned.append((article_id, previous, after))
+
+    failed = set()
+    if operations:
+        try:
+            await db.user_interactions.bulk_write(operations, ordered=False)
+        except BulkWriteError as e:
+            failed = {error["index"] for error in e.details.get("writeErrors", [])}
+
+    like_deltas = {}
+    changes = []
+    conflicted = []
+    for index, (article_id, previous, after) in enumerate(planned):
+        if index in failed:
+            conflicted.append(article_id)
+            continue
+        for flag in _TIMESTAMP_FIELDS:
+            if after[flag] != previous[flag]:
+                _update_cached_state(user_id, article_id, flag, after[flag])
+        change = {
+            "article_id": article_id,
+            "topics": topics[article_id],
+            "like": int(after["is_liked"]) - int(previous["is_liked"]),
+            "save": int(after["is_saved"]) - int(previous["is_saved"]),
+        }
+        changes.append(change)
+        if change["like"]:
+            like_deltas[article_id] = change["like"]
 
-    return result
+    if like_deltas:
+        await db.articles.bulk_write(
+            [
+                UpdateOne({"id": article_id}, {"$inc": {"like_count": delta}})
+                for article_id, delta in like_deltas.items()
+            ],
+            ordered=False,
+        )
+
+    if conflicted:
+        # Lost a race with another write: report what is actually stored.
+        invalidate_interaction_state(user_id)
+        conflicts_cursor = db.user_interactions.find(
+            {"user_id": user_id, "article_id": {"$in": conflicted}},
+            {"_id": 0, "article_id": 1, "is_liked": 1, "is_saved": 1},
+        )
+        for stored in await conflicts_cursor.to_list(length=None):
+            states[stored["article_id"]] = {
+                flag: stored.get(flag) is True for flag in _TIMESTAMP_FIELDS
+            }
+
+    return (
+        [
+            {"article_id": article_id, **states[article_id]}
+            for article_id in article_ids
+        ],
+        skipped,
+        changes,
+    )
@@ -1,9 +1,10 @@
 import uuid
 from datetime import datetime
-from typing import List
+from typing import List, Optional
 
 from app.db.database import db
 from app.schemas.magazine import MagazineCreate, MagazineUpdate
+from app.utils.pagination import apply_keyset, keyset_sort
 
 
 async def create_magazine(user_id: str, magazine: MagazineCreate):
@@ -15,27 +16,44 @@ async def create_magazine(user_id: str, magazine: MagazineCreate):
     magazine_doc["updated_at"] = datetime.utcnow()
 
     await db.magazines.insert_one(magazine_doc)
-    return await get_magazine_by_id(magazine_doc["id"])
+    return magazine_doc
 
 
 async def get_magazine_by_id(magazine_id: str):
     return await db.magazines.find_one({"id": magazine_id})
 
 
+async def get_magazine_version(magazine_id: str):
+    """
+    The magazine's update timestamp only, to validate a cached copy.
+    """
+    return await db.magazines.find_one(
+        {"id": magazine_id}, {"_id": 0, "updated_at": 1, "created_at": 1}
+    )
+
+
 async def get_user_magazines(user_id: str):
     cursor = db.magazines.find({"user_id": user_id}).sort("updated_at", -1)
     return await cursor.to_list(length=100)
 
 
 async def get_all_magazines(
-    skip: int = 0, limit: int = 100, exclude_user_id: str = None
+    skip: int = 0,
+    limit: int = 100,
+    exclude_user_id: str = None,
+    cursor: Optional[str] = None,
 ):
     query = {}
     if exclude_user_id:
         query["user_id"] = {"$ne": exclude_user_id}
+    if cursor:
+        query = apply_keyset(query, cursor, "updated_at")
+        skip = 0
 
-    cursor = db.magazines.find(query).sort("updated_at", -1).skip(skip).limit(limit)
-    return await cursor.to_list(length=limit)
+    db_cursor = (
+        db.magazines.find(query).sort(keyset_sort("updated_at")).skip(skip).limit(limit)
+    )
+    return await db_cursor.to_list(length=limit)
 
 
 async def update_magazine(magazine_id: str, magazine_update: MagazineUpdate):
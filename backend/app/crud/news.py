@@ -1,10 +1,14 @@
-from typing import Optional
+import logging
+from typing import List, Optional
 
 import httpx
 from fastapi import HTTPException
 
 from app.core.config import settings
-from app.models.news import NewsResponse
+from app.crud import entity as entity_crud
+from app.models.news import NewsPost, NewsResponse
+
+logger = logging.getLogger(__name__)
 
 WEBZ_IO_BASE_URL = "https://api.webz.io/newsApiLite"
 
@@ -51,6 +55,14 @@ TOPIC_MAPPING = {
 }
 
 
+async def _ingest_posts(posts: List[NewsPost]):
+    # Best effort: the fetched news is served even if indexing it fails.
+    try:
+        await entity_crud.ingest_posts(posts)
+    except Exception as e:
+        logger.error(f"Indexing news entities failed: {str(e)}")
+
+
 async def fetch_news(
     query: str = "news",
     timestamp: Optional[int] = None,
@@ -83,7 +95,7 @@ async def fetch_news(
             response.raise_for_status()
 
             data = response.json()
-            return NewsResponse(**data)
+            news = NewsResponse(**data)
     except Exception as e:
         # Re-using previous error handling logic
         if isinstance(e, httpx.HTTPStatusError):
@@ -93,6 +105,9 @@ async def fetch_news(
             )
         raise e
 
+    await _ingest_posts(news.posts)
+    return news
+
 
 async def fetch_news_feed(
     topics: list[str],
@@ -220,7 +235,7 @@ async def fetch_news_paginated(next_url: str) -> NewsResponse:
             response.raise_for_status()
 
             data = response.json()
-            return NewsResponse(**data)
+            news = NewsResponse(**data)
 
     except httpx.HTTPStatusError as e:
         raise HTTPException(
@@ -243,3 +258,6 @@ async def fetch_news_paginated(next_url: str) -> NewsResponse:
         raise HTTPException(
             status_code=500, detail=f"Error processing news data: {str(e)}"
         )
+
+    await _ingest_posts(news.posts)
+    return news
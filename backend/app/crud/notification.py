@@ -1,30 +1,80 @@
+import logging
 import uuid
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
+
+from pymongo.errors import BulkWriteError
 
 from app.db.database import db
 from app.schemas.notification import NotificationCreate
+from app.utils.events import publish, publish_many
+from app.utils.pagination import apply_keyset, keyset_sort
 
+logger = logging.getLogger(__name__)
 
-async def create_notification(notification: NotificationCreate):
+
+def _notification_document(notification: NotificationCreate, created_at: datetime):
     notification_doc = notification.dict()
     if not notification_doc.get("id"):
         notification_doc["id"] = str(uuid.uuid4())
-    notification_doc["created_at"] = datetime.utcnow()
+    notification_doc["created_at"] = created_at
+    return notification_doc
+
+
+async def create_notification(notification: NotificationCreate):
+    notification_doc = _notification_document(notification, datetime.utcnow())
 
     await db.notifications.insert_one(notification_doc)
-    return await db.notifications.find_one({"id": notification_doc["id"]})
+    await publish(
+        f"user:{notification_doc['user_id']}", "notification", notification_doc
+    )
+    return notification_doc
+
+
+async def create_notifications(notifications: List[NotificationCreate]) -> int:
+    """
+    Write many notifications in one unordered `insert_many`. Returns how
+    many were written; one failing does not stop the others.
+    """
+    if not notifications:
+        return 0
+    now = datetime.utcnow()
+    docs = [_notification_document(notification, now) for notification in notifications]
+    written = docs
+    try:
+        await db.notifications.insert_many(docs, ordered=False)
+    except BulkWriteError as e:
+        logger.error(f"Notification write failed: {e.details.get('writeErrors')}")
+        failed = {error["index"] for error in e.details.get("writeErrors", [])}
+        written = [doc for index, doc in enumerate(docs) if index not in failed]
+
+    await publish_many(
+        (f"user:{doc['user_id']}", "notification", doc) for doc in written
+    )
+    return len(written)
 
 
 async def get_notifications_for_user(
-    user_id: str, skip: int = 0, limit: int = 100, read: Optional[bool] = None
+    user_id: str,
+    skip: int = 0,
+    limit: int = 100,
+    read: Optional[bool] = None,
+    cursor: Optional[str] = None,
 ):
     query = {"user_id": user_id}
     if read is not None:
         query["read"] = read
+    if cursor:
+        query = apply_keyset(query, cursor, "created_at")
+        skip = 0
 
-    cursor = db.notifications.find(query).sort("created_at", -1).skip(skip).limit(limit)
-    notifications = await cursor.to_list(length=limit)
+    db_cursor = (
+        db.notifications.find(query)
+        .sort(keyset_sort("created_at"))
+        .skip(skip)
+        .limit(limit)
+    )
+    notifications = await db_cursor.to_list(length=limit)
 
     # Adapt old data: if 'message' is missing but 'content_preview' exists, use it
     for notification in notifications:
@@ -0,0 +1,55 @@
+from typing import List
+
+from app.core.config import settings
+from app.crud.article import ARTICLE_PROJECTION
+from app.crud.interaction import get_interaction_state, recent_likes_and_saves
+from app.db.database import db
+
+
+async def get_recommended_articles(user_id: str, limit: int = 20) -> List[dict]:
+    """
+    Articles similar to the user's RECOMMEND_SEED_ITEMS most recent likes and
+    saves, best first. The neighbour lists precomputed by the batch job are
+    joined and summed in one aggregation; articles the user already liked or
+    saved are left out.
+    """
+    state = await get_interaction_state(user_id)
+    seen = state.liked | state.saved
+    if not seen:
+        return []
+
+    pipeline = [
+        *recent_likes_and_saves(user_id, settings.RECOMMEND_SEED_ITEMS),
+        # An article both liked and saved is one seed, as recent as either.
+        {"$group": {"_id": "$article_id", "at": {"$max": "$at"}}},
+        {"$sort": {"at": -1}},
+        {"$limit": settings.RECOMMEND_SEED_ITEMS},
+        {
+            "$lookup": {
+                "from": "article_neighbours",
+                "localField": "_id",
+                "foreignField": "article_id",
+                "pipeline": [{"$project": {"_id": 0, "neighbours": 1}}],
+                "as": "similar",
+            }
+        },
+        {"$unwind": "$similar"},
+        {"$unwind": "$similar.neighbours"},
+        {
+            "$group": {
+                "_id": "$similar.neighbours.id",
+                "score": {"$sum": "$similar.neighbours.score"},
+            }
+        },
+        {"$match": {"_id": {"$nin": list(seen)}}},
+        {"$sort": {"score": -1, "_id": 1}},
+        {"$limit": limit},
+    ]
+    rows = await db.user_interactions.aggregate(pipeline).to_list(length=limit)
+    ids = [row["_id"] for row in rows]
+    if not ids:
+        return []
+
+    cursor = db.articles.find({"id": {"$in": ids}}, ARTICLE_PROJECTION)
+    by_id = {article["id"]: article for article in await cursor.to_list(len(ids))}
+    return [by_id[article_id] for article_id in ids if article_id in by_id]
@@ -0,0 +1,26 @@
+from typing import List, Optional
+
+from app.crud.article import ARTICLE_PROJECTION, article_exists
+from app.db.database import db
+
+
+async def get_related_articles(
+    article_id: str, limit: int = 10
+) -> Optional[List[dict]]:
+    """
+    The articles most similar to `article_id`, best first, from the
+    precomputed related lists. Returns None when the article does not exist.
+    """
+    doc = await db.related_articles.find_one(
+        {"article_id": article_id}, {"_id": 0, "related": {"$slice": limit}}
+    )
+    if doc is None:
+        # Not indexed yet, or no such article.
+        return [] if await article_exists(article_id) else None
+
+    ids = [entry["id"] for entry in doc.get("related", [])]
+    if not ids:
+        return []
+    cursor = db.articles.find({"id": {"$in": ids}}, ARTICLE_PROJECTION)
+    by_id = {article["id"]: article for article in await cursor.to_list(len(ids))}
+    return [by_id[related_id] for related_id in ids if related_id in by_id]
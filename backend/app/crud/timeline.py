@@ -0,0 +1,222 @@
+from datetime import datetime
+from typing import List, Optional
+
+from app.core.config import settings
+from app.crud.article import ARTICLE_PROJECTION
+from app.db.database import db
+from app.utils.cache import TTLCache
+from app.utils.pagination import apply_keyset, decode_cursor, keyset_sort
+
+# Topics with more followers than TIMELINE_HOT_TOPIC_FOLLOWERS. Their
+# articles are read on demand instead of being pushed to every follower.
+_hot_topic_cache = TTLCache(maxsize=1, ttl=settings.TIMELINE_HOT_TOPICS_TTL_SECONDS)
+
+_ENTRY_SORT = {"published_at": -1, "id": -1}
+
+
+def _entry(article: dict) -> dict:
+    return {"id": article["id"], "published_at": article["published_at"]}
+
+
+async def hot_topic_ids() -> set:
+    hot = _hot_topic_cache.get("hot")
+    if hot is None:
+        cursor = db.topics.find(
+            {"follower_count": {"$gt": settings.TIMELINE_HOT_TOPIC_FOLLOWERS}},
+            {"_id": 0, "id": 1},
+        )
+        hot = {topic["id"] for topic in await cursor.to_list(length=None)}
+        _hot_topic_cache.set("hot", hot)
+    return hot
+
+
+def invalidate_hot_topics():
+    _hot_topic_cache.clear()
+
+
+async def rebuild_timeline(user_id: str, topic_ids: List[str]) -> dict:
+    """
+    Recompute a user's timeline from the articles of the topics they follow,
+    keeping the newest TIMELINE_MAX_ENTRIES. Hot topics are left out and
+    merged in at read time.
+    """
+    hot = await hot_topic_ids()
+    hot_topics = sorted(set(topic_ids) & hot)
+    cold_topics = [topic_id for topic_id in topic_ids if topic_id not in hot]
+
+    entries = []
+    if cold_topics:
+        cursor = (
+            db.articles.find(
+                {"topics": {"$in": cold_topics}},
+                {"_id": 0, "id": 1, "published_at": 1},
+            )
+            .sort(keyset_sort("published_at"))
+            .limit(settings.TIMELINE_MAX_ENTRIES)
+        )
+        entries = await cursor.to_list(length=settings.TIMELINE_MAX_ENTRIES)
+
+    timeline = {
+        "user_id": user_id,
+        "topics": sorted(set(topic_ids)),
+        "hot_topics": hot_topics,
+        "entries": entries,
+        "built_at": datetime.utcnow(),
+    }
+    await db.timelines.replace_one({"user_id": user_id}, timeline, upsert=True)
+    return timeline
+
+
+async def fan_out_article(article: dict) -> int:
+    """
+    Push a new article onto the timeline of every follower of its topics, in
+    one update. Each list stays sorted and capped at TIMELINE_MAX_ENTRIES.
+
+    Returns the number of timelines updated.
+    """
+    hot = await hot_topic_ids()
+    cold_topics = [
+        topic_id for topic_id in article.get("topics") or [] if topic_id not in hot
+    ]
+    if not cold_topics or not article.get("published_at"):
+        return 0
+
+    result = await db.timelines.update_many(
+        {"topics": {"$in": cold_topics}},
+        {
+            "$push": {
+                "entries": {
+                    "$each": [_entry(article)],
+                    "$sort": _ENTRY_SORT,
+                    "$slice": settings.TIMELINE_MAX_ENTRIES,
+                }
+            }
+        },
+    )
+    return result.modified_count
+
+
+def _entries_after(cursor: str) -> dict:
+    published_at, article_id = decode_cursor(cursor, "published_at")
+    return {
+        "$filter": {
+            "input": "$entries",
+            "as": "entry",
+            "cond": {
+                "$or": [
+                    {"$lt": ["$$entry.published_at", published_at]},
+                    {
+                        "$and": [
+                            {"$eq": ["$$entry.published_at", published_at]},
+                            {"$lt": ["$$entry.id", article_id]},
+                        ]
+                    },
+                ]
+            },
+        }
+    }
+
+
+async def _read_timeline(
+    user_id: str, skip: int, limit: int, cursor: Optional[str]
+) -> Optional[dict]:
+    entries = _entries_after(cursor) if cursor else "$entries"
+    pipeline = [
+        {"$match": {"user_id": user_id}},
+        {
+            "$project": {
+                "_id": 0,
+                "topics": 1,
+                "hot_topics": 1,
+                "entries": {"$slice": [entries, skip, limit]},
+            }
+        },
+    ]
+    rows = await db.timelines.aggregate(pipeline).to_list(length=1)
+    return rows[0] if rows else None
+
+
+async def _hydrate(
+    user_id: str,
+    entries: List[dict],
+    offset: int,
+    count: int,
+    cursor: Optional[str],
+) -> List[dict]:
+    """
+    The articles of `entries`, a range read of `count` timeline entries from
+    `offset`. Articles deleted since they were pushed are skipped and the
+    entries after the range read in their place, so a page only comes up
+    short at the end of the timeline.
+    """
+    articles = []
+    requested = count
+    while entries:
+        ids = [entry["id"] for entry in entries]
+        found = await db.articles.find(
+            {"id": {"$in": ids}}, ARTICLE_PROJECTION
+        ).to_list(length=len(ids))
+        by_id = {article["id"]: article for article in found}
+        articles += [by_id[article_id] for article_id in ids if article_id in by_id]
+        if len(entries) < requested or len(articles) >= count:
+            break
+        offset += len(entries)
+        requested = count - len(articles)
+        timeline = await _read_timeline(user_id, offset, requested, cursor)
+        entries = timeline["entries"] if timeline else []
+    return articles
+
+
+async def get_timeline_articles(
+    user_id: str,
+    topic_ids: List[str],
+    skip: int = 0,
+    limit: int = 20,
+    cursor: Optional[str] = None,
+) -> List[dict]:
+    """
+    A page of the user's feed: the articles of the topics they follow, newest
+    first. The page is one range read of the stored timeline, merged with
+    the newest articles of followed hot topics. A timeline built for another
+    set of topics is rebuilt first.
+    """
+    if cursor:
+        skip = 0
+
+    hot = await hot_topic_ids()
+    topics = sorted(set(topic_ids))
+    merge = bool(set(topics) & hot)
+
+    # Merging needs the first skip + limit candidates from both sides.
+    offset, count = (0, skip + limit) if merge else (skip, limit)
+    timeline = await _read_timeline(user_id, offset, count, cursor)
+    if timeline is None or timeline["topics"] != topics:
+        await rebuild_timeline(user_id, topic_ids)
+        timeline = await _read_timeline(user_id, offset, count, cursor)
+    # Topics that were hot when the timeline was built are still read on
+    # demand, even if they have cooled down since.
+    read_topics = sorted(set(timeline["hot_topics"]) | (set(topics) & hot))
+    if read_topics and not merge:
+        merge = True
+        offset, count = 0, skip + limit
+        timeline = await _read_timeline(user_id, offset, count, cursor)
+
+    articles = await _hydrate(user_id, timeline["entries"], offset, count, cursor)
+
+    if not merge:
+        return articles
+
+    query = apply_keyset({"topics": {"$in": read_topics}}, cursor, "published_at")
+    hot_articles = (
+        await db.articles.find(query, ARTICLE_PROJECTION)
+        .sort(keyset_sort("published_at"))
+        .limit(skip + limit)
+        .to_list(length=skip + limit)
+    )
+    merged = {article["id"]: article for article in articles + hot_articles}
+    ordered = sorted(
+        merged.values(),
+        key=lambda article: (article["published_at"], article["id"]),
+        reverse=True,
+    )
+    return ordered[skip : skip + limit]
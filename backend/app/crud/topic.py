@@ -1,6 +1,8 @@
 import uuid
 from datetime import datetime
-from typing import List, Optional
+from typing import List, Optional, Tuple
+
+from pymongo import ReturnDocument
 
 from app.db.database import db
 from app.schemas.topic import TopicCreate, TopicUpdate
@@ -10,6 +12,15 @@ async def get_topic_by_id(topic_id: str):
     return await db.topics.find_one({"id": topic_id})
 
 
+async def get_topic_version(topic_id: str):
+    """
+    The topic's update timestamps only, to validate a cached copy.
+    """
+    return await db.topics.find_one(
+        {"id": topic_id}, {"_id": 0, "updated_at": 1, "created_at": 1}
+    )
+
+
 async def get_topic_by_name(name: str):
     return await db.topics.find_one({"name": name})
 
@@ -24,6 +35,32 @@ async def get_topics(skip: int = 0, limit: int = 100, search: Optional[str] = No
     return topics
 
 
+async def get_topics_version(
+    search: Optional[str] = None,
+) -> Tuple[int, Optional[datetime]]:
+    """
+    How many topics match and when the latest of them changed, to validate a
+    cached list without reading it.
+    """
+    query = {}
+    if search:
+        query["name"] = {"$regex": search, "$options": "i"}
+    pipeline = [
+        {"$match": query},
+        {
+            "$group": {
+                "_id": None,
+                "count": {"$sum": 1},
+                "latest": {"$max": {"$ifNull": ["$updated_at", "$created_at"]}},
+            }
+        },
+    ]
+    rows = await db.topics.aggregate(pipeline).to_list(length=1)
+    if not rows:
+        return 0, None
+    return rows[0]["count"], rows[0]["latest"]
+
+
 async def get_topics_count(search: Optional[str] = None):
     query = {}
     if search:
@@ -35,19 +72,25 @@ async def create_topic(topic: TopicCreate):
     topic_doc = topic.dict()
     topic_doc["id"] = str(uuid.uuid4())
     topic_doc["follower_count"] = 0
-    topic_doc["created_at"] = datetime.utcnow()
+    topic_doc["created_at"] = topic_doc["updated_at"] = datetime.utcnow()
 
     await db.topics.insert_one(topic_doc)
-    return await get_topic_by_id(topic_doc["id"])
+    return topic_doc
 
 
 async def update_topic(topic_id: str, topic: TopicUpdate):
     update_data = {
         k: v for k, v in topic.dict(exclude_unset=True).items() if v is not None
     }
-    if update_data:
-        await db.topics.update_one({"id": topic_id}, {"$set": update_data})
-    return await get_topic_by_id(topic_id)
+    if not update_data:
+        return await get_topic_by_id(topic_id)
+
+    update_data["updated_at"] = datetime.utcnow()
+    return await db.topics.find_one_and_update(
+        {"id": topic_id},
+        {"$set": update_data},
+        return_document=ReturnDocument.AFTER,
+    )
 
 
 async def delete_topic(topic_id: str):
@@ -57,7 +100,11 @@ async def delete_topic(topic_id: str):
 
 async def increment_follower_count(topic_id: str, increment: int = 1):
     await db.topics.update_one(
-        {"id": topic_id}, {"$inc": {"follower_count": increment}}
+        {"id": topic_id},
+        {
+            "$inc": {"follower_count": increment},
+            "$set": {"updated_at": datetime.utcnow()},
+        },
     )
 
 
@@ -1,9 +1,23 @@
 import uuid
 from datetime import datetime
+from typing import Dict, List
 
+from app.core.config import settings
 from app.db.database import db
 from app.schemas.user import UserCreate
 from app.security.password import get_password_hash, verify_password
+from app.utils.cache import TTLCache
+
+# The fields shown next to a user's comments and posts.
+PROFILE_PROJECTION = {"_id": 0, "id": 1, "username": 1, "profile_pic": 1}
+
+# Short-lived, so a rename or new picture made through another worker shows
+# up quickly; changes made through this process evict the entry at once.
+_profile_cache = TTLCache(
+    maxsize=settings.USER_PROFILE_CACHE_SIZE,
+    ttl=settings.USER_PROFILE_CACHE_TTL_SECONDS,
+)
+_UNCACHED = object()
 
 
 async def get_user_by_email(email: str):
@@ -14,27 +28,36 @@ async def get_user_by_username(username: str):
     return await db.users.find_one({"username": username})
 
 
+async def get_user_version(username: str):
+    """
+    The user's `id` and update timestamps only, to validate a cached profile.
+    """
+    return await db.users.find_one(
+        {"username": username}, {"_id": 0, "id": 1, "updated_at": 1, "created_at": 1}
+    )
+
+
 async def create_user(user: UserCreate):
     hashed_password = get_password_hash(user.password[:72])
     user_doc = user.dict()
     user_doc.pop("password")
     user_doc["hashed_password"] = hashed_password
     user_doc["id"] = str(uuid.uuid4())
-    user_doc["created_at"] = datetime.utcnow()
+    user_doc["created_at"] = user_doc["updated_at"] = datetime.utcnow()
 
     await db.users.insert_one(user_doc)
-    return await get_user_by_username(user.username)
+    return user_doc
 
 
 async def create_social_user(user_data: dict):
     user_doc = user_data.copy()
     user_doc["id"] = str(uuid.uuid4())
-    user_doc["created_at"] = datetime.utcnow()
+    user_doc["created_at"] = user_doc["updated_at"] = datetime.utcnow()
     # Set an unusable password for social users using a random, hashed value
     user_doc["hashed_password"] = get_password_hash(str(uuid.uuid4()))
 
     await db.users.insert_one(user_doc)
-    return await get_user_by_username(user_data["username"])
+    return user_doc
 
 
 async def authenticate_user(username: str, password: str):
@@ -68,25 +91,31 @@ async def remove_followed_topic(user_id: str, topic_id: str):
 
 
 async def follow_user(follower_id: str, followed_id: str):
+    now = datetime.utcnow()
     # Add followed_id to follower's 'following' list
     await db.users.update_one(
-        {"id": follower_id}, {"$addToSet": {"following": followed_id}}
+        {"id": follower_id},
+        {"$addToSet": {"following": followed_id}, "$set": {"updated_at": now}},
     )
     # Add follower_id to followed's 'followers' list
     await db.users.update_one(
-        {"id": followed_id}, {"$addToSet": {"followers": follower_id}}
+        {"id": followed_id},
+        {"$addToSet": {"followers": follower_id}, "$set": {"updated_at": now}},
     )
     return True
 
 
 async def unfollow_user(follower_id: str, followed_id: str):
+    now = datetime.utcnow()
     # Remove followed_id from follower's 'following' list
     await db.users.update_one(
-        {"id": follower_id}, {"$pull": {"following": followed_id}}
+        {"id": follower_id},
+        {"$pull": {"following": followed_id}, "$set": {"updated_at": now}},
     )
     # Remove follower_id from followed's 'followers' list
     await db.users.update_one(
-        {"id": followed_id}, {"$pull": {"followers": follower_id}}
+        {"id": followed_id},
+        {"$pull": {"followers": follower_id}, "$set": {"updated_at": now}},
     )
     return True
 
@@ -119,7 +148,9 @@ async def update_user(user_id: str, user_update: dict):
     if not update_data:
         return False
 
+    update_data["updated_at"] = datetime.utcnow()
     result = await db.users.update_one({"id": user_id}, {"$set": update_data})
+    _profile_cache.pop(user_id)
     return result.modified_count > 0
 
 
@@ -127,11 +158,44 @@ async def get_user_by_id(user_id: str):
     return await db.users.find_one({"id": user_id})
 
 
+async def get_user_profiles(user_ids: List[str]) -> Dict[str, dict]:
+    """
+    The public profile (id, username, picture) of each distinct user in
+    `user_ids`, with users missing from the database left out. Profiles not
+    cached are read in one query.
+    """
+    profiles = {}
+    missing = []
+    for user_id in dict.fromkeys(user_ids):
+        profile = _profile_cache.get(user_id, _UNCACHED)
+        if profile is _UNCACHED:
+            missing.append(user_id)
+        elif profile is not None:
+            profiles[user_id] = profile
+
+    if missing:
+        cursor = db.users.find({"id": {"$in": missing}}, PROFILE_PROJECTION)
+        for profile in await cursor.to_list(length=len(missing)):
+            profiles[profile["id"]] = profile
+        # Deleted users are cached too, as None, so their comments do not
+        # cost a query on every page.
+        for user_id in missing:
+            _profile_cache.set(user_id, profiles.get(user_id))
+    return profiles
+
+
 async def get_users_by_ids(user_ids: list):
     cursor = db.users.find({"id": {"$in": user_ids}})
     return await cursor.to_list(length=len(user_ids))
 
 
-async def get_users_following_magazine(magazine_id: str):
-    cursor = db.users.find({"followed_magazines": magazine_id})
-    return await cursor.to_list(length=None)
+async def iter_magazine_follower_ids(magazine_id: str, batch_size: int = 1000):
+    """
+    Yield the ids of the users following a magazine, read `batch_size` at a
+    time, so a magazine with many followers is never held in memory.
+    """
+    cursor = db.users.find(
+        {"followed_magazines": magazine_id}, {"_id": 0, "id": 1}
+    ).batch_size(batch_size)
+    async for user in cursor:
+        yield user["id"]
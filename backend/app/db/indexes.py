@@ -0,0 +1,147 @@
+import logging
+
+from pymongo import ASCENDING, DESCENDING, TEXT
+from pymongo.errors import OperationFailure
+
+from app.db.database import db
+
+logger = logging.getLogger(__name__)
+
+# (collection, keys, options) for every index the queries rely on.
+INDEXES = [
+    # Keyset pagination: every list is ordered by its sort key plus `id`.
+    ("articles", [("published_at", DESCENDING), ("id", DESCENDING)], {}),
+    ("articles", [("view_count", DESCENDING), ("id", DESCENDING)], {}),
+    ("articles", [("like_count", DESCENDING), ("id", DESCENDING)], {}),
+    (
+        "articles",
+        [("topics", ASCENDING), ("published_at", DESCENDING), ("id", DESCENDING)],
+        {},
+    ),
+    (
+        "comments",
+        [("article_id", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)],
+        {},
+    ),
+    (
+        "comments",
+        [("magazine_id", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)],
+        {},
+    ),
+    (
+        "comments",
+        [("user_id", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)],
+        {},
+    ),
+    # Comment threads: a thread or subtree is one range of paths. Replies
+    # past the first few of a thread are skipped in the index.
+    (
+        "comments",
+        [("article_id", ASCENDING), ("path", ASCENDING), ("reply_number", ASCENDING)],
+        {},
+    ),
+    (
+        "comments",
+        [("magazine_id", ASCENDING), ("path", ASCENDING), ("reply_number", ASCENDING)],
+        {},
+    ),
+    (
+        "notifications",
+        [("user_id", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)],
+        {},
+    ),
+    (
+        "user_interactions",
+        [
+            ("user_id", ASCENDING),
+            ("is_liked", ASCENDING),
+            ("liked_at", DESCENDING),
+            ("id", DESCENDING),
+        ],
+        {},
+    ),
+    (
+        "user_interactions",
+        [
+            ("user_id", ASCENDING),
+            ("is_saved", ASCENDING),
+            ("saved_at", DESCENDING),
+            ("id", DESCENDING),
+        ],
+        {},
+    ),
+    ("magazines", [("updated_at", DESCENDING), ("id", DESCENDING)], {}),
+    # Counter reconciliation groups likes per article and followers per topic.
+    ("user_interactions", [("article_id", ASCENDING), ("is_liked", ASCENDING)], {}),
+    ("users", [("followed_topics", ASCENDING)], {}),
+    # Materialized timelines: read by user, fanned out to by followed topic.
+    ("timelines", [("user_id", ASCENDING)], {"unique": True}),
+    ("timelines", [("topics", ASCENDING)], {}),
+    ("topic_affinity", [("user_id", ASCENDING)], {"unique": True}),
+    # Recommendations: neighbour lists. A user's most recent likes and saves
+    # are read through the liked/saved list indexes above.
+    ("article_neighbours", [("article_id", ASCENDING)], {"unique": True}),
+    ("related_articles", [("article_id", ASCENDING)], {"unique": True}),
+    # Entity index over fetched news; both expire on `expires_at`.
+    ("news_posts", [("uuid", ASCENDING)], {"unique": True}),
+    ("news_posts", [("expires_at", ASCENDING)], {"expireAfterSeconds": 0}),
+    (
+        "news_entities",
+        [("name", ASCENDING), ("type", ASCENDING), ("day", DESCENDING)],
+        {"unique": True},
+    ),
+    ("news_entities", [("day", DESCENDING)], {}),
+    ("news_entities", [("expires_at", ASCENDING)], {"expireAfterSeconds": 0}),
+    ("article_contents", [("article_id", ASCENDING)], {"unique": True}),
+    # Live events relayed between workers; only the change stream reads them.
+    ("events", [("expires_at", ASCENDING)], {"expireAfterSeconds": 0}),
+    # Notification fan-out streams the followers of a magazine.
+    ("users", [("followed_magazines", ASCENDING)], {}),
+    # Near-duplicate lookup on import: one entry per SimHash band.
+    ("articles", [("simhash_bands", ASCENDING)], {}),
+    ("related_idf", [("name", ASCENDING)], {"unique": True}),
+    # One interaction per user and article; like/save upserts rely on it.
+    (
+        "user_interactions",
+        [("user_id", ASCENDING), ("article_id", ASCENDING)],
+        {"unique": True},
+    ),
+    # Covers the per-user liked/saved state load used for enrichment.
+    (
+        "user_interactions",
+        [
+            ("user_id", ASCENDING),
+            ("article_id", ASCENDING),
+            ("is_liked", ASCENDING),
+            ("is_saved", ASCENDING),
+        ],
+        {},
+    ),
+    # Full-text article search, stemmed per article `language`. Bodies are
+    # matched through the copy of their start kept in `search_text`.
+    (
+        "articles",
+        [("title", TEXT), ("excerpt", TEXT), ("search_text", TEXT)],
+        {
+            "name": "articles_text",
+            "weights": {"title": 10, "excerpt": 5, "search_text": 1},
+            "default_language": "english",
+            "language_override": "language",
+        },
+    ),
+]
+
+
+async def ensure_indexes():
+    """
+    Create the indexes used by the CRUD layer. Safe to call on every startup:
+    MongoDB treats re-creating an identical index as a no-op.
+    """
+    for collection, keys, options in INDEXES:
+        try:
+            await db[collection].create_index(keys, **options)
+        except OperationFailure as e:
+            # e.g. a unique index over existing duplicates: keep serving and
+            # let the operator clean the data up.
+            logger.error(f"Could not create index {keys} on {collection}: {e}")
+    logger.info(f"Ensured {len(INDEXES)} indexes")
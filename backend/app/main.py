@@ -1,6 +1,13 @@
+from contextlib import asynccontextmanager
+
+import anyio
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
+from app.core.config import settings
+from app.crud import article as article_crud
+from app.crud import interaction as interaction_crud
+from app.db.indexes import ensure_indexes
 from app.routes import (
     articles,
     auth,
@@ -12,8 +19,49 @@ from app.routes import (
     topics,
     users,
 )
+from app.utils.affinity import affinity_store, run_affinity_flush_loop
+from app.utils.events import event_hub, run_event_relay_loop
+from app.utils.near_duplicates import news_fingerprints
+from app.utils.notification_fanout import (
+    notification_fanout,
+    run_notification_fanout_loop,
+)
+from app.utils.recommendations import (
+    recommendation_stats,
+    run_recommendation_loop,
+)
+from app.utils.reconciliation import reconciliation_stats, run_reconciliation_loop
+from app.utils.related import related_index, run_related_loop
+from app.utils.trending import run_trending_refresh_loop, trending
+from app.utils.view_buffer import run_view_flush_loop, view_buffer
+
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await ensure_indexes()
+    async with anyio.create_task_group() as tg:
+        if settings.RECONCILE_INTERVAL_SECONDS > 0:
+            tg.start_soon(run_reconciliation_loop)
+        tg.start_soon(run_view_flush_loop)
+        tg.start_soon(run_trending_refresh_loop)
+        tg.start_soon(run_affinity_flush_loop)
+        if settings.RECOMMEND_INTERVAL_SECONDS > 0:
+            tg.start_soon(run_recommendation_loop)
+        if settings.RELATED_INTERVAL_SECONDS > 0:
+            tg.start_soon(run_related_loop)
+        if settings.EVENTS_CHANGE_STREAM:
+            tg.start_soon(run_event_relay_loop)
+        tg.start_soon(run_notification_fanout_loop)
+        yield
+        # Open event streams would otherwise hold shutdown up.
+        event_hub.close()
+        tg.cancel_scope.cancel()
+    # Write out views and profiles buffered since the last flush.
+    await view_buffer.flush()
+    await affinity_store.flush()
+
+
+app = FastAPI(lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -48,3 +96,22 @@ def read_root():
 @app.get("/health")
 def health_check():
     return {"status": "healthy"}
+
+
+@app.get("/metrics")
+def metrics():
+    return {
+        "caches": {
+            "article_counts": article_crud.count_cache_stats(),
+            "interaction_state": interaction_crud.interaction_cache_stats(),
+            "affinity_profiles": affinity_store.stats(),
+        },
+        "reconciliation": reconciliation_stats(),
+        "views": view_buffer.stats(),
+        "trending": trending.stats(),
+        "recommendations": recommendation_stats(),
+        "related": related_index.stats(),
+        "near_duplicates": news_fingerprints.stats(),
+        "events": event_hub.stats(),
+        "notification_fanout": notification_fanout.stats(),
+    }
@@ -1,4 +1,4 @@
-from typing import Any, List, Optional
+from typing import Any, Dict, List, Optional
 
 from pydantic import BaseModel, ConfigDict, field_validator
 
@@ -71,6 +71,16 @@ class Entities(BaseModel):
     locations: List[Entity] = []
 
 
+class Coverage(BaseModel):
+    """
+    A near-duplicate of a post, published by another site.
+    """
+
+    site: str = ""
+    url: str = ""
+    title: str = ""
+
+
 class NewsPost(BaseModel):
     model_config = ConfigDict(extra="ignore")
 
@@ -97,6 +107,7 @@ class NewsPost(BaseModel):
     updated: Optional[str] = None
     liked: bool = False
     saved: bool = False
+    also_covered_by: List[Coverage] = []
 
     @field_validator("categories", "external_links", "external_images", mode="before")
     @classmethod
@@ -117,6 +128,18 @@ class NewsResponse(BaseModel):
     warnings: Optional[str] = None
 
 
+class EntitySummary(BaseModel):
+    name: str
+    key: str
+    type: str
+    mentions: int = 0
+    sentiment: Dict[str, int] = {}
+
+
+class EntityNews(EntitySummary):
+    posts: List[NewsPost] = []
+
+
 class NewsQueryParams(BaseModel):
     q: str = "news"
     ts: Optional[int] = None
@@ -1,11 +1,35 @@
-from typing import Optional
+import logging
+from typing import List, Literal, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import (
+    APIRouter,
+    BackgroundTasks,
+    Depends,
+    HTTPException,
+    Query,
+    Request,
+    Response,
+    status,
+)
 
+from app.core.config import settings
 from app.crud import article as article_crud
+from app.crud import recommendation as recommendation_crud
+from app.crud import related as related_crud
+from app.crud import timeline as timeline_crud
+from app.crud.article import CountMode
 from app.dependencies import get_current_user
 from app.schemas.article import Article, ArticleCreate, ArticleList, ArticleUpdate
+from app.utils.affinity import affinity_store
 from app.utils.article_enricher import enrich_article, enrich_articles
+from app.utils.http_cache import PRIVATE_REVALIDATE, make_etag, not_modified, version
+from app.utils.pagination import next_cursor
+from app.utils.ranking import rank_articles
+from app.utils.related import related_index
+from app.utils.trending import trending
+from app.utils.view_buffer import view_buffer
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
@@ -19,21 +43,51 @@ async def get_articles(
     sort_by: str = Query(
         "published_at", regex="^(published_at|view_count|like_count)$"
     ),
+    cursor: Optional[str] = Query(
+        None, description="Opaque `next_cursor` from the previous page"
+    ),
+    lang: Optional[str] = Query(
+        None, description="Language of the search terms (en or fr)"
+    ),
+    count: CountMode = Query(
+        "approx",
+        description="How to compute `total`: exact, approx (cached) or none",
+    ),
     current_user: dict = Depends(get_current_user),
 ):
     articles = await article_crud.get_articles(
-        skip=skip, limit=limit, topic=topic, search=search, sort_by=sort_by
+        skip=skip,
+        limit=limit,
+        topic=topic,
+        search=search,
+        sort_by=sort_by,
+        cursor=cursor,
+        language=lang,
+    )
+    total = await article_crud.get_articles_count(
+        topic=topic, search=search, language=lang, mode=count
     )
-    total = await article_crud.get_articles_count(topic=topic, search=search)
 
     articles = await enrich_articles(articles, current_user)
 
-    return ArticleList(articles=articles, total=total, skip=skip, limit=limit)
+    return ArticleList(
+        articles=articles,
+        total=total,
+        skip=skip,
+        limit=limit,
+        # Relevance-ranked search results page by skip only.
+        next_cursor=None if search else next_cursor(articles, sort_by, limit),
+    )
 
 
 @router.get("/hero", response_model=Article)
 async def get_hero_article(current_user: dict = Depends(get_current_user)):
-    article = await article_crud.get_hero_article()
+    trending_articles = await trending.top(limit=1)
+    if trending_articles:
+        article = trending_articles[0]
+    else:
+        # Nothing has scored yet (e.g. no recent articles): most viewed.
+        article = await article_crud.get_hero_article()
     if not article:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="No articles found"
@@ -41,55 +95,206 @@ async def get_hero_article(current_user: dict = Depends(get_current_user)):
     return await enrich_article(article, current_user)
 
 
+@router.get("/trending", response_model=List[Article])
+async def get_trending_articles(
+    topic: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=settings.TRENDING_TOP_K),
+    current_user: dict = Depends(get_current_user),
+):
+    """
+    Articles ranked by time-decayed views, likes, saves and comments,
+    as of the last trending refresh.
+    """
+    articles = await trending.top(topic=topic, limit=limit)
+    return await enrich_articles(articles, current_user)
+
+
+@router.get("/recommended", response_model=List[Article])
+async def get_recommended_articles(
+    limit: int = Query(20, ge=1, le=50),
+    current_user: dict = Depends(get_current_user),
+):
+    """
+    Articles liked or saved by the readers of what the user recently liked
+    or saved, from the precomputed article neighbours.
+    """
+    articles = await recommendation_crud.get_recommended_articles(
+        current_user["id"], limit=limit
+    )
+    return await enrich_articles(articles, current_user)
+
+
 @router.get("/feed", response_model=ArticleList)
 async def get_personalized_feed(
     skip: int = Query(0, ge=0),
     limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(
+        None, description="Opaque `next_cursor` from the previous page"
+    ),
+    count: CountMode = Query(
+        "approx",
+        description="How to compute `total`: exact, approx (cached) or none",
+    ),
+    sort: Literal["ranked", "recent"] = Query(
+        "ranked",
+        description="ranked (personalized relevance) or recent (newest first)",
+    ),
     current_user: dict = Depends(get_current_user),
 ):
     followed_topic_ids = current_user.get("followed_topics", [])
+    # A cursor continues a newest-first listing.
+    ranked = bool(followed_topic_ids) and sort == "ranked" and not cursor
 
     if not followed_topic_ids:
-        articles = await article_crud.get_articles(skip=skip, limit=limit)
-        total = await article_crud.get_articles_count()
+        articles = await article_crud.get_articles(
+            skip=skip, limit=limit, cursor=cursor
+        )
+        total = await article_crud.get_articles_count(mode=count)
     else:
-        articles = await article_crud.get_articles_by_topic_ids(
-            followed_topic_ids, skip=skip, limit=limit
+        if ranked:
+            # Rank the newest RANK_CANDIDATES articles of the timeline; past
+            # them the feed goes on newest first.
+            window = settings.RANK_CANDIDATES
+            candidates = await timeline_crud.get_timeline_articles(
+                current_user["id"], followed_topic_ids, limit=window
+            )
+            articles = []
+            if skip < len(candidates):
+                affinity = await affinity_store.shares(current_user["id"])
+                articles = rank_articles(candidates, affinity, k=skip + limit)[skip:]
+            if len(articles) < limit and len(candidates) == window:
+                start = max(skip, window)
+                articles += await timeline_crud.get_timeline_articles(
+                    current_user["id"],
+                    followed_topic_ids,
+                    skip=start,
+                    limit=skip + limit - start,
+                )
+                # The page ends in the newest-first part: a cursor goes on
+                # from there.
+                ranked = False
+        else:
+            articles = await timeline_crud.get_timeline_articles(
+                current_user["id"],
+                followed_topic_ids,
+                skip=skip,
+                limit=limit,
+                cursor=cursor,
+            )
+        total = await article_crud.get_articles_count_by_topic_ids(
+            followed_topic_ids, mode=count
         )
-        total = len(articles)
 
     articles = await enrich_articles(articles, current_user)
 
-    return ArticleList(articles=articles, total=total, skip=skip, limit=limit)
+    return ArticleList(
+        articles=articles,
+        total=total,
+        skip=skip,
+        limit=limit,
+        # Ranked pages are paged by skip only, like search results.
+        next_cursor=None if ranked else next_cursor(articles, "published_at", limit),
+    )
 
 
 @router.get("/{article_id}", response_model=Article)
-async def get_article(article_id: str, current_user: dict = Depends(get_current_user)):
-    article = await article_crud.get_article_by_id(article_id, increment_view=True)
+async def get_article(
+    article_id: str,
+    request: Request,
+    response: Response,
+    current_user: dict = Depends(get_current_user),
+):
+    article = await article_crud.get_article_by_id(article_id)
     if not article:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Article not found"
         )
-    return await enrich_article(article, current_user)
+
+    # Views are written behind; include the not yet flushed ones.
+    if view_buffer.record(article_id, current_user["id"]):
+        trending.record(article_id, "view")
+        await affinity_store.record(current_user["id"], article.get("topics"), "view")
+    stored_views = article.get("view_count", 0)
+    article["view_count"] = stored_views + view_buffer.pending(article_id)
+    article = await enrich_article(article, current_user)
+
+    # Counters and the caller's own state are part of the response, so they
+    # are part of the tag; the body is only read for a stale copy. Views
+    # still buffered are left out, or this very view would change the tag:
+    # the tag moves once they are flushed.
+    etag = make_etag(
+        article_id,
+        version(article),
+        stored_views,
+        article.get("like_count"),
+        article.get("comment_count"),
+        article.get("liked"),
+        article.get("saved"),
+    )
+    cached = not_modified(request, response, etag, PRIVATE_REVALIDATE)
+    if cached:
+        return cached
+
+    article["content"] = await article_crud.get_article_content(article_id)
+    return article
+
+
+@router.get("/{article_id}/related", response_model=List[Article])
+async def get_related_articles(
+    article_id: str,
+    limit: int = Query(10, ge=1, le=settings.RELATED_TOP_K),
+    current_user: dict = Depends(get_current_user),
+):
+    articles = await related_crud.get_related_articles(article_id, limit=limit)
+    if articles is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Article not found"
+        )
+    return await enrich_articles(articles, current_user)
+
+
+async def _index_related(article: dict):
+    try:
+        await related_index.index_article(article)
+    except Exception as e:
+        logger.error(f"Indexing related articles of {article['id']} failed: {str(e)}")
+
+
+async def _spread_new_article(article: dict, background_tasks: BackgroundTasks):
+    # Best effort: the article is stored either way. Timelines that miss it
+    # get it when next rebuilt, and the related index on its next build.
+    try:
+        await timeline_crud.fan_out_article(article)
+    except Exception as e:
+        logger.error(f"Fanning out article {article['id']} failed: {str(e)}")
+    # Finding related articles searches and reads candidate bodies: it runs
+    # after the response is sent.
+    background_tasks.add_task(_index_related, article)
 
 
 @router.post("/", response_model=Article, status_code=status.HTTP_201_CREATED)
 async def create_article(
-    article_in: ArticleCreate, current_user: dict = Depends(get_current_user)
+    article_in: ArticleCreate,
+    background_tasks: BackgroundTasks,
+    current_user: dict = Depends(get_current_user),
 ):
     article = await article_crud.create_article(article_in)
+    await _spread_new_article(article, background_tasks)
     return article
 
 
 @router.post("/import", response_model=Article, status_code=status.HTTP_200_OK)
 async def import_article(
-    article_in: ArticleCreate, current_user: dict = Depends(get_current_user)
+    article_in: ArticleCreate,
+    background_tasks: BackgroundTasks,
+    current_user: dict = Depends(get_current_user),
 ):
     # Check if exists by URL
     existing = await article_crud.get_article_by_url(article_in.source_url)
     if existing:
         # Check if new content is significantly longer (indicating full content update)
-        existing_content_len = len(existing.get("content", "") or "")
+        existing["content"] = await article_crud.get_article_content(existing["id"])
+        existing_content_len = len(existing["content"])
         new_content_len = len(article_in.content or "")
 
         # If new content is longer by at least 100 chars, update it
@@ -100,8 +305,18 @@ async def import_article(
 
         return await enrich_article(existing, current_user)
 
+    # The same story syndicated under another URL.
+    fingerprint = article_crud.article_fingerprint(article_in)
+    duplicate = await article_crud.find_near_duplicate(fingerprint)
+    if duplicate:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Near-duplicate of article {duplicate['id']}",
+        )
+
     # Create new
-    article = await article_crud.create_article(article_in)
+    article = await article_crud.create_article(article_in, fingerprint=fingerprint)
+    await _spread_new_article(article, background_tasks)
     return article
 
 
@@ -111,13 +326,11 @@ async def update_article(
     article_in: ArticleUpdate,
     current_user: dict = Depends(get_current_user),
 ):
-    article = await article_crud.get_article_by_id(article_id)
-    if not article:
+    updated_article = await article_crud.update_article(article_id, article_in)
+    if not updated_article:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Article not found"
         )
-
-    updated_article = await article_crud.update_article(article_id, article_in)
     return updated_article
 
 
@@ -125,11 +338,9 @@ async def update_article(
 async def delete_article(
     article_id: str, current_user: dict = Depends(get_current_user)
 ):
-    article = await article_crud.get_article_by_id(article_id)
-    if not article:
+    deleted = await article_crud.delete_article(article_id)
+    if not deleted:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Article not found"
         )
-
-    await article_crud.delete_article(article_id)
     return None
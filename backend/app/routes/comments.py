@@ -1,18 +1,40 @@
-from typing import List
+from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from fastapi.responses import StreamingResponse
 
+from app.core.config import settings
 from app.crud import article as article_crud
 from app.crud import comment as comment_crud
 from app.dependencies import get_current_user
-from app.schemas.comment import Comment, CommentCreate, CommentUpdate, CommentWithUser
+from app.schemas.comment import (
+    Comment,
+    CommentCreate,
+    CommentThread,
+    CommentUpdate,
+    CommentWithUser,
+)
+from app.utils.affinity import affinity_store
+from app.utils.events import STREAM_HEADERS, event_hub
+from app.utils.pagination import NEXT_CURSOR_HEADER, next_cursor
+from app.utils.trending import trending
 
 router = APIRouter()
 
 
+def _set_next_cursor(response: Response, comments: list, limit: int):
+    token = next_cursor(comments, "created_at", limit)
+    if token:
+        response.headers[NEXT_CURSOR_HEADER] = token
+
+
 @router.get("/articles/{article_id}/comments", response_model=List[CommentWithUser])
 async def get_article_comments(
-    article_id: str, skip: int = Query(0, ge=0), limit: int = Query(100, ge=1, le=100)
+    article_id: str,
+    response: Response,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=100),
+    cursor: Optional[str] = None,
 ):
     article = await article_crud.get_article_by_id(article_id)
     if not article:
@@ -21,30 +43,106 @@ async def get_article_comments(
         )
 
     comments = await comment_crud.get_comments_by_article(
-        article_id, skip=skip, limit=limit
+        article_id, skip=skip, limit=limit, cursor=cursor
     )
+    _set_next_cursor(response, comments, limit)
     return comments
 
 
+@router.get(
+    "/articles/{article_id}/comments/threads", response_model=List[CommentThread]
+)
+async def get_article_comment_threads(
+    article_id: str,
+    response: Response,
+    limit: int = Query(20, ge=1, le=100),
+    replies: int = Query(3, ge=0, le=20),
+    cursor: Optional[str] = None,
+):
+    article = await article_crud.get_article_by_id(article_id)
+    if not article:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Article not found"
+        )
+
+    threads = await comment_crud.get_threads(
+        {"article_id": article_id}, limit=limit, replies=replies, cursor=cursor
+    )
+    token = next_cursor(threads, "path", limit)
+    if token:
+        response.headers[NEXT_CURSOR_HEADER] = token
+    return threads
+
+
+@router.get("/articles/{article_id}/comments/stream")
+async def stream_article_comments(article_id: str):
+    """
+    Server-Sent Events: `comment` events for new comments and replies on the
+    article, and `likes` events as its like count moves.
+    """
+    article = await article_crud.get_article_by_id(article_id)
+    if not article:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Article not found"
+        )
+
+    return StreamingResponse(
+        event_hub.stream([f"article:{article_id}"]),
+        media_type="text/event-stream",
+        headers=STREAM_HEADERS,
+    )
+
+
+@router.get("/comments/{comment_id}/replies", response_model=List[CommentWithUser])
+async def get_comment_replies(
+    comment_id: str,
+    response: Response,
+    limit: int = Query(100, ge=1, le=100),
+    cursor: Optional[str] = None,
+):
+    comment = await comment_crud.get_comment_by_id(comment_id)
+    if not comment:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Comment not found"
+        )
+    if "path" not in comment:
+        # Written before comments were threaded, and never replied to.
+        return []
+
+    replies = await comment_crud.get_replies(comment, limit=limit, cursor=cursor)
+    token = next_cursor(replies, "path", limit)
+    if token:
+        response.headers[NEXT_CURSOR_HEADER] = token
+    return replies
+
+
 @router.get("/users/me/comments", response_model=List[CommentWithUser])
 async def get_my_comments(
+    response: Response,
     current_user: dict = Depends(get_current_user),
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=100),
+    cursor: Optional[str] = None,
 ):
     comments = await comment_crud.get_comments_by_user(
-        current_user["id"], skip=skip, limit=limit
+        current_user["id"], skip=skip, limit=limit, cursor=cursor
     )
+    _set_next_cursor(response, comments, limit)
     return comments
 
 
 @router.get("/users/{user_id}/comments", response_model=List[CommentWithUser])
 async def get_user_comments(
     user_id: str,
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=100),
+    cursor: Optional[str] = None,
 ):
-    comments = await comment_crud.get_comments_by_user(user_id, skip=skip, limit=limit)
+    comments = await comment_crud.get_comments_by_user(
+        user_id, skip=skip, limit=limit, cursor=cursor
+    )
+    _set_next_cursor(response, comments, limit)
     return comments
 
 
@@ -64,11 +162,29 @@ async def create_comment(
             status_code=status.HTTP_404_NOT_FOUND, detail="Article not found"
         )
 
+    parent = None
+    if comment_in.parent_id:
+        parent = await comment_crud.get_reply_parent(
+            comment_in.parent_id, {"article_id": article_id}
+        )
+        if not parent:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Parent comment not found",
+            )
+        if parent.get("depth", 0) >= settings.COMMENT_MAX_DEPTH:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Replies are nested too deeply",
+            )
+
     comment = await comment_crud.create_comment(
-        article_id, current_user["id"], comment_in
+        article_id, current_user["id"], comment_in, parent=parent
     )
 
     await article_crud.increment_comment_count(article_id, 1)
+    trending.record(article_id, "comment")
+    await affinity_store.record(current_user["id"], article.get("topics"), "comment")
 
     return comment
 
@@ -80,7 +196,7 @@ async def update_comment(
     current_user: dict = Depends(get_current_user),
 ):
     comment = await comment_crud.get_comment_by_id(comment_id)
-    if not comment:
+    if not comment or comment.get("deleted"):
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Comment not found"
         )
@@ -100,7 +216,7 @@ async def delete_comment(
     comment_id: str, current_user: dict = Depends(get_current_user)
 ):
     comment = await comment_crud.get_comment_by_id(comment_id)
-    if not comment:
+    if not comment or comment.get("deleted"):
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Comment not found"
         )
@@ -111,7 +227,13 @@ async def delete_comment(
             detail="Not authorized to delete this comment",
         )
 
-    await comment_crud.delete_comment(comment_id)
+    # Replies may be other users': a comment with some is only blanked out.
+    if comment.get("path") and await comment_crud.has_replies(comment):
+        await comment_crud.tombstone_comment(comment_id)
+    else:
+        await comment_crud.delete_comment(comment_id)
+    if comment.get("parent_id"):
+        await comment_crud.increment_reply_count(comment["thread_id"], -1)
 
     if comment.get("article_id"):
         await article_crud.increment_comment_count(comment["article_id"], -1)
@@ -1,33 +1,37 @@
-from typing import List
+from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 
 from app.crud import article as article_crud
 from app.crud import interaction as interaction_crud
 from app.dependencies import get_current_user
 from app.schemas.article import Article
-from app.schemas.interaction import InteractionStatus
-from app.utils.article_enricher import enrich_articles
+from app.schemas.interaction import (
+    InteractionBatch,
+    InteractionBatchResult,
+    InteractionStatus,
+)
+from app.utils.affinity import affinity_store
+from app.utils.events import publish
+from app.utils.pagination import NEXT_CURSOR_HEADER, next_cursor
+from app.utils.trending import trending
 
 router = APIRouter()
 
 
-@router.post("/articles/{article_id}/like")
-async def toggle_like_article(
-    article_id: str, current_user: dict = Depends(get_current_user)
-):
-    article = await article_crud.get_article_by_id(article_id)
-    if not article:
+async def _ensure_article_exists(article_id: str) -> List[str]:
+    """
+    404 unless the article exists. Returns its topics.
+    """
+    topics = await article_crud.get_article_topics(article_id)
+    if topics is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Article not found"
         )
+    return topics
 
-    interaction, like_increment = await interaction_crud.toggle_like(
-        current_user["id"], article_id
-    )
-
-    await article_crud.increment_like_count(article_id, like_increment)
 
+def _interaction_status(article_id: str, interaction: dict) -> dict:
     return {
         "article_id": article_id,
         "is_liked": interaction.get("is_liked", False),
@@ -35,23 +39,133 @@ async def toggle_like_article(
     }
 
 
+async def _publish_status(user_id: str, article_id: str, interaction: dict) -> dict:
+    """
+    The interaction status, also sent to the user's other open sessions.
+    """
+    interaction_status = _interaction_status(article_id, interaction)
+    await publish(f"user:{user_id}", "interaction", interaction_status)
+    return interaction_status
+
+
+async def _like_changed(
+    user_id: str, article_id: str, topics: List[str], like_increment: int
+):
+    """
+    Signals of a like that was just given (1) or taken back (-1).
+    """
+    trending.record(article_id, "like", like_increment)
+    await affinity_store.record(user_id, topics, "like", like_increment)
+    await publish(
+        f"article:{article_id}",
+        "likes",
+        {"article_id": article_id, "change": like_increment},
+    )
+
+
+async def _save_changed(
+    user_id: str, article_id: str, topics: List[str], save_increment: int
+):
+    # A repeated save is not new attention.
+    if save_increment > 0:
+        trending.record(article_id, "save")
+        await affinity_store.record(user_id, topics, "save")
+
+
+async def _apply_like(article_id: str, user_id: str, liked: Optional[bool]):
+    topics = await _ensure_article_exists(article_id)
+
+    if liked is None:
+        interaction, like_increment = await interaction_crud.toggle_like(
+            user_id, article_id
+        )
+    else:
+        interaction, like_increment = await interaction_crud.set_like(
+            user_id, article_id, liked
+        )
+
+    # Only touch the counter when the like state actually changed.
+    if like_increment:
+        await article_crud.increment_like_count(article_id, like_increment)
+        await _like_changed(user_id, article_id, topics, like_increment)
+
+    return await _publish_status(user_id, article_id, interaction)
+
+
+async def _apply_save(article_id: str, user_id: str, saved: Optional[bool]):
+    topics = await _ensure_article_exists(article_id)
+
+    if saved is None:
+        interaction, save_increment = await interaction_crud.toggle_save(
+            user_id, article_id
+        )
+    else:
+        interaction, save_increment = await interaction_crud.set_save(
+            user_id, article_id, saved
+        )
+
+    await _save_changed(user_id, article_id, topics, save_increment)
+    return await _publish_status(user_id, article_id, interaction)
+
+
+@router.post("/articles/{article_id}/like")
+async def toggle_like_article(
+    article_id: str, current_user: dict = Depends(get_current_user)
+):
+    return await _apply_like(article_id, current_user["id"], None)
+
+
+@router.put("/articles/{article_id}/like")
+async def like_article(article_id: str, current_user: dict = Depends(get_current_user)):
+    return await _apply_like(article_id, current_user["id"], True)
+
+
+@router.delete("/articles/{article_id}/like")
+async def unlike_article(
+    article_id: str, current_user: dict = Depends(get_current_user)
+):
+    return await _apply_like(article_id, current_user["id"], False)
+
+
 @router.post("/articles/{article_id}/save")
 async def toggle_save_article(
     article_id: str, current_user: dict = Depends(get_current_user)
 ):
-    article = await article_crud.get_article_by_id(article_id)
-    if not article:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND, detail="Article not found"
-        )
+    return await _apply_save(article_id, current_user["id"], None)
 
-    interaction = await interaction_crud.toggle_save(current_user["id"], article_id)
 
-    return {
-        "article_id": article_id,
-        "is_liked": interaction.get("is_liked", False),
-        "is_saved": interaction.get("is_saved", False),
-    }
+@router.put("/articles/{article_id}/save")
+async def save_article(article_id: str, current_user: dict = Depends(get_current_user)):
+    return await _apply_save(article_id, current_user["id"], True)
+
+
+@router.delete("/articles/{article_id}/save")
+async def unsave_article(
+    article_id: str, current_user: dict = Depends(get_current_user)
+):
+    return await _apply_save(article_id, current_user["id"], False)
+
+
+@router.post("/interactions/batch", response_model=InteractionBatchResult)
+async def sync_interactions(
+    batch: InteractionBatch, current_user: dict = Depends(get_current_user)
+):
+    """
+    Replay a queue of offline like/unlike/save/unsave actions in one request.
+    Only the final state per article is written, and only the flips it
+    made are signalled, as they would be by single requests.
+    """
+    states, skipped, changes = await interaction_crud.apply_interaction_batch(
+        current_user["id"], batch.actions
+    )
+    for change in changes:
+        args = (current_user["id"], change["article_id"], change["topics"])
+        if change["like"]:
+            await _like_changed(*args, change["like"])
+        await _save_changed(*args, change["save"])
+    for state in states:
+        await publish(f"user:{current_user['id']}", "interaction", state)
+    return {"states": states, "skipped": skipped}
 
 
 @router.get("/articles/{article_id}/status", response_model=InteractionStatus)
@@ -72,23 +186,34 @@ async def get_article_interaction_status(
 
 @router.get("/me/liked", response_model=List[Article])
 async def get_liked_articles(
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
     current_user: dict = Depends(get_current_user),
 ):
     articles = await interaction_crud.get_user_liked_articles(
-        current_user["id"], skip=skip, limit=limit
+        current_user["id"], skip=skip, limit=limit, cursor=cursor
     )
-    return await enrich_articles(articles, current_user)
+    token = next_cursor(articles, "liked_at", limit, id_field="interaction_id")
+    if token:
+        response.headers[NEXT_CURSOR_HEADER] = token
+    # liked/saved flags come back from the aggregation; no enrichment needed.
+    return articles
 
 
 @router.get("/me/saved", response_model=List[Article])
 async def get_saved_articles(
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
     current_user: dict = Depends(get_current_user),
 ):
     articles = await interaction_crud.get_user_saved_articles(
-        current_user["id"], skip=skip, limit=limit
+        current_user["id"], skip=skip, limit=limit, cursor=cursor
     )
-    return await enrich_articles(articles, current_user)
+    token = next_cursor(articles, "saved_at", limit, id_field="interaction_id")
+    if token:
+        response.headers[NEXT_CURSOR_HEADER] = token
+    return articles
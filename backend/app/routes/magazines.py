@@ -1,18 +1,22 @@
-from typing import List
+from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
 
+from app.core.config import settings
 from app.crud import article as crud_article
 from app.crud import comment as crud_comment
 from app.crud import magazine as crud_magazine
-from app.crud import notification as crud_notification
 from app.crud import user as crud_user
 from app.dependencies import get_current_user
 from app.schemas.article import Article
-from app.schemas.comment import CommentCreate, MagazineCommentWithUser
+from app.schemas.comment import CommentCreate, CommentThread, MagazineCommentWithUser
 from app.schemas.magazine import Magazine, MagazineCreate, MagazineUpdate
-from app.schemas.notification import NotificationCreate
 from app.utils.article_enricher import enrich_articles
+from app.utils.events import STREAM_HEADERS, event_hub
+from app.utils.http_cache import PRIVATE_REVALIDATE, make_etag, not_modified, version
+from app.utils.notification_fanout import notification_fanout
+from app.utils.pagination import NEXT_CURSOR_HEADER, next_cursor
 
 router = APIRouter()
 
@@ -38,18 +42,62 @@ async def get_magazine_articles(
 
 @router.get("/{magazine_id}/comments", response_model=List[MagazineCommentWithUser])
 async def get_magazine_comments(
-    magazine_id: str, skip: int = Query(0, ge=0), limit: int = Query(100, ge=1, le=100)
+    magazine_id: str,
+    response: Response,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=100),
+    cursor: Optional[str] = None,
 ):
     magazine = await crud_magazine.get_magazine_by_id(magazine_id)
     if not magazine:
         raise HTTPException(status_code=404, detail="Magazine not found")
 
     comments = await crud_comment.get_comments_by_magazine(
-        magazine_id, skip=skip, limit=limit
+        magazine_id, skip=skip, limit=limit, cursor=cursor
     )
+    token = next_cursor(comments, "created_at", limit)
+    if token:
+        response.headers[NEXT_CURSOR_HEADER] = token
     return comments
 
 
+@router.get("/{magazine_id}/comments/threads", response_model=List[CommentThread])
+async def get_magazine_comment_threads(
+    magazine_id: str,
+    response: Response,
+    limit: int = Query(20, ge=1, le=100),
+    replies: int = Query(3, ge=0, le=20),
+    cursor: Optional[str] = None,
+):
+    magazine = await crud_magazine.get_magazine_by_id(magazine_id)
+    if not magazine:
+        raise HTTPException(status_code=404, detail="Magazine not found")
+
+    threads = await crud_comment.get_threads(
+        {"magazine_id": magazine_id}, limit=limit, replies=replies, cursor=cursor
+    )
+    token = next_cursor(threads, "path", limit)
+    if token:
+        response.headers[NEXT_CURSOR_HEADER] = token
+    return threads
+
+
+@router.get("/{magazine_id}/comments/stream")
+async def stream_magazine_comments(magazine_id: str):
+    """
+    Server-Sent Events: `comment` events for new comments on the magazine.
+    """
+    magazine = await crud_magazine.get_magazine_by_id(magazine_id)
+    if not magazine:
+        raise HTTPException(status_code=404, detail="Magazine not found")
+
+    return StreamingResponse(
+        event_hub.stream([f"magazine:{magazine_id}"]),
+        media_type="text/event-stream",
+        headers=STREAM_HEADERS,
+    )
+
+
 @router.post(
     "/{magazine_id}/comments",
     response_model=MagazineCommentWithUser,
@@ -64,8 +112,18 @@ async def create_magazine_comment(
     if not magazine:
         raise HTTPException(status_code=404, detail="Magazine not found")
 
+    parent = None
+    if comment_in.parent_id:
+        parent = await crud_comment.get_reply_parent(
+            comment_in.parent_id, {"magazine_id": magazine_id}
+        )
+        if not parent:
+            raise HTTPException(status_code=404, detail="Parent comment not found")
+        if parent.get("depth", 0) >= settings.COMMENT_MAX_DEPTH:
+            raise HTTPException(status_code=400, detail="Replies are nested too deeply")
+
     comment = await crud_comment.create_magazine_comment(
-        magazine_id, current_user["id"], comment_in
+        magazine_id, current_user["id"], comment_in, parent=parent
     )
 
     return comment
@@ -108,13 +166,18 @@ async def get_followed_magazines(current_user: dict = Depends(get_current_user))
 
 @router.get("/explore", response_model=List[Magazine])
 async def get_explore_magazines(
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=100),
+    cursor: Optional[str] = None,
     current_user: dict = Depends(get_current_user),
 ):
     magazines = await crud_magazine.get_all_magazines(
-        skip=skip, limit=limit, exclude_user_id=current_user["id"]
+        skip=skip, limit=limit, exclude_user_id=current_user["id"], cursor=cursor
     )
+    token = next_cursor(magazines, "updated_at", limit)
+    if token:
+        response.headers[NEXT_CURSOR_HEADER] = token
     return await crud_magazine.enrich_magazines_with_covers(magazines)
 
 
@@ -145,8 +208,22 @@ async def unfollow_magazine(
 
 @router.get("/{magazine_id}", response_model=Magazine)
 async def get_magazine(
-    magazine_id: str, current_user: dict = Depends(get_current_user)
+    magazine_id: str,
+    request: Request,
+    response: Response,
+    current_user: dict = Depends(get_current_user),
 ):
+    stamp = await crud_magazine.get_magazine_version(magazine_id)
+    if not stamp:
+        raise HTTPException(status_code=404, detail="Magazine not found")
+    # Adding or removing an article stamps the magazine, so a new cover
+    # article changes the tag too.
+    updated_at = version(stamp)
+    etag = make_etag(magazine_id, updated_at)
+    cached = not_modified(request, response, etag, PRIVATE_REVALIDATE, updated_at)
+    if cached:
+        return cached
+
     magazine = await crud_magazine.get_magazine_by_id(magazine_id)
     if not magazine:
         raise HTTPException(status_code=404, detail="Magazine not found")
@@ -206,22 +283,16 @@ async def add_article(
 
     await crud_magazine.add_article_to_magazine(magazine_id, article_id)
 
-    # Notify followers of the magazine
-    if magazine and article:
-        followers = await crud_user.get_users_following_magazine(magazine_id)
-        notification_message = (
+    # Followers are notified in the background; the owner is not notified
+    # of their own action.
+    notification_fanout.submit(
+        magazine_id=magazine_id,
+        article_id=article_id,
+        message=(
             f"New article '{article['title']}' added to '{magazine['name']}' magazine."
-        )
-        for user_data in followers:
-            # Ensure the magazine owner does not get a notification for their own action
-            if user_data["id"] != current_user["id"]:
-                notification_in = NotificationCreate(
-                    user_id=user_data["id"],
-                    magazine_id=magazine_id,
-                    article_id=article_id,
-                    message=notification_message,
-                )
-                await crud_notification.create_notification(notification_in)
+        ),
+        exclude_user_id=current_user["id"],
+    )
 
     return {"message": "Article added to magazine"}
 
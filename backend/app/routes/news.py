@@ -1,17 +1,30 @@
-from typing import Optional
+from typing import List, Literal, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
 
+from app.core.config import settings
 from app.crud import article as article_crud
+from app.crud import entity as entity_crud
 from app.crud import interaction as interaction_crud
 from app.crud import news as news_crud
 from app.crud import topic as topic_crud
 from app.dependencies import get_current_user
-from app.models.news import NewsResponse
+from app.models.news import EntityNews, EntitySummary, NewsResponse
+from app.utils.cache import TTLCache
+from app.utils.http_cache import make_etag, not_modified
+from app.utils.near_duplicates import news_fingerprints
 from app.utils.scraper import scrape_article_content
 
 router = APIRouter()
 
+# url -> ETag of the content last scraped from it
+_content_etags = TTLCache(
+    maxsize=settings.NEWS_CONTENT_ETAG_MAX_ENTRIES,
+    ttl=settings.NEWS_CONTENT_ETAG_TTL_SECONDS,
+)
+
+EntityType = Literal["person", "organization", "location"]
+
 
 async def enrich_news_response(response: NewsResponse, user: Optional[dict]):
     if not user or not response.posts:
@@ -27,19 +40,21 @@ async def enrich_news_response(response: NewsResponse, user: Optional[dict]):
         return response
 
     # Get interaction status for these existing articles
-    article_ids = [a["id"] for a in existing_articles]
-    interactions_map = await interaction_crud.get_user_interactions_for_articles(
-        user["id"], article_ids
-    )
+    state = await interaction_crud.get_interaction_state(user["id"])
 
     # Update posts
     for post in response.posts:
         if post.url in existing_map:
             article_id = existing_map[post.url]["id"]
-            status = interactions_map.get(article_id, {})
-            post.liked = status.get("is_liked", False)
-            post.saved = status.get("is_saved", False)
+            post.liked = article_id in state.liked
+            post.saved = article_id in state.saved
+
+    return response
+
 
+def _collapse(response: NewsResponse) -> NewsResponse:
+    # One post per wire story; the other sites are listed on it.
+    response.posts = news_fingerprints.collapse(response.posts)
     return response
 
 
@@ -73,7 +88,7 @@ async def get_news_feed(
             response = await news_crud.fetch_news(
                 query="news", timestamp=ts, size=size, country=country
             )
-            return await enrich_news_response(response, current_user)
+            return await enrich_news_response(_collapse(response), current_user)
 
         print("DEBUG: Fetching topics from DB...")
         topics = await topic_crud.get_topics_by_ids(followed_topic_ids)
@@ -87,7 +102,7 @@ async def get_news_feed(
             response = await news_crud.fetch_news(
                 query="news", timestamp=ts, size=size, country=country
             )
-            return await enrich_news_response(response, current_user)
+            return await enrich_news_response(_collapse(response), current_user)
 
         print(
             f"DEBUG: Calling fetch_news_feed with topics: {topic_names}, "
@@ -102,7 +117,7 @@ async def get_news_feed(
         )
         print(f"DEBUG: Received response with {len(response.posts)} posts")
 
-        return await enrich_news_response(response, current_user)
+        return await enrich_news_response(_collapse(response), current_user)
     except Exception as e:
         import traceback
 
@@ -118,14 +133,31 @@ async def get_news_feed(
 
 @router.get("/content")
 async def get_article_content(
+    request: Request,
+    response: Response,
     url: str = Query(..., description="The URL of the article to scrape"),
     current_user: dict = Depends(get_current_user),
 ):
     """
     Scrape the full content of an article from a given URL.
+
+    The tag of each page scraped lately is remembered, so a client
+    revalidating its copy is answered without scraping the page again.
     """
+    cache_control = f"private, max-age={settings.NEWS_CONTENT_ETAG_TTL_SECONDS}"
+    etag = _content_etags.get(url)
+    if etag:
+        cached = not_modified(request, response, etag, cache_control)
+        if cached:
+            return cached
+
     try:
         content = await scrape_article_content(url)
+        etag = make_etag(content)
+        _content_etags.set(url, etag)
+        cached = not_modified(request, response, etag, cache_control)
+        if cached:
+            return cached
         return {"content": content}
     except Exception as e:
         raise HTTPException(
@@ -204,6 +236,54 @@ async def get_news_by_topic(
     return await enrich_news_response(response, current_user)
 
 
+@router.get("/entities", response_model=List[EntitySummary])
+async def search_entities(
+    prefix: str = Query(..., min_length=1, description="Start of an entity name"),
+    limit: int = Query(10, ge=1, le=50),
+    current_user: dict = Depends(get_current_user),
+):
+    """
+    Autocomplete people, organizations and locations mentioned in fetched
+    news, most mentioned first. Served from the entity index; no upstream
+    call is made.
+    """
+    return await entity_crud.search_entities(prefix, limit=limit)
+
+
+@router.get("/entities/trending", response_model=List[EntitySummary])
+async def get_trending_entities(
+    days: int = Query(1, ge=1, le=settings.NEWS_ENTITY_TTL_DAYS),
+    type: Optional[EntityType] = Query(None),
+    limit: int = Query(10, ge=1, le=50),
+    current_user: dict = Depends(get_current_user),
+):
+    """
+    The entities mentioned by the most fetched posts published in the last
+    `days` days.
+    """
+    return await entity_crud.get_trending_entities(
+        days=days, entity_type=type, limit=limit
+    )
+
+
+@router.get("/entity/{name}", response_model=EntityNews)
+async def get_entity_news(
+    name: str,
+    type: Optional[EntityType] = Query(None),
+    limit: int = Query(10, ge=1, le=50),
+    current_user: dict = Depends(get_current_user),
+):
+    """
+    Mention and sentiment totals for an entity, with its most recent posts.
+    """
+    entity = await entity_crud.get_entity(name, entity_type=type, limit=limit)
+    if entity is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Entity not found"
+        )
+    return entity
+
+
 @router.get("/next", response_model=NewsResponse)
 async def get_next_news_page(
     next_url: str = Query(
@@ -1,24 +1,32 @@
-from typing import List
+from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from fastapi.responses import StreamingResponse
 
 from app.crud import notification as crud_notification
 from app.dependencies import get_current_user
 from app.schemas.notification import Notification, NotificationUpdate
+from app.utils.events import STREAM_HEADERS, event_hub
+from app.utils.pagination import NEXT_CURSOR_HEADER, next_cursor
 
 router = APIRouter()
 
 
 @router.get("/", response_model=List[Notification])
 async def get_notifications(
+    response: Response,
     current_user: dict = Depends(get_current_user),
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=100),
     read: bool = Query(None, description="Filter by read status"),
+    cursor: Optional[str] = None,
 ):
     notifications = await crud_notification.get_notifications_for_user(
-        user_id=current_user["id"], skip=skip, limit=limit, read=read
+        user_id=current_user["id"], skip=skip, limit=limit, read=read, cursor=cursor
     )
+    token = next_cursor(notifications, "created_at", limit)
+    if token:
+        response.headers[NEXT_CURSOR_HEADER] = token
     return notifications
 
 
@@ -32,6 +40,25 @@ async def get_unread_notifications_count(
     return count
 
 
+@router.get("/stream")
+async def stream_notifications(current_user: dict = Depends(get_current_user)):
+    """
+    Server-Sent Events: the unread count once, then `notification` events as
+    they are created and `interaction` events from the user's other sessions.
+    """
+    user_id = current_user["id"]
+
+    async def unread_count():
+        count = await crud_notification.get_unread_notifications_count(user_id)
+        return [{"type": "count", "data": {"unread": count}}]
+
+    return StreamingResponse(
+        event_hub.stream([f"user:{user_id}"], snapshot=unread_count),
+        media_type="text/event-stream",
+        headers=STREAM_HEADERS,
+    )
+
+
 @router.put("/{notification_id}", response_model=Notification)
 async def update_notification(
     notification_id: str,
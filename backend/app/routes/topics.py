@@ -1,27 +1,47 @@
 from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
 
 from app.crud import topic as topic_crud
 from app.crud import user as user_crud
 from app.dependencies import get_current_user
 from app.schemas.topic import Topic, TopicBulkFollow, TopicCreate
+from app.utils.http_cache import PUBLIC_SHORT, make_etag, not_modified, version
 
 router = APIRouter()
 
 
 @router.get("/", response_model=List[Topic])
 async def get_topics(
+    request: Request,
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=100),
     search: Optional[str] = None,
 ):
+    count, latest = await topic_crud.get_topics_version(search=search)
+    etag = make_etag("topics", skip, limit, search, count, latest)
+    cached = not_modified(request, response, etag, PUBLIC_SHORT, latest)
+    if cached:
+        return cached
+
     topics = await topic_crud.get_topics(skip=skip, limit=limit, search=search)
     return topics
 
 
 @router.get("/{topic_id}", response_model=Topic)
-async def get_topic(topic_id: str):
+async def get_topic(topic_id: str, request: Request, response: Response):
+    stamp = await topic_crud.get_topic_version(topic_id)
+    if not stamp:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Topic not found"
+        )
+    updated_at = version(stamp)
+    etag = make_etag(topic_id, updated_at)
+    cached = not_modified(request, response, etag, PUBLIC_SHORT, updated_at)
+    if cached:
+        return cached
+
     topic = await topic_crud.get_topic_by_id(topic_id)
     if not topic:
         raise HTTPException(
@@ -62,8 +82,15 @@ async def bulk_follow_topics(
 
     await user_crud.update_followed_topics(current_user["id"], topic_ids)
 
-    for topic_id in topic_ids:
-        await topic_crud.increment_follower_count(topic_id)
+    # The followed list is replaced, so only count the actual difference:
+    # re-following a topic must not increment it again.
+    previous = current_user.get("followed_topics", [])
+    for topic_id in dict.fromkeys(topic_ids):
+        if topic_id not in previous:
+            await topic_crud.increment_follower_count(topic_id, 1)
+    for topic_id in previous:
+        if topic_id not in topic_ids:
+            await topic_crud.increment_follower_count(topic_id, -1)
 
     return {"message": "Topics followed successfully", "followed_topics": topic_ids}
 
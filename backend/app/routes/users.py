@@ -1,17 +1,30 @@
 from typing import List
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 
 from app.crud import user as user_crud
 from app.dependencies import get_current_user
 from app.schemas.user import User, UserPublic, UserUpdate
+from app.utils.http_cache import PUBLIC_REVALIDATE, make_etag, not_modified, version
 from app.utils.newsletter import process_weekly_newsletter
 
 router = APIRouter()
 
 
 @router.get("/{username}", response_model=UserPublic)
-async def get_user_by_username(username: str):
+async def get_user_by_username(username: str, request: Request, response: Response):
+    stamp = await user_crud.get_user_version(username)
+    if not stamp:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found",
+        )
+    updated_at = version(stamp)
+    etag = make_etag(stamp["id"], updated_at)
+    cached = not_modified(request, response, etag, PUBLIC_REVALIDATE, updated_at)
+    if cached:
+        return cached
+
     user = await user_crud.get_user_by_username(username)
     if not user:
         raise HTTPException(
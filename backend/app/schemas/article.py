@@ -18,6 +18,7 @@ class ArticleBase(BaseModel):
 
 class ArticleCreate(ArticleBase):
     id: Optional[str] = None
+    language: Optional[str] = None
 
 
 class ArticleUpdate(BaseModel):
@@ -34,6 +35,8 @@ class ArticleUpdate(BaseModel):
 
 class Article(ArticleBase):
     id: str
+    # Left empty unless the request read or wrote the body.
+    content: str = ""
     view_count: int
     like_count: int
     comment_count: int
@@ -47,6 +50,7 @@ class Article(ArticleBase):
 
 class ArticleList(BaseModel):
     articles: List[Article]
-    total: int
+    total: Optional[int] = None
     skip: int
     limit: int
+    next_cursor: Optional[str] = None
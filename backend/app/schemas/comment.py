@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional
 
 from pydantic import BaseModel
 
@@ -9,7 +9,8 @@ class CommentBase(BaseModel):
 
 
 class CommentCreate(CommentBase):
-    pass
+    # Set to reply to another comment on the same article or magazine.
+    parent_id: Optional[str] = None
 
 
 class CommentUpdate(BaseModel):
@@ -22,6 +23,12 @@ class Comment(CommentBase):
     magazine_id: Optional[str] = None
     user_id: str
     article_title: Optional[str] = None
+    parent_id: Optional[str] = None
+    depth: int = 0
+    # Replies in the thread, on top-level comments.
+    reply_count: int = 0
+    # Deleted, but kept blank for the replies under it.
+    deleted: bool = False
     created_at: datetime
     updated_at: Optional[datetime] = None
 
@@ -33,10 +40,18 @@ class CommentWithUser(Comment):
     user: Dict[str, Any]
 
 
+class CommentThread(CommentWithUser):
+    replies: List[CommentWithUser] = []
+
+
 class MagazineComment(CommentBase):
     id: str
     magazine_id: str
     user_id: str
+    parent_id: Optional[str] = None
+    depth: int = 0
+    reply_count: int = 0
+    deleted: bool = False
     created_at: datetime
     updated_at: Optional[datetime] = None
 
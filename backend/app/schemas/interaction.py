@@ -1,7 +1,10 @@
 from datetime import datetime
-from typing import Optional
+from typing import List, Literal, Optional
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+
+# Upper bound on actions replayed in one batch request.
+MAX_BATCH_ACTIONS = 500
 
 
 class InteractionBase(BaseModel):
@@ -24,3 +27,19 @@ class InteractionStatus(BaseModel):
     article_id: str
     is_liked: bool
     is_saved: bool
+
+
+class InteractionAction(BaseModel):
+    article_id: str
+    action: Literal["like", "unlike", "save", "unsave"]
+    timestamp: datetime
+
+
+class InteractionBatch(BaseModel):
+    actions: List[InteractionAction] = Field(..., max_length=MAX_BATCH_ACTIONS)
+
+
+class InteractionBatchResult(BaseModel):
+    states: List[InteractionStatus]
+    # Articles referenced by the batch that no longer exist.
+    skipped: List[str] = []
@@ -0,0 +1,220 @@
+import logging
+import time
+from typing import Dict, Iterable, List, Optional
+
+import anyio
+import numpy as np
+from bson import Binary
+from pymongo import UpdateOne
+
+from app.core.config import settings
+from app.crud import interaction as interaction_crud
+from app.db.database import db
+from app.utils.cache import TTLCache
+from app.utils.trending import EVENT_WEIGHTS
+
+logger = logging.getLogger(__name__)
+
+
+class AffinityProfile:
+    """
+    How much a user reads each topic: one decayed weight per topic id.
+
+    Weights are stored as of `updated_at` and halve every half-life, so old
+    reading habits fade out. On disk the weights are a little-endian float32
+    array next to the list of topic ids.
+    """
+
+    __slots__ = ("topics", "weights", "updated_at")
+
+    def __init__(
+        self,
+        topics: Optional[List[str]] = None,
+        weights: Optional[np.ndarray] = None,
+        updated_at: float = 0.0,
+    ):
+        self.topics = topics or []
+        self.weights = (
+            np.zeros(len(self.topics)) if weights is None else np.asarray(weights)
+        )
+        self.updated_at = updated_at
+
+    def _decay_to(self, now: float, half_life: float):
+        if now > self.updated_at and len(self.weights):
+            self.weights = self.weights * 0.5 ** ((now - self.updated_at) / half_life)
+        self.updated_at = max(now, self.updated_at)
+
+    def add(
+        self,
+        topics: Iterable[str],
+        weight: float,
+        now: float,
+        half_life: float,
+        max_topics: int,
+    ):
+        self._decay_to(now, half_life)
+        new_topics = [
+            topic for topic in dict.fromkeys(topics) if topic not in self.topics
+        ]
+        if new_topics:
+            self.topics = self.topics + new_topics
+            self.weights = np.concatenate([self.weights, np.zeros(len(new_topics))])
+        index = {topic: i for i, topic in enumerate(self.topics)}
+        rows = [index[topic] for topic in dict.fromkeys(topics)]
+        self.weights[rows] = np.maximum(self.weights[rows] + weight, 0.0)
+
+        if len(self.topics) > max_topics:
+            keep = np.sort(np.argsort(-self.weights, kind="stable")[:max_topics])
+            self.topics = [self.topics[i] for i in keep]
+            self.weights = self.weights[keep]
+
+    def shares(self, now: float, half_life: float) -> Dict[str, float]:
+        """
+        Each topic's share of the total weight. Decay scales every weight by
+        the same factor, so the shares do not depend on `now`.
+        """
+        total = float(self.weights.sum())
+        if total <= 0:
+            return {}
+        return {
+            topic: float(weight) / total
+            for topic, weight in zip(self.topics, self.weights)
+            if weight > 0
+        }
+
+    def to_document(self, user_id: str) -> dict:
+        return {
+            "user_id": user_id,
+            "topics": self.topics,
+            "weights": Binary(self.weights.astype("<f4").tobytes()),
+            "updated_at": self.updated_at,
+        }
+
+    @classmethod
+    def from_document(cls, doc: dict) -> "AffinityProfile":
+        weights = np.frombuffer(bytes(doc["weights"]), dtype="<f4").astype(np.float64)
+        return cls(list(doc["topics"]), weights, doc["updated_at"])
+
+
+class AffinityStore:
+    """
+    Per-user topic affinity profiles, updated in memory on every view, like,
+    save and comment and written behind to `topic_affinity`.
+
+    Profiles are kept in a bounded LRU cache. Changed profiles are held until
+    the next flush, so an eviction never loses an update. Like the view
+    buffer, each process writes its own copy: when two workers update the
+    same user between flushes, the last flush wins.
+    """
+
+    def __init__(self, half_life: float, max_topics: int, cache_size: int):
+        self.half_life = half_life
+        self.max_topics = max_topics
+        self._profiles = TTLCache(maxsize=cache_size)
+        self._dirty: Dict[str, AffinityProfile] = {}
+        self.flushed = 0
+
+    async def profile(self, user_id: str) -> AffinityProfile:
+        profile = self._dirty.get(user_id) or self._profiles.get(user_id)
+        if profile is not None:
+            return profile
+
+        doc = await db.topic_affinity.find_one({"user_id": user_id}, {"_id": 0})
+        if doc:
+            profile = AffinityProfile.from_document(doc)
+        else:
+            # First use: start from the user's like and save history, once.
+            history = await interaction_crud.get_topic_affinity(user_id)
+            profile = AffinityProfile(
+                list(history), np.array(list(history.values())), time.time()
+            )
+            self._dirty[user_id] = profile
+        self._profiles.set(user_id, profile)
+        return profile
+
+    async def record(
+        self,
+        user_id: str,
+        topics: Optional[Iterable[str]],
+        event: str,
+        amount: int = 1,
+        now: Optional[float] = None,
+    ):
+        """
+        Add `amount` events of kind `event` on an article with `topics`. A
+        negative amount (an unlike) takes the weight back off.
+        """
+        topics = list(topics or [])
+        if not topics:
+            return
+        profile = await self.profile(user_id)
+        profile.add(
+            topics,
+            EVENT_WEIGHTS[event] * amount,
+            time.time() if now is None else now,
+            self.half_life,
+            self.max_topics,
+        )
+        self._dirty[user_id] = profile
+
+    async def shares(self, user_id: str) -> Dict[str, float]:
+        profile = await self.profile(user_id)
+        return profile.shares(time.time(), self.half_life)
+
+    async def flush(self) -> int:
+        """
+        Write every changed profile in one unordered bulk upsert. On failure
+        the profiles stay pending for the next flush.
+        """
+        if not self._dirty:
+            return 0
+
+        batch, self._dirty = self._dirty, {}
+        operations = [
+            UpdateOne(
+                {"user_id": user_id},
+                {"$set": profile.to_document(user_id)},
+                upsert=True,
+            )
+            for user_id, profile in batch.items()
+        ]
+        try:
+            await db.topic_affinity.bulk_write(operations, ordered=False)
+        except Exception:
+            # Profiles changed since the swap are newer; keep those.
+            self._dirty = {**batch, **self._dirty}
+            raise
+        self.flushed += len(batch)
+        return len(batch)
+
+    def clear(self):
+        self._profiles.clear()
+        self._dirty.clear()
+
+    def stats(self) -> dict:
+        return {
+            **self._profiles.stats(),
+            "pending": len(self._dirty),
+            "flushed": self.flushed,
+        }
+
+
+affinity_store = AffinityStore(
+    half_life=settings.AFFINITY_HALF_LIFE_DAYS * 86400,
+    max_topics=settings.AFFINITY_MAX_TOPICS,
+    cache_size=settings.AFFINITY_CACHE_MAX_USERS,
+)
+
+
+async def run_affinity_flush_loop():
+    """
+    Flush changed profiles every AFFINITY_FLUSH_INTERVAL_SECONDS until
+    cancelled.
+    """
+    while True:
+        await anyio.sleep(settings.AFFINITY_FLUSH_INTERVAL_SECONDS)
+        with anyio.CancelScope(shield=True):
+            try:
+                await affinity_store.flush()
+            except Exception as e:
+                logger.error(f"Affinity profile flush failed: {str(e)}")
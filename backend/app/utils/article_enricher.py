@@ -5,11 +5,9 @@ async def enrich_article(article, user):
     if not user:
         return article
 
-    # Check interaction
-    interaction = await interaction_crud.get_interaction(user["id"], article["id"])
-    if interaction:
-        article["liked"] = interaction.get("is_liked", False)
-        article["saved"] = interaction.get("is_saved", False)
+    state = await interaction_crud.get_interaction_state(user["id"])
+    article["liked"] = article["id"] in state.liked
+    article["saved"] = article["id"] in state.saved
     return article
 
 
@@ -17,13 +15,8 @@ async def enrich_articles(articles, user):
     if not user:
         return articles
 
-    ids = [a["id"] for a in articles]
-    interactions_map = await interaction_crud.get_user_interactions_for_articles(
-        user["id"], ids
-    )
-
+    state = await interaction_crud.get_interaction_state(user["id"])
     for a in articles:
-        status = interactions_map.get(a["id"], {})
-        a["liked"] = status.get("is_liked", False)
-        a["saved"] = status.get("is_saved", False)
+        a["liked"] = a["id"] in state.liked
+        a["saved"] = a["id"] in state.saved
     return articles
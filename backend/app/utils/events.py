@@ -0,0 +1,224 @@
+import json
+import logging
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import (
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Tuple,
+)
+
+import anyio
+from anyio.streams.memory import MemoryObjectSendStream
+from fastapi.encoders import jsonable_encoder
+from pymongo.errors import OperationFailure
+
+from app.core.config import settings
+from app.db.database import db
+
+logger = logging.getLogger(__name__)
+
+# Sent when no event came for a heartbeat interval, so proxies keep the
+# connection open and dead clients are noticed on the next write.
+HEARTBEAT = ": heartbeat\n\n"
+# Sent before a stream ends on the server's side: the client missed events
+# (or the server is stopping) and should reload what it shows, then reconnect.
+RESET_EVENT = {"type": "reset", "data": {}}
+# Response headers of an event stream: never cached, never buffered by nginx.
+STREAM_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+
+def format_event(event: dict) -> str:
+    data = json.dumps(jsonable_encoder(event["data"]), separators=(",", ":"))
+    return f"event: {event['type']}\ndata: {data}\n\n"
+
+
+class EventHub:
+    """
+    In-process publish/subscribe of live events, for Server-Sent Events.
+
+    Every connection gets a bounded queue per subscription. Publishing never
+    waits on a connection: one whose queue is full is a client that stopped
+    reading, and is disconnected rather than buffered for without bound.
+    It is sent a `reset` event once it has drained what was queued.
+    """
+
+    def __init__(self, queue_size: int, heartbeat: float):
+        self.queue_size = queue_size
+        self.heartbeat = heartbeat
+        self._subscribers: Dict[str, set] = {}
+        self.published = 0
+        self.delivered = 0
+        self.disconnected = 0
+
+    @contextmanager
+    def subscribe(self, channels: Iterable[str]):
+        """
+        A receive stream of the events published on any of `channels`,
+        while the context is open.
+        """
+        channels = list(channels)
+        send, receive = anyio.create_memory_object_stream(self.queue_size)
+        for channel in channels:
+            self._subscribers.setdefault(channel, set()).add(send)
+        try:
+            yield receive
+        finally:
+            for channel in channels:
+                self._unsubscribe(channel, send)
+            send.close()
+            receive.close()
+
+    def _unsubscribe(self, channel: str, send: MemoryObjectSendStream):
+        subscribers = self._subscribers.get(channel)
+        if subscribers is None:
+            return
+        subscribers.discard(send)
+        if not subscribers:
+            del self._subscribers[channel]
+
+    def dispatch(self, event: dict) -> int:
+        """
+        Queue `event` for every subscriber of its channel. Returns how many
+        subscribers it was queued for.
+        """
+        self.published += 1
+        delivered = 0
+        for send in list(self._subscribers.get(event["channel"], ())):
+            try:
+                send.send_nowait(event)
+                delivered += 1
+            except anyio.WouldBlock:
+                send.close()
+                self._unsubscribe(event["channel"], send)
+                self.disconnected += 1
+            except (anyio.BrokenResourceError, anyio.ClosedResourceError):
+                self._unsubscribe(event["channel"], send)
+        self.delivered += delivered
+        return delivered
+
+    async def stream(
+        self,
+        channels: Iterable[str],
+        snapshot: Optional[Callable[[], Awaitable[List[dict]]]] = None,
+    ) -> AsyncIterator[str]:
+        """
+        The events published on `channels`, as an SSE body. `snapshot` is
+        called once subscribed, so nothing published meanwhile is missed,
+        and its events are sent first.
+        """
+        with self.subscribe(channels) as receive:
+            if snapshot is not None:
+                for event in await snapshot():
+                    yield format_event(event)
+            while True:
+                event = None
+                try:
+                    with anyio.move_on_after(self.heartbeat):
+                        event = await receive.receive()
+                except anyio.EndOfStream:
+                    yield format_event(RESET_EVENT)
+                    return
+                yield format_event(event) if event else HEARTBEAT
+
+    def close(self):
+        """
+        End every open stream, e.g. on shutdown.
+        """
+        for subscribers in list(self._subscribers.values()):
+            for send in list(subscribers):
+                send.close()
+        self._subscribers.clear()
+
+    def stats(self) -> dict:
+        return {
+            "channels": len(self._subscribers),
+            "connections": len(
+                {
+                    send
+                    for subscribers in self._subscribers.values()
+                    for send in subscribers
+                }
+            ),
+            "published": self.published,
+            "delivered": self.delivered,
+            "disconnected": self.disconnected,
+        }
+
+
+event_hub = EventHub(
+    queue_size=settings.EVENTS_QUEUE_SIZE, heartbeat=settings.EVENTS_HEARTBEAT_SECONDS
+)
+
+
+def _event(channel: str, event_type: str, data: dict) -> dict:
+    return {
+        "channel": channel,
+        "type": event_type,
+        "data": {key: value for key, value in data.items() if key != "_id"},
+    }
+
+
+async def publish(channel: str, event_type: str, data: dict):
+    """
+    Publish an event to the subscribers of `channel`: to this process's
+    directly, or through the `events` collection to every worker's when the
+    change stream relay is on.
+    """
+    await publish_many([(channel, event_type, data)])
+
+
+async def publish_many(events: Iterable[Tuple[str, str, dict]]):
+    """
+    Publish `(channel, type, data)` events, relayed in one write.
+
+    Best effort: events follow writes that are already committed, so a
+    failed relay write is logged rather than failing the caller, whose
+    retry would repeat the write.
+    """
+    events = [_event(*event) for event in events]
+    if not events:
+        return
+    if not settings.EVENTS_CHANGE_STREAM:
+        for event in events:
+            event_hub.dispatch(event)
+        return
+    now = datetime.utcnow()
+    expires_at = now + timedelta(seconds=settings.EVENTS_TTL_SECONDS)
+    for event in events:
+        event["created_at"] = now
+        event["expires_at"] = expires_at
+    try:
+        await db.events.insert_many(events, ordered=False)
+    except Exception as e:
+        logger.error(f"Relaying {len(events)} events failed: {str(e)}")
+
+
+async def run_event_relay_loop():
+    """
+    Dispatch the events every worker publishes, read from the change stream
+    of the `events` collection, until cancelled. Needs a replica set.
+    """
+    resume_token = None
+    while True:
+        try:
+            async with db.events.watch(
+                [{"$match": {"operationType": "insert"}}], resume_after=resume_token
+            ) as changes:
+                async for change in changes:
+                    resume_token = change["_id"]
+                    event_hub.dispatch(change["fullDocument"])
+        except OperationFailure as e:
+            # e.g. the oplog no longer reaches back to the resume token.
+            logger.error(f"Event relay lost its place: {str(e)}")
+            resume_token = None
+        except Exception as e:
+            logger.error(f"Event relay failed: {str(e)}")
+        # Streams may have missed events while the relay was down.
+        event_hub.close()
+        await anyio.sleep(settings.EVENTS_RELAY_RETRY_SECONDS)
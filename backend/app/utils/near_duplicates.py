@@ -0,0 +1,184 @@
+import hashlib
+from collections import Counter
+from itertools import combinations
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from app.core.config import settings
+from app.models.news import Coverage, NewsPost
+from app.utils.cache import TTLCache
+from app.utils.text import tokenize
+
+# Fingerprints at most MAX_DISTANCE bits apart are the same story. Split in
+# BLOCKS parts, two such fingerprints agree on at least two of them, so each
+# pair of blocks is an LSH bucket key and only fingerprints sharing a key
+# need to be compared. Keys of two blocks are 18 bits or more wide, which
+# keeps buckets small however many articles are stored. News bodies are
+# short, so a light edit flips more bits than on a long page.
+MAX_DISTANCE = 5
+BLOCKS = MAX_DISTANCE + 2
+_BLOCK_EDGES = [block * 64 // BLOCKS for block in range(BLOCKS + 1)]
+_BLOCK_PAIRS = list(combinations(range(BLOCKS), 2))
+BANDS = len(_BLOCK_PAIRS)
+_BLOCK_BITS = max(b - a for a, b in zip(_BLOCK_EDGES, _BLOCK_EDGES[1:]))
+# Headlines are rewritten less than bodies; weigh their words higher.
+TITLE_WEIGHT = 3
+MAX_TEXT_CHARS = 5000
+
+_BIT_POSITIONS = np.arange(64, dtype=np.uint64)
+
+
+def _shingles(text: Optional[str]) -> List[str]:
+    tokens = tokenize(text)
+    if len(tokens) < 2:
+        return tokens
+    return [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+
+
+def simhash(title: Optional[str], text: Optional[str]) -> int:
+    """
+    64-bit SimHash of a story's word pairs. Texts that share most of their
+    word pairs get fingerprints that differ in only a few bits.
+    """
+    features = Counter(_shingles((text or "")[:MAX_TEXT_CHARS]))
+    for shingle in _shingles(title):
+        features[shingle] += TITLE_WEIGHT
+    if not features:
+        return 0
+
+    hashes = np.fromiter(
+        (
+            int.from_bytes(hashlib.blake2b(f.encode(), digest_size=8).digest(), "big")
+            for f in features
+        ),
+        dtype=np.uint64,
+        count=len(features),
+    )
+    weights = np.fromiter(features.values(), dtype=np.int64, count=len(features))
+    bits = ((hashes[:, None] >> _BIT_POSITIONS) & np.uint64(1)).astype(np.int64)
+    votes = weights @ (2 * bits - 1)
+    return int(np.packbits((votes > 0)[::-1]).view(">u8")[0])
+
+
+def distance(a: int, b: int) -> int:
+    return (a ^ b).bit_count()
+
+
+def _block(fingerprint: int, block: int) -> int:
+    start, end = _BLOCK_EDGES[block], _BLOCK_EDGES[block + 1]
+    return (fingerprint >> start) & ((1 << (end - start)) - 1)
+
+
+def bands(fingerprint: int) -> List[int]:
+    """
+    The fingerprint's LSH bucket keys: the bits of each pair of blocks,
+    tagged with the pair's position so equal bits in different pairs do
+    not collide.
+    """
+    return [
+        (((pair << _BLOCK_BITS) | _block(fingerprint, a)) << _BLOCK_BITS)
+        | _block(fingerprint, b)
+        for pair, (a, b) in enumerate(_BLOCK_PAIRS)
+    ]
+
+
+def to_signed(fingerprint: int) -> int:
+    """
+    The fingerprint as a signed 64-bit integer, the widest MongoDB stores.
+    """
+    return fingerprint - (1 << 64) if fingerprint >= 1 << 63 else fingerprint
+
+
+class NearDuplicateIndex:
+    """
+    SimHash fingerprints of recently seen news posts, bucketed by band.
+
+    Each post joins the cluster of the first near-duplicate seen before it,
+    so a wire story keeps the same representative across pages, users and
+    requests. Fingerprints and buckets both expire after `ttl` seconds; a
+    bucket may list posts that have expired since, which lookups skip.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        # url -> (fingerprint, cluster url)
+        self._posts = TTLCache(maxsize=maxsize, ttl=ttl)
+        # band key -> urls
+        self._buckets = TTLCache(maxsize=maxsize * BANDS, ttl=ttl)
+        self.collapsed = 0
+
+    def cluster(self, url: str, title: Optional[str], text: Optional[str]) -> str:
+        """
+        The key of the representative of the post's cluster.
+        """
+        entry = self._posts.get(url)
+        if entry is not None:
+            return entry[1]
+
+        fingerprint = simhash(title, text)
+        if not fingerprint:
+            # No words to compare: never a duplicate of anything.
+            return url
+        keys = bands(fingerprint)
+        cluster = url
+        for key in keys:
+            for other in self._buckets.peek(key, ()):
+                match = self._posts.peek(other)
+                if (
+                    match is not None
+                    and distance(match[0], fingerprint) <= MAX_DISTANCE
+                ):
+                    cluster = match[1]
+                    break
+            if cluster != url:
+                break
+
+        self._posts.set(url, (fingerprint, cluster))
+        for key in keys:
+            members = [
+                member
+                for member in self._buckets.peek(key, ())
+                if member in self._posts
+            ]
+            self._buckets.set(key, members + [url])
+        return cluster
+
+    def collapse(self, posts: List[NewsPost]) -> List[NewsPost]:
+        """
+        Keep the first post of each cluster, in order, listing the others
+        in its `also_covered_by`.
+        """
+        kept: List[NewsPost] = []
+        representatives: Dict[str, NewsPost] = {}
+        for post in posts:
+            key = post.url or post.uuid
+            if not key:
+                kept.append(post)
+                continue
+            cluster = self.cluster(key, post.title, post.text)
+            representative = representatives.get(cluster)
+            if representative is None:
+                representatives[cluster] = post
+                kept.append(post)
+                continue
+            representative.also_covered_by.append(
+                Coverage(
+                    site=post.thread.site if post.thread else "",
+                    url=post.url,
+                    title=post.title,
+                )
+            )
+            self.collapsed += 1
+        return kept
+
+    def clear(self):
+        self._posts.clear()
+        self._buckets.clear()
+
+    def stats(self) -> dict:
+        return {**self._posts.stats(), "collapsed": self.collapsed}
+
+
+news_fingerprints = NearDuplicateIndex(
+    maxsize=settings.DEDUPE_MAX_ENTRIES, ttl=settings.DEDUPE_TTL_SECONDS
+)
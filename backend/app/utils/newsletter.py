@@ -2,6 +2,7 @@ import logging
 
 from app.crud.news import fetch_news_feed
 from app.db.database import db
+from app.utils.affinity import affinity_store
 from app.utils.email import send_newsletter_email
 
 logger = logging.getLogger(__name__)
@@ -32,6 +33,9 @@ async def process_weekly_newsletter():
             if topic_ids:
                 topic_cursor = db.topics.find({"id": {"$in": topic_ids}})
                 topic_docs = await topic_cursor.to_list(length=None)
+                # Most read topics first.
+                affinity = await affinity_store.shares(user["id"])
+                topic_docs.sort(key=lambda doc: -affinity.get(doc["id"], 0.0))
                 topic_names = [doc["name"] for doc in topic_docs]
 
             if not topic_names:
@@ -0,0 +1,142 @@
+import logging
+import time
+from typing import Optional
+
+import anyio
+
+from app.core.config import settings
+from app.crud import notification as notification_crud
+from app.crud import user as user_crud
+from app.schemas.notification import NotificationCreate
+
+logger = logging.getLogger(__name__)
+
+
+class NotificationFanout:
+    """
+    Background queue of notifications for everyone following a magazine.
+
+    A popular magazine has too many followers to notify inside the request
+    that added the article, so the request only queues a job. A worker
+    streams the follower ids with a projected cursor and writes their
+    notifications `chunk_size` at a time with unordered bulk inserts. Jobs
+    live in memory: those still queued when the process stops are lost.
+    """
+
+    def __init__(self, chunk_size: int, max_pending: int):
+        self.chunk_size = chunk_size
+        self._send, self._receive = anyio.create_memory_object_stream(max_pending)
+        self.current: Optional[dict] = None
+        self.queued = 0
+        self.rejected = 0
+        self.completed = 0
+        self.failed = 0
+        self.notified = 0
+
+    def submit(
+        self,
+        magazine_id: str,
+        article_id: str,
+        message: str,
+        exclude_user_id: Optional[str] = None,
+    ) -> bool:
+        """
+        Queue notifying a magazine's followers, except `exclude_user_id`.
+        Returns False when the queue is full and the job was dropped.
+        """
+        job = {
+            "magazine_id": magazine_id,
+            "article_id": article_id,
+            "message": message,
+            "exclude_user_id": exclude_user_id,
+        }
+        try:
+            self._send.send_nowait(job)
+        except anyio.WouldBlock:
+            self.rejected += 1
+            logger.error(f"Notification queue full, dropped job for {magazine_id}")
+            return False
+        self.queued += 1
+        return True
+
+    def _notification(self, job: dict, user_id: str) -> NotificationCreate:
+        return NotificationCreate(
+            user_id=user_id,
+            magazine_id=job["magazine_id"],
+            article_id=job["article_id"],
+            message=job["message"],
+        )
+
+    async def run(self, job: dict) -> int:
+        """
+        Notify the followers of one job. Returns how many were notified.
+        """
+        self.current = {
+            "magazine_id": job["magazine_id"],
+            "notified": 0,
+            "started_at": time.time(),
+        }
+        chunk = []
+        async for user_id in user_crud.iter_magazine_follower_ids(
+            job["magazine_id"], batch_size=self.chunk_size
+        ):
+            if user_id == job["exclude_user_id"]:
+                continue
+            chunk.append(self._notification(job, user_id))
+            if len(chunk) == self.chunk_size:
+                await self._write(chunk)
+                chunk = []
+        await self._write(chunk)
+        return self.current["notified"]
+
+    async def _write(self, chunk: list):
+        written = await notification_crud.create_notifications(chunk)
+        self.current["notified"] += written
+        self.notified += written
+
+    async def work(self):
+        """
+        Run queued jobs one after another until cancelled.
+        """
+        async for job in self._receive:
+            self.queued -= 1
+            try:
+                await self.run(job)
+                self.completed += 1
+            except Exception as e:
+                self.failed += 1
+                logger.error(
+                    f"Notifying followers of {job['magazine_id']} failed: {str(e)}"
+                )
+            finally:
+                self.current = None
+
+    def stats(self) -> dict:
+        current = None
+        if self.current is not None:
+            current = {
+                "magazine_id": self.current["magazine_id"],
+                "notified": self.current["notified"],
+                "seconds": round(time.time() - self.current["started_at"], 1),
+            }
+        return {
+            "queued": self.queued,
+            "running": current,
+            "rejected": self.rejected,
+            "completed": self.completed,
+            "failed": self.failed,
+            "notified": self.notified,
+        }
+
+
+notification_fanout = NotificationFanout(
+    chunk_size=settings.NOTIFICATION_FANOUT_CHUNK_SIZE,
+    max_pending=settings.NOTIFICATION_FANOUT_MAX_PENDING,
+)
+
+
+async def run_notification_fanout_loop():
+    """
+    Work through queued notification fan-outs until cancelled.
+    """
+    await notification_fanout.work()
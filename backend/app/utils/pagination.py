@@ -0,0 +1,111 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Any, List, Optional
+
+from fastapi import HTTPException, status
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+# Sort values a cursor may carry besides datetimes. Cursors come from
+# clients: anything else, such as a dict of operators, would end up in the
+# query.
+_SCALAR_TYPES = (str, int, float, bool, type(None))
+
+
+def encode_cursor(sort_key: str, value: Any, item_id: str) -> str:
+    """
+    Build an opaque cursor pointing just past the given (sort value, id) pair.
+    """
+    if isinstance(value, datetime):
+        encoded_value = {"t": "dt", "v": value.isoformat()}
+    else:
+        encoded_value = {"t": "raw", "v": value}
+
+    payload = {"k": sort_key, "v": encoded_value, "id": item_id}
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort_key: str):
+    """
+    Decode a cursor produced by `encode_cursor` into its (sort value, id) pair.
+
+    Raises a 400 error if the cursor is malformed, carries a value that is
+    not a scalar or datetime, or was issued for another sort key.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        encoded_value = payload["v"]
+        value = encoded_value["v"]
+        if encoded_value["t"] == "dt":
+            value = datetime.fromisoformat(value)
+        elif encoded_value["t"] != "raw" or not isinstance(value, _SCALAR_TYPES):
+            raise ValueError(value)
+        item_id = payload["id"]
+        if not isinstance(item_id, str):
+            raise ValueError(item_id)
+        cursor_key = payload["k"]
+    except (binascii.Error, ValueError, KeyError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor"
+        )
+
+    if cursor_key != sort_key:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cursor does not match the requested sort order",
+        )
+
+    return value, item_id
+
+
+def keyset_filter(cursor: str, sort_key: str, direction: int = -1) -> dict:
+    """
+    Build the query fragment selecting documents after the cursor position.
+
+    Documents are ordered by (sort_key, id) in the given direction, so the
+    fragment relies on a compound index on those two fields to seek straight
+    to the next page instead of skipping over the previous ones.
+    """
+    value, item_id = decode_cursor(cursor, sort_key)
+    op = "$lt" if direction < 0 else "$gt"
+    return {
+        "$or": [
+            {sort_key: {op: value}},
+            {sort_key: value, "id": {op: item_id}},
+        ]
+    }
+
+
+def keyset_sort(sort_key: str, direction: int = -1) -> list:
+    return [(sort_key, direction), ("id", direction)]
+
+
+def apply_keyset(query: dict, cursor: Optional[str], sort_key: str, direction=-1):
+    """
+    Return a copy of `query` restricted to the page after `cursor`.
+    """
+    if not cursor:
+        return query
+    seek = keyset_filter(cursor, sort_key, direction)
+    if "$or" in query:
+        return {"$and": [query, seek]}
+    return {**query, **seek}
+
+
+def next_cursor(
+    items: List[dict], sort_key: str, limit: int, id_field: str = "id"
+) -> Optional[str]:
+    """
+    Cursor for the page following `items`, or None when this was the last page.
+
+    `id_field` names the key holding the tiebreaker id when it differs from
+    the item's own `id` (e.g. articles listed through their interactions).
+    """
+    if not items or len(items) < limit:
+        return None
+    last = items[-1]
+    return encode_cursor(sort_key, last.get(sort_key), last[id_field])
@@ -0,0 +1,116 @@
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from app.core.config import settings
+from app.utils.trending import EVENT_WEIGHTS
+
+
+def _recency(articles: List[dict], now: datetime, half_life_hours: float):
+    age_seconds = np.fromiter(
+        ((now - article["published_at"]).total_seconds() for article in articles),
+        dtype=np.float64,
+        count=len(articles),
+    )
+    return np.exp2(-np.clip(age_seconds, 0, None) / (half_life_hours * 3600))
+
+
+def _popularity(articles: List[dict]):
+    counts = np.array(
+        [
+            [
+                article.get("view_count") or 0,
+                article.get("like_count") or 0,
+                article.get("comment_count") or 0,
+            ]
+            for article in articles
+        ],
+        dtype=np.float64,
+    )
+    weights = np.array(
+        [EVENT_WEIGHTS["view"], EVENT_WEIGHTS["like"], EVENT_WEIGHTS["comment"]]
+    )
+    popularity = np.log1p(np.clip(counts, 0, None) @ weights)
+    top = popularity.max()
+    return popularity / top if top > 0 else popularity
+
+
+def _affinity(articles: List[dict], affinity: Dict[str, float]):
+    # One (row, weight) pair per article topic the user has an affinity for,
+    # summed per row.
+    rows, values = [], []
+    for row, article in enumerate(articles):
+        for topic in article.get("topics") or ():
+            weight = affinity.get(topic)
+            if weight:
+                rows.append(row)
+                values.append(weight)
+    scores = np.bincount(
+        np.asarray(rows, dtype=np.intp), weights=values, minlength=len(articles)
+    )
+    return np.minimum(scores, 1.0)
+
+
+def _publisher_codes(articles: List[dict]):
+    codes: Dict[str, int] = {}
+    return np.fromiter(
+        (
+            codes.setdefault(article.get("publisher") or "", len(codes))
+            for article in articles
+        ),
+        dtype=np.intp,
+        count=len(articles),
+    )
+
+
+def _publisher_occurrence(codes: np.ndarray):
+    """
+    For each position, how many earlier positions have the same publisher
+    code.
+    """
+    by_code = np.argsort(codes, kind="stable")
+    sorted_codes = codes[by_code]
+    starts = np.flatnonzero(np.r_[True, sorted_codes[1:] != sorted_codes[:-1]])
+    lengths = np.diff(np.r_[starts, len(codes)])
+    occurrence = np.empty(len(codes), dtype=np.int64)
+    occurrence[by_code] = np.arange(len(codes)) - np.repeat(starts, lengths)
+    return occurrence
+
+
+def score_articles(
+    articles: List[dict], affinity: Dict[str, float], now: Optional[datetime] = None
+):
+    """
+    Relevance score of every candidate, before the diversity penalty. The
+    weights are the RANK_* settings.
+    """
+    now = now or datetime.utcnow()
+    recency = _recency(articles, now, settings.RANK_RECENCY_HALF_LIFE_HOURS)
+    return (
+        settings.RANK_WEIGHT_RECENCY * recency
+        + settings.RANK_WEIGHT_AFFINITY * _affinity(articles, affinity)
+        + settings.RANK_WEIGHT_POPULARITY * _popularity(articles)
+    )
+
+
+def rank_articles(
+    articles: List[dict],
+    affinity: Dict[str, float],
+    k: Optional[int] = None,
+    now: Optional[datetime] = None,
+) -> List[dict]:
+    """
+    Order feed candidates by recency, topic affinity and popularity, and
+    return the best `k`. Each further article from a publisher already ranked
+    higher loses RANK_PUBLISHER_PENALTY, so one source cannot fill the page.
+    """
+    if not articles:
+        return []
+    scores = score_articles(articles, affinity, now)
+
+    order = np.argsort(-scores, kind="stable")
+    publishers = _publisher_codes(articles)[order]
+    penalty = settings.RANK_PUBLISHER_PENALTY * _publisher_occurrence(publishers)
+    ranked = order[np.argsort(penalty - scores[order], kind="stable")]
+    return [articles[i] for i in ranked[:k]]
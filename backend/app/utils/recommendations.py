@@ -0,0 +1,204 @@
+import logging
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import anyio
+import numpy as np
+from pymongo import ReplaceOne
+from scipy import sparse
+
+from app.core.config import settings
+from app.db.database import db
+
+logger = logging.getLogger(__name__)
+
+_stats = {
+    "runs": 0,
+    "last_run": None,
+}
+
+
+def recommendation_stats() -> dict:
+    return dict(_stats)
+
+
+class _InteractionMatrix:
+    """
+    Sparse user x article matrix of likes and saves, filled chunk by chunk.
+    Only integer coordinates are kept per interaction; the id strings are
+    stored once per user and once per article.
+    """
+
+    def __init__(self):
+        self.users: Dict[str, int] = {}
+        self.articles: Dict[str, int] = {}
+        self._rows: List[np.ndarray] = []
+        self._cols: List[np.ndarray] = []
+
+    def add_chunk(self, interactions: List[dict]):
+        users, articles = self.users, self.articles
+        self._rows.append(
+            np.fromiter(
+                (users.setdefault(i["user_id"], len(users)) for i in interactions),
+                dtype=np.int32,
+                count=len(interactions),
+            )
+        )
+        self._cols.append(
+            np.fromiter(
+                (
+                    articles.setdefault(i["article_id"], len(articles))
+                    for i in interactions
+                ),
+                dtype=np.int32,
+                count=len(interactions),
+            )
+        )
+
+    def to_csr(self) -> sparse.csr_matrix:
+        rows = np.concatenate(self._rows) if self._rows else np.array([], np.int32)
+        cols = np.concatenate(self._cols) if self._cols else np.array([], np.int32)
+        self._rows, self._cols = [], []
+        matrix = sparse.csr_matrix(
+            (np.ones(len(rows), dtype=np.float32), (rows, cols)),
+            shape=(len(self.users), len(self.articles)),
+        )
+        # A user liking and saving an article still counts once.
+        matrix.data[:] = 1.0
+        return matrix
+
+
+async def _load_matrix(chunk_size: int) -> _InteractionMatrix:
+    """
+    Stream liked or saved interactions in `_id` order, `chunk_size` at a time.
+    """
+    matrix = _InteractionMatrix()
+    last_id = None
+    while True:
+        query = {"$or": [{"is_liked": True}, {"is_saved": True}]}
+        if last_id is not None:
+            query = {**query, "_id": {"$gt": last_id}}
+        cursor = (
+            db.user_interactions.find(query, {"user_id": 1, "article_id": 1})
+            .sort("_id", 1)
+            .limit(chunk_size)
+        )
+        chunk = await cursor.to_list(length=chunk_size)
+        if not chunk:
+            break
+        matrix.add_chunk(chunk)
+        last_id = chunk[-1]["_id"]
+        if len(chunk) < chunk_size:
+            break
+    return matrix
+
+
+def _normalize_columns(matrix: sparse.csr_matrix) -> sparse.csc_matrix:
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=0)).ravel())
+    norms[norms == 0] = 1.0
+    return (matrix @ sparse.diags(1.0 / norms)).tocsc()
+
+
+def _block_neighbours(
+    normalized_t: sparse.csr_matrix,
+    normalized: sparse.csc_matrix,
+    start: int,
+    stop: int,
+    top_n: int,
+) -> List[List[tuple]]:
+    """
+    Cosine similarities between articles `start:stop` and all articles, as
+    the `top_n` (article index, score) pairs per article, best first.
+    """
+    similarities = (normalized_t @ normalized[:, start:stop]).tocsc()
+    neighbours = []
+    for column in range(stop - start):
+        lo, hi = similarities.indptr[column], similarities.indptr[column + 1]
+        rows = similarities.indices[lo:hi]
+        scores = similarities.data[lo:hi]
+        keep = rows != start + column
+        rows, scores = rows[keep], scores[keep]
+        if len(scores) > top_n:
+            best = np.argpartition(-scores, top_n - 1)[:top_n]
+            rows, scores = rows[best], scores[best]
+        order = np.argsort(-scores, kind="stable")
+        neighbours.append(list(zip(rows[order].tolist(), scores[order].tolist())))
+    return neighbours
+
+
+async def build_article_neighbours(
+    chunk_size: Optional[int] = None,
+    block_size: Optional[int] = None,
+    top_n: Optional[int] = None,
+) -> int:
+    """
+    Recompute the item-item neighbours of every liked or saved article and
+    store them in `article_neighbours`.
+
+    Interactions are read in chunks and kept as integer coordinates only.
+    Similarities are computed for `block_size` articles at a time, in a
+    worker thread, so only one block of the article x article matrix is ever
+    materialized. Returns the number of articles written.
+    """
+    chunk_size = chunk_size or settings.RECOMMEND_CHUNK_SIZE
+    block_size = block_size or settings.RECOMMEND_BLOCK_SIZE
+    top_n = top_n or settings.RECOMMEND_NEIGHBOURS
+    started_at = datetime.utcnow()
+
+    loaded = await _load_matrix(chunk_size)
+    article_ids = list(loaded.articles)
+    matrix = loaded.to_csr()
+    normalized = await anyio.to_thread.run_sync(_normalize_columns, matrix)
+    normalized_t = normalized.T.tocsr()
+
+    written = 0
+    for start in range(0, len(article_ids), block_size):
+        stop = min(start + block_size, len(article_ids))
+        block = await anyio.to_thread.run_sync(
+            _block_neighbours, normalized_t, normalized, start, stop, top_n
+        )
+        operations = [
+            ReplaceOne(
+                {"article_id": article_ids[start + offset]},
+                {
+                    "article_id": article_ids[start + offset],
+                    "neighbours": [
+                        {"id": article_ids[index], "score": round(score, 6)}
+                        for index, score in neighbours
+                    ],
+                    "updated_at": started_at,
+                },
+                upsert=True,
+            )
+            for offset, neighbours in enumerate(block)
+            if neighbours
+        ]
+        if operations:
+            await db.article_neighbours.bulk_write(operations, ordered=False)
+            written += len(operations)
+
+    # Articles that lost all their neighbours since the previous run.
+    await db.article_neighbours.delete_many({"updated_at": {"$lt": started_at}})
+
+    _stats["runs"] += 1
+    _stats["last_run"] = {
+        "users": matrix.shape[0],
+        "articles": matrix.shape[1],
+        "interactions": int(matrix.nnz),
+        "written": written,
+    }
+    logger.info(f"Article neighbours rebuilt: {_stats['last_run']}")
+    return written
+
+
+async def run_recommendation_loop():
+    """
+    Rebuild article neighbours every RECOMMEND_INTERVAL_SECONDS until
+    cancelled.
+    """
+    while True:
+        await anyio.sleep(settings.RECOMMEND_INTERVAL_SECONDS)
+        try:
+            await build_article_neighbours()
+        except Exception as e:
+            logger.error(f"Article neighbour rebuild failed: {str(e)}")
@@ -0,0 +1,208 @@
+import logging
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import anyio
+from pymongo import UpdateOne
+
+from app.core.config import settings
+from app.db.database import db
+
+logger = logging.getLogger(__name__)
+
+# Resume points, so each run continues where the previous one stopped
+# instead of rescanning from the start.
+_resume_after: Dict[str, Optional[str]] = {"articles": None, "topics": None}
+
+_stats = {
+    "runs": 0,
+    "articles_scanned": 0,
+    "topics_scanned": 0,
+    "corrections": 0,
+    "drift": {
+        "like_count": 0,
+        "comment_count": 0,
+        "view_count": 0,
+        "follower_count": 0,
+    },
+    "last_run": None,
+}
+
+
+def reconciliation_stats() -> dict:
+    return {**_stats, "drift": dict(_stats["drift"])}
+
+
+async def _count_by(collection, match: dict, group_field: str) -> Dict[str, int]:
+    pipeline = [
+        {"$match": match},
+        {"$group": {"_id": f"${group_field}", "count": {"$sum": 1}}},
+    ]
+    rows = await db[collection].aggregate(pipeline).to_list(length=None)
+    return {row["_id"]: row["count"] for row in rows}
+
+
+async def _topic_follower_counts(topic_ids: List[str]) -> Dict[str, int]:
+    pipeline = [
+        {"$match": {"followed_topics": {"$in": topic_ids}}},
+        {"$project": {"_id": 0, "followed_topics": 1}},
+        {"$unwind": "$followed_topics"},
+        {"$match": {"followed_topics": {"$in": topic_ids}}},
+        {"$group": {"_id": "$followed_topics", "count": {"$sum": 1}}},
+    ]
+    rows = await db.users.aggregate(pipeline).to_list(length=None)
+    return {row["_id"]: row["count"] for row in rows}
+
+
+def _correction(
+    doc: dict, expected: Dict[str, int], drift: Dict[str, int], stamp: bool = False
+):
+    """
+    Build a guarded update for the counters of `doc` that differ from
+    `expected`. The filter pins the values that were read, so a concurrent
+    `$inc` makes the correction miss instead of being overwritten; the next
+    run picks it up again.
+
+    With `stamp`, updated_at is set too, for documents whose ETag derives
+    from it.
+    """
+    stale = {
+        field: value for field, value in expected.items() if doc.get(field) != value
+    }
+    if not stale:
+        return None
+    for field, value in stale.items():
+        drift[field] += abs((doc.get(field) or 0) - value)
+    update = {**stale, "updated_at": datetime.utcnow()} if stamp else stale
+    return UpdateOne(
+        {"id": doc["id"], **{field: doc.get(field) for field in stale}},
+        {"$set": update},
+    )
+
+
+async def _next_batch(collection: str, fields: dict, batch_size: int) -> List[dict]:
+    query = {}
+    if _resume_after[collection]:
+        query = {"id": {"$gt": _resume_after[collection]}}
+    cursor = (
+        db[collection]
+        .find(query, {"_id": 0, "id": 1, **fields})
+        .sort("id", 1)
+        .limit(batch_size)
+    )
+    batch = await cursor.to_list(length=batch_size)
+    # An empty or short batch means the scan reached the end: wrap around.
+    _resume_after[collection] = batch[-1]["id"] if len(batch) == batch_size else None
+    return batch
+
+
+async def reconcile_article_batch(batch_size: int) -> int:
+    """
+    Recompute like_count and comment_count for the next batch of articles
+    from user_interactions and comments, leaving out deleted comments kept
+    as tombstones. view_count has no ledger to count from, so it is only
+    repaired when missing or negative.
+
+    Returns the number of articles scanned.
+    """
+    articles = await _next_batch(
+        "articles", {"like_count": 1, "comment_count": 1, "view_count": 1}, batch_size
+    )
+    if not articles:
+        return 0
+
+    ids = [article["id"] for article in articles]
+    likes = await _count_by(
+        "user_interactions",
+        {"article_id": {"$in": ids}, "is_liked": True},
+        "article_id",
+    )
+    comments = await _count_by(
+        "comments",
+        {"article_id": {"$in": ids}, "deleted": {"$ne": True}},
+        "article_id",
+    )
+
+    operations = []
+    for article in articles:
+        expected = {
+            "like_count": likes.get(article["id"], 0),
+            "comment_count": comments.get(article["id"], 0),
+        }
+        views = article.get("view_count")
+        if not isinstance(views, int) or views < 0:
+            expected["view_count"] = max(views or 0, 0)
+        operation = _correction(article, expected, _stats["drift"])
+        if operation:
+            operations.append(operation)
+
+    if operations:
+        await db.articles.bulk_write(operations, ordered=False)
+        _stats["corrections"] += len(operations)
+    _stats["articles_scanned"] += len(articles)
+    return len(articles)
+
+
+async def reconcile_topic_batch(batch_size: int) -> int:
+    """
+    Recompute follower_count for the next batch of topics from users'
+    followed_topics. Returns the number of topics scanned.
+    """
+    topics = await _next_batch("topics", {"follower_count": 1}, batch_size)
+    if not topics:
+        return 0
+
+    followers = await _topic_follower_counts([topic["id"] for topic in topics])
+
+    operations = []
+    for topic in topics:
+        expected = {"follower_count": followers.get(topic["id"], 0)}
+        # The topic's ETag is its updated_at, like for increment_follower_count.
+        operation = _correction(topic, expected, _stats["drift"], stamp=True)
+        if operation:
+            operations.append(operation)
+
+    if operations:
+        await db.topics.bulk_write(operations, ordered=False)
+        _stats["corrections"] += len(operations)
+    _stats["topics_scanned"] += len(topics)
+    return len(topics)
+
+
+async def reconcile_counters(
+    batch_size: Optional[int] = None, max_batches: Optional[int] = None
+):
+    """
+    Run one reconciliation pass of at most `max_batches` batches per
+    collection. Only one batch of documents is held in memory at a time.
+    """
+    batch_size = batch_size or settings.RECONCILE_BATCH_SIZE
+    max_batches = max_batches or settings.RECONCILE_MAX_BATCHES_PER_RUN
+    corrections_before = _stats["corrections"]
+
+    for reconcile_batch in (reconcile_article_batch, reconcile_topic_batch):
+        for _ in range(max_batches):
+            scanned = await reconcile_batch(batch_size)
+            if scanned < batch_size:
+                break
+
+    _stats["runs"] += 1
+    _stats["last_run"] = {
+        "corrections": _stats["corrections"] - corrections_before,
+    }
+    logger.info(
+        f"Counter reconciliation corrected "
+        f"{_stats['last_run']['corrections']} documents"
+    )
+
+
+async def run_reconciliation_loop():
+    """
+    Reconcile counters every RECONCILE_INTERVAL_SECONDS until cancelled.
+    """
+    while True:
+        await anyio.sleep(settings.RECONCILE_INTERVAL_SECONDS)
+        try:
+            await reconcile_counters()
+        except Exception as e:
+            logger.error(f"Counter reconciliation failed: {str(e)}")
@@ -0,0 +1,392 @@
+import logging
+import zlib
+from collections import Counter
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+import anyio
+import numpy as np
+from bson import Binary
+from pymongo import ReplaceOne, UpdateOne
+from scipy import sparse
+
+from app.core.config import settings
+from app.crud import article as article_crud
+from app.db.database import db
+from app.utils.text import tokenize
+
+logger = logging.getLogger(__name__)
+
+# Title words say more about an article than body words.
+FIELD_WEIGHTS = (("title", 3.0), ("excerpt", 2.0), ("content", 1.0))
+# Long bodies add little beyond their opening; cap the text vectorized.
+MAX_CONTENT_CHARS = 5000
+# Rarest title and excerpt words used to find candidates for a new article.
+SEARCH_TERMS = 20
+TEXT_PROJECTION = {"_id": 1, "id": 1, "title": 1, "excerpt": 1}
+
+
+def vectorize(articles: List[dict], n_features: int) -> sparse.csr_matrix:
+    """
+    Field-weighted term counts of `articles`, one row per article, with each
+    word hashed to one of `n_features` columns. Hashing needs no vocabulary,
+    so articles vectorized separately land in the same space.
+    """
+    vocabulary: Dict[str, int] = {}
+    rows: List[int] = []
+    terms: List[int] = []
+    weights: List[float] = []
+    for row, article in enumerate(articles):
+        for field, weight in FIELD_WEIGHTS:
+            text = article.get(field) or ""
+            if field == "content":
+                text = text[:MAX_CONTENT_CHARS]
+            # Duplicates within a row are summed when the matrix is built.
+            for token, count in Counter(tokenize(text)).items():
+                terms.append(vocabulary.setdefault(token, len(vocabulary)))
+                rows.append(row)
+                weights.append(weight * count)
+
+    # Hash each distinct word once per batch, not once per occurrence.
+    buckets = np.fromiter(
+        (zlib.crc32(token.encode()) % n_features for token in vocabulary),
+        dtype=np.int32,
+        count=len(vocabulary),
+    )
+    counts = sparse.csr_matrix(
+        (
+            np.asarray(weights, dtype=np.float32),
+            (np.asarray(rows, dtype=np.int32), buckets[np.asarray(terms, np.intp)]),
+        ),
+        shape=(len(articles), n_features),
+    )
+    counts.sum_duplicates()
+    return counts
+
+
+def fit_idf(counts: sparse.csr_matrix, max_df: float = 1.0) -> np.ndarray:
+    """
+    Smoothed inverse document frequency of every column of `counts`. Columns
+    found in more than a `max_df` share of the rows get 0: words that common
+    say nothing about relatedness, and every pair of rows would share them.
+    """
+    documents = np.bincount(counts.indices, minlength=counts.shape[1])
+    idf = np.log((1 + counts.shape[0]) / (1 + documents)) + 1
+    idf[documents > max_df * counts.shape[0]] = 0
+    return idf.astype(np.float32)
+
+
+def weigh(
+    counts: sparse.csr_matrix, idf: np.ndarray, max_terms: int
+) -> sparse.csr_matrix:
+    """
+    TF-IDF rows of `counts`, keeping each row's `max_terms` heaviest terms
+    and scaled to unit length, so a dot product is a cosine similarity.
+    """
+    matrix = counts.copy()
+    matrix.data = np.log1p(matrix.data) * idf[matrix.indices]
+    matrix.eliminate_zeros()
+
+    indptr = matrix.indptr
+    if np.any(np.diff(indptr) > max_terms):
+        keep = np.ones(matrix.nnz, dtype=bool)
+        for row in np.flatnonzero(np.diff(indptr) > max_terms):
+            lo, hi = indptr[row], indptr[row + 1]
+            lightest = np.argpartition(matrix.data[lo:hi], hi - lo - max_terms)
+            keep[lo + lightest[: hi - lo - max_terms]] = False
+        matrix.data[~keep] = 0
+        matrix.eliminate_zeros()
+
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    norms[norms == 0] = 1.0
+    return sparse.csr_matrix(sparse.diags(1.0 / norms) @ matrix, dtype=np.float32)
+
+
+def top_neighbours(
+    matrix: sparse.csr_matrix, start: int, stop: int, k: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    The `k` rows of `matrix` most similar to rows `start:stop`, as
+    (indices, scores) arrays of shape (stop - start, k), best first. Only a
+    block of the article x article similarity matrix is materialized.
+    """
+    scores = (matrix[start:stop] @ matrix.T).toarray()
+    scores[np.arange(stop - start), np.arange(start, stop)] = -1.0
+    k = min(k, matrix.shape[0] - 1)
+    if k <= 0:
+        empty = np.empty((stop - start, 0))
+        return empty.astype(np.intp), empty
+    best = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    best_scores = np.take_along_axis(scores, best, axis=1)
+    order = np.argsort(-best_scores, axis=1, kind="stable")
+    return (
+        np.take_along_axis(best, order, axis=1),
+        np.take_along_axis(best_scores, order, axis=1),
+    )
+
+
+async def _with_contents(articles: List[dict]) -> List[dict]:
+    """
+    Attach the opening MAX_CONTENT_CHARS of each body, read from the
+    content collection.
+    """
+    contents = await article_crud.get_article_contents(
+        [article["id"] for article in articles], MAX_CONTENT_CHARS
+    )
+    for article in articles:
+        article["content"] = contents.get(article["id"], "")
+    return articles
+
+
+def _related_list(ids: List[str], indices, scores) -> List[dict]:
+    return [
+        {"id": ids[index], "score": round(float(score), 6)}
+        for index, score in zip(indices, scores)
+        if score > 0
+    ]
+
+
+class RelatedIndex:
+    """
+    Precomputed "related articles" lists, kept in `related_articles`.
+
+    A periodic batch job vectorizes the whole catalog and stores each
+    article's top-k most similar articles. The IDF weights it fits are kept
+    in `related_idf`, so an article created between two runs is indexed on
+    its own: it is compared with the text-search hits for its heaviest
+    terms, and added to their lists where it ranks among their top-k.
+    """
+
+    def __init__(
+        self,
+        n_features: int,
+        max_terms: int,
+        max_df: float,
+        top_k: int,
+        chunk_size: int,
+        block_size: int,
+        candidates: int,
+    ):
+        self.n_features = n_features
+        self.max_terms = max_terms
+        self.max_df = max_df
+        self.top_k = top_k
+        self.chunk_size = chunk_size
+        self.block_size = block_size
+        self.candidates = candidates
+        self._idf: Optional[np.ndarray] = None
+        self.runs = 0
+        self.indexed = 0
+        self.last_run: Optional[dict] = None
+
+    async def _load_counts(self) -> Tuple[List[str], sparse.csr_matrix]:
+        """
+        Vectorize every article, reading them in `_id` order, a chunk at a
+        time, so only term counts are held in memory.
+        """
+        ids: List[str] = []
+        chunks: List[sparse.csr_matrix] = []
+        last_id = None
+        while True:
+            query = {} if last_id is None else {"_id": {"$gt": last_id}}
+            cursor = (
+                db.articles.find(query, TEXT_PROJECTION)
+                .sort("_id", 1)
+                .limit(self.chunk_size)
+            )
+            chunk = await cursor.to_list(length=self.chunk_size)
+            if not chunk:
+                break
+            await _with_contents(chunk)
+            chunks.append(
+                await anyio.to_thread.run_sync(vectorize, chunk, self.n_features)
+            )
+            ids.extend(article["id"] for article in chunk)
+            last_id = chunk[-1]["_id"]
+            if len(chunk) < self.chunk_size:
+                break
+        if not chunks:
+            return ids, sparse.csr_matrix((0, self.n_features), dtype=np.float32)
+        return ids, sparse.vstack(chunks, format="csr")
+
+    async def _save_idf(self, idf: np.ndarray, documents: int):
+        self._idf = idf
+        await db.related_idf.replace_one(
+            {"name": "tfidf"},
+            {
+                "name": "tfidf",
+                "n_features": self.n_features,
+                "documents": documents,
+                "idf": Binary(idf.astype("<f4").tobytes()),
+                "built_at": datetime.utcnow(),
+            },
+            upsert=True,
+        )
+
+    async def _load_idf(self) -> Optional[np.ndarray]:
+        if self._idf is None:
+            doc = await db.related_idf.find_one({"name": "tfidf"})
+            if doc and doc["n_features"] == self.n_features:
+                self._idf = np.frombuffer(bytes(doc["idf"]), dtype="<f4")
+        return self._idf
+
+    async def build(self) -> int:
+        """
+        Recompute the related lists of every article. Returns the number of
+        lists written.
+        """
+        started_at = datetime.utcnow()
+        ids, counts = await self._load_counts()
+        idf = fit_idf(counts, self.max_df)
+        matrix = await anyio.to_thread.run_sync(weigh, counts, idf, self.max_terms)
+        del counts
+
+        written = 0
+        for start in range(0, len(ids), self.block_size):
+            stop = min(start + self.block_size, len(ids))
+            indices, scores = await anyio.to_thread.run_sync(
+                top_neighbours, matrix, start, stop, self.top_k
+            )
+            operations = [
+                ReplaceOne(
+                    {"article_id": ids[start + offset]},
+                    {
+                        "article_id": ids[start + offset],
+                        "related": _related_list(ids, indices[offset], scores[offset]),
+                        "updated_at": started_at,
+                    },
+                    upsert=True,
+                )
+                for offset in range(stop - start)
+            ]
+            if operations:
+                await db.related_articles.bulk_write(operations, ordered=False)
+                written += len(operations)
+
+        # Lists of articles deleted since the previous run.
+        await db.related_articles.delete_many({"updated_at": {"$lt": started_at}})
+        await self._save_idf(idf, len(ids))
+
+        self.runs += 1
+        self.last_run = {
+            "articles": len(ids),
+            "terms": int(matrix.nnz),
+            "written": written,
+        }
+        logger.info(f"Related articles rebuilt: {self.last_run}")
+        return written
+
+    def _similarities(
+        self, candidates: List[dict], vector: sparse.csr_matrix, idf: np.ndarray
+    ) -> np.ndarray:
+        matrix = weigh(vectorize(candidates, self.n_features), idf, self.max_terms)
+        return (matrix @ vector.T).toarray().ravel()
+
+    async def index_article(self, article: dict) -> int:
+        """
+        Add a new article to the index without a rebuild. Returns the number
+        of lists changed, or 0 before the first build.
+        """
+        idf = await self._load_idf()
+        if idf is None:
+            return 0
+
+        vector = weigh(vectorize([article], self.n_features), idf, self.max_terms)
+        if not vector.nnz:
+            return 0
+        words = dict.fromkeys(
+            tokenize(f"{article.get('title') or ''} {article.get('excerpt') or ''}")
+        )
+        terms = sorted(
+            words,
+            key=lambda word: -idf[zlib.crc32(word.encode()) % self.n_features],
+        )[:SEARCH_TERMS]
+        if not terms:
+            return 0
+        text = {"$search": " ".join(terms)}
+        if article.get("language"):
+            text["$language"] = article["language"]
+        cursor = (
+            db.articles.find(
+                {"$text": text, "id": {"$ne": article["id"]}},
+                {**TEXT_PROJECTION, "score": {"$meta": "textScore"}},
+            )
+            .sort([("score", {"$meta": "textScore"})])
+            .limit(self.candidates)
+        )
+        candidates = await cursor.to_list(length=self.candidates)
+
+        related = []
+        operations = []
+        if candidates:
+            await _with_contents(candidates)
+            scores = await anyio.to_thread.run_sync(
+                self._similarities, candidates, vector, idf
+            )
+            ids = [candidate["id"] for candidate in candidates]
+            best = np.argsort(-scores, kind="stable")[: self.top_k]
+            related = _related_list(ids, best, scores[best])
+            operations = [
+                UpdateOne(
+                    {"article_id": ids[index], "related.id": {"$ne": article["id"]}},
+                    {
+                        "$push": {
+                            "related": {
+                                "$each": [
+                                    {"id": article["id"], "score": round(score, 6)}
+                                ],
+                                "$sort": {"score": -1},
+                                "$slice": self.top_k,
+                            }
+                        }
+                    },
+                )
+                for index, score in enumerate(scores.tolist())
+                if score > 0
+            ]
+
+        operations.append(
+            ReplaceOne(
+                {"article_id": article["id"]},
+                {
+                    "article_id": article["id"],
+                    "related": related,
+                    "updated_at": datetime.utcnow(),
+                },
+                upsert=True,
+            )
+        )
+        await db.related_articles.bulk_write(operations, ordered=False)
+        self.indexed += 1
+        return len(operations)
+
+    def stats(self) -> dict:
+        return {
+            "runs": self.runs,
+            "indexed": self.indexed,
+            "last_run": self.last_run,
+        }
+
+
+related_index = RelatedIndex(
+    n_features=settings.RELATED_HASH_FEATURES,
+    max_terms=settings.RELATED_MAX_TERMS,
+    max_df=settings.RELATED_MAX_DF,
+    top_k=settings.RELATED_TOP_K,
+    chunk_size=settings.RELATED_CHUNK_SIZE,
+    block_size=settings.RELATED_BLOCK_SIZE,
+    candidates=settings.RELATED_CANDIDATES,
+)
+
+
+async def run_related_loop():
+    """
+    Rebuild the related-articles index every RELATED_INTERVAL_SECONDS until
+    cancelled.
+    """
+    while True:
+        await anyio.sleep(settings.RELATED_INTERVAL_SECONDS)
+        try:
+            await related_index.build()
+        except Exception as e:
+            logger.error(f"Related articles rebuild failed: {str(e)}")
@@ -0,0 +1,114 @@
+import re
+import unicodedata
+from functools import lru_cache
+from typing import List, Optional
+
+# Languages the MongoDB text index stems with, keyed by the codes clients send.
+SEARCH_LANGUAGES = {
+    "en": "english",
+    "english": "english",
+    "fr": "french",
+    "french": "french",
+}
+
+ENGLISH_STOPWORDS = frozenset(
+    """
+    a about after all also an and any are as at be been but by can could did do
+    does for from had has have he her his how i if in into is it its just more
+    most my no not of on or other our out over she so some than that the their
+    them then there these they this to up was we were what when which who will
+    with would you your
+    """.split()
+)
+
+FRENCH_STOPWORDS = frozenset(
+    """
+    a au aux avec ce ces cette dans de des du elle en est et eux il ils je la le
+    les leur leurs lui mais me même mes moi mon ne nos notre nous on ou où par
+    pas pour qu que qui sa se ses son sont sur ta te tes toi ton tu un une vos
+    votre vous été être était ont plus comme fait aussi très
+    """.split()
+)
+
+STOPWORDS = ENGLISH_STOPWORDS | FRENCH_STOPWORDS
+
+_WORD_RE = re.compile(r"[^\W\d_]+(?:['’][^\W\d_]+)?", re.UNICODE)
+_FRENCH_ELISION_RE = re.compile(r"^(?:[cdjlmnst]|qu)['’]", re.IGNORECASE)
+_FRENCH_CHARS = set("àâæçéèêëîïôœùûüÿ")
+
+
+def normalize(text: str) -> str:
+    """
+    Lowercase and strip accents so "Économie" and "economie" compare equal.
+    """
+    decomposed = unicodedata.normalize("NFKD", text.lower())
+    return "".join(c for c in decomposed if not unicodedata.combining(c))
+
+
+def tokenize(text: Optional[str], drop_stopwords: bool = True) -> List[str]:
+    """
+    Split English or French text into normalized word tokens.
+
+    French elisions ("l'économie", "qu'il") are reduced to the word they
+    attach to, and English/French stopwords are dropped unless asked otherwise.
+    """
+    if not text:
+        return []
+
+    stopwords = STOPWORDS if drop_stopwords else ()
+    return [
+        word
+        for word in map(_normalize_word, _WORD_RE.findall(text))
+        if len(word) >= 2 and word not in stopwords
+    ]
+
+
+def has_search_terms(text: Optional[str]) -> bool:
+    """
+    Whether a text index could match anything in `text`: a word or a number.
+    Punctuation and stray letters alone match nothing.
+    """
+    if not text:
+        return False
+    return bool(tokenize(text, drop_stopwords=False)) or any(c.isdigit() for c in text)
+
+
+@lru_cache(maxsize=65536)
+def _normalize_word(word: str) -> str:
+    # Cached: the same words recur across articles, and normalizing each
+    # occurrence dominates the cost of tokenizing long text.
+    word = _FRENCH_ELISION_RE.sub("", word)
+    word = normalize(word).replace("’", "'")
+    if "'" in word:
+        # English possessives/contractions: keep the stem ("today's").
+        word = word.split("'", 1)[0]
+    return word
+
+
+def detect_language(text: Optional[str]) -> Optional[str]:
+    """
+    Guess whether `text` is English or French from stopwords and accents.
+
+    Returns the MongoDB language name ("english"/"french") or None when the
+    text carries no signal either way.
+    """
+    if not text:
+        return None
+
+    words = [w.lower() for w in _WORD_RE.findall(text)]
+    english = sum(1 for w in words if w in ENGLISH_STOPWORDS)
+    french = sum(1 for w in words if w in FRENCH_STOPWORDS)
+    french += sum(1 for c in text.lower() if c in _FRENCH_CHARS)
+
+    if english == french:
+        return None
+    return "french" if french > english else "english"
+
+
+def search_language(code: Optional[str]) -> Optional[str]:
+    """
+    Map a client language code to a language the text index can stem.
+    """
+    if not code:
+        return None
+    return SEARCH_LANGUAGES.get(code.lower())
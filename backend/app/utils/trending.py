@@ -0,0 +1,211 @@
+import calendar
+import heapq
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+
+import anyio
+
+from app.core.config import settings
+from app.crud.article import ARTICLE_PROJECTION
+from app.db.database import db
+
+logger = logging.getLogger(__name__)
+
+# How much one event of each kind adds to an article's score.
+EVENT_WEIGHTS = {
+    "view": 1.0,
+    "like": 3.0,
+    "save": 4.0,
+    "comment": 5.0,
+}
+
+
+def _epoch(value: datetime) -> float:
+    # Stored datetimes are naive UTC; utctimetuple also normalizes aware ones.
+    return calendar.timegm(value.utctimetuple())
+
+
+class TrendingEngine:
+    """
+    Time-decayed popularity scores for articles.
+
+    Every event adds its weight to the article's score, and scores halve
+    every `half_life` seconds, so an article trends while it keeps getting
+    attention and falls off once it stops. Scores are decayed lazily (only
+    when touched) and kept per process, like the other in-memory caches.
+
+    `refresh` ranks the tracked articles and stores a snapshot of the top
+    `top_k` overall and per topic, which is what the read paths serve.
+    """
+
+    def __init__(
+        self,
+        half_life: float,
+        top_k: int = 50,
+        candidates: int = 1000,
+        max_tracked: int = 50000,
+        seed_window: float = 0,
+    ):
+        self.half_life = half_life
+        self.top_k = top_k
+        self.candidates = candidates
+        self.max_tracked = max_tracked
+        self.seed_window = seed_window
+        # article_id -> (score, time the score was last decayed to)
+        self._scores: Dict[str, Tuple[float, float]] = {}
+        self._top: List[dict] = []
+        self._by_topic: Dict[str, List[dict]] = {}
+        self.refreshed_at: Optional[float] = None
+        self.refreshes = 0
+
+    def _decay(self, score: float, at: float, now: float) -> float:
+        return score * 0.5 ** ((now - at) / self.half_life)
+
+    def record(
+        self,
+        article_id: str,
+        event: str,
+        amount: int = 1,
+        now: Optional[float] = None,
+    ):
+        """
+        Add `amount` events of kind `event` to the article's score. A
+        negative amount (an unlike) takes the weight back off.
+        """
+        now = time.time() if now is None else now
+        score, at = self._scores.get(article_id, (0.0, now))
+        score = self._decay(score, at, now) + EVENT_WEIGHTS[event] * amount
+        self._scores[article_id] = (max(score, 0.0), now)
+
+    def score(self, article_id: str, now: Optional[float] = None) -> float:
+        now = time.time() if now is None else now
+        score, at = self._scores.get(article_id, (0.0, now))
+        return self._decay(score, at, now)
+
+    async def seed(self, now: Optional[float] = None):
+        """
+        Give articles published within the seed window a starting score from
+        their stored counters, decayed from their publication time, so a
+        fresh process does not start with an empty ranking.
+        """
+        now = time.time() if now is None else now
+        since = datetime.fromtimestamp(now, timezone.utc).replace(
+            tzinfo=None
+        ) - timedelta(seconds=self.seed_window)
+        cursor = (
+            db.articles.find(
+                {"published_at": {"$gte": since}},
+                {
+                    "_id": 0,
+                    "id": 1,
+                    "published_at": 1,
+                    "view_count": 1,
+                    "like_count": 1,
+                    "comment_count": 1,
+                },
+            )
+            .sort("published_at", -1)
+            .limit(self.max_tracked)
+        )
+        for article in await cursor.to_list(length=self.max_tracked):
+            if article["id"] in self._scores:
+                continue
+            score = (
+                EVENT_WEIGHTS["view"] * (article.get("view_count") or 0)
+                + EVENT_WEIGHTS["like"] * (article.get("like_count") or 0)
+                + EVENT_WEIGHTS["comment"] * (article.get("comment_count") or 0)
+            )
+            published = min(_epoch(article["published_at"]), now)
+            self._scores[article["id"]] = (score, published)
+
+    async def refresh(self, now: Optional[float] = None):
+        """
+        Rebuild the top-K snapshot from the current scores. Only the best
+        `candidates` articles are loaded, in one query.
+        """
+        now = time.time() if now is None else now
+        if self.refreshed_at is None and self.seed_window > 0:
+            await self.seed(now)
+
+        decayed = {
+            article_id: self._decay(score, at, now)
+            for article_id, (score, at) in self._scores.items()
+        }
+        if len(decayed) > self.max_tracked:
+            kept = heapq.nlargest(self.max_tracked, decayed, key=decayed.get)
+            self._scores = {article_id: self._scores[article_id] for article_id in kept}
+
+        ranked = heapq.nlargest(
+            self.candidates,
+            (article_id for article_id, score in decayed.items() if score > 0),
+            key=decayed.get,
+        )
+        articles = {}
+        if ranked:
+            cursor = db.articles.find({"id": {"$in": ranked}}, ARTICLE_PROJECTION)
+            articles = {
+                article["id"]: article
+                for article in await cursor.to_list(length=len(ranked))
+            }
+
+        top: List[dict] = []
+        by_topic: Dict[str, List[dict]] = {}
+        for article_id in ranked:
+            article = articles.get(article_id)
+            if article is None:
+                # Deleted since it was scored.
+                self._scores.pop(article_id, None)
+                continue
+            if len(top) < self.top_k:
+                top.append(article)
+            for topic in article.get("topics") or []:
+                topic_top = by_topic.setdefault(topic, [])
+                if len(topic_top) < self.top_k:
+                    topic_top.append(article)
+
+        self._top, self._by_topic = top, by_topic
+        self.refreshed_at = now
+        self.refreshes += 1
+
+    async def top(self, topic: Optional[str] = None, limit: int = 20) -> List[dict]:
+        """
+        The highest scoring articles as of the last refresh, overall or for
+        one topic. Returns copies, so callers may enrich them in place.
+        """
+        if self.refreshed_at is None:
+            await self.refresh()
+        articles = self._by_topic.get(topic, []) if topic else self._top
+        return [dict(article) for article in articles[:limit]]
+
+    def stats(self) -> dict:
+        return {
+            "tracked": len(self._scores),
+            "top": len(self._top),
+            "topics": len(self._by_topic),
+            "refreshes": self.refreshes,
+            "refreshed_at": self.refreshed_at,
+        }
+
+
+trending = TrendingEngine(
+    half_life=settings.TRENDING_HALF_LIFE_HOURS * 3600,
+    top_k=settings.TRENDING_TOP_K,
+    candidates=settings.TRENDING_CANDIDATES,
+    max_tracked=settings.TRENDING_MAX_TRACKED,
+    seed_window=settings.TRENDING_SEED_HOURS * 3600,
+)
+
+
+async def run_trending_refresh_loop():
+    """
+    Refresh the trending snapshot every TRENDING_REFRESH_SECONDS until
+    cancelled.
+    """
+    while True:
+        try:
+            await trending.refresh()
+        except Exception as e:
+            logger.error(f"Trending refresh failed: {str(e)}")
+        await anyio.sleep(settings.TRENDING_REFRESH_SECONDS)
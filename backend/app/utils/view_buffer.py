@@ -0,0 +1,107 @@
+import logging
+from collections import Counter
+from typing import Optional
+
+import anyio
+from pymongo import UpdateOne
+
+from app.core.config import settings
+from app.db.database import db
+from app.utils.cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+
+class ViewBuffer:
+    """
+    Write-behind buffer for article view counts.
+
+    Views are counted in memory and written as one unordered bulk `$inc` per
+    flush, so a popular article costs one write per flush interval instead
+    of one per page view. With a dedupe window, repeated views of the same
+    article by the same user inside the window are counted once.
+    """
+
+    def __init__(self, dedupe_window: float = 0, dedupe_max_entries: int = 100000):
+        self._pending: Counter = Counter()
+        self._seen = (
+            TTLCache(maxsize=dedupe_max_entries, ttl=dedupe_window)
+            if dedupe_window > 0
+            else None
+        )
+        self.recorded = 0
+        self.deduplicated = 0
+        self.flushed = 0
+        self.flushes = 0
+
+    def record(self, article_id: str, user_id: Optional[str] = None) -> bool:
+        """
+        Count one view. Returns False when it was dropped as a duplicate.
+        """
+        if self._seen is not None and user_id:
+            key = (user_id, article_id)
+            if key in self._seen:
+                self.deduplicated += 1
+                return False
+            self._seen.set(key, True)
+        self._pending[article_id] += 1
+        self.recorded += 1
+        return True
+
+    def pending(self, article_id: str) -> int:
+        return self._pending.get(article_id, 0)
+
+    async def flush(self) -> int:
+        """
+        Write all buffered views. Returns the number of views written; on
+        failure the views are put back so the next flush retries them.
+        """
+        if not self._pending:
+            return 0
+
+        batch, self._pending = self._pending, Counter()
+        operations = [
+            UpdateOne({"id": article_id}, {"$inc": {"view_count": count}})
+            for article_id, count in batch.items()
+        ]
+        try:
+            await db.articles.bulk_write(operations, ordered=False)
+        except Exception:
+            self._pending.update(batch)
+            raise
+
+        written = sum(batch.values())
+        self.flushed += written
+        self.flushes += 1
+        return written
+
+    def stats(self) -> dict:
+        return {
+            "pending_articles": len(self._pending),
+            "pending_views": sum(self._pending.values()),
+            "recorded": self.recorded,
+            "deduplicated": self.deduplicated,
+            "flushed": self.flushed,
+            "flushes": self.flushes,
+        }
+
+
+view_buffer = ViewBuffer(
+    dedupe_window=settings.VIEW_DEDUPE_WINDOW_SECONDS,
+    dedupe_max_entries=settings.VIEW_DEDUPE_MAX_ENTRIES,
+)
+
+
+async def run_view_flush_loop():
+    """
+    Flush buffered views every VIEW_FLUSH_INTERVAL_SECONDS until cancelled.
+    """
+    while True:
+        await anyio.sleep(settings.VIEW_FLUSH_INTERVAL_SECONDS)
+        # Shielded so shutdown waits for an in-flight write instead of
+        # abandoning it half way.
+        with anyio.CancelScope(shield=True):
+            try:
+                await view_buffer.flush()
+            except Exception as e:
+                logger.error(f"View count flush failed: {str(e)}")
@@ -95,6 +95,99 @@ def mock_db():
     return db
 
 
+_WRITE_OPS = ("insert", "update", "delete", "replace", "bulk_write")
+
+
+class RecordingCursor:
+    """Cursor stand-in that counts a round trip only when it is consumed."""
+
+    def __init__(self, calls, name, op, items):
+        self._calls = calls
+        self._name = name
+        self._op = op
+        self._items = items
+
+    def sort(self, *args, **kwargs):
+        return self
+
+    def skip(self, *args, **kwargs):
+        return self
+
+    def limit(self, *args, **kwargs):
+        return self
+
+    async def to_list(self, length=None):
+        self._calls.append((self._name, self._op))
+        return list(self._items)
+
+
+class RecordingCollection:
+    """Collection stand-in that records every operation reaching MongoDB."""
+
+    def __init__(self, calls, name, results):
+        self._calls = calls
+        self._name = name
+        self._results = results
+
+    def __getattr__(self, op):
+        result = self._results.get((self._name, op))
+
+        if op in ("find", "aggregate"):
+
+            def open_cursor(*args, **kwargs):
+                return RecordingCursor(self._calls, self._name, op, result or [])
+
+            return open_cursor
+
+        async def call(*args, **kwargs):
+            self._calls.append((self._name, op))
+            if result is None and op.startswith(_WRITE_OPS):
+                # Writes always return a result object (InsertOneResult...).
+                return MagicMock()
+            return result
+
+        return call
+
+
+class RecordingDatabase:
+    """
+    Database stand-in for asserting how many round trips a CRUD call makes.
+
+    Configure return values with `returns(collection, op, value)`; every
+    awaited operation (and every consumed cursor) is appended to `calls` as
+    a `(collection, op)` tuple.
+    """
+
+    def __init__(self):
+        self.calls = []
+        self._results = {}
+
+    def returns(self, collection, op, value):
+        self._results[(collection, op)] = value
+
+    def __getattr__(self, name):
+        return RecordingCollection(self.calls, name, self._results)
+
+    def __getitem__(self, name):
+        return RecordingCollection(self.calls, name, self._results)
+
+
+@pytest.fixture
+def recording_db():
+    """Create a fake database that records every round trip."""
+    return RecordingDatabase()
+
+
+@pytest.fixture
+def clear_profile_cache():
+    """Empty the per-process user profile cache around a test."""
+    from app.crud.user import _profile_cache
+
+    _profile_cache.clear()
+    yield _profile_cache
+    _profile_cache.clear()
+
+
 @pytest.fixture
 def mock_cursor():
     """Create a mock async cursor for find operations."""
@@ -0,0 +1,122 @@
+"""
+Benchmark the related-articles index on a synthetic corpus: the full batch
+build (vectorizing, IDF, blocked top-k search) and indexing one new article
+against its text-search candidates.
+
+Usage:
+    python scripts/benchmark_related.py --articles 100000
+
+No database is needed; the corpus is generated in memory.
+"""
+
+import argparse
+import itertools
+import random
+import statistics
+import sys
+import time
+import uuid
+from pathlib import Path
+
+from dotenv import load_dotenv
+from scipy import sparse
+
+sys.path.append(str(Path(__file__).parent.parent))
+load_dotenv(Path(__file__).parent.parent / ".env")
+
+from app.core.config import settings  # noqa: E402
+from app.utils.related import fit_idf, top_neighbours, vectorize, weigh  # noqa: E402
+
+SYLLABLES = "ka lo mi ra te su vo ne pi da ru ho ze li ba go".split()
+
+
+def _vocabulary(size):
+    words = set()
+    while len(words) < size:
+        words.add("".join(random.choices(SYLLABLES, k=random.randint(2, 4))))
+    return sorted(words)
+
+
+def _text(words, weights, length):
+    # Zipf word frequencies, as in natural text.
+    return " ".join(random.choices(words, cum_weights=weights, k=length))
+
+
+def _synthetic_article(words, weights):
+    return {
+        "id": str(uuid.uuid4()),
+        "title": _text(words, weights, 8),
+        "excerpt": _text(words, weights, 30),
+        "content": _text(words, weights, 400),
+    }
+
+
+def _timed(label, fn, *args):
+    started = time.perf_counter()
+    result = fn(*args)
+    print(f"{label}: {time.perf_counter() - started:.2f}s")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--articles", type=int, default=100000)
+    parser.add_argument("--vocabulary", type=int, default=30000)
+    parser.add_argument("--runs", type=int, default=200)
+    args = parser.parse_args()
+
+    n_features = settings.RELATED_HASH_FEATURES
+    words = _vocabulary(args.vocabulary)
+    weights = list(itertools.accumulate(1 / rank for rank in range(1, len(words) + 1)))
+    corpus = [_synthetic_article(words, weights) for _ in range(args.articles)]
+
+    def vectorize_corpus():
+        chunk = settings.RELATED_CHUNK_SIZE
+        return sparse.vstack(
+            [
+                vectorize(corpus[i : i + chunk], n_features)
+                for i in range(0, len(corpus), chunk)
+            ],
+            format="csr",
+        )
+
+    counts = _timed("vectorize", vectorize_corpus)
+    idf = fit_idf(counts, settings.RELATED_MAX_DF)
+    matrix = _timed("weigh", weigh, counts, idf, settings.RELATED_MAX_TERMS)
+
+    def search():
+        for start in range(0, matrix.shape[0], settings.RELATED_BLOCK_SIZE):
+            stop = min(start + settings.RELATED_BLOCK_SIZE, matrix.shape[0])
+            top_neighbours(matrix, start, stop, settings.RELATED_TOP_K)
+
+    _timed("top-k search", search)
+    block_mb = settings.RELATED_BLOCK_SIZE * matrix.shape[0] * 4 / 1e6
+    print(
+        f"{args.articles} articles, {matrix.nnz} terms kept, "
+        f"{block_mb:.0f}MB per similarity block"
+    )
+
+    # One new article against RELATED_CANDIDATES text-search hits.
+    samples = []
+    for _ in range(args.runs):
+        candidates = random.sample(corpus, settings.RELATED_CANDIDATES)
+        article = _synthetic_article(words, weights)
+        started = time.perf_counter()
+        vector = weigh(
+            vectorize([article], n_features), idf, settings.RELATED_MAX_TERMS
+        )
+        others = weigh(
+            vectorize(candidates, n_features), idf, settings.RELATED_MAX_TERMS
+        )
+        (others @ vector.T).toarray()
+        samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    p95 = samples[max(0, int(len(samples) * 0.95) - 1)]
+    print(
+        f"incremental, {settings.RELATED_CANDIDATES} candidates: "
+        f"p50 {statistics.median(samples):.2f}ms, p95 {p95:.2f}ms"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+"""
+Benchmark article search: the legacy unanchored `$regex` scan against the
+weighted text index, on a synthetic corpus.
+
+Usage:
+    python scripts/benchmark_search.py --articles 1000000
+
+The corpus is written to a separate `<MONGODB_DATABASE>_bench` database so
+the application data is never touched. Pass --keep to reuse it across runs.
+"""
+
+import argparse
+import asyncio
+import random
+import statistics
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+sys.path.append(str(Path(__file__).parent.parent))
+load_dotenv(Path(__file__).parent.parent / ".env")
+
+from motor.motor_asyncio import AsyncIOMotorClient  # noqa: E402
+from pymongo import DESCENDING  # noqa: E402
+
+from app.core.config import settings  # noqa: E402
+from app.crud.article import search_text  # noqa: E402
+from app.db.indexes import INDEXES  # noqa: E402
+
+ENGLISH_WORDS = (
+    "market election climate energy football startup research health budget "
+    "policy vaccine transport housing inflation technology culture museum "
+    "festival satellite battery ocean forest university court parliament"
+).split()
+FRENCH_WORDS = (
+    "économie élection climat énergie football entreprise recherche santé "
+    "budget politique vaccin transport logement inflation technologie culture "
+    "musée festival satellite batterie océan forêt université tribunal"
+).split()
+ENGLISH_GLUE = "the of and in to for with on".split()
+FRENCH_GLUE = "le la les des du et dans pour avec sur".split()
+
+QUERIES = [
+    ("climate energy", "en"),
+    ("football", "en"),
+    ("vaccine research", "en"),
+    ("économie inflation", "fr"),
+    ("élection", "fr"),
+    ("musée culture", "fr"),
+]
+
+
+def _sentence(words, glue, length):
+    parts = []
+    for _ in range(length):
+        parts.append(random.choice(words))
+        if random.random() < 0.4:
+            parts.append(random.choice(glue))
+    return " ".join(parts)
+
+
+def _synthetic_article(now):
+    french = random.random() < 0.5
+    words, glue = (
+        (FRENCH_WORDS, FRENCH_GLUE) if french else (ENGLISH_WORDS, ENGLISH_GLUE)
+    )
+    return {
+        "id": str(uuid.uuid4()),
+        "title": _sentence(words, glue, 8).capitalize(),
+        "excerpt": _sentence(words, glue, 25),
+        # Search reads only this start of the body, never the body itself.
+        "search_text": search_text(_sentence(words, glue, 300)),
+        "author": "Bench",
+        "publisher": "Bench",
+        "source_url": f"https://bench.example/{uuid.uuid4()}",
+        "published_at": now - timedelta(minutes=random.randint(0, 60 * 24 * 365)),
+        "topics": [],
+        "language": "french" if french else "english",
+        "view_count": 0,
+        "like_count": 0,
+        "comment_count": 0,
+        "created_at": now,
+    }
+
+
+async def seed(collection, total, batch_size):
+    existing = await collection.estimated_document_count()
+    if existing >= total:
+        print(f"Reusing {existing} existing articles")
+        return
+
+    now = datetime.utcnow()
+    remaining = total - existing
+    started = time.perf_counter()
+    while remaining > 0:
+        batch = [_synthetic_article(now) for _ in range(min(batch_size, remaining))]
+        await collection.insert_many(batch, ordered=False)
+        remaining -= len(batch)
+        print(f"  seeded {total - remaining}/{total}", end="\r")
+    print(
+        f"\nSeeded {total - existing} articles in {time.perf_counter() - started:.1f}s"
+    )
+
+    await collection.create_index([("published_at", DESCENDING), ("id", DESCENDING)])
+    # The application's own text index, weights and language handling included.
+    for name, keys, options in INDEXES:
+        if name == "articles" and options.get("name") == "articles_text":
+            await collection.create_index(keys, **options)
+
+
+async def _timed(coro_factory, runs):
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        await coro_factory()
+        samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    p95 = samples[max(0, int(len(samples) * 0.95) - 1)]
+    return statistics.median(samples), p95
+
+
+async def run(args):
+    client = AsyncIOMotorClient(settings.MONGODB_URL)
+    bench_db = client.get_database(f"{settings.MONGODB_DATABASE}_bench")
+    collection = bench_db.articles
+
+    await seed(collection, args.articles, args.batch_size)
+
+    # Point the CRUD layer at the benchmark database.
+    from app.crud import article as article_crud
+
+    article_crud.db = bench_db
+
+    header = ["regex p50", "regex p95", "text p50", "text p95"]
+    print("\n" + f"{'query':<22}" + "".join(f"{h:>12}" for h in header))
+    for query, lang in QUERIES:
+
+        async def regex_search():
+            regex = {"$regex": query, "$options": "i"}
+            cursor = (
+                collection.find({"$or": [{"title": regex}, {"excerpt": regex}]})
+                .sort("published_at", -1)
+                .limit(20)
+            )
+            await cursor.to_list(length=20)
+            await collection.count_documents(
+                {"$or": [{"title": regex}, {"excerpt": regex}]}
+            )
+
+        async def text_search():
+            await article_crud.get_articles(search=query, limit=20, language=lang)
+            await article_crud.get_articles_count(search=query, language=lang)
+
+        regex_p50, regex_p95 = await _timed(regex_search, args.runs)
+        text_p50, text_p95 = await _timed(text_search, args.runs)
+        print(
+            f"{query:<22}{regex_p50:>10.1f}ms{regex_p95:>10.1f}ms"
+            f"{text_p50:>10.1f}ms{text_p95:>10.1f}ms"
+        )
+
+    if not args.keep:
+        await client.drop_database(bench_db.name)
+    client.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--articles", type=int, default=1_000_000)
+    parser.add_argument("--batch-size", type=int, default=10_000)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--keep", action="store_true", help="keep the bench database")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
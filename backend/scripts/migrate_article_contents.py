@@ -0,0 +1,205 @@
+"""
+Move article bodies still stored inline into the compressed
+`article_contents` collection, a batch at a time, and keep the start of
+each body on its article as `search_text` for the text index.
+
+Usage:
+    python scripts/migrate_article_contents.py --batch-size 1000
+
+Each batch writes the bodies first and only then unsets them on the
+articles, so an interrupted run loses nothing and can simply be restarted.
+It is safe to run while the API serves writes: a body is only stored if
+the article has none in `article_contents` yet, and only unset if it is
+still the one that was copied, so a concurrent edit is never overwritten.
+Articles moved by an earlier run without `search_text` are given theirs,
+and a text index still built over `content` is rebuilt over `search_text`.
+The articles collection size and the latency of a list query are reported
+before and after.
+"""
+
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+sys.path.append(str(Path(__file__).parent.parent))
+load_dotenv(Path(__file__).parent.parent / ".env")
+
+from motor.motor_asyncio import AsyncIOMotorClient  # noqa: E402
+from pymongo import UpdateOne  # noqa: E402
+
+from app.core.config import settings  # noqa: E402
+
+
+async def report(database, runs):
+    from app.crud import article as article_crud
+
+    articles = await database.command("collStats", "articles")
+    print(
+        f"  articles: {articles['count']} docs, "
+        f"{articles['size'] / 1e6:.1f}MB data, "
+        f"{articles.get('avgObjSize', 0):.0f}B per doc, "
+        f"{articles['storageSize'] / 1e6:.1f}MB on disk"
+    )
+    contents = await database.command("collStats", "article_contents")
+    print(
+        f"  article_contents: {contents['count']} docs, "
+        f"{contents['size'] / 1e6:.1f}MB data, "
+        f"{contents['storageSize'] / 1e6:.1f}MB on disk"
+    )
+
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        await article_crud.get_articles(limit=20)
+        samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    p95 = samples[max(0, int(len(samples) * 0.95) - 1)]
+    print(
+        f"  list query, 20 articles: "
+        f"p50 {statistics.median(samples):.1f}ms, p95 {p95:.1f}ms"
+    )
+
+
+async def migrate(database, batch_size):
+    from app.crud.article import content_document, search_text
+
+    moved = 0
+    last_id = None
+    started = time.perf_counter()
+    while True:
+        query = {"content": {"$exists": True}}
+        if last_id is not None:
+            query["_id"] = {"$gt": last_id}
+        cursor = (
+            database.articles.find(query, {"_id": 1, "id": 1, "content": 1})
+            .sort("_id", 1)
+            .limit(batch_size)
+        )
+        batch = await cursor.to_list(length=batch_size)
+        if not batch:
+            break
+
+        await database.article_contents.bulk_write(
+            [
+                UpdateOne(
+                    {"article_id": article["id"]},
+                    {
+                        "$setOnInsert": content_document(
+                            article["id"], article["content"] or ""
+                        )
+                    },
+                    upsert=True,
+                )
+                for article in batch
+            ],
+            ordered=False,
+        )
+        result = await database.articles.bulk_write(
+            [
+                UpdateOne(
+                    {"_id": article["_id"], "content": article["content"]},
+                    {
+                        "$set": {"search_text": search_text(article["content"])},
+                        "$unset": {"content": ""},
+                    },
+                )
+                for article in batch
+            ],
+            ordered=False,
+        )
+        moved += result.modified_count
+        last_id = batch[-1]["_id"]
+        print(f"  moved {moved}", end="\r")
+    print(f"\nMoved {moved} bodies in {time.perf_counter() - started:.1f}s")
+
+
+async def backfill_search_text(database, batch_size):
+    from app.crud import article as article_crud
+
+    filled = 0
+    last_id = None
+    while True:
+        query = {"content": {"$exists": False}, "search_text": {"$exists": False}}
+        if last_id is not None:
+            query["_id"] = {"$gt": last_id}
+        cursor = (
+            database.articles.find(query, {"_id": 1, "id": 1})
+            .sort("_id", 1)
+            .limit(batch_size)
+        )
+        batch = await cursor.to_list(length=batch_size)
+        if not batch:
+            break
+
+        contents = await article_crud.get_article_contents(
+            [article["id"] for article in batch],
+            max_chars=settings.ARTICLE_SEARCH_TEXT_CHARS,
+        )
+        # Guarded, so a search_text written by a concurrent edit is kept.
+        result = await database.articles.bulk_write(
+            [
+                UpdateOne(
+                    {"_id": article["_id"], "search_text": {"$exists": False}},
+                    {"$set": {"search_text": contents.get(article["id"], "")}},
+                )
+                for article in batch
+            ],
+            ordered=False,
+        )
+        filled += result.modified_count
+        last_id = batch[-1]["_id"]
+    print(f"Gave {filled} migrated articles their search_text")
+
+
+async def rebuild_text_index(database):
+    from app.db.indexes import INDEXES
+
+    keys, options = next(
+        (keys, options)
+        for collection, keys, options in INDEXES
+        if options.get("name") == "articles_text"
+    )
+    current = (await database.articles.index_information()).get("articles_text")
+    if current is not None and "search_text" in current.get("weights", {}):
+        return
+    if current is not None:
+        # A collection has a single text index: the old one goes first.
+        await database.articles.drop_index("articles_text")
+    await database.articles.create_index(keys, **options)
+    print("Rebuilt the text index over search_text")
+
+
+async def run(args):
+    client = AsyncIOMotorClient(settings.MONGODB_URL)
+    database = client.get_database(settings.MONGODB_DATABASE)
+
+    # Point the CRUD layer at the same client.
+    from app.crud import article as article_crud
+
+    article_crud.db = database
+
+    await database.article_contents.create_index("article_id", unique=True)
+    print("Before:")
+    await report(database, args.runs)
+    await migrate(database, args.batch_size)
+    await backfill_search_text(database, args.batch_size)
+    await rebuild_text_index(database)
+    print("After:")
+    await report(database, args.runs)
+    client.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--runs", type=int, default=20)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
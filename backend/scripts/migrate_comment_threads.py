@@ -0,0 +1,75 @@
+"""
+Start a thread at every comment written before comments were threaded.
+
+Each such comment becomes the top-level comment of its own thread, a batch
+at a time.
+
+Usage:
+    python scripts/migrate_comment_threads.py --batch-size 1000
+
+Unthreaded comments are left out of thread listings until they are given a
+path; replying to one threads it on the spot, so the run is only needed for
+them to be listed. It only touches comments without a path, so an
+interrupted run can simply be restarted.
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+sys.path.append(str(Path(__file__).parent.parent))
+load_dotenv(Path(__file__).parent.parent / ".env")
+
+from motor.motor_asyncio import AsyncIOMotorClient  # noqa: E402
+from pymongo import UpdateOne  # noqa: E402
+
+from app.core.config import settings  # noqa: E402
+
+
+async def migrate(database, batch_size):
+    from app.crud.comment import _root_fields
+
+    threaded = 0
+    started = time.perf_counter()
+    while True:
+        cursor = database.comments.find(
+            {"path": {"$exists": False}}, {"_id": 1, "id": 1, "created_at": 1}
+        ).limit(batch_size)
+        batch = await cursor.to_list(length=batch_size)
+        if not batch:
+            break
+
+        await database.comments.bulk_write(
+            [
+                UpdateOne(
+                    {"_id": comment["_id"], "path": {"$exists": False}},
+                    {"$set": _root_fields(comment["id"], comment["created_at"])},
+                )
+                for comment in batch
+            ],
+            ordered=False,
+        )
+        threaded += len(batch)
+        print(f"  threaded {threaded}", end="\r")
+    print(f"\nThreaded {threaded} comments in {time.perf_counter() - started:.1f}s")
+
+
+async def run(args):
+    client = AsyncIOMotorClient(settings.MONGODB_URL)
+    database = client.get_database(settings.MONGODB_DATABASE)
+    await migrate(database, args.batch_size)
+    client.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--batch-size", type=int, default=1000)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
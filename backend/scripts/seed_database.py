@@ -11,6 +11,7 @@ import random  # noqa: E402
 import uuid
 from datetime import datetime, timedelta
 
+from app.crud.article import save_article_content, search_text
 from app.db.database import db
 from app.security.password import get_password_hash
 
@@ -336,6 +337,7 @@ async def clear_database():
     print("🗑️  Clearing existing data...")
     await db.topics.delete_many({})
     await db.articles.delete_many({})
+    await db.article_contents.delete_many({})
     await db.users.delete_many({})
     await db.comments.delete_many({})
     await db.user_interactions.delete_many({})
@@ -401,7 +403,7 @@ async def seed_articles(topics):
             "id": str(uuid.uuid4()),
             "title": article_data["title"],
             "excerpt": article_data["excerpt"],
-            "content": article_data["content"],
+            "search_text": search_text(article_data["content"]),
             "author": article_data["author"],
             "publisher": article_data["publisher"],
             "source_url": f"https://example.com/article-{i + 1}",
@@ -415,6 +417,9 @@ async def seed_articles(topics):
         }
         articles.append(article)
 
+    # Bodies live in article_contents, stored as create_article stores them.
+    for article, article_data in zip(articles, ARTICLES_FR):
+        await save_article_content(article["id"], article_data["content"])
     await db.articles.insert_many(articles)
     print(f"✅ Created {len(articles)} articles")
     return articles
@@ -1,14 +1,27 @@
+import zlib
 from datetime import datetime
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
+from bson import Binary
+from pymongo import ReturnDocument
 
 from app.crud import article as article_crud
 from app.schemas.article import ArticleCreate, ArticleUpdate
+from app.utils.near_duplicates import BANDS, bands, to_signed
 
 pytestmark = pytest.mark.anyio
 
 
+def _content_doc(article_id, content):
+    return {
+        "article_id": article_id,
+        "encoding": "zlib",
+        "body": Binary(zlib.compress(content.encode())),
+        "length": len(content),
+    }
+
+
 # ============================================================================
 # get_article_by_id Tests
 # ============================================================================
@@ -24,8 +37,10 @@ async def test_get_article_by_id_found(mock_db, test_article):
     # WHEN get_article_by_id is called
     result = await article_crud.get_article_by_id("test-article-id-123")
 
-    # THEN the article is returned
-    mock_db.articles.find_one.assert_awaited_with({"id": "test-article-id-123"})
+    # THEN the article is returned, without an inline body
+    mock_db.articles.find_one.assert_awaited_with(
+        {"id": "test-article-id-123"}, {"content": 0, "search_text": 0}
+    )
     assert result == test_article
 
 
@@ -43,20 +58,94 @@ async def test_get_article_by_id_not_found(mock_db):
 
 
 @patch("app.crud.article.db")
-async def test_get_article_by_id_increments_view(mock_db, test_article):
+async def test_get_article_by_id_is_pure_read(mock_db, test_article):
     # GIVEN an article exists
     mock_db.articles = MagicMock()
     mock_db.articles.find_one = AsyncMock(return_value=test_article)
     mock_db.articles.update_one = AsyncMock()
 
-    # WHEN get_article_by_id is called with increment_view=True
-    await article_crud.get_article_by_id("test-article-id-123", increment_view=True)
+    # WHEN get_article_by_id is called
+    await article_crud.get_article_by_id("test-article-id-123")
 
-    # THEN view_count is incremented
-    mock_db.articles.update_one.assert_awaited_with(
-        {"id": "test-article-id-123"}, {"$inc": {"view_count": 1}}
+    # THEN no write is made (views are counted by the view buffer)
+    mock_db.articles.update_one.assert_not_awaited()
+
+
+# ============================================================================
+# Article Content Tests
+# ============================================================================
+
+
+@patch("app.crud.article.db")
+async def test_get_article_content(mock_db):
+    # GIVEN a body stored compressed
+    mock_db.article_contents.find_one = AsyncMock(
+        return_value=_content_doc("a1", "Full body – with accents é")
+    )
+    mock_db.articles.find_one = AsyncMock()
+
+    # WHEN the content is read
+    result = await article_crud.get_article_content("a1")
+
+    # THEN it is decompressed without touching the article
+    assert result == "Full body – with accents é"
+    mock_db.articles.find_one.assert_not_awaited()
+
+
+@patch("app.crud.article.db")
+async def test_get_article_content_not_migrated(mock_db):
+    # GIVEN an article whose body is still inline
+    mock_db.article_contents.find_one = AsyncMock(return_value=None)
+    mock_db.articles.find_one = AsyncMock(return_value={"content": "Inline body"})
+
+    # WHEN the content is read
+    result = await article_crud.get_article_content("a1")
+
+    # THEN the inline body is returned
+    assert result == "Inline body"
+    mock_db.articles.find_one.assert_awaited_with(
+        {"id": "a1"}, {"_id": 0, "content": 1}
+    )
+
+
+@patch("app.crud.article.db")
+async def test_get_article_content_missing(mock_db):
+    mock_db.article_contents.find_one = AsyncMock(return_value=None)
+    mock_db.articles.find_one = AsyncMock(return_value=None)
+
+    assert await article_crud.get_article_content("nonexistent") == ""
+
+
+@patch("app.crud.article.db")
+async def test_get_article_contents_prefixes(mock_db, mock_cursor):
+    # GIVEN one body migrated and one still inline
+    mock_db.article_contents.find = MagicMock(
+        return_value=mock_cursor([_content_doc("a1", "é" * 5000)])
+    )
+    mock_db.articles.find = MagicMock(
+        return_value=mock_cursor([{"id": "a2", "content": "inline body"}])
     )
 
+    # WHEN the first 6 characters of three articles are read
+    result = await article_crud.get_article_contents(["a1", "a2", "a3"], 6)
+
+    # THEN both bodies are cut, and the one without a body is left out
+    assert result == {"a1": "éééééé", "a2": "inline"}
+    query = mock_db.articles.find.call_args[0][0]
+    assert query == {"id": {"$in": ["a2", "a3"]}, "content": {"$exists": True}}
+
+
+@patch("app.crud.article.db")
+async def test_get_article_topics(mock_db):
+    mock_db.articles.find_one = AsyncMock(
+        side_effect=[{"topics": ["technology"]}, {}, None]
+    )
+
+    assert await article_crud.get_article_topics("a1") == ["technology"]
+    assert await article_crud.get_article_topics("a2") == []
+    assert await article_crud.get_article_topics("missing") is None
+    assert mock_db.articles.find_one.call_args[0][1] == {"_id": 0, "topics": 1}
+
 
 # ============================================================================
 # get_articles Tests
@@ -79,8 +168,8 @@ async def test_get_articles_basic(mock_db, test_article, test_article_2):
 
     # THEN articles are returned
     assert len(result) == 2
-    mock_db.articles.find.assert_called_with({})
-    mock_cursor.sort.assert_called_with("published_at", -1)
+    mock_db.articles.find.assert_called_with({}, article_crud.ARTICLE_PROJECTION)
+    mock_cursor.sort.assert_called_with([("published_at", -1), ("id", -1)])
 
 
 @patch("app.crud.article.db")
@@ -98,13 +187,87 @@ async def test_get_articles_with_topic_filter(mock_db, test_article):
     result = await article_crud.get_articles(topic="technology")
 
     # THEN query includes topic filter
-    mock_db.articles.find.assert_called_with({"topics": "technology"})
+    mock_db.articles.find.assert_called_with(
+        {"topics": "technology"}, article_crud.ARTICLE_PROJECTION
+    )
     assert len(result) == 1
 
 
 @patch("app.crud.article.db")
 async def test_get_articles_with_search(mock_db, test_article):
-    # GIVEN articles exist
+    # GIVEN articles matching a search exist
+    mock_cursor = MagicMock()
+    mock_cursor.to_list = AsyncMock(return_value=[test_article])
+    mock_db.articles = MagicMock()
+    mock_db.articles.aggregate = MagicMock(return_value=mock_cursor)
+
+    # WHEN get_articles is called with search term
+    result = await article_crud.get_articles(search="test", topic="technology")
+
+    # THEN the text index is queried and results are ranked by relevance
+    pipeline = mock_db.articles.aggregate.call_args[0][0]
+    assert pipeline[0]["$match"]["$text"]["$search"] == "test"
+    assert pipeline[0]["$match"]["topics"] == "technology"
+    assert pipeline[2]["$sort"] == {"search_score": -1, "id": -1}
+    assert pipeline[-1]["$project"] == {"content": 0, "search_text": 0}
+    mock_db.articles.find.assert_not_called()
+    assert result == [test_article]
+
+
+@patch("app.crud.article.db")
+async def test_get_articles_search_is_not_a_regex(mock_db):
+    # GIVEN a search term containing regex metacharacters
+    mock_cursor = MagicMock()
+    mock_cursor.to_list = AsyncMock(return_value=[])
+    mock_db.articles = MagicMock()
+    mock_db.articles.aggregate = MagicMock(return_value=mock_cursor)
+
+    # WHEN get_articles is called
+    await article_crud.get_articles(search="(market+)+$")
+
+    # THEN the term is passed to the text index verbatim
+    match = mock_db.articles.aggregate.call_args[0][0][0]["$match"]
+    assert match == {"$text": {"$search": "(market+)+$"}}
+
+
+@pytest.mark.parametrize("search", ["?!", " - ", "(a+)+$"])
+@patch("app.crud.article.db")
+async def test_search_without_terms_skips_the_index(mock_db, search):
+    # GIVEN a search with nothing the text index could match
+    mock_db.articles = MagicMock()
+
+    # WHEN it is run and counted
+    articles = await article_crud.get_articles(search=search)
+    total = await article_crud.get_articles_count(search=search)
+
+    # THEN nothing is found without querying
+    assert articles == []
+    assert total == 0
+    mock_db.articles.aggregate.assert_not_called()
+    mock_db.articles.count_documents.assert_not_called()
+
+
+@patch("app.crud.article.db")
+async def test_get_articles_search_language(mock_db):
+    # GIVEN a French search
+    mock_cursor = MagicMock()
+    mock_cursor.to_list = AsyncMock(return_value=[])
+    mock_db.articles = MagicMock()
+    mock_db.articles.aggregate = MagicMock(return_value=mock_cursor)
+
+    # WHEN get_articles is called with an explicit language
+    await article_crud.get_articles(search="économie", language="fr")
+
+    # THEN the query is stemmed as French
+    match = mock_db.articles.aggregate.call_args[0][0][0]["$match"]
+    assert match["$text"]["$language"] == "french"
+
+
+@patch("app.crud.article.db")
+async def test_get_articles_with_cursor(mock_db, test_article):
+    # GIVEN a cursor from a previous page
+    from app.utils.pagination import encode_cursor
+
     mock_cursor = MagicMock()
     mock_cursor.sort = MagicMock(return_value=mock_cursor)
     mock_cursor.skip = MagicMock(return_value=mock_cursor)
@@ -112,14 +275,20 @@ async def test_get_articles_with_search(mock_db, test_article):
     mock_cursor.to_list = AsyncMock(return_value=[test_article])
     mock_db.articles = MagicMock()
     mock_db.articles.find = MagicMock(return_value=mock_cursor)
+    published_at = datetime(2024, 1, 15, 12, 0, 0)
+    cursor = encode_cursor("published_at", published_at, "article-x")
 
-    # WHEN get_articles is called with search term
-    await article_crud.get_articles(search="test")
+    # WHEN get_articles is called with the cursor and a skip
+    await article_crud.get_articles(skip=40, cursor=cursor, topic="technology")
 
-    # THEN query includes search regex
-    call_args = mock_db.articles.find.call_args[0][0]
-    assert "$or" in call_args
-    assert call_args["$or"][0]["title"]["$regex"] == "test"
+    # THEN the query seeks past the cursor instead of skipping
+    query = mock_db.articles.find.call_args[0][0]
+    assert query["topics"] == "technology"
+    assert query["$or"] == [
+        {"published_at": {"$lt": published_at}},
+        {"published_at": published_at, "id": {"$lt": "article-x"}},
+    ]
+    mock_cursor.skip.assert_called_with(0)
 
 
 # ============================================================================
@@ -154,7 +323,100 @@ async def test_get_articles_count_with_filters(mock_db):
     assert result == 10
     call_args = mock_db.articles.count_documents.call_args[0][0]
     assert call_args["topics"] == "technology"
-    assert "$or" in call_args
+    assert call_args["$text"]["$search"] == "test"
+
+
+@pytest.fixture
+def clear_count_cache():
+    article_crud.invalidate_counts()
+    yield
+    article_crud.invalidate_counts()
+
+
+@patch("app.crud.article.db")
+async def test_get_articles_count_approx_unfiltered(mock_db, clear_count_cache):
+    # GIVEN an unfiltered list
+    mock_db.articles = MagicMock()
+    mock_db.articles.estimated_document_count = AsyncMock(return_value=1000)
+    mock_db.articles.count_documents = AsyncMock(return_value=999)
+
+    # WHEN an approximate count is requested
+    result = await article_crud.get_articles_count(mode="approx")
+
+    # THEN collection metadata is used instead of counting
+    assert result == 1000
+    mock_db.articles.count_documents.assert_not_awaited()
+
+
+@patch("app.crud.article.db")
+async def test_get_articles_count_approx_uses_cache(mock_db, clear_count_cache):
+    # GIVEN a filtered count
+    mock_db.articles = MagicMock()
+    mock_db.articles.count_documents = AsyncMock(return_value=10)
+
+    # WHEN the same approximate count is requested twice
+    first = await article_crud.get_articles_count(topic="tech", mode="approx")
+    second = await article_crud.get_articles_count(topic="tech", mode="approx")
+
+    # THEN the database is counted only once
+    assert first == second == 10
+    mock_db.articles.count_documents.assert_awaited_once()
+
+
+@patch("app.crud.article.db")
+async def test_get_articles_count_exact_bypasses_cache(mock_db, clear_count_cache):
+    # GIVEN a cached count
+    mock_db.articles = MagicMock()
+    mock_db.articles.count_documents = AsyncMock(side_effect=[10, 11])
+    await article_crud.get_articles_count(topic="tech", mode="approx")
+
+    # WHEN an exact count is requested
+    result = await article_crud.get_articles_count(topic="tech", mode="exact")
+
+    # THEN the database is counted again
+    assert result == 11
+    assert mock_db.articles.count_documents.await_count == 2
+
+
+@patch("app.crud.article.db")
+async def test_get_articles_count_none(mock_db, clear_count_cache):
+    mock_db.articles = MagicMock()
+    mock_db.articles.count_documents = AsyncMock(return_value=10)
+
+    result = await article_crud.get_articles_count(topic="tech", mode="none")
+
+    assert result is None
+    mock_db.articles.count_documents.assert_not_awaited()
+
+
+@patch("app.crud.article.db")
+async def test_article_write_invalidates_counts(mock_db, clear_count_cache):
+    # GIVEN a cached count
+    mock_db.articles = MagicMock()
+    mock_db.articles.count_documents = AsyncMock(side_effect=[10, 11])
+    mock_db.articles.delete_one = AsyncMock(return_value=MagicMock(deleted_count=1))
+    mock_db.article_contents.delete_one = AsyncMock()
+    await article_crud.get_articles_count(topic="tech", mode="approx")
+
+    # WHEN an article is deleted
+    await article_crud.delete_article("a1")
+
+    # THEN the next approximate count hits the database
+    result = await article_crud.get_articles_count(topic="tech", mode="approx")
+    assert result == 11
+
+
+@patch("app.crud.article.db")
+async def test_get_articles_count_by_topic_ids(mock_db, clear_count_cache):
+    mock_db.articles = MagicMock()
+    mock_db.articles.count_documents = AsyncMock(return_value=7)
+
+    result = await article_crud.get_articles_count_by_topic_ids(["t1", "t2"])
+
+    assert result == 7
+    mock_db.articles.count_documents.assert_awaited_with(
+        {"topics": {"$in": ["t1", "t2"]}}
+    )
 
 
 # ============================================================================
@@ -214,17 +476,10 @@ async def test_create_article(mock_db):
         source_url="https://example.com/new",
         published_at=datetime(2024, 1, 20, 12, 0, 0),
     )
-    created_article = {
-        "id": "new-article-id",
-        "title": "New Article",
-        "view_count": 0,
-        "like_count": 0,
-        "comment_count": 0,
-    }
     mock_db.articles = MagicMock()
     mock_db.articles.insert_one = AsyncMock()
-    mock_db.articles.find_one = AsyncMock(return_value=created_article)
-    mock_db.articles.update_one = AsyncMock()
+    mock_db.articles.find_one = AsyncMock()
+    mock_db.article_contents.replace_one = AsyncMock()
 
     # WHEN create_article is called
     result = await article_crud.create_article(article_in)
@@ -238,7 +493,80 @@ async def test_create_article(mock_db):
     assert insert_data["comment_count"] == 0
     assert "id" in insert_data
     assert "created_at" in insert_data
-    assert result == created_article
+    # AND the near-duplicate fingerprint is stored with its bands
+    assert len(insert_data["simhash_bands"]) == BANDS
+    assert -(1 << 63) <= insert_data["simhash"] < 1 << 63
+    # AND the body is stored compressed in its own collection
+    assert "content" not in insert_data
+    filter_, content_doc = mock_db.article_contents.replace_one.call_args[0]
+    assert filter_ == {"article_id": insert_data["id"]}
+    assert content_doc["encoding"] == "zlib"
+    assert content_doc["length"] == len("Article content")
+    assert zlib.decompress(content_doc["body"]).decode() == "Article content"
+    # AND its start is kept on the article for the text index
+    assert insert_data["search_text"] == "Article content"
+    # AND the inserted document is returned with its body, without a read back
+    assert result == {**insert_data, "content": "Article content"}
+    mock_db.articles.find_one.assert_not_awaited()
+
+
+# ============================================================================
+# find_near_duplicate Tests
+# ============================================================================
+
+
+@patch("app.crud.article.db")
+async def test_find_near_duplicate_compares_band_matches(mock_db, mock_cursor):
+    # GIVEN two articles sharing a band, one 2 bits away and one 40 bits away
+    fingerprint = (1 << 63) | 0xF0F0
+    close = {"id": "close", "simhash": to_signed(fingerprint ^ 0b101)}
+    far = {"id": "far", "simhash": to_signed(fingerprint ^ ((1 << 40) - 1))}
+    mock_db.articles.find = MagicMock(return_value=mock_cursor([far, close]))
+
+    # WHEN a near duplicate is looked up
+    result = await article_crud.find_near_duplicate(fingerprint)
+
+    # THEN only articles sharing a band are read, and the close one matches
+    assert result is close
+    query = mock_db.articles.find.call_args[0][0]
+    assert query == {"simhash_bands": {"$in": bands(fingerprint)}}
+
+
+@patch("app.crud.article.db")
+async def test_find_near_duplicate_none_within_distance(mock_db, mock_cursor):
+    far = {"id": "far", "simhash": to_signed((1 << 40) - 1)}
+    mock_db.articles.find = MagicMock(return_value=mock_cursor([far]))
+
+    assert await article_crud.find_near_duplicate(0xFF) is None
+
+
+async def test_find_near_duplicate_without_text():
+    assert await article_crud.find_near_duplicate(0) is None
+
+
+@patch("app.crud.article.db")
+async def test_create_article_detects_language(mock_db):
+    # GIVEN a French article without an explicit language
+    article_in = ArticleCreate(
+        title="La réforme des retraites est adoptée",
+        excerpt="Le texte a été voté par les députés",
+        content="Contenu",
+        author="Auteur",
+        publisher="Le Journal",
+        source_url="https://example.fr/article",
+        published_at=datetime(2024, 1, 20, 12, 0, 0),
+    )
+    mock_db.articles = MagicMock()
+    mock_db.articles.insert_one = AsyncMock()
+    mock_db.articles.find_one = AsyncMock(return_value={})
+    mock_db.article_contents.replace_one = AsyncMock()
+
+    # WHEN create_article is called
+    await article_crud.create_article(article_in)
+
+    # THEN the article is indexed as French
+    insert_data = mock_db.articles.insert_one.call_args[0][0]
+    assert insert_data["language"] == "french"
 
 
 # ============================================================================
@@ -252,17 +580,80 @@ async def test_update_article(mock_db, test_article):
     update_data = ArticleUpdate(title="Updated Title", excerpt="Updated excerpt")
     updated_article = {**test_article, "title": "Updated Title"}
     mock_db.articles = MagicMock()
-    mock_db.articles.update_one = AsyncMock()
-    mock_db.articles.find_one = AsyncMock(return_value=updated_article)
+    mock_db.articles.find_one_and_update = AsyncMock(return_value=updated_article)
+    mock_db.articles.find_one = AsyncMock()
+    mock_db.article_contents.find_one = AsyncMock()
 
     # WHEN update_article is called
     result = await article_crud.update_article("test-article-id-123", update_data)
 
-    # THEN article is updated
-    mock_db.articles.update_one.assert_awaited_once()
-    call_args = mock_db.articles.update_one.call_args
+    # THEN article is updated and returned in a single round trip
+    mock_db.articles.find_one_and_update.assert_awaited_once()
+    call_args = mock_db.articles.find_one_and_update.call_args
     assert call_args[0][0] == {"id": "test-article-id-123"}
+    assert call_args[1]["return_document"] == ReturnDocument.AFTER
+    mock_db.articles.find_one.assert_not_awaited()
     assert result["title"] == "Updated Title"
+    # AND the unchanged body is not read
+    mock_db.article_contents.find_one.assert_not_awaited()
+
+
+@patch("app.crud.article.db")
+async def test_update_article_content(mock_db, test_article):
+    # GIVEN an article whose body is still stored inline
+    mock_db.articles = MagicMock()
+    mock_db.articles.find_one = AsyncMock(return_value={"_id": "oid"})
+    mock_db.articles.find_one_and_update = AsyncMock(return_value=dict(test_article))
+    mock_db.article_contents.replace_one = AsyncMock()
+
+    # WHEN its content is updated
+    result = await article_crud.update_article(
+        "test-article-id-123", ArticleUpdate(content="A much longer body")
+    )
+
+    # THEN the new body goes to the content collection
+    content_doc = mock_db.article_contents.replace_one.call_args[0][1]
+    assert zlib.decompress(content_doc["body"]).decode() == "A much longer body"
+    # AND the inline copy is dropped
+    update = mock_db.articles.find_one_and_update.call_args[0][1]
+    assert update["$unset"] == {"content": ""}
+    assert set(update["$set"]) == {"updated_at", "search_text"}
+    assert update["$set"]["search_text"] == "A much longer body"
+    assert result["content"] == "A much longer body"
+
+
+@patch("app.crud.article.db")
+async def test_update_article_not_found(mock_db):
+    # GIVEN no article matches
+    mock_db.articles = MagicMock()
+    mock_db.articles.find_one_and_update = AsyncMock(return_value=None)
+
+    # WHEN update_article is called
+    result = await article_crud.update_article(
+        "nonexistent", ArticleUpdate(title="Updated Title")
+    )
+
+    # THEN None is returned
+    assert result is None
+
+
+@patch("app.crud.article.db")
+async def test_update_article_content_not_found(mock_db):
+    # GIVEN no article matches
+    mock_db.articles = MagicMock()
+    mock_db.articles.find_one = AsyncMock(return_value=None)
+    mock_db.articles.find_one_and_update = AsyncMock()
+    mock_db.article_contents.replace_one = AsyncMock()
+
+    # WHEN its content is updated
+    result = await article_crud.update_article(
+        "nonexistent", ArticleUpdate(content="Body")
+    )
+
+    # THEN nothing is written
+    assert result is None
+    mock_db.article_contents.replace_one.assert_not_awaited()
+    mock_db.articles.find_one_and_update.assert_not_awaited()
 
 
 @patch("app.crud.article.db")
@@ -270,14 +661,13 @@ async def test_update_article_filters_none(mock_db, test_article):
     # GIVEN update with None values
     update_data = ArticleUpdate(title="Updated Title", excerpt=None)
     mock_db.articles = MagicMock()
-    mock_db.articles.update_one = AsyncMock()
-    mock_db.articles.find_one = AsyncMock(return_value=test_article)
+    mock_db.articles.find_one_and_update = AsyncMock(return_value=test_article)
 
     # WHEN update_article is called
     await article_crud.update_article("test-article-id-123", update_data)
 
     # THEN None values are filtered out
-    call_args = mock_db.articles.update_one.call_args
+    call_args = mock_db.articles.find_one_and_update.call_args
     update_set = call_args[0][1]["$set"]
     assert "title" in update_set
     assert "excerpt" not in update_set or update_set.get("excerpt") is not None
@@ -295,6 +685,7 @@ async def test_delete_article_success(mock_db):
     mock_result.deleted_count = 1
     mock_db.articles = MagicMock()
     mock_db.articles.delete_one = AsyncMock(return_value=mock_result)
+    mock_db.article_contents.delete_one = AsyncMock()
 
     # WHEN delete_article is called
     result = await article_crud.delete_article("test-article-id-123")
@@ -302,6 +693,10 @@ async def test_delete_article_success(mock_db):
     # THEN True is returned
     assert result is True
     mock_db.articles.delete_one.assert_awaited_with({"id": "test-article-id-123"})
+    # AND its body is deleted too
+    mock_db.article_contents.delete_one.assert_awaited_with(
+        {"article_id": "test-article-id-123"}
+    )
 
 
 @patch("app.crud.article.db")
@@ -311,6 +706,7 @@ async def test_delete_article_not_found(mock_db):
     mock_result.deleted_count = 0
     mock_db.articles = MagicMock()
     mock_db.articles.delete_one = AsyncMock(return_value=mock_result)
+    mock_db.article_contents.delete_one = AsyncMock()
 
     # WHEN delete_article is called
     result = await article_crud.delete_article("nonexistent-id")
@@ -374,33 +770,6 @@ async def test_increment_comment_count(mock_db):
     )
 
 
-# ============================================================================
-# get_articles_by_topic_ids Tests
-# ============================================================================
-
-
-@patch("app.crud.article.db")
-async def test_get_articles_by_topic_ids(mock_db, test_article):
-    # GIVEN articles with topics
-    mock_cursor = MagicMock()
-    mock_cursor.sort = MagicMock(return_value=mock_cursor)
-    mock_cursor.skip = MagicMock(return_value=mock_cursor)
-    mock_cursor.limit = MagicMock(return_value=mock_cursor)
-    mock_cursor.to_list = AsyncMock(return_value=[test_article])
-    mock_db.articles = MagicMock()
-    mock_db.articles.find = MagicMock(return_value=mock_cursor)
-
-    # WHEN get_articles_by_topic_ids is called
-    result = await article_crud.get_articles_by_topic_ids(
-        ["topic-1", "topic-2"], skip=0, limit=20
-    )
-
-    # THEN articles with matching topics are returned
-    call_args = mock_db.articles.find.call_args[0][0]
-    assert call_args == {"topics": {"$in": ["topic-1", "topic-2"]}}
-    assert len(result) == 1
-
-
 # ============================================================================
 # get_article_by_url Tests
 # ============================================================================
@@ -417,7 +786,7 @@ async def test_get_article_by_url_found(mock_db, test_article):
 
     # THEN the article is returned
     mock_db.articles.find_one.assert_awaited_with(
-        {"source_url": "https://example.com/article"}
+        {"source_url": "https://example.com/article"}, {"content": 0, "search_text": 0}
     )
     assert result == test_article
 
@@ -2,13 +2,38 @@ from datetime import datetime
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
+from pymongo import ReturnDocument
 
 from app.crud import comment as comment_crud
 from app.schemas.comment import CommentCreate, CommentUpdate
+from app.utils.events import event_hub
+from app.utils.pagination import encode_cursor
 
 pytestmark = pytest.mark.anyio
 
 
+@pytest.fixture(autouse=True)
+def clear_title_cache():
+    comment_crud._title_cache.clear()
+    yield
+    comment_crud._title_cache.clear()
+
+
+def _cursor(docs):
+    cursor = MagicMock()
+    cursor.sort = MagicMock(return_value=cursor)
+    cursor.skip = MagicMock(return_value=cursor)
+    cursor.limit = MagicMock(return_value=cursor)
+    cursor.to_list = AsyncMock(return_value=docs)
+    return cursor
+
+
+def _title_cursor(docs):
+    cursor = MagicMock()
+    cursor.to_list = AsyncMock(return_value=docs)
+    return cursor
+
+
 # ============================================================================
 # get_comment_by_id Tests
 # ============================================================================
@@ -60,7 +85,9 @@ async def test_get_comments_by_article(
     mock_db.comments = MagicMock()
     mock_db.comments.find = MagicMock(return_value=mock_cursor)
 
-    mock_user_crud.get_user_by_id = AsyncMock(return_value=test_user)
+    mock_user_crud.get_user_profiles = AsyncMock(
+        side_effect=lambda user_ids: dict.fromkeys(user_ids, test_user)
+    )
 
     # WHEN get_comments_by_article is called
     result = await comment_crud.get_comments_by_article("test-article-id-123")
@@ -85,7 +112,7 @@ async def test_get_comments_by_article_user_not_found(
     mock_db.comments = MagicMock()
     mock_db.comments.find = MagicMock(return_value=mock_cursor)
 
-    mock_user_crud.get_user_by_id = AsyncMock(return_value=None)
+    mock_user_crud.get_user_profiles = AsyncMock(return_value={})
 
     # WHEN get_comments_by_article is called
     result = await comment_crud.get_comments_by_article("test-article-id-123")
@@ -95,6 +122,40 @@ async def test_get_comments_by_article_user_not_found(
     assert result[0]["user"]["username"] == "Unknown User"
 
 
+async def test_get_comments_by_article_query_count(recording_db, clear_profile_cache):
+    # GIVEN a full page of 100 comments by 3 authors, one of them deleted
+    comments = [
+        {"id": f"c{i}", "user_id": f"u{i % 3}", "content": "Hi"} for i in range(100)
+    ]
+    authors = [
+        {"id": "u0", "username": "ann", "profile_pic": None},
+        {"id": "u1", "username": "bob", "profile_pic": "bob.png"},
+    ]
+    recording_db.returns("comments", "find", comments)
+    recording_db.returns("users", "find", authors)
+
+    # WHEN the page is read twice
+    with (
+        patch("app.crud.comment.db", recording_db),
+        patch("app.crud.user.db", recording_db),
+    ):
+        result = await comment_crud.get_comments_by_article("a1")
+        await comment_crud.get_comments_by_article("a1")
+
+    # THEN the authors are read in one query, then served from the cache,
+    # the deleted one included
+    assert recording_db.calls == [
+        ("comments", "find"),
+        ("users", "find"),
+        ("comments", "find"),
+    ]
+    assert [r["user"]["username"] for r in result[:3]] == [
+        "ann",
+        "bob",
+        "Unknown User",
+    ]
+
+
 # ============================================================================
 # get_comments_count Tests
 # ============================================================================
@@ -111,8 +172,9 @@ async def test_get_comments_count(mock_db):
 
     # THEN count is returned
     assert result == 5
+    # AND tombstones are not counted
     mock_db.comments.count_documents.assert_awaited_with(
-        {"article_id": "test-article-id-123"}
+        {"article_id": "test-article-id-123", "deleted": {"$ne": True}}
     )
 
 
@@ -140,7 +202,9 @@ async def test_get_comments_by_magazine(mock_db, mock_user_crud, test_user):
     mock_db.comments = MagicMock()
     mock_db.comments.find = MagicMock(return_value=mock_cursor)
 
-    mock_user_crud.get_user_by_id = AsyncMock(return_value=test_user)
+    mock_user_crud.get_user_profiles = AsyncMock(
+        side_effect=lambda user_ids: dict.fromkeys(user_ids, test_user)
+    )
 
     # WHEN get_comments_by_magazine is called
     result = await comment_crud.get_comments_by_magazine("test-magazine-id")
@@ -194,9 +258,11 @@ async def test_get_comments_by_user_with_article(mock_db, mock_user_crud, test_u
     mock_db.comments = MagicMock()
     mock_db.comments.find = MagicMock(return_value=mock_cursor)
     mock_db.articles = MagicMock()
-    mock_db.articles.find_one = AsyncMock(return_value=article)
+    mock_db.articles.find = MagicMock(return_value=_title_cursor([article]))
 
-    mock_user_crud.get_user_by_id = AsyncMock(return_value=test_user)
+    mock_user_crud.get_user_profiles = AsyncMock(
+        side_effect=lambda user_ids: dict.fromkeys(user_ids, test_user)
+    )
 
     # WHEN get_comments_by_user is called
     result = await comment_crud.get_comments_by_user(test_user["id"])
@@ -204,6 +270,10 @@ async def test_get_comments_by_user_with_article(mock_db, mock_user_crud, test_u
     # THEN comments with article title are returned
     assert len(result) == 1
     assert result[0]["article_title"] == "Test Article"
+    # AND tombstones are left out
+    mock_db.comments.find.assert_called_once_with(
+        {"user_id": test_user["id"], "deleted": {"$ne": True}}
+    )
 
 
 @patch("app.crud.comment.user_crud")
@@ -227,9 +297,11 @@ async def test_get_comments_by_user_with_magazine(mock_db, mock_user_crud, test_
     mock_db.comments = MagicMock()
     mock_db.comments.find = MagicMock(return_value=mock_cursor)
     mock_db.magazines = MagicMock()
-    mock_db.magazines.find_one = AsyncMock(return_value=magazine)
+    mock_db.magazines.find = MagicMock(return_value=_title_cursor([magazine]))
 
-    mock_user_crud.get_user_by_id = AsyncMock(return_value=test_user)
+    mock_user_crud.get_user_profiles = AsyncMock(
+        side_effect=lambda user_ids: dict.fromkeys(user_ids, test_user)
+    )
 
     # WHEN get_comments_by_user is called
     result = await comment_crud.get_comments_by_user(test_user["id"])
@@ -259,9 +331,11 @@ async def test_get_comments_by_user_deleted_article(mock_db, mock_user_crud, tes
     mock_db.comments = MagicMock()
     mock_db.comments.find = MagicMock(return_value=mock_cursor)
     mock_db.articles = MagicMock()
-    mock_db.articles.find_one = AsyncMock(return_value=None)
+    mock_db.articles.find = MagicMock(return_value=_title_cursor([]))
 
-    mock_user_crud.get_user_by_id = AsyncMock(return_value=test_user)
+    mock_user_crud.get_user_profiles = AsyncMock(
+        side_effect=lambda user_ids: dict.fromkeys(user_ids, test_user)
+    )
 
     # WHEN get_comments_by_user is called
     result = await comment_crud.get_comments_by_user(test_user["id"])
@@ -271,6 +345,64 @@ async def test_get_comments_by_user_deleted_article(mock_db, mock_user_crud, tes
     assert result[0]["article_title"] == "Deleted Article"
 
 
+async def test_get_comments_by_user_query_count(recording_db, clear_profile_cache):
+    # GIVEN a full page of comments spread over many articles and magazines
+    comments = [
+        {"id": f"c{i}", "user_id": "u1", "article_id": f"a{i}"} for i in range(60)
+    ] + [{"id": f"m{i}", "user_id": "u1", "magazine_id": f"g{i}"} for i in range(40)]
+    recording_db.returns("comments", "find", comments)
+    recording_db.returns("users", "find", [{"id": "u1", "username": "ann"}])
+    recording_db.returns(
+        "articles", "find", [{"id": f"a{i}", "title": f"A{i}"} for i in range(60)]
+    )
+    recording_db.returns(
+        "magazines", "find", [{"id": f"g{i}", "name": f"G{i}"} for i in range(39)]
+    )
+
+    # WHEN the page is read twice
+    with (
+        patch("app.crud.comment.db", recording_db),
+        patch("app.crud.user.db", recording_db),
+    ):
+        result = await comment_crud.get_comments_by_user("u1")
+        await comment_crud.get_comments_by_user("u1")
+
+    # THEN titles cost one query per collection, then none
+    assert recording_db.calls == [
+        ("comments", "find"),
+        ("users", "find"),
+        ("articles", "find"),
+        ("magazines", "find"),
+        ("comments", "find"),
+    ]
+    assert result[0]["article_title"] == "A0"
+    assert result[60]["magazine_title"] == "G0"
+    assert result[99]["magazine_title"] == "Deleted Magazine"
+
+
+@patch("app.crud.comment.user_crud")
+@patch("app.crud.comment.db")
+async def test_get_comments_by_user_projects_titles(mock_db, mock_user_crud, test_user):
+    # GIVEN two comments on the same article
+    comments = [
+        {"id": f"c{i}", "user_id": test_user["id"], "article_id": "a1"}
+        for i in range(2)
+    ]
+    mock_db.comments.find = MagicMock(return_value=_cursor(comments))
+    mock_db.articles.find = MagicMock(
+        return_value=_title_cursor([{"id": "a1", "title": "Art"}])
+    )
+    mock_user_crud.get_user_profiles = AsyncMock(return_value={})
+
+    # WHEN get_comments_by_user is called
+    await comment_crud.get_comments_by_user(test_user["id"])
+
+    # THEN only the title is read, once per article
+    query, projection = mock_db.articles.find.call_args[0]
+    assert query == {"id": {"$in": ["a1"]}}
+    assert projection == {"_id": 0, "id": 1, "title": 1}
+
+
 # ============================================================================
 # create_comment Tests
 # ============================================================================
@@ -293,7 +425,9 @@ async def test_create_comment(mock_db, mock_user_crud, test_user):
     mock_db.comments.insert_one = AsyncMock()
     mock_db.comments.find_one = AsyncMock(return_value=created_comment)
 
-    mock_user_crud.get_user_by_id = AsyncMock(return_value=test_user)
+    mock_user_crud.get_user_profiles = AsyncMock(
+        side_effect=lambda user_ids: dict.fromkeys(user_ids, test_user)
+    )
 
     # WHEN create_comment is called
     result = await comment_crud.create_comment(
@@ -323,7 +457,7 @@ async def test_create_comment_user_not_found(mock_db, mock_user_crud):
     mock_db.comments.insert_one = AsyncMock()
     mock_db.comments.find_one = AsyncMock(return_value=created_comment)
 
-    mock_user_crud.get_user_by_id = AsyncMock(return_value=None)
+    mock_user_crud.get_user_profiles = AsyncMock(return_value={})
 
     # WHEN create_comment is called
     result = await comment_crud.create_comment(
@@ -356,7 +490,9 @@ async def test_create_magazine_comment(mock_db, mock_user_crud, test_user):
     mock_db.comments.insert_one = AsyncMock()
     mock_db.comments.find_one = AsyncMock(return_value=created_comment)
 
-    mock_user_crud.get_user_by_id = AsyncMock(return_value=test_user)
+    mock_user_crud.get_user_profiles = AsyncMock(
+        side_effect=lambda user_ids: dict.fromkeys(user_ids, test_user)
+    )
 
     # WHEN create_magazine_comment is called
     result = await comment_crud.create_magazine_comment(
@@ -382,17 +518,19 @@ async def test_update_comment(mock_db, test_comment):
     update_data = CommentUpdate(content="Updated comment")
     updated_comment = {**test_comment, "content": "Updated comment"}
     mock_db.comments = MagicMock()
-    mock_db.comments.update_one = AsyncMock()
-    mock_db.comments.find_one = AsyncMock(return_value=updated_comment)
+    mock_db.comments.find_one_and_update = AsyncMock(return_value=updated_comment)
+    mock_db.comments.find_one = AsyncMock()
 
     # WHEN update_comment is called
     result = await comment_crud.update_comment("test-comment-id-123", update_data)
 
-    # THEN comment is updated
-    mock_db.comments.update_one.assert_awaited_once()
-    call_args = mock_db.comments.update_one.call_args
+    # THEN comment is updated and returned in a single round trip
+    mock_db.comments.find_one_and_update.assert_awaited_once()
+    call_args = mock_db.comments.find_one_and_update.call_args
     assert call_args[0][0] == {"id": "test-comment-id-123"}
     assert "updated_at" in call_args[0][1]["$set"]
+    assert call_args[1]["return_document"] == ReturnDocument.AFTER
+    mock_db.comments.find_one.assert_not_awaited()
     assert result["content"] == "Updated comment"
 
 
@@ -457,7 +595,7 @@ async def test_get_comments_by_magazine_user_not_found(
     mock_db.comments = MagicMock()
     mock_db.comments.find = MagicMock(return_value=mock_cursor)
 
-    mock_user_crud.get_user_by_id = AsyncMock(return_value=None)
+    mock_user_crud.get_user_profiles = AsyncMock(return_value={})
 
     # WHEN get_comments_by_magazine is called
     result = await comment_crud.get_comments_by_magazine("test-magazine-id")
@@ -494,9 +632,11 @@ async def test_get_comments_by_user_deleted_magazine(
     mock_db.comments = MagicMock()
     mock_db.comments.find = MagicMock(return_value=mock_cursor)
     mock_db.magazines = MagicMock()
-    mock_db.magazines.find_one = AsyncMock(return_value=None)
+    mock_db.magazines.find = MagicMock(return_value=_title_cursor([]))
 
-    mock_user_crud.get_user_by_id = AsyncMock(return_value=test_user)
+    mock_user_crud.get_user_profiles = AsyncMock(
+        side_effect=lambda user_ids: dict.fromkeys(user_ids, test_user)
+    )
 
     # WHEN get_comments_by_user is called
     result = await comment_crud.get_comments_by_user(test_user["id"])
@@ -527,7 +667,9 @@ async def test_get_comments_by_user_no_article_or_magazine(
     mock_db.comments = MagicMock()
     mock_db.comments.find = MagicMock(return_value=mock_cursor)
 
-    mock_user_crud.get_user_by_id = AsyncMock(return_value=test_user)
+    mock_user_crud.get_user_profiles = AsyncMock(
+        side_effect=lambda user_ids: dict.fromkeys(user_ids, test_user)
+    )
 
     # WHEN get_comments_by_user is called
     result = await comment_crud.get_comments_by_user(test_user["id"])
@@ -557,9 +699,11 @@ async def test_get_comments_by_user_unknown_user(mock_db, mock_user_crud):
     mock_db.comments = MagicMock()
     mock_db.comments.find = MagicMock(return_value=mock_cursor)
     mock_db.articles = MagicMock()
-    mock_db.articles.find_one = AsyncMock(return_value={"id": "a1", "title": "Art"})
+    mock_db.articles.find = MagicMock(
+        return_value=_title_cursor([{"id": "a1", "title": "Art"}])
+    )
 
-    mock_user_crud.get_user_by_id = AsyncMock(return_value=None)
+    mock_user_crud.get_user_profiles = AsyncMock(return_value={})
 
     # WHEN get_comments_by_user is called
     result = await comment_crud.get_comments_by_user("unknown-user-id")
@@ -590,7 +734,7 @@ async def test_create_magazine_comment_user_not_found(mock_db, mock_user_crud):
     mock_db.comments.insert_one = AsyncMock()
     mock_db.comments.find_one = AsyncMock(return_value=created_comment)
 
-    mock_user_crud.get_user_by_id = AsyncMock(return_value=None)
+    mock_user_crud.get_user_profiles = AsyncMock(return_value={})
 
     # WHEN create_magazine_comment is called
     result = await comment_crud.create_magazine_comment(
@@ -599,3 +743,291 @@ async def test_create_magazine_comment_user_not_found(mock_db, mock_user_crud):
 
     # THEN comment has fallback user info
     assert result["user"]["username"] == "Unknown User"
+
+
+# ============================================================================
+# Threads Tests
+# ============================================================================
+
+
+def _thread_comment(comment_id, path, depth=0, reply_number=0, thread_id=None):
+    return {
+        "id": comment_id,
+        "content": f"Comment {comment_id}",
+        "article_id": "test-article-id",
+        "user_id": "u1",
+        "parent_id": None,
+        "thread_id": thread_id or comment_id,
+        "path": path,
+        "depth": depth,
+        "reply_number": reply_number,
+        "reply_count": 0,
+        "created_at": datetime(2024, 1, 15, 14, 0, 0),
+        "updated_at": None,
+    }
+
+
+def test_path_segment_sorts_by_creation_time():
+    # GIVEN comments written a microsecond, then years apart
+    first = comment_crud.path_segment(datetime(2024, 1, 1), "ffffffff-id")
+    second = comment_crud.path_segment(datetime(2024, 1, 1, 0, 0, 0, 1), "00000000")
+    later = comment_crud.path_segment(datetime(2090, 1, 1), "00000000")
+
+    # THEN segments have one width and sort oldest first
+    assert len(first) == len(second) == len(later)
+    assert first < second < later
+    # ...and a subtree sorts between its root and the next root
+    assert first < first + "/" + later < first + comment_crud.SUBTREE_END < second
+
+
+@patch("app.crud.comment.user_crud")
+@patch("app.crud.comment.db")
+async def test_create_top_level_comment_starts_a_thread(mock_db, mock_user_crud):
+    # GIVEN a comment that answers nothing
+    mock_db.comments.insert_one = AsyncMock()
+    mock_user_crud.get_user_profiles = AsyncMock(return_value={})
+
+    # WHEN it is created
+    result = await comment_crud.create_comment(
+        "test-article-id", "u1", CommentCreate(content="Hello")
+    )
+
+    # THEN it is the root of its own thread, with no extra write
+    doc = mock_db.comments.insert_one.call_args[0][0]
+    assert doc["thread_id"] == doc["id"]
+    assert doc["parent_id"] is None
+    assert doc["depth"] == 0 and doc["reply_number"] == 0
+    assert doc["reply_count"] == doc["last_reply_number"] == 0
+    assert doc["path"] == comment_crud.path_segment(doc["created_at"], doc["id"])
+    assert "parent_id" in result
+    mock_db.comments.find_one_and_update.assert_not_called()
+
+
+@patch("app.crud.comment.user_crud")
+@patch("app.crud.comment.db")
+async def test_create_magazine_comment_is_published(mock_db, mock_user_crud):
+    # GIVEN a live stream of a magazine's comments
+    mock_db.comments.insert_one = AsyncMock()
+    mock_user_crud.get_user_profiles = AsyncMock(return_value={})
+
+    with event_hub.subscribe(["magazine:test-magazine-id"]) as receive:
+        # WHEN a comment is left on it
+        result = await comment_crud.create_magazine_comment(
+            "test-magazine-id", "u1", CommentCreate(content="Hello")
+        )
+
+        # THEN the stream gets it, with its author
+        event = receive.receive_nowait()
+    assert event["type"] == "comment"
+    assert event["data"]["id"] == result["id"]
+    assert event["data"]["user"]["username"] == "Unknown User"
+
+
+@patch("app.crud.comment.user_crud")
+@patch("app.crud.comment.db")
+async def test_create_reply_extends_parent_path(mock_db, mock_user_crud):
+    # GIVEN a reply to a first-level reply of a thread that had four replies
+    parent = _thread_comment("p1", "aaaa/bbbb", depth=1, reply_number=1, thread_id="r1")
+    mock_db.comments.find_one_and_update = AsyncMock(
+        return_value={"last_reply_number": 5}
+    )
+    mock_db.comments.insert_one = AsyncMock()
+    mock_user_crud.get_user_profiles = AsyncMock(return_value={})
+
+    # WHEN it is created
+    await comment_crud.create_comment(
+        "test-article-id",
+        "u1",
+        CommentCreate(content="Reply", parent_id="p1"),
+        parent=parent,
+    )
+
+    # THEN it sits under its parent and is numbered within the thread, after
+    # every reply ever written to it, deleted ones included
+    mock_db.comments.find_one_and_update.assert_awaited_once_with(
+        {"id": "r1"},
+        {"$inc": {"reply_count": 1, "last_reply_number": 1}},
+        projection={"_id": 0, "last_reply_number": 1},
+        return_document=ReturnDocument.AFTER,
+    )
+    doc = mock_db.comments.insert_one.call_args[0][0]
+    assert doc["path"].startswith("aaaa/bbbb/")
+    assert doc["parent_id"] == "p1"
+    assert doc["thread_id"] == "r1"
+    assert doc["depth"] == 2
+    assert doc["reply_number"] == 5
+    assert "reply_count" not in doc
+
+
+@patch("app.crud.comment.user_crud")
+@patch("app.crud.comment.db")
+async def test_create_reply_to_unthreaded_comment(
+    mock_db, mock_user_crud, test_comment
+):
+    # GIVEN a comment written before comments were threaded
+    mock_db.comments.update_one = AsyncMock()
+    mock_db.comments.find_one_and_update = AsyncMock(
+        return_value={"last_reply_number": 1}
+    )
+    mock_db.comments.insert_one = AsyncMock()
+    mock_user_crud.get_user_profiles = AsyncMock(return_value={})
+
+    # WHEN it is replied to
+    await comment_crud.create_comment(
+        test_comment["article_id"],
+        "u1",
+        CommentCreate(content="Reply"),
+        parent=test_comment,
+    )
+
+    # THEN it becomes the root of a thread first
+    root_path = comment_crud.path_segment(
+        test_comment["created_at"], test_comment["id"]
+    )
+    update = mock_db.comments.update_one.call_args[0]
+    assert update[0] == {"id": test_comment["id"]}
+    assert update[1]["$set"]["path"] == root_path
+    assert update[1]["$set"]["thread_id"] == test_comment["id"]
+    doc = mock_db.comments.insert_one.call_args[0][0]
+    assert doc["path"].startswith(root_path + "/")
+    assert doc["depth"] == 1
+
+
+@patch("app.crud.comment.user_crud")
+@patch("app.crud.comment.db")
+async def test_get_threads_groups_replies_under_roots(mock_db, mock_user_crud):
+    # GIVEN two threads and the start of a third, in path order
+    docs = [
+        _thread_comment("r1", "a"),
+        _thread_comment("x", "a/b", depth=1, reply_number=1, thread_id="r1"),
+        _thread_comment("y", "a/b/c", depth=2, reply_number=2, thread_id="r1"),
+        _thread_comment("r2", "b"),
+        _thread_comment("r3", "c"),
+        _thread_comment("z", "c/d", depth=1, reply_number=1, thread_id="r3"),
+    ]
+    mock_db.comments.find = MagicMock(return_value=_cursor(docs))
+    mock_user_crud.get_user_profiles = AsyncMock(return_value={})
+
+    # WHEN a page of two threads is read
+    result = await comment_crud.get_threads(
+        {"article_id": "test-article-id"}, limit=2, replies=2
+    )
+
+    # THEN one scan reads at most two threads of three comments
+    query = mock_db.comments.find.call_args[0][0]
+    assert query == {
+        "article_id": "test-article-id",
+        "path": {"$gt": ""},
+        "reply_number": {"$lte": 2},
+    }
+    mock_db.comments.find.return_value.sort.assert_called_with("path", 1)
+    mock_db.comments.find.return_value.limit.assert_called_with(6)
+    # ...and the page stops before the third thread
+    assert [thread["id"] for thread in result] == ["r1", "r2"]
+    assert [reply["id"] for reply in result[0]["replies"]] == ["x", "y"]
+    assert result[1]["replies"] == []
+    assert result[0]["user"]["username"] == "Unknown User"
+
+
+@patch("app.crud.comment.user_crud")
+@patch("app.crud.comment.db")
+async def test_get_threads_with_cursor_skips_past_subtree(mock_db, mock_user_crud):
+    # GIVEN a cursor issued after thread "a"
+    mock_db.comments.find = MagicMock(return_value=_cursor([]))
+    mock_user_crud.get_user_profiles = AsyncMock(return_value={})
+    cursor = encode_cursor("path", "a", "r1")
+
+    # WHEN the next page is read
+    await comment_crud.get_threads(
+        {"magazine_id": "test-magazine-id"}, limit=2, cursor=cursor
+    )
+
+    # THEN it starts after every reply of that thread
+    query = mock_db.comments.find.call_args[0][0]
+    assert query["magazine_id"] == "test-magazine-id"
+    assert query["path"] == {"$gt": "a" + comment_crud.SUBTREE_END}
+
+
+@patch("app.crud.comment.user_crud")
+@patch("app.crud.comment.db")
+async def test_get_replies_reads_subtree_range(mock_db, mock_user_crud):
+    # GIVEN a reply with a cursor into its subtree
+    comment = _thread_comment("x", "a/b", depth=1, thread_id="r1")
+    mock_db.comments.find = MagicMock(return_value=_cursor([]))
+    mock_user_crud.get_user_profiles = AsyncMock(return_value={})
+
+    # WHEN its replies are paged from the start, then from the cursor
+    await comment_crud.get_replies(comment, limit=10)
+    first = mock_db.comments.find.call_args[0][0]
+    await comment_crud.get_replies(
+        comment, limit=10, cursor=encode_cursor("path", "a/b/c", "y")
+    )
+    second = mock_db.comments.find.call_args[0][0]
+
+    # THEN both are ranges within the subtree
+    end = "a/b" + comment_crud.SUBTREE_END
+    assert first == {
+        "article_id": "test-article-id",
+        "path": {"$gt": "a/b", "$lt": end},
+    }
+    assert second["path"] == {"$gt": "a/b/c", "$lt": end}
+
+
+@patch("app.crud.comment.db")
+async def test_has_replies(mock_db):
+    # GIVEN a comment with a reply below it
+    mock_db.comments.find_one = AsyncMock(return_value={"_id": "oid"})
+
+    # WHEN it is checked for replies
+    result = await comment_crud.has_replies(_thread_comment("r1", "a"))
+
+    # THEN one indexed lookup in its subtree answers
+    assert result is True
+    mock_db.comments.find_one.assert_awaited_once_with(
+        {
+            "article_id": "test-article-id",
+            "path": {"$gt": "a", "$lt": "a" + comment_crud.SUBTREE_END},
+        },
+        {"_id": 1},
+    )
+
+
+@patch("app.crud.comment.db")
+async def test_tombstone_comment(mock_db):
+    mock_db.comments.update_one = AsyncMock()
+
+    await comment_crud.tombstone_comment("r1")
+
+    query, update = mock_db.comments.update_one.call_args[0]
+    assert query == {"id": "r1"}
+    assert update["$set"]["content"] == ""
+    assert update["$set"]["deleted"] is True
+
+
+@patch("app.crud.comment.user_crud")
+async def test_attach_authors_hides_author_of_deleted(mock_user_crud, test_user):
+    # GIVEN a comment blanked out when its author deleted it
+    mock_user_crud.get_user_profiles = AsyncMock(
+        return_value={test_user["id"]: {"id": test_user["id"], "username": "x"}}
+    )
+    comment = {**_thread_comment("r1", "a"), "user_id": test_user["id"]}
+
+    # WHEN authors are attached
+    [result] = await comment_crud.attach_authors([{**comment, "deleted": True}])
+
+    # THEN the author is not shown
+    assert result["user"]["username"] == "Unknown User"
+
+
+@patch("app.crud.comment.db")
+async def test_get_reply_parent_on_other_article(mock_db, test_comment):
+    # GIVEN a comment on another article
+    mock_db.comments.find_one = AsyncMock(return_value=test_comment)
+
+    # WHEN it is looked up as the parent of a reply
+    result = await comment_crud.get_reply_parent(
+        test_comment["id"], {"article_id": "other-article"}
+    )
+
+    # THEN it is not found
+    assert result is None
@@ -0,0 +1,214 @@
+from datetime import datetime
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from pymongo.errors import BulkWriteError
+
+from app.crud import entity as entity_crud
+from app.models.news import Entities, Entity, NewsPost
+
+pytestmark = pytest.mark.anyio
+
+
+def _post(uuid, persons=(), organizations=(), published="2024-01-15T18:30:00+02:00"):
+    return NewsPost(
+        uuid=uuid,
+        url=f"https://news.example/{uuid}",
+        title=f"Title {uuid}",
+        text="x" * 1000,
+        published=published,
+        entities=Entities(
+            persons=[Entity(name=n, sentiment=s) for n, s in persons],
+            organizations=[Entity(name=n, sentiment=s) for n, s in organizations],
+        ),
+    )
+
+
+def _bulk_result(upserted_ids):
+    result = MagicMock()
+    result.upserted_ids = upserted_ids
+    return result
+
+
+# ============================================================================
+# ingest_posts Tests
+# ============================================================================
+
+
+@patch("app.crud.entity.db")
+async def test_ingest_indexes_only_new_posts(mock_db):
+    # GIVEN one new post and one stored by an earlier fetch
+    posts = [
+        _post(
+            "p1", persons=[("Émile  Zola", "positive")], organizations=[("ACME", None)]
+        ),
+        _post("p2", persons=[("Emile Zola", "negative")]),
+    ]
+    mock_db.news_posts.bulk_write = AsyncMock(return_value=_bulk_result({0: "oid"}))
+    mock_db.news_entities.bulk_write = AsyncMock()
+
+    # WHEN the posts are ingested
+    new = await entity_crud.ingest_posts(posts)
+
+    # THEN posts are stored once, as snippets, expiring with the TTL
+    assert new == 1
+    post_ops = mock_db.news_posts.bulk_write.call_args[0][0]
+    stored = post_ops[0]._doc["$setOnInsert"]
+    assert post_ops[0]._filter == {"uuid": "p1"}
+    assert len(stored["text"]) == entity_crud.SNIPPET_CHARS
+    assert stored["published_at"] == datetime(2024, 1, 15, 16, 30)
+    assert (stored["expires_at"] - stored["published_at"]).days == 30
+
+    # AND only the new post's entities are counted, per publication day
+    entity_ops = mock_db.news_entities.bulk_write.call_args[0][0]
+    by_key = {op._filter["name"]: op for op in entity_ops}
+    zola = by_key["emile zola"]
+    assert zola._filter == {
+        "name": "emile zola",
+        "type": "person",
+        "day": datetime(2024, 1, 15),
+    }
+    assert zola._doc["$inc"] == {"mentions": 1, "sentiment.positive": 1}
+    assert zola._doc["$push"] == {"posts": {"$each": ["p1"]}}
+    assert zola._doc["$setOnInsert"]["display"] == "Émile  Zola"
+    assert by_key["acme"]._doc["$inc"] == {"mentions": 1}
+
+
+@patch("app.crud.entity.db")
+async def test_ingest_lost_upsert_race_is_not_an_error(mock_db):
+    mock_db.news_posts.bulk_write = AsyncMock(
+        side_effect=BulkWriteError(
+            {
+                "writeErrors": [{"index": 0, "code": 11000}],
+                "upserted": [{"index": 1, "_id": "oid"}],
+            }
+        )
+    )
+    mock_db.news_entities.bulk_write = AsyncMock()
+
+    new = await entity_crud.ingest_posts(
+        [_post("p1", persons=[("A", None)]), _post("p2", persons=[("B", None)])]
+    )
+
+    assert new == 1
+    entity_ops = mock_db.news_entities.bulk_write.call_args[0][0]
+    assert [op._filter["name"] for op in entity_ops] == ["b"]
+
+
+@patch("app.crud.entity.db")
+async def test_ingest_skips_posts_without_uuid(mock_db):
+    mock_db.news_posts.bulk_write = AsyncMock()
+
+    assert await entity_crud.ingest_posts([NewsPost(title="No id")]) == 0
+
+    mock_db.news_posts.bulk_write.assert_not_awaited()
+
+
+# ============================================================================
+# Lookup Tests
+# ============================================================================
+
+
+@patch("app.crud.entity.db")
+async def test_get_entity_sums_days_and_lists_newest_posts(mock_db, mock_cursor):
+    # GIVEN two daily buckets, newest first
+    mock_db.news_entities.find = MagicMock(
+        return_value=mock_cursor(
+            [
+                {
+                    "type": "person",
+                    "display": "Emile Zola",
+                    "posts": ["p3", "p4"],
+                    "mentions": 2,
+                    "sentiment": {"positive": 1},
+                },
+                {
+                    "type": "person",
+                    "display": "Émile Zola",
+                    "posts": ["p1"],
+                    "mentions": 1,
+                    "sentiment": {"positive": 1, "negative": 1},
+                },
+            ]
+        )
+    )
+    stored = [
+        {**entity_crud._post_document(_post(uuid), None, None)} for uuid in ("p1", "p4")
+    ]
+    mock_db.news_posts.find = MagicMock(return_value=mock_cursor(stored))
+
+    # WHEN the entity is read
+    entity = await entity_crud.get_entity("ÉMILE ZOLA", limit=3)
+
+    # THEN totals span every day and posts come newest first
+    assert mock_db.news_entities.find.call_args[0][0] == {"name": "emile zola"}
+    # AND each bucket is read with its newest posts only
+    projection = mock_db.news_entities.find.call_args[0][1]
+    assert projection["posts"] == {"$slice": -3}
+    assert entity["mentions"] == 3
+    assert entity["sentiment"] == {"positive": 2, "negative": 1, "neutral": 0}
+    assert mock_db.news_posts.find.call_args[0][0] == {
+        "uuid": {"$in": ["p4", "p3", "p1"]}
+    }
+    # p3 has expired since; it is skipped.
+    assert [post.uuid for post in entity["posts"]] == ["p4", "p1"]
+
+
+@patch("app.crud.entity.db")
+async def test_get_entity_unknown(mock_db, mock_cursor):
+    mock_db.news_entities.find = MagicMock(return_value=mock_cursor([]))
+
+    assert await entity_crud.get_entity("nobody") is None
+
+
+@patch("app.crud.entity.db")
+async def test_trending_entities_pipeline(mock_db, mock_cursor):
+    cursor = MagicMock()
+    cursor.to_list = AsyncMock(
+        return_value=[
+            {
+                "_id": {"name": "acme", "type": "organization"},
+                "display": "ACME",
+                "mentions": 7,
+                "positive": 2,
+                "negative": 1,
+                "neutral": 0,
+            }
+        ]
+    )
+    mock_db.news_entities.aggregate = MagicMock(return_value=cursor)
+
+    result = await entity_crud.get_trending_entities(
+        days=3, entity_type="organization", limit=5
+    )
+
+    assert result == [
+        {
+            "name": "ACME",
+            "key": "acme",
+            "type": "organization",
+            "mentions": 7,
+            "sentiment": {"positive": 2, "negative": 1, "neutral": 0},
+        }
+    ]
+    pipeline = mock_db.news_entities.aggregate.call_args[0][0]
+    match = pipeline[0]["$match"]
+    assert match["type"] == "organization"
+    assert (datetime.utcnow() - match["day"]["$gte"]).days == 2
+    assert pipeline[-1] == {"$limit": 5}
+
+
+@patch("app.crud.entity.db")
+async def test_search_entities_anchors_normalized_prefix(mock_db):
+    cursor = MagicMock()
+    cursor.to_list = AsyncMock(return_value=[])
+    mock_db.news_entities.aggregate = MagicMock(return_value=cursor)
+
+    await entity_crud.search_entities("É.M")
+
+    pipeline = mock_db.news_entities.aggregate.call_args[0][0]
+    assert pipeline[0]["$match"] == {"name": {"$regex": "^e\\.m"}}
+
+
+async def test_search_entities_blank_prefix():
+    assert await entity_crud.search_entities("  ") == []
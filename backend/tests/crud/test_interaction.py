@@ -2,8 +2,13 @@ from datetime import datetime
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
+from pymongo import ReturnDocument
+from pymongo.errors import BulkWriteError, DuplicateKeyError
 
+from app.core.config import settings
 from app.crud import interaction as interaction_crud
+from app.schemas.interaction import InteractionAction
+from app.utils.pagination import encode_cursor
 
 pytestmark = pytest.mark.anyio
 
@@ -45,36 +50,34 @@ async def test_get_interaction_not_found(mock_db):
 
 
 # ============================================================================
-# toggle_like Tests
+# toggle_like / set_like Tests
 # ============================================================================
 
 
 @patch("app.crud.interaction.db")
 async def test_toggle_like_new_interaction(mock_db):
-    # GIVEN no existing interaction
-    new_interaction = {
-        "id": "new-interaction-id",
-        "user_id": "test-user-id",
-        "article_id": "test-article-id",
-        "is_liked": True,
-        "is_saved": False,
-        "liked_at": datetime.utcnow(),
-        "saved_at": None,
-    }
+    # GIVEN no existing interaction (the upsert returns no previous document)
     mock_db.user_interactions = MagicMock()
-    mock_db.user_interactions.find_one = AsyncMock(side_effect=[None, new_interaction])
-    mock_db.user_interactions.insert_one = AsyncMock()
+    mock_db.user_interactions.find_one_and_update = AsyncMock(return_value=None)
 
     # WHEN toggle_like is called
     result, increment = await interaction_crud.toggle_like(
         "test-user-id", "test-article-id"
     )
 
-    # THEN a new interaction is created with is_liked=True
-    mock_db.user_interactions.insert_one.assert_awaited_once()
-    insert_data = mock_db.user_interactions.insert_one.call_args[0][0]
-    assert insert_data["is_liked"] is True
-    assert insert_data["is_saved"] is False
+    # THEN a single atomic upsert creates the liked interaction
+    mock_db.user_interactions.find_one_and_update.assert_awaited_once()
+    call_args = mock_db.user_interactions.find_one_and_update.call_args
+    assert call_args[0][0] == {
+        "user_id": "test-user-id",
+        "article_id": "test-article-id",
+    }
+    assert isinstance(call_args[0][1], list)
+    assert call_args[1]["upsert"] is True
+    assert call_args[1]["return_document"] == ReturnDocument.BEFORE
+    assert result["is_liked"] is True
+    assert result["is_saved"] is False
+    assert result["liked_at"] is not None
     assert increment == 1
 
 
@@ -87,13 +90,12 @@ async def test_toggle_like_already_liked(mock_db):
         "article_id": "test-article-id",
         "is_liked": True,
         "is_saved": False,
+        "liked_at": datetime(2024, 1, 1),
     }
-    updated_interaction = {**existing_interaction, "is_liked": False}
     mock_db.user_interactions = MagicMock()
-    mock_db.user_interactions.find_one = AsyncMock(
-        side_effect=[existing_interaction, updated_interaction]
+    mock_db.user_interactions.find_one_and_update = AsyncMock(
+        return_value=existing_interaction
     )
-    mock_db.user_interactions.update_one = AsyncMock()
 
     # WHEN toggle_like is called
     result, increment = await interaction_crud.toggle_like(
@@ -101,9 +103,9 @@ async def test_toggle_like_already_liked(mock_db):
     )
 
     # THEN like is toggled off
-    mock_db.user_interactions.update_one.assert_awaited_once()
-    call_args = mock_db.user_interactions.update_one.call_args
-    assert call_args[0][1]["$set"]["is_liked"] is False
+    assert result["id"] == "interaction-id"
+    assert result["is_liked"] is False
+    assert result["liked_at"] is None
     assert increment == -1
 
 
@@ -117,53 +119,117 @@ async def test_toggle_like_not_liked(mock_db):
         "is_liked": False,
         "is_saved": True,
     }
-    updated_interaction = {**existing_interaction, "is_liked": True}
     mock_db.user_interactions = MagicMock()
-    mock_db.user_interactions.find_one = AsyncMock(
-        side_effect=[existing_interaction, updated_interaction]
+    mock_db.user_interactions.find_one_and_update = AsyncMock(
+        return_value=existing_interaction
     )
-    mock_db.user_interactions.update_one = AsyncMock()
 
     # WHEN toggle_like is called
     result, increment = await interaction_crud.toggle_like(
         "test-user-id", "test-article-id"
     )
 
-    # THEN like is toggled on
-    call_args = mock_db.user_interactions.update_one.call_args
-    assert call_args[0][1]["$set"]["is_liked"] is True
+    # THEN like is toggled on and the save is untouched
+    assert result["is_liked"] is True
+    assert result["is_saved"] is True
     assert increment == 1
 
 
+@patch("app.crud.interaction.db")
+async def test_toggle_like_retries_duplicate_key(mock_db):
+    # GIVEN a concurrent request wins the insert race
+    mock_db.user_interactions = MagicMock()
+    mock_db.user_interactions.find_one_and_update = AsyncMock(
+        side_effect=[DuplicateKeyError("E11000"), {"id": "i-1", "is_liked": True}]
+    )
+
+    # WHEN toggle_like is called
+    result, increment = await interaction_crud.toggle_like(
+        "test-user-id", "test-article-id"
+    )
+
+    # THEN the upsert is retried against the winner's document
+    assert mock_db.user_interactions.find_one_and_update.await_count == 2
+    assert result["id"] == "i-1"
+    assert increment == -1
+
+
+@patch("app.crud.interaction.db")
+async def test_set_like_already_liked_is_noop(mock_db):
+    # GIVEN an interaction that is already liked
+    liked_at = datetime(2024, 1, 1)
+    mock_db.user_interactions = MagicMock()
+    mock_db.user_interactions.find_one_and_update = AsyncMock(
+        return_value={"id": "i-1", "is_liked": True, "liked_at": liked_at}
+    )
+
+    # WHEN set_like(True) is retried
+    result, increment = await interaction_crud.set_like(
+        "test-user-id", "test-article-id", True
+    )
+
+    # THEN nothing changes and the counter must not move
+    assert result["is_liked"] is True
+    assert result["liked_at"] == liked_at
+    assert increment == 0
+
+
+@patch("app.crud.interaction.db")
+async def test_set_like_false_on_new_interaction(mock_db):
+    # GIVEN no existing interaction
+    mock_db.user_interactions = MagicMock()
+    mock_db.user_interactions.find_one_and_update = AsyncMock(return_value=None)
+
+    # WHEN set_like(False) is called
+    result, increment = await interaction_crud.set_like(
+        "test-user-id", "test-article-id", False
+    )
+
+    # THEN the interaction stays unliked
+    assert result["is_liked"] is False
+    assert increment == 0
+
+
+def test_flag_pipeline_toggle_flips_previous_value():
+    pipeline = interaction_crud._flag_pipeline(
+        "is_liked", "liked_at", None, "new-id", datetime(2024, 1, 1)
+    )
+
+    assert pipeline[0]["$set"]["_previous"] == {"$eq": ["$is_liked", True]}
+    assert pipeline[1]["$set"]["is_liked"] == {"$not": ["$_previous"]}
+    assert pipeline[-1] == {"$unset": "_previous"}
+
+
+def test_flag_pipeline_set_uses_literal():
+    pipeline = interaction_crud._flag_pipeline(
+        "is_saved", "saved_at", False, "new-id", datetime(2024, 1, 1)
+    )
+
+    assert pipeline[1]["$set"]["is_saved"] == {"$literal": False}
+
+
 # ============================================================================
-# toggle_save Tests
+# toggle_save / set_save Tests
 # ============================================================================
 
 
 @patch("app.crud.interaction.db")
 async def test_toggle_save_new_interaction(mock_db):
     # GIVEN no existing interaction
-    new_interaction = {
-        "id": "new-interaction-id",
-        "user_id": "test-user-id",
-        "article_id": "test-article-id",
-        "is_liked": False,
-        "is_saved": True,
-        "liked_at": None,
-        "saved_at": datetime.utcnow(),
-    }
     mock_db.user_interactions = MagicMock()
-    mock_db.user_interactions.find_one = AsyncMock(side_effect=[None, new_interaction])
-    mock_db.user_interactions.insert_one = AsyncMock()
+    mock_db.user_interactions.find_one_and_update = AsyncMock(return_value=None)
 
     # WHEN toggle_save is called
-    await interaction_crud.toggle_save("test-user-id", "test-article-id")
+    result, increment = await interaction_crud.toggle_save(
+        "test-user-id", "test-article-id"
+    )
 
     # THEN a new interaction is created with is_saved=True
-    mock_db.user_interactions.insert_one.assert_awaited_once()
-    insert_data = mock_db.user_interactions.insert_one.call_args[0][0]
-    assert insert_data["is_saved"] is True
-    assert insert_data["is_liked"] is False
+    assert increment == 1
+    mock_db.user_interactions.find_one_and_update.assert_awaited_once()
+    assert result["is_saved"] is True
+    assert result["is_liked"] is False
+    assert result["saved_at"] is not None
 
 
 @patch("app.crud.interaction.db")
@@ -176,20 +242,20 @@ async def test_toggle_save_already_saved(mock_db):
         "is_liked": False,
         "is_saved": True,
     }
-    updated_interaction = {**existing_interaction, "is_saved": False}
     mock_db.user_interactions = MagicMock()
-    mock_db.user_interactions.find_one = AsyncMock(
-        side_effect=[existing_interaction, updated_interaction]
+    mock_db.user_interactions.find_one_and_update = AsyncMock(
+        return_value=existing_interaction
     )
-    mock_db.user_interactions.update_one = AsyncMock()
 
     # WHEN toggle_save is called
-    await interaction_crud.toggle_save("test-user-id", "test-article-id")
+    result, increment = await interaction_crud.toggle_save(
+        "test-user-id", "test-article-id"
+    )
 
     # THEN save is toggled off
-    mock_db.user_interactions.update_one.assert_awaited_once()
-    call_args = mock_db.user_interactions.update_one.call_args
-    assert call_args[0][1]["$set"]["is_saved"] is False
+    assert increment == -1
+    assert result["is_saved"] is False
+    assert result["saved_at"] is None
 
 
 @patch("app.crud.interaction.db")
@@ -202,19 +268,38 @@ async def test_toggle_save_not_saved(mock_db):
         "is_liked": True,
         "is_saved": False,
     }
-    updated_interaction = {**existing_interaction, "is_saved": True}
     mock_db.user_interactions = MagicMock()
-    mock_db.user_interactions.find_one = AsyncMock(
-        side_effect=[existing_interaction, updated_interaction]
+    mock_db.user_interactions.find_one_and_update = AsyncMock(
+        return_value=existing_interaction
     )
-    mock_db.user_interactions.update_one = AsyncMock()
 
     # WHEN toggle_save is called
-    await interaction_crud.toggle_save("test-user-id", "test-article-id")
+    result, increment = await interaction_crud.toggle_save(
+        "test-user-id", "test-article-id"
+    )
 
     # THEN save is toggled on
-    call_args = mock_db.user_interactions.update_one.call_args
-    assert call_args[0][1]["$set"]["is_saved"] is True
+    assert increment == 1
+    assert result["is_saved"] is True
+    assert result["is_liked"] is True
+
+
+@patch("app.crud.interaction.db")
+async def test_set_save_is_idempotent(mock_db):
+    # GIVEN an interaction that is already saved
+    mock_db.user_interactions = MagicMock()
+    mock_db.user_interactions.find_one_and_update = AsyncMock(
+        return_value={"id": "i-1", "is_saved": True}
+    )
+
+    # WHEN set_save(True) is called again
+    result, increment = await interaction_crud.set_save(
+        "test-user-id", "test-article-id", True
+    )
+
+    # THEN it stays saved, and nothing changed
+    assert result["is_saved"] is True
+    assert increment == 0
 
 
 # ============================================================================
@@ -225,46 +310,75 @@ async def test_toggle_save_not_saved(mock_db):
 @patch("app.crud.interaction.db")
 async def test_get_user_liked_articles(mock_db, test_article):
     # GIVEN user has liked articles
-    liked_interaction = {
-        "user_id": "test-user-id",
-        "article_id": "test-article-id-123",
-        "is_liked": True,
-    }
+    liked = {**test_article, "liked_at": datetime(2024, 1, 2), "liked": True}
     mock_cursor = MagicMock()
-    mock_cursor.sort = MagicMock(return_value=mock_cursor)
-    mock_cursor.skip = MagicMock(return_value=mock_cursor)
-    mock_cursor.limit = MagicMock(return_value=mock_cursor)
-    mock_cursor.to_list = AsyncMock(return_value=[liked_interaction])
-
-    mock_articles_cursor = MagicMock()
-    mock_articles_cursor.to_list = AsyncMock(return_value=[test_article])
-
+    mock_cursor.to_list = AsyncMock(return_value=[liked])
     mock_db.user_interactions = MagicMock()
-    mock_db.user_interactions.find = MagicMock(return_value=mock_cursor)
+    mock_db.user_interactions.aggregate = MagicMock(return_value=mock_cursor)
     mock_db.articles = MagicMock()
-    mock_db.articles.find = MagicMock(return_value=mock_articles_cursor)
 
     # WHEN get_user_liked_articles is called
     result = await interaction_crud.get_user_liked_articles("test-user-id")
 
-    # THEN liked articles are returned
-    mock_db.user_interactions.find.assert_called_with(
-        {"user_id": "test-user-id", "is_liked": True}
-    )
-    assert len(result) == 1
+    # THEN a single aggregation pages the interactions in recency order
+    pipeline = mock_db.user_interactions.aggregate.call_args[0][0]
+    assert pipeline[0] == {"$match": {"user_id": "test-user-id", "is_liked": True}}
+    assert pipeline[1] == {"$sort": {"liked_at": -1, "id": -1}}
+    assert pipeline[2] == {"$skip": 0}
+    assert pipeline[3] == {"$limit": 20}
+    # AND joins the articles with a projection
+    lookup = pipeline[4]["$lookup"]
+    assert lookup["from"] == "articles"
+    assert lookup["localField"] == "article_id"
+    assert lookup["foreignField"] == "id"
+    assert lookup["pipeline"][0]["$project"]["_id"] == 0
+    mock_db.articles.find.assert_not_called()
+    assert result == [liked]
+
+
+@patch("app.crud.interaction.db")
+async def test_get_user_liked_articles_with_cursor(mock_db):
+    # GIVEN a cursor from a previous page
+    cursor = encode_cursor("liked_at", datetime(2024, 1, 1), "i-9")
+    mock_cursor = MagicMock()
+    mock_cursor.to_list = AsyncMock(return_value=[])
+    mock_db.user_interactions = MagicMock()
+    mock_db.user_interactions.aggregate = MagicMock(return_value=mock_cursor)
+
+    # WHEN the next page is requested
+    await interaction_crud.get_user_liked_articles("u1", skip=40, cursor=cursor)
+
+    # THEN the keyset filter replaces the offset
+    pipeline = mock_db.user_interactions.aggregate.call_args[0][0]
+    assert "$or" in pipeline[0]["$match"]
+    assert pipeline[2] == {"$skip": 0}
+
+
+@patch("app.crud.interaction.db")
+async def test_get_user_liked_articles_merges_flags(mock_db):
+    mock_cursor = MagicMock()
+    mock_cursor.to_list = AsyncMock(return_value=[])
+    mock_db.user_interactions = MagicMock()
+    mock_db.user_interactions.aggregate = MagicMock(return_value=mock_cursor)
+
+    await interaction_crud.get_user_liked_articles("u1")
+
+    pipeline = mock_db.user_interactions.aggregate.call_args[0][0]
+    merged = pipeline[-1]["$replaceRoot"]["newRoot"]["$mergeObjects"]
+    assert merged[0] == "$article"
+    assert merged[1]["liked_at"] == "$liked_at"
+    assert merged[1]["interaction_id"] == "$id"
+    assert merged[1]["liked"] == {"$eq": ["$is_liked", True]}
+    assert merged[1]["saved"] == {"$eq": ["$is_saved", True]}
 
 
 @patch("app.crud.interaction.db")
 async def test_get_user_liked_articles_empty(mock_db):
     # GIVEN user has no liked articles
     mock_cursor = MagicMock()
-    mock_cursor.sort = MagicMock(return_value=mock_cursor)
-    mock_cursor.skip = MagicMock(return_value=mock_cursor)
-    mock_cursor.limit = MagicMock(return_value=mock_cursor)
     mock_cursor.to_list = AsyncMock(return_value=[])
-
     mock_db.user_interactions = MagicMock()
-    mock_db.user_interactions.find = MagicMock(return_value=mock_cursor)
+    mock_db.user_interactions.aggregate = MagicMock(return_value=mock_cursor)
 
     # WHEN get_user_liked_articles is called
     result = await interaction_crud.get_user_liked_articles("test-user-id")
@@ -281,32 +395,19 @@ async def test_get_user_liked_articles_empty(mock_db):
 @patch("app.crud.interaction.db")
 async def test_get_user_saved_articles(mock_db, test_article):
     # GIVEN user has saved articles
-    saved_interaction = {
-        "user_id": "test-user-id",
-        "article_id": "test-article-id-123",
-        "is_saved": True,
-    }
+    saved = {**test_article, "saved_at": datetime(2024, 1, 2), "saved": True}
     mock_cursor = MagicMock()
-    mock_cursor.sort = MagicMock(return_value=mock_cursor)
-    mock_cursor.skip = MagicMock(return_value=mock_cursor)
-    mock_cursor.limit = MagicMock(return_value=mock_cursor)
-    mock_cursor.to_list = AsyncMock(return_value=[saved_interaction])
-
-    mock_articles_cursor = MagicMock()
-    mock_articles_cursor.to_list = AsyncMock(return_value=[test_article])
-
+    mock_cursor.to_list = AsyncMock(return_value=[saved])
     mock_db.user_interactions = MagicMock()
-    mock_db.user_interactions.find = MagicMock(return_value=mock_cursor)
-    mock_db.articles = MagicMock()
-    mock_db.articles.find = MagicMock(return_value=mock_articles_cursor)
+    mock_db.user_interactions.aggregate = MagicMock(return_value=mock_cursor)
 
     # WHEN get_user_saved_articles is called
     result = await interaction_crud.get_user_saved_articles("test-user-id")
 
-    # THEN saved articles are returned
-    mock_db.user_interactions.find.assert_called_with(
-        {"user_id": "test-user-id", "is_saved": True}
-    )
+    # THEN saved articles are returned in saved_at order
+    pipeline = mock_db.user_interactions.aggregate.call_args[0][0]
+    assert pipeline[0] == {"$match": {"user_id": "test-user-id", "is_saved": True}}
+    assert pipeline[1] == {"$sort": {"saved_at": -1, "id": -1}}
     assert len(result) == 1
 
 
@@ -314,13 +415,9 @@ async def test_get_user_saved_articles(mock_db, test_article):
 async def test_get_user_saved_articles_empty(mock_db):
     # GIVEN user has no saved articles
     mock_cursor = MagicMock()
-    mock_cursor.sort = MagicMock(return_value=mock_cursor)
-    mock_cursor.skip = MagicMock(return_value=mock_cursor)
-    mock_cursor.limit = MagicMock(return_value=mock_cursor)
     mock_cursor.to_list = AsyncMock(return_value=[])
-
     mock_db.user_interactions = MagicMock()
-    mock_db.user_interactions.find = MagicMock(return_value=mock_cursor)
+    mock_db.user_interactions.aggregate = MagicMock(return_value=mock_cursor)
 
     # WHEN get_user_saved_articles is called
     result = await interaction_crud.get_user_saved_articles("test-user-id")
@@ -330,51 +427,331 @@ async def test_get_user_saved_articles_empty(mock_db):
 
 
 # ============================================================================
-# get_user_interactions_for_articles Tests
+# get_topic_affinity Tests
 # ============================================================================
 
 
 @patch("app.crud.interaction.db")
-async def test_get_user_interactions_for_articles(mock_db):
-    # GIVEN user has interactions with some articles
-    interactions = [
-        {"article_id": "article-1", "is_liked": True, "is_saved": False},
-        {"article_id": "article-2", "is_liked": False, "is_saved": True},
+async def test_get_topic_affinity_normalizes_weights(mock_db):
+    # GIVEN topic weights summed over recent likes and saves
+    mock_cursor = MagicMock()
+    mock_cursor.to_list = AsyncMock(
+        return_value=[{"_id": "tech", "weight": 3}, {"_id": "science", "weight": 1}]
+    )
+    mock_db.user_interactions.aggregate = MagicMock(return_value=mock_cursor)
+
+    # WHEN the affinity is computed
+    result = await interaction_crud.get_topic_affinity("test-user-id")
+
+    # THEN each topic gets its share, from one aggregation over the history
+    assert result == {"tech": 0.75, "science": 0.25}
+    pipeline = mock_db.user_interactions.aggregate.call_args[0][0]
+    assert pipeline[0]["$match"]["user_id"] == "test-user-id"
+    assert {"$limit": settings.RANK_AFFINITY_HISTORY} in pipeline
+
+
+def test_recent_likes_and_saves_orders_by_when_they_happened():
+    stages = interaction_crud.recent_likes_and_saves("u1", 10)
+
+    # Likes newest first by liked_at, merged with saves newest first by
+    # saved_at, both on the user's list indexes.
+    assert stages[:3] == [
+        {"$match": {"user_id": "u1", "is_liked": True}},
+        {"$sort": {"liked_at": -1}},
+        {"$limit": 10},
+    ]
+    saves = stages[4]["$unionWith"]
+    assert saves["coll"] == "user_interactions"
+    assert saves["pipeline"][:2] == [
+        {"$match": {"user_id": "u1", "is_saved": True}},
+        {"$sort": {"saved_at": -1}},
     ]
+    assert saves["pipeline"][3]["$project"]["at"] == "$saved_at"
+    assert stages[-1] == {"$sort": {"at": -1}}
+
+
+@patch("app.crud.interaction.db")
+async def test_get_topic_affinity_without_history(mock_db):
     mock_cursor = MagicMock()
-    mock_cursor.to_list = AsyncMock(return_value=interactions)
+    mock_cursor.to_list = AsyncMock(return_value=[])
+    mock_db.user_interactions.aggregate = MagicMock(return_value=mock_cursor)
+
+    assert await interaction_crud.get_topic_affinity("test-user-id") == {}
+
+
+# ============================================================================
+# get_interaction_state Tests
+# ============================================================================
+
+
+@pytest.fixture
+def clear_state_cache():
+    interaction_crud.invalidate_interaction_state()
+    yield
+    interaction_crud.invalidate_interaction_state()
+
+
+@patch("app.crud.interaction.db")
+async def test_get_interaction_state_loads_with_covered_query(
+    mock_db, mock_cursor, clear_state_cache
+):
+    # GIVEN a user with a liked, a saved and a cleared interaction
+    mock_db.user_interactions = MagicMock()
+    mock_db.user_interactions.find = MagicMock(
+        return_value=mock_cursor(
+            [
+                {"article_id": "a1", "is_liked": True, "is_saved": False},
+                {"article_id": "a2", "is_liked": False, "is_saved": True},
+                {"article_id": "a3", "is_liked": False, "is_saved": False},
+            ]
+        )
+    )
+
+    # WHEN the state is loaded
+    state = await interaction_crud.get_interaction_state("u1")
+
+    # THEN only index fields are projected and only set flags are kept
+    query, projection = mock_db.user_interactions.find.call_args[0]
+    assert query == {"user_id": "u1"}
+    assert projection == {"_id": 0, "article_id": 1, "is_liked": 1, "is_saved": 1}
+    assert state.liked == {"a1"}
+    assert state.saved == {"a2"}
+
+
+@patch("app.crud.interaction.db")
+async def test_get_interaction_state_cache_hit(mock_db, mock_cursor, clear_state_cache):
+    # GIVEN a state that was already loaded
+    mock_db.user_interactions = MagicMock()
+    mock_db.user_interactions.find = MagicMock(return_value=mock_cursor([]))
+    await interaction_crud.get_interaction_state("u1")
+
+    # WHEN it is requested again
+    await interaction_crud.get_interaction_state("u1")
+
+    # THEN the database is queried only once
+    mock_db.user_interactions.find.assert_called_once()
+    stats = interaction_crud.interaction_cache_stats()
+    assert stats["hits"] >= 1
+    assert stats["size"] == 1
+
+
+@patch("app.crud.interaction.db")
+async def test_toggle_writes_through_to_cached_state(
+    mock_db, mock_cursor, clear_state_cache
+):
+    # GIVEN a cached state with nothing liked
+    mock_db.user_interactions = MagicMock()
+    mock_db.user_interactions.find = MagicMock(return_value=mock_cursor([]))
+    state = await interaction_crud.get_interaction_state("u1")
+    mock_db.user_interactions.find_one_and_update = AsyncMock(return_value=None)
+
+    # WHEN the user likes then unsaves an article
+    await interaction_crud.toggle_like("u1", "a1")
+    await interaction_crud.set_save("u1", "a1", False)
+
+    # THEN the cached state reflects the writes without a reload
+    assert state.flags("a1") == {"is_liked": True, "is_saved": False}
+    mock_db.user_interactions.find.assert_called_once()
+
+
+@patch("app.crud.interaction.db")
+async def test_toggle_without_cached_state_does_not_cache(mock_db, clear_state_cache):
+    mock_db.user_interactions = MagicMock()
+    mock_db.user_interactions.find_one_and_update = AsyncMock(return_value=None)
+
+    await interaction_crud.toggle_like("u1", "a1")
+
+    assert interaction_crud.interaction_cache_stats()["size"] == 0
+
+
+def test_interaction_cache_stats_memory(clear_state_cache):
+    interaction_crud._state_cache.set(
+        "u1", interaction_crud.InteractionState(liked=["a1", "a2"], saved=["a2"])
+    )
+
+    stats = interaction_crud.interaction_cache_stats()
+
+    assert stats["memory_bytes"] > 0
+    assert stats["avg_bytes_per_user"] == stats["memory_bytes"]
+
+
+# ============================================================================
+# collapse_actions / apply_interaction_batch Tests
+# ============================================================================
+
+
+def _action(article_id, action, minute):
+    return InteractionAction(
+        article_id=article_id,
+        action=action,
+        timestamp=datetime(2024, 1, 1, 12, minute),
+    )
+
+
+def test_collapse_actions_keeps_last_state_per_flag():
+    actions = [
+        _action("a1", "like", 0),
+        _action("a1", "save", 1),
+        _action("a1", "unlike", 2),
+        _action("a2", "like", 3),
+    ]
+
+    final = interaction_crud.collapse_actions(actions)
+
+    assert final["a1"] == {
+        "is_liked": (False, datetime(2024, 1, 1, 12, 2)),
+        "is_saved": (True, datetime(2024, 1, 1, 12, 1)),
+    }
+    assert final["a2"] == {"is_liked": (True, datetime(2024, 1, 1, 12, 3))}
+
+
+def test_collapse_actions_replays_in_timestamp_order():
+    # GIVEN actions that arrive out of order
+    actions = [_action("a1", "unlike", 5), _action("a1", "like", 1)]
+
+    final = interaction_crud.collapse_actions(actions)
+
+    # THEN the latest action wins
+    assert final["a1"]["is_liked"][0] is False
+
+
+def _find_returning(*results):
+    cursors = []
+    for items in results:
+        cursor = MagicMock()
+        cursor.to_list = AsyncMock(return_value=items)
+        cursors.append(cursor)
+    return MagicMock(side_effect=cursors)
+
+
+@patch("app.crud.interaction.db")
+async def test_apply_interaction_batch(mock_db):
+    # GIVEN a1 is currently liked and a2 has no interaction
+    mock_db.articles = MagicMock()
+    mock_db.articles.find = _find_returning(
+        [{"id": "a1", "topics": ["t1"]}, {"id": "a2"}]
+    )
+    mock_db.articles.bulk_write = AsyncMock()
+    mock_db.user_interactions = MagicMock()
+    mock_db.user_interactions.find = _find_returning(
+        [{"article_id": "a1", "is_liked": True, "is_saved": False}]
+    )
+    mock_db.user_interactions.bulk_write = AsyncMock()
+    actions = [
+        _action("a1", "unlike", 0),
+        _action("a2", "like", 1),
+        _action("a2", "unlike", 2),
+        _action("a2", "like", 3),
+        _action("a2", "save", 4),
+    ]
+
+    # WHEN the batch is applied
+    states, skipped, changes = await interaction_crud.apply_interaction_batch(
+        "u1", actions
+    )
+
+    # THEN one bulk write carries one upsert per changed article
+    mock_db.user_interactions.bulk_write.assert_awaited_once()
+    operations = mock_db.user_interactions.bulk_write.call_args[0][0]
+    assert len(operations) == 2
+    a1_op, a2_op = (op._doc for op in operations)
+    assert operations[0]._filter == {
+        "user_id": "u1",
+        "article_id": "a1",
+        "is_liked": True,
+    }
+    assert a1_op["$set"] == {"is_liked": False, "liked_at": None}
+    assert a2_op["$set"]["is_liked"] is True
+    assert a2_op["$set"]["is_saved"] is True
+    assert a2_op["$set"]["liked_at"] == datetime(2024, 1, 1, 12, 3)
+    # AND the like counters move by the net delta in one bulk write
+    counter_ops = mock_db.articles.bulk_write.call_args[0][0]
+    assert sorted(
+        (op._filter["id"], op._doc["$inc"]["like_count"]) for op in counter_ops
+    ) == [
+        ("a1", -1),
+        ("a2", 1),
+    ]
+    assert states == [
+        {"article_id": "a1", "is_liked": False, "is_saved": False},
+        {"article_id": "a2", "is_liked": True, "is_saved": True},
+    ]
+    assert skipped == []
+    # AND the flips are reported with the articles' topics, for signals
+    assert changes == [
+        {"article_id": "a1", "topics": ["t1"], "like": -1, "save": 0},
+        {"article_id": "a2", "topics": [], "like": 1, "save": 1},
+    ]
+
+
+@patch("app.crud.interaction.db")
+async def test_apply_interaction_batch_no_change(mock_db):
+    # GIVEN the final state matches what is stored
+    mock_db.articles = MagicMock()
+    mock_db.articles.find = _find_returning([{"id": "a1"}])
+    mock_db.articles.bulk_write = AsyncMock()
     mock_db.user_interactions = MagicMock()
-    mock_db.user_interactions.find = MagicMock(return_value=mock_cursor)
+    mock_db.user_interactions.find = _find_returning(
+        [{"article_id": "a1", "is_liked": True, "is_saved": False}]
+    )
+    mock_db.user_interactions.bulk_write = AsyncMock()
+
+    # WHEN a like/unlike/like sequence is replayed
+    states, _, changes = await interaction_crud.apply_interaction_batch(
+        "u1",
+        [
+            _action("a1", "like", 0),
+            _action("a1", "unlike", 1),
+            _action("a1", "like", 2),
+        ],
+    )
+
+    # THEN nothing is written
+    mock_db.user_interactions.bulk_write.assert_not_awaited()
+    mock_db.articles.bulk_write.assert_not_awaited()
+    assert states == [{"article_id": "a1", "is_liked": True, "is_saved": False}]
+    assert changes == []
+
+
+@patch("app.crud.interaction.db")
+async def test_apply_interaction_batch_skips_missing_articles(mock_db):
+    mock_db.articles = MagicMock()
+    mock_db.articles.find = _find_returning([])
+    mock_db.user_interactions = MagicMock()
+    mock_db.user_interactions.bulk_write = AsyncMock()
 
-    # WHEN get_user_interactions_for_articles is called
-    article_ids = ["article-1", "article-2", "article-3"]
-    result = await interaction_crud.get_user_interactions_for_articles(
-        "test-user-id", article_ids
+    states, skipped, _ = await interaction_crud.apply_interaction_batch(
+        "u1", [_action("gone", "like", 0)]
     )
 
-    # THEN interactions are returned with defaults for missing
-    assert result["article-1"]["is_liked"] is True
-    assert result["article-1"]["is_saved"] is False
-    assert result["article-2"]["is_liked"] is False
-    assert result["article-2"]["is_saved"] is True
-    assert result["article-3"]["is_liked"] is False
-    assert result["article-3"]["is_saved"] is False
+    assert states == []
+    assert skipped == ["gone"]
+    mock_db.user_interactions.bulk_write.assert_not_awaited()
 
 
 @patch("app.crud.interaction.db")
-async def test_get_user_interactions_for_articles_no_interactions(mock_db):
-    # GIVEN user has no interactions
-    mock_cursor = MagicMock()
-    mock_cursor.to_list = AsyncMock(return_value=[])
+async def test_apply_interaction_batch_conflict_drops_delta(mock_db):
+    # GIVEN another request liked a1 between the read and the bulk write
+    mock_db.articles = MagicMock()
+    mock_db.articles.find = _find_returning([{"id": "a1"}])
+    mock_db.articles.bulk_write = AsyncMock()
     mock_db.user_interactions = MagicMock()
-    mock_db.user_interactions.find = MagicMock(return_value=mock_cursor)
+    mock_db.user_interactions.find = _find_returning(
+        [],
+        [{"article_id": "a1", "is_liked": True, "is_saved": False}],
+    )
+    mock_db.user_interactions.bulk_write = AsyncMock(
+        side_effect=BulkWriteError(
+            {"writeErrors": [{"index": 0, "code": 11000}], "nInserted": 0}
+        )
+    )
 
-    # WHEN get_user_interactions_for_articles is called
-    article_ids = ["article-1", "article-2"]
-    result = await interaction_crud.get_user_interactions_for_articles(
-        "test-user-id", article_ids
+    # WHEN the batch tries to like it too
+    states, _, changes = await interaction_crud.apply_interaction_batch(
+        "u1", [_action("a1", "like", 0)]
     )
 
-    # THEN all articles have default values
-    assert result["article-1"] == {"is_liked": False, "is_saved": False}
-    assert result["article-2"] == {"is_liked": False, "is_saved": False}
+    # THEN the counter is not incremented twice and the stored state is returned
+    mock_db.articles.bulk_write.assert_not_awaited()
+    assert changes == []
+    assert states == [{"article_id": "a1", "is_liked": True, "is_saved": False}]
@@ -0,0 +1,165 @@
+"""
+Concurrency stress test for like/save writes against a real MongoDB.
+
+The atomic upsert and the "only count real flips" rule can only be checked
+against the server, so these tests are skipped when MongoDB is unreachable
+(CI provides one as a service).
+"""
+
+import os
+import uuid
+from datetime import datetime
+from unittest.mock import patch
+
+import anyio
+import pytest
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ASCENDING, MongoClient
+from pymongo.errors import PyMongoError
+
+from app.routes.interactions import _apply_like, _apply_save
+from app.utils.affinity import affinity_store
+
+MONGODB_URL = os.environ.get("MONGODB_URL", "mongodb://localhost:27017")
+
+
+def _mongo_available() -> bool:
+    try:
+        MongoClient(MONGODB_URL, serverSelectionTimeoutMS=500).admin.command("ping")
+        return True
+    except PyMongoError:
+        return False
+
+
+pytestmark = [
+    pytest.mark.anyio,
+    pytest.mark.slow,
+    pytest.mark.skipif(not _mongo_available(), reason="MongoDB is not available"),
+]
+
+
+@pytest.fixture
+def anyio_backend():
+    # Motor is bound to asyncio.
+    return "asyncio"
+
+
+@pytest.fixture
+async def real_db():
+    client = AsyncIOMotorClient(MONGODB_URL)
+    database = client[f"flipboard_stress_{uuid.uuid4().hex[:8]}"]
+    await database.user_interactions.create_index(
+        [("user_id", ASCENDING), ("article_id", ASCENDING)], unique=True
+    )
+    await database.articles.insert_one({"id": "article-1", "like_count": 0})
+
+    with (
+        patch("app.crud.article.db", database),
+        patch("app.crud.interaction.db", database),
+        patch("app.utils.affinity.db", database),
+    ):
+        yield database
+    affinity_store.clear()
+
+    await client.drop_database(database.name)
+    client.close()
+
+
+async def test_concurrent_toggles_keep_like_count_exact(real_db):
+    # GIVEN 20 users each toggling the same article 7 times at once
+    users = [f"user-{i}" for i in range(20)]
+
+    # WHEN all toggles race each other
+    async with anyio.create_task_group() as tg:
+        for user_id in users:
+            for _ in range(7):
+                tg.start_soon(_apply_like, "article-1", user_id, None)
+
+    # THEN each user has exactly one interaction, liked after an odd count
+    interactions = await real_db.user_interactions.find({}).to_list(length=None)
+    assert len(interactions) == len(users)
+    assert all(i["is_liked"] for i in interactions)
+    article = await real_db.articles.find_one({"id": "article-1"})
+    assert article["like_count"] == len(users)
+
+
+async def test_concurrent_set_retries_count_once(real_db):
+    # GIVEN clients retrying PUT/DELETE like many times
+    async with anyio.create_task_group() as tg:
+        for i in range(30):
+            tg.start_soon(_apply_like, "article-1", f"user-{i % 10}", True)
+
+    article = await real_db.articles.find_one({"id": "article-1"})
+    assert article["like_count"] == 10
+
+    async with anyio.create_task_group() as tg:
+        for i in range(30):
+            tg.start_soon(_apply_like, "article-1", f"user-{i % 4}", False)
+
+    # THEN the counter only moved once per real state change
+    article = await real_db.articles.find_one({"id": "article-1"})
+    liked = await real_db.user_interactions.count_documents({"is_liked": True})
+    assert liked == 6
+    assert article["like_count"] == 6
+
+
+async def test_save_does_not_touch_like_state(real_db):
+    await _apply_like("article-1", "user-1", True)
+
+    result = await _apply_save("article-1", "user-1", True)
+
+    assert result == {"article_id": "article-1", "is_liked": True, "is_saved": True}
+    interaction = await real_db.user_interactions.find_one({"user_id": "user-1"})
+    assert interaction["liked_at"] is not None
+    assert interaction["saved_at"] is not None
+
+
+async def test_liked_history_keeps_recency_order(real_db):
+    # GIVEN three liked articles, liked in a known order
+    from app.crud import interaction as interaction_crud
+
+    for article_id in ("article-2", "article-3"):
+        await real_db.articles.insert_one({"id": article_id, "like_count": 0})
+    for minute, article_id in enumerate(("article-2", "article-1", "article-3")):
+        await real_db.user_interactions.insert_one(
+            {
+                "id": f"i-{article_id}",
+                "user_id": "user-1",
+                "article_id": article_id,
+                "is_liked": True,
+                "is_saved": article_id == "article-1",
+                "liked_at": datetime(2024, 1, 1, 12, minute),
+            }
+        )
+
+    # WHEN the history is read back
+    articles = await interaction_crud.get_user_liked_articles("user-1")
+
+    # THEN it is newest first, with the interaction flags merged in
+    assert [a["id"] for a in articles] == ["article-3", "article-1", "article-2"]
+    assert all(a["liked"] for a in articles)
+    assert [a["saved"] for a in articles] == [False, True, False]
+    assert all("_id" not in a for a in articles)
+
+
+async def test_batch_sync_matches_individual_requests(real_db):
+    # GIVEN an offline queue replayed alongside direct requests
+    from app.crud import interaction as interaction_crud
+    from app.schemas.interaction import InteractionAction
+
+    await _apply_like("article-1", "user-1", True)
+    actions = [
+        InteractionAction(
+            article_id="article-1", action=action, timestamp=datetime(2024, 1, 1, m)
+        )
+        for m, action in enumerate(["unlike", "save", "like", "unlike"])
+    ]
+
+    # WHEN the batch is applied
+    states, _, _ = await interaction_crud.apply_interaction_batch("user-1", actions)
+
+    # THEN the final state is stored once and the counter matches it
+    assert states == [{"article_id": "article-1", "is_liked": False, "is_saved": True}]
+    assert await real_db.user_interactions.count_documents({}) == 1
+    article = await real_db.articles.find_one({"id": "article-1"})
+    assert article["like_count"] == 0
@@ -22,19 +22,9 @@ async def test_create_magazine(mock_db, test_user):
         description="A test magazine",
         is_public=True,
     )
-    created_magazine = {
-        "id": "new-magazine-id",
-        "name": "New Magazine",
-        "description": "A test magazine",
-        "user_id": test_user["id"],
-        "article_ids": [],
-        "is_public": True,
-        "created_at": datetime.utcnow(),
-        "updated_at": datetime.utcnow(),
-    }
     mock_db.magazines = MagicMock()
     mock_db.magazines.insert_one = AsyncMock()
-    mock_db.magazines.find_one = AsyncMock(return_value=created_magazine)
+    mock_db.magazines.find_one = AsyncMock()
 
     # WHEN create_magazine is called
     result = await magazine_crud.create_magazine(test_user["id"], magazine_in)
@@ -47,7 +37,8 @@ async def test_create_magazine(mock_db, test_user):
     assert insert_data["article_ids"] == []
     assert "id" in insert_data
     assert "created_at" in insert_data
-    assert result == created_magazine
+    assert result is insert_data
+    mock_db.magazines.find_one.assert_not_awaited()
 
 
 # ============================================================================
@@ -147,7 +138,7 @@ async def test_get_all_magazines_basic(mock_db, test_magazine):
 
     # THEN all magazines are returned
     mock_db.magazines.find.assert_called_with({})
-    mock_cursor.sort.assert_called_with("updated_at", -1)
+    mock_cursor.sort.assert_called_with([("updated_at", -1), ("id", -1)])
     mock_cursor.skip.assert_called_with(0)
     mock_cursor.limit.assert_called_with(100)
     assert len(result) == 2
@@ -177,7 +168,7 @@ async def test_get_all_magazines_with_exclude_user(mock_db, test_magazine):
     mock_db.magazines.find.assert_called_with(
         {"user_id": {"$ne": test_magazine["user_id"]}}
     )
-    mock_cursor.sort.assert_called_with("updated_at", -1)
+    mock_cursor.sort.assert_called_with([("updated_at", -1), ("id", -1)])
     assert len(result) == 1
     assert result[0]["user_id"] == "another-user-id"
 
@@ -253,7 +244,7 @@ async def test_get_all_magazines_sorting(mock_db, test_magazine):
     result = await magazine_crud.get_all_magazines()
 
     # THEN results are sorted by updated_at in descending order
-    mock_cursor.sort.assert_called_with("updated_at", -1)
+    mock_cursor.sort.assert_called_with([("updated_at", -1), ("id", -1)])
     assert len(result) == 3
     # Verify order: most recently updated first
     assert result[0]["updated_at"] > result[1]["updated_at"]
@@ -10,13 +10,20 @@ from app.models.news import NewsResponse
 pytestmark = pytest.mark.anyio
 
 
+@pytest.fixture(autouse=True)
+def mock_entity_crud():
+    with patch("app.crud.news.entity_crud") as entity_crud:
+        entity_crud.ingest_posts = AsyncMock(return_value=0)
+        yield entity_crud
+
+
 # ============================================================================
 # fetch_news Tests
 # ============================================================================
 
 
 @patch("app.crud.news.httpx.AsyncClient")
-async def test_fetch_news_basic(mock_client_class):
+async def test_fetch_news_basic(mock_client_class, mock_entity_crud):
     mock_response = MagicMock()
     mock_response.json.return_value = {
         "posts": [{"uuid": "p1", "title": "Test"}],
@@ -38,11 +45,34 @@ async def test_fetch_news_basic(mock_client_class):
     assert len(result.posts) == 1
     assert result.totalResults == 1
     mock_client.get.assert_awaited_once()
+    # AND the fetched posts are indexed
+    mock_entity_crud.ingest_posts.assert_awaited_once_with(result.posts)
     call_kwargs = mock_client.get.call_args
     assert call_kwargs[1]["params"]["q"] == "bitcoin"
     assert call_kwargs[1]["params"]["size"] == 5
 
 
+@patch("app.crud.news.httpx.AsyncClient")
+async def test_fetch_news_when_indexing_fails(mock_client_class, mock_entity_crud):
+    # GIVEN the entity index is unavailable
+    mock_response = MagicMock()
+    mock_response.json.return_value = {"posts": [{"uuid": "p1", "title": "Test"}]}
+    mock_response.raise_for_status = MagicMock()
+
+    mock_client = AsyncMock()
+    mock_client.get = AsyncMock(return_value=mock_response)
+    mock_client.__aenter__ = AsyncMock(return_value=mock_client)
+    mock_client.__aexit__ = AsyncMock(return_value=False)
+    mock_client_class.return_value = mock_client
+    mock_entity_crud.ingest_posts.side_effect = Exception("connection refused")
+
+    # WHEN news is fetched
+    result = await news_crud.fetch_news(query="bitcoin")
+
+    # THEN the news is still returned
+    assert len(result.posts) == 1
+
+
 @patch("app.crud.news.httpx.AsyncClient")
 async def test_fetch_news_with_country(mock_client_class):
     mock_response = MagicMock()
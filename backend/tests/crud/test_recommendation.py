@@ -0,0 +1,56 @@
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from app.core.config import settings
+from app.crud import recommendation as recommendation_crud
+from app.crud.interaction import InteractionState
+
+pytestmark = pytest.mark.anyio
+
+
+# ============================================================================
+# get_recommended_articles Tests
+# ============================================================================
+
+
+@patch("app.crud.recommendation.get_interaction_state")
+@patch("app.crud.recommendation.db")
+async def test_recommendations_sum_neighbour_scores(mock_db, mock_state):
+    # GIVEN a user who liked a1 and saved a2
+    mock_state.return_value = InteractionState(liked={"a1"}, saved={"a2"})
+    aggregate_cursor = MagicMock()
+    aggregate_cursor.to_list = AsyncMock(
+        return_value=[{"_id": "a4", "score": 1.5}, {"_id": "a3", "score": 0.5}]
+    )
+    mock_db.user_interactions.aggregate = MagicMock(return_value=aggregate_cursor)
+    find_cursor = MagicMock()
+    find_cursor.to_list = AsyncMock(return_value=[{"id": "a3"}, {"id": "a4"}])
+    mock_db.articles.find = MagicMock(return_value=find_cursor)
+
+    # WHEN recommendations are requested
+    result = await recommendation_crud.get_recommended_articles("user-1", limit=5)
+
+    # THEN the neighbour order is kept after hydration
+    assert [a["id"] for a in result] == ["a4", "a3"]
+    pipeline = mock_db.user_interactions.aggregate.call_args[0][0]
+    assert pipeline[0]["$match"] == {"user_id": "user-1", "is_liked": True}
+    # AND the seeds are the latest articles liked or saved, by when they were
+    seeds = pipeline.index({"$limit": settings.RECOMMEND_SEED_ITEMS}, 4)
+    assert pipeline[seeds - 1] == {"$sort": {"at": -1}}
+    assert pipeline[seeds + 1]["$lookup"]["from"] == "article_neighbours"
+    # AND articles the user already liked or saved are excluded
+    assert set(pipeline[-3]["$match"]["_id"]["$nin"]) == {"a1", "a2"}
+    assert pipeline[-1] == {"$limit": 5}
+    assert mock_db.articles.find.call_args[0][0] == {"id": {"$in": ["a4", "a3"]}}
+
+
+@patch("app.crud.recommendation.get_interaction_state")
+@patch("app.crud.recommendation.db")
+async def test_recommendations_empty_without_history(mock_db, mock_state):
+    mock_state.return_value = InteractionState()
+    mock_db.user_interactions.aggregate = MagicMock()
+
+    assert await recommendation_crud.get_recommended_articles("user-1") == []
+
+    mock_db.user_interactions.aggregate.assert_not_called()
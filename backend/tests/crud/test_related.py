@@ -0,0 +1,52 @@
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from app.crud import related as related_crud
+
+pytestmark = pytest.mark.anyio
+
+
+# ============================================================================
+# get_related_articles Tests
+# ============================================================================
+
+
+@patch("app.crud.related.db")
+async def test_related_articles_keep_stored_order(mock_db):
+    # GIVEN a stored related list
+    mock_db.related_articles.find_one = AsyncMock(
+        return_value={
+            "related": [{"id": "a3", "score": 0.9}, {"id": "a2", "score": 0.4}]
+        }
+    )
+    cursor = MagicMock()
+    cursor.to_list = AsyncMock(return_value=[{"id": "a2"}, {"id": "a3"}])
+    mock_db.articles.find = MagicMock(return_value=cursor)
+
+    # WHEN the related articles are read
+    result = await related_crud.get_related_articles("a1", limit=2)
+
+    # THEN only the requested slice is read and its order is kept
+    assert [a["id"] for a in result] == ["a3", "a2"]
+    projection = mock_db.related_articles.find_one.call_args[0][1]
+    assert projection["related"] == {"$slice": 2}
+    assert mock_db.articles.find.call_args[0][0] == {"id": {"$in": ["a3", "a2"]}}
+
+
+@patch("app.crud.related.article_exists")
+@patch("app.crud.related.db")
+async def test_related_articles_not_indexed_yet(mock_db, mock_exists):
+    mock_db.related_articles.find_one = AsyncMock(return_value=None)
+    mock_exists.return_value = True
+
+    assert await related_crud.get_related_articles("a1") == []
+
+
+@patch("app.crud.related.article_exists")
+@patch("app.crud.related.db")
+async def test_related_articles_missing_article(mock_db, mock_exists):
+    mock_db.related_articles.find_one = AsyncMock(return_value=None)
+    mock_exists.return_value = False
+
+    assert await related_crud.get_related_articles("missing") is None
@@ -0,0 +1,241 @@
+"""
+Round-trip budget tests for CRUD writes.
+
+Every create/update returns the document it wrote (or the document MongoDB
+returned from an atomic find-and-modify) instead of reading it back, so each
+write costs exactly one round trip to its collection. An article's body is
+a second write, to its own collection.
+"""
+
+from datetime import datetime
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from pymongo.errors import BulkWriteError
+
+from app.crud import article as article_crud
+from app.crud import comment as comment_crud
+from app.crud import interaction as interaction_crud
+from app.crud import magazine as magazine_crud
+from app.crud import notification as notification_crud
+from app.crud import topic as topic_crud
+from app.crud import user as user_crud
+from app.schemas.article import ArticleCreate, ArticleUpdate
+from app.schemas.comment import CommentCreate, CommentUpdate
+from app.schemas.magazine import MagazineCreate
+from app.schemas.notification import NotificationCreate
+from app.schemas.topic import TopicCreate, TopicUpdate
+from app.schemas.user import UserCreate
+from app.utils.events import event_hub
+
+pytestmark = pytest.mark.anyio
+
+
+# ============================================================================
+# Create Tests
+# ============================================================================
+
+
+async def test_create_article_round_trips(recording_db):
+    article_in = ArticleCreate(
+        title="New Article",
+        excerpt="Article excerpt",
+        content="Article content",
+        author="Author",
+        publisher="Publisher",
+        source_url="https://example.com/new",
+        published_at=datetime(2024, 1, 20, 12, 0, 0),
+    )
+
+    with patch("app.crud.article.db", recording_db):
+        result = await article_crud.create_article(article_in)
+
+    # One write for the body, one for the article; nothing is read back.
+    assert recording_db.calls == [
+        ("article_contents", "replace_one"),
+        ("articles", "insert_one"),
+    ]
+    assert result["title"] == "New Article"
+    assert result["view_count"] == 0
+
+
+@patch("app.crud.user.get_password_hash", return_value="hashed")
+async def test_create_user_single_round_trip(mock_hash, recording_db):
+    user_in = UserCreate(
+        email="new@example.com", username="newuser", password="password"
+    )
+
+    with patch("app.crud.user.db", recording_db):
+        result = await user_crud.create_user(user_in)
+
+    assert recording_db.calls == [("users", "insert_one")]
+    assert result["username"] == "newuser"
+
+
+@patch("app.crud.user.get_password_hash", return_value="hashed")
+async def test_create_social_user_single_round_trip(mock_hash, recording_db):
+    with patch("app.crud.user.db", recording_db):
+        result = await user_crud.create_social_user(
+            {"email": "g@example.com", "username": "guser"}
+        )
+
+    assert recording_db.calls == [("users", "insert_one")]
+    assert result["email"] == "g@example.com"
+
+
+async def test_create_topic_single_round_trip(recording_db):
+    with patch("app.crud.topic.db", recording_db):
+        result = await topic_crud.create_topic(TopicCreate(name="Science"))
+
+    assert recording_db.calls == [("topics", "insert_one")]
+    assert result["follower_count"] == 0
+
+
+async def test_create_magazine_single_round_trip(recording_db):
+    with patch("app.crud.magazine.db", recording_db):
+        result = await magazine_crud.create_magazine(
+            "user-1", MagazineCreate(name="Reads")
+        )
+
+    assert recording_db.calls == [("magazines", "insert_one")]
+    assert result["user_id"] == "user-1"
+
+
+async def test_create_notification_single_round_trip(recording_db):
+    notification_in = NotificationCreate(user_id="user-1", message="Hello")
+
+    with patch("app.crud.notification.db", recording_db):
+        result = await notification_crud.create_notification(notification_in)
+
+    assert recording_db.calls == [("notifications", "insert_one")]
+    assert result["message"] == "Hello"
+
+
+async def test_create_notifications_single_round_trip(recording_db):
+    notifications = [
+        NotificationCreate(user_id=f"user-{i}", message="Hello") for i in range(500)
+    ]
+
+    with patch("app.crud.notification.db", recording_db):
+        written = await notification_crud.create_notifications(notifications)
+
+    assert recording_db.calls == [("notifications", "insert_many")]
+    assert written == 500
+
+
+async def test_create_notifications_keeps_going_past_failures():
+    notifications = [
+        NotificationCreate(user_id=f"user-{i}", message="Hi") for i in range(3)
+    ]
+    error = BulkWriteError({"writeErrors": [{"index": 1, "code": 11000}]})
+
+    with (
+        patch("app.crud.notification.db") as mock_db,
+        event_hub.subscribe(["user:user-1", "user:user-2"]) as receive,
+    ):
+        mock_db.notifications.insert_many = AsyncMock(side_effect=error)
+        written = await notification_crud.create_notifications(notifications)
+
+        # Only the notifications that were written are published.
+        assert receive.receive_nowait()["data"]["user_id"] == "user-2"
+
+    assert written == 2
+    mock_db.notifications.insert_many.assert_awaited_once()
+    assert mock_db.notifications.insert_many.call_args.kwargs == {"ordered": False}
+
+
+async def test_create_comment_single_write(
+    recording_db, clear_profile_cache, test_user
+):
+    recording_db.returns("users", "find", [test_user])
+
+    with (
+        patch("app.crud.comment.db", recording_db),
+        patch("app.crud.user.db", recording_db),
+    ):
+        result = await comment_crud.create_comment(
+            "article-1", test_user["id"], CommentCreate(content="Nice")
+        )
+
+    # The comment itself is never read back; only the author is looked up.
+    assert recording_db.calls == [("comments", "insert_one"), ("users", "find")]
+    assert result["content"] == "Nice"
+    assert result["user"]["username"] == test_user["username"]
+
+
+# ============================================================================
+# Update Tests
+# ============================================================================
+
+
+async def test_update_article_single_round_trip(recording_db, test_article):
+    recording_db.returns(
+        "articles", "find_one_and_update", {**test_article, "title": "New"}
+    )
+
+    with patch("app.crud.article.db", recording_db):
+        result = await article_crud.update_article(
+            test_article["id"], ArticleUpdate(title="New")
+        )
+
+    assert recording_db.calls == [("articles", "find_one_and_update")]
+    assert result["title"] == "New"
+
+
+async def test_update_comment_single_round_trip(recording_db, test_comment):
+    recording_db.returns(
+        "comments", "find_one_and_update", {**test_comment, "content": "Edited"}
+    )
+
+    with patch("app.crud.comment.db", recording_db):
+        result = await comment_crud.update_comment(
+            test_comment["id"], CommentUpdate(content="Edited")
+        )
+
+    assert recording_db.calls == [("comments", "find_one_and_update")]
+    assert result["content"] == "Edited"
+
+
+async def test_update_topic_single_round_trip(recording_db, test_topic):
+    recording_db.returns(
+        "topics", "find_one_and_update", {**test_topic, "name": "Renamed"}
+    )
+
+    with patch("app.crud.topic.db", recording_db):
+        result = await topic_crud.update_topic(
+            test_topic["id"], TopicUpdate(name="Renamed")
+        )
+
+    assert recording_db.calls == [("topics", "find_one_and_update")]
+    assert result["name"] == "Renamed"
+
+
+# ============================================================================
+# Toggle Tests
+# ============================================================================
+
+
+async def test_toggle_like_single_round_trip(recording_db):
+    with patch("app.crud.interaction.db", recording_db):
+        interaction, increment = await interaction_crud.toggle_like(
+            "user-1", "article-1"
+        )
+
+    assert recording_db.calls == [("user_interactions", "find_one_and_update")]
+    assert interaction["is_liked"] is True
+    assert increment == 1
+
+
+async def test_toggle_save_single_round_trip(recording_db):
+    recording_db.returns(
+        "user_interactions",
+        "find_one_and_update",
+        {"user_id": "user-1", "article_id": "article-1", "is_saved": True},
+    )
+
+    with patch("app.crud.interaction.db", recording_db):
+        interaction, _ = await interaction_crud.toggle_save("user-1", "article-1")
+
+    assert recording_db.calls == [("user_interactions", "find_one_and_update")]
+    assert interaction["is_saved"] is False
+    assert interaction["saved_at"] is None
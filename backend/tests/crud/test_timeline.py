@@ -0,0 +1,184 @@
+from datetime import datetime
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from app.crud import timeline as timeline_crud
+from app.utils.pagination import encode_cursor
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture(autouse=True)
+def clear_hot_topics():
+    timeline_crud.invalidate_hot_topics()
+    yield
+    timeline_crud.invalidate_hot_topics()
+
+
+def _article(article_id, day, topics=("topic-1",)):
+    return {
+        "id": article_id,
+        "published_at": datetime(2024, 1, day),
+        "topics": list(topics),
+    }
+
+
+def _timeline(entries, topics=("topic-1",), hot_topics=()):
+    return {
+        "topics": sorted(topics),
+        "hot_topics": list(hot_topics),
+        "entries": [
+            {"id": article["id"], "published_at": article["published_at"]}
+            for article in entries
+        ],
+    }
+
+
+# ============================================================================
+# fan_out_article Tests
+# ============================================================================
+
+
+@patch("app.crud.timeline.db")
+async def test_fan_out_pushes_capped_sorted_entry(mock_db, mock_cursor):
+    # GIVEN an article in one regular and one hot topic
+    mock_db.topics.find = MagicMock(return_value=mock_cursor([{"id": "hot"}]))
+    mock_db.timelines.update_many = AsyncMock(return_value=MagicMock(modified_count=3))
+    article = _article("a1", 5, topics=("topic-1", "hot"))
+
+    # WHEN it is fanned out
+    updated = await timeline_crud.fan_out_article(article)
+
+    # THEN one update reaches the followers of the regular topic only
+    assert updated == 3
+    query, update = mock_db.timelines.update_many.call_args[0]
+    assert query == {"topics": {"$in": ["topic-1"]}}
+    push = update["$push"]["entries"]
+    assert push["$each"] == [{"id": "a1", "published_at": datetime(2024, 1, 5)}]
+    assert push["$sort"] == {"published_at": -1, "id": -1}
+    assert push["$slice"] == timeline_crud.settings.TIMELINE_MAX_ENTRIES
+
+
+async def test_fan_out_skips_hot_only_articles(recording_db):
+    recording_db.returns("topics", "find", [{"id": "hot"}])
+
+    with patch("app.crud.timeline.db", recording_db):
+        updated = await timeline_crud.fan_out_article(_article("a1", 5, ("hot",)))
+
+    assert updated == 0
+    assert recording_db.calls == [("topics", "find")]
+
+
+# ============================================================================
+# get_timeline_articles Tests
+# ============================================================================
+
+
+async def test_feed_is_one_range_read_plus_hydration(recording_db):
+    # GIVEN an up to date timeline, one of whose articles has been deleted
+    a1, a2, a3 = _article("a1", 3), _article("a2", 2), _article("a3", 1)
+    recording_db.returns("timelines", "aggregate", [_timeline([a1, a2, a3])])
+    recording_db.returns("articles", "find", [a3, a1])
+
+    # WHEN the feed is read past its end
+    with patch("app.crud.timeline.db", recording_db):
+        articles = await timeline_crud.get_timeline_articles(
+            "user-1", ["topic-1"], limit=5
+        )
+
+    # THEN the timeline order is kept and nothing is sorted over articles
+    assert [a["id"] for a in articles] == ["a1", "a3"]
+    assert recording_db.calls == [
+        ("topics", "find"),
+        ("timelines", "aggregate"),
+        ("articles", "find"),
+    ]
+
+
+@patch("app.crud.timeline.db")
+async def test_feed_page_reads_on_past_deleted_articles(mock_db, mock_cursor):
+    # GIVEN a timeline whose second article has been deleted
+    a1, a2, a3 = _article("a1", 3), _article("a2", 2), _article("a3", 1)
+    mock_db.topics.find = MagicMock(return_value=mock_cursor([]))
+    mock_db.timelines.aggregate = MagicMock(
+        side_effect=[
+            mock_cursor([_timeline([a1, a2])]),
+            mock_cursor([_timeline([a3])]),
+        ]
+    )
+    mock_db.articles.find = MagicMock(
+        side_effect=[mock_cursor([a1]), mock_cursor([a3])]
+    )
+
+    # WHEN a page of two is read
+    articles = await timeline_crud.get_timeline_articles("user-1", ["topic-1"], limit=2)
+
+    # THEN the page is filled from the entries after it, so it stays full
+    assert [a["id"] for a in articles] == ["a1", "a3"]
+    pipeline = mock_db.timelines.aggregate.call_args[0][0]
+    assert pipeline[1]["$project"]["entries"]["$slice"] == ["$entries", 2, 1]
+
+
+@patch("app.crud.timeline.db")
+async def test_feed_page_slices_timeline_after_cursor(mock_db, mock_cursor):
+    mock_db.topics.find = MagicMock(return_value=mock_cursor([]))
+    mock_db.timelines.aggregate = MagicMock(return_value=mock_cursor([_timeline([])]))
+    cursor = encode_cursor("published_at", datetime(2024, 1, 2), "a2")
+
+    await timeline_crud.get_timeline_articles(
+        "user-1", ["topic-1"], skip=40, limit=10, cursor=cursor
+    )
+
+    pipeline = mock_db.timelines.aggregate.call_args[0][0]
+    assert pipeline[0] == {"$match": {"user_id": "user-1"}}
+    entries, skip, limit = pipeline[1]["$project"]["entries"]["$slice"]
+    # A cursor replaces skip, and the seek happens inside the document.
+    assert (skip, limit) == (0, 10)
+    assert entries["$filter"]["input"] == "$entries"
+
+
+async def test_feed_rebuilds_timeline_for_new_topics(recording_db):
+    # GIVEN a timeline built before the user followed topic-2
+    recording_db.returns("timelines", "aggregate", [_timeline([])])
+
+    # WHEN the feed is read with the new followed topics
+    with patch("app.crud.timeline.db", recording_db):
+        await timeline_crud.get_timeline_articles("user-1", ["topic-1", "topic-2"])
+
+    # THEN the timeline is rebuilt from the articles, then read again
+    assert recording_db.calls == [
+        ("topics", "find"),
+        ("timelines", "aggregate"),
+        ("articles", "find"),
+        ("timelines", "replace_one"),
+        ("timelines", "aggregate"),
+    ]
+
+
+@patch("app.crud.timeline.db")
+async def test_feed_merges_hot_topics_on_read(mock_db, mock_cursor):
+    # GIVEN a user following a regular topic and a hot one
+    mock_db.topics.find = MagicMock(return_value=mock_cursor([{"id": "hot"}]))
+    a1, a3 = _article("a1", 3), _article("a3", 1)
+    hot = _article("h2", 2, topics=("hot",))
+    mock_db.timelines.aggregate = MagicMock(
+        return_value=mock_cursor(
+            [_timeline([a1, a3], topics=("hot", "topic-1"), hot_topics=("hot",))]
+        )
+    )
+    mock_db.articles.find = MagicMock(
+        side_effect=[mock_cursor([a1, a3]), mock_cursor([hot])]
+    )
+
+    # WHEN the second page of two is read
+    articles = await timeline_crud.get_timeline_articles(
+        "user-1", ["topic-1", "hot"], skip=1, limit=2
+    )
+
+    # THEN both sources were read from the top and merged by recency
+    assert [a["id"] for a in articles] == ["h2", "a3"]
+    slice_args = mock_db.timelines.aggregate.call_args[0][0][1]["$project"]
+    assert slice_args["entries"]["$slice"][1:] == [0, 3]
+    hot_query = mock_db.articles.find.call_args_list[1][0][0]
+    assert hot_query == {"topics": {"$in": ["hot"]}}
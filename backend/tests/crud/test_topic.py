@@ -1,5 +1,5 @@
 from datetime import datetime
-from unittest.mock import AsyncMock, MagicMock, patch
+from unittest.mock import ANY, AsyncMock, MagicMock, patch
 
 import pytest
 
@@ -173,6 +173,35 @@ async def test_get_topics_count_with_search(mock_db):
     assert call_args["name"]["$regex"] == "Tech"
 
 
+# ============================================================================
+# get_topics_version Tests
+# ============================================================================
+
+
+@patch("app.crud.topic.db")
+async def test_get_topics_version(mock_db, mock_cursor):
+    # GIVEN matching topics
+    latest = datetime(2024, 1, 5)
+    mock_db.topics.aggregate = MagicMock(
+        return_value=mock_cursor([{"_id": None, "count": 3, "latest": latest}])
+    )
+
+    # WHEN the list version is read
+    result = await topic_crud.get_topics_version(search="Tech")
+
+    # THEN the count and the latest change are returned in one aggregation
+    assert result == (3, latest)
+    pipeline = mock_db.topics.aggregate.call_args[0][0]
+    assert pipeline[0] == {"$match": {"name": {"$regex": "Tech", "$options": "i"}}}
+
+
+@patch("app.crud.topic.db")
+async def test_get_topics_version_empty(mock_db, mock_cursor):
+    mock_db.topics.aggregate = MagicMock(return_value=mock_cursor([]))
+
+    assert await topic_crud.get_topics_version() == (0, None)
+
+
 # ============================================================================
 # create_topic Tests
 # ============================================================================
@@ -186,17 +215,9 @@ async def test_create_topic(mock_db):
         description="A new topic",
         image_url="https://example.com/topic.jpg",
     )
-    created_topic = {
-        "id": "new-topic-id",
-        "name": "New Topic",
-        "description": "A new topic",
-        "image_url": "https://example.com/topic.jpg",
-        "follower_count": 0,
-        "created_at": datetime.utcnow(),
-    }
     mock_db.topics = MagicMock()
     mock_db.topics.insert_one = AsyncMock()
-    mock_db.topics.find_one = AsyncMock(return_value=created_topic)
+    mock_db.topics.find_one = AsyncMock()
 
     # WHEN create_topic is called
     result = await topic_crud.create_topic(topic_in)
@@ -208,7 +229,8 @@ async def test_create_topic(mock_db):
     assert insert_data["follower_count"] == 0
     assert "id" in insert_data
     assert "created_at" in insert_data
-    assert result == created_topic
+    assert result is insert_data
+    mock_db.topics.find_one.assert_not_awaited()
 
 
 # ============================================================================
@@ -222,16 +244,17 @@ async def test_update_topic(mock_db, test_topic):
     update_data = TopicUpdate(name="Updated Topic", description="Updated description")
     updated_topic = {**test_topic, "name": "Updated Topic"}
     mock_db.topics = MagicMock()
-    mock_db.topics.update_one = AsyncMock()
-    mock_db.topics.find_one = AsyncMock(return_value=updated_topic)
+    mock_db.topics.find_one_and_update = AsyncMock(return_value=updated_topic)
+    mock_db.topics.find_one = AsyncMock()
 
     # WHEN update_topic is called
     result = await topic_crud.update_topic("test-topic-id-123", update_data)
 
-    # THEN topic is updated
-    mock_db.topics.update_one.assert_awaited_once()
-    call_args = mock_db.topics.update_one.call_args
+    # THEN topic is updated and returned in a single round trip
+    mock_db.topics.find_one_and_update.assert_awaited_once()
+    call_args = mock_db.topics.find_one_and_update.call_args
     assert call_args[0][0] == {"id": "test-topic-id-123"}
+    mock_db.topics.find_one.assert_not_awaited()
     assert result["name"] == "Updated Topic"
 
 
@@ -240,14 +263,13 @@ async def test_update_topic_filters_none(mock_db, test_topic):
     # GIVEN update with None values
     update_data = TopicUpdate(name="Updated", description=None)
     mock_db.topics = MagicMock()
-    mock_db.topics.update_one = AsyncMock()
-    mock_db.topics.find_one = AsyncMock(return_value=test_topic)
+    mock_db.topics.find_one_and_update = AsyncMock(return_value=test_topic)
 
     # WHEN update_topic is called
     await topic_crud.update_topic("test-topic-id-123", update_data)
 
     # THEN None values are filtered
-    call_args = mock_db.topics.update_one.call_args
+    call_args = mock_db.topics.find_one_and_update.call_args
     update_set = call_args[0][1]["$set"]
     assert "name" in update_set
     assert "description" not in update_set or update_set.get("description") is not None
@@ -305,7 +327,8 @@ async def test_increment_follower_count(mock_db):
 
     # THEN follower_count is incremented
     mock_db.topics.update_one.assert_awaited_with(
-        {"id": "test-topic-id-123"}, {"$inc": {"follower_count": 1}}
+        {"id": "test-topic-id-123"},
+        {"$inc": {"follower_count": 1}, "$set": {"updated_at": ANY}},
     )
 
 
@@ -320,7 +343,8 @@ async def test_decrement_follower_count(mock_db):
 
     # THEN follower_count is decremented
     mock_db.topics.update_one.assert_awaited_with(
-        {"id": "test-topic-id-123"}, {"$inc": {"follower_count": -1}}
+        {"id": "test-topic-id-123"},
+        {"$inc": {"follower_count": -1}, "$set": {"updated_at": ANY}},
     )
 
 
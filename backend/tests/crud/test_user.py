@@ -1,4 +1,4 @@
-from unittest.mock import AsyncMock, MagicMock, patch
+from unittest.mock import ANY, AsyncMock, MagicMock, patch
 
 import pytest
 
@@ -74,13 +74,7 @@ async def test_create_user(mock_db, mock_get_password_hash):
     # GIVEN user data for a new user
     mock_db.users = MagicMock()
     mock_db.users.insert_one = AsyncMock()
-    # The create_user function returns the created user, so we need to mock the find_one call too
-    created_user_doc = {
-        "username": "newuser",
-        "email": "new@example.com",
-        "hashed_password": "hashedpassword",
-    }
-    mock_db.users.find_one = AsyncMock(return_value=created_user_doc)
+    mock_db.users.find_one = AsyncMock()
     mock_get_password_hash.return_value = "hashedpassword"
     user_in = UserCreate(
         email="new@example.com", username="newuser", password="password"
@@ -95,8 +89,8 @@ async def test_create_user(mock_db, mock_get_password_hash):
     assert inserted_data["email"] == "new@example.com"
     assert inserted_data["username"] == "newuser"
     assert inserted_data["hashed_password"] == "hashedpassword"
-    mock_db.users.find_one.assert_awaited_with({"username": user_in.username})
-    assert result_user == created_user_doc
+    mock_db.users.find_one.assert_not_awaited()
+    assert result_user is inserted_data
 
 
 @patch("app.crud.user.verify_password")
@@ -164,7 +158,9 @@ async def test_update_user_with_newsletter_false(mock_db):
     call_args = mock_db.users.update_one.call_args
     assert call_args[0][0] == {"id": "user123"}
     # Verify that False is included in the update (not filtered out)
-    assert call_args[0][1] == {"$set": {"newsletter_subscribed": False}}
+    assert call_args[0][1] == {
+        "$set": {"newsletter_subscribed": False, "updated_at": ANY}
+    }
 
 
 @patch("app.crud.user.db")
@@ -184,7 +180,9 @@ async def test_update_user_with_newsletter_true(mock_db):
     mock_db.users.update_one.assert_awaited_once()
     call_args = mock_db.users.update_one.call_args
     assert call_args[0][0] == {"id": "user123"}
-    assert call_args[0][1] == {"$set": {"newsletter_subscribed": True}}
+    assert call_args[0][1] == {
+        "$set": {"newsletter_subscribed": True, "updated_at": ANY}
+    }
 
 
 @patch("app.crud.user.db")
@@ -204,7 +202,7 @@ async def test_update_user_filters_none_values(mock_db):
     mock_db.users.update_one.assert_awaited_once()
     call_args = mock_db.users.update_one.call_args
     # Only username should be in the update, bio should be filtered out
-    assert call_args[0][1] == {"$set": {"username": "newname"}}
+    assert call_args[0][1] == {"$set": {"username": "newname", "updated_at": ANY}}
 
 
 @patch("app.crud.user.db")
@@ -259,12 +257,7 @@ async def test_create_social_user(mock_db, mock_hash):
     # GIVEN social user data
     mock_db.users = MagicMock()
     mock_db.users.insert_one = AsyncMock()
-    created_user = {
-        "username": "googleuser",
-        "email": "google@example.com",
-        "hashed_password": "hashed_random",
-    }
-    mock_db.users.find_one = AsyncMock(return_value=created_user)
+    mock_db.users.find_one = AsyncMock()
     mock_hash.return_value = "hashed_random"
 
     user_data = {
@@ -283,7 +276,8 @@ async def test_create_social_user(mock_db, mock_hash):
     assert "id" in inserted
     assert "created_at" in inserted
     assert "hashed_password" in inserted
-    assert result == created_user
+    assert result is inserted
+    mock_db.users.find_one.assert_not_awaited()
 
 
 # ============================================================================
@@ -389,6 +383,38 @@ async def test_get_user_by_id_not_found(mock_db):
     assert result is None
 
 
+# ============================================================================
+# iter_magazine_follower_ids Tests
+# ============================================================================
+
+
+@patch("app.crud.user.db")
+async def test_iter_magazine_follower_ids(mock_db):
+    class Cursor:
+        def batch_size(self, size):
+            self.size = size
+            return self
+
+        async def __aiter__(self):
+            for user in [{"id": "u1"}, {"id": "u2"}]:
+                yield user
+
+    cursor = Cursor()
+    mock_db.users.find = MagicMock(return_value=cursor)
+
+    result = [
+        user_id
+        async for user_id in user_crud.iter_magazine_follower_ids("m1", batch_size=50)
+    ]
+
+    # Only ids are read, a batch at a time.
+    mock_db.users.find.assert_called_once_with(
+        {"followed_magazines": "m1"}, {"_id": 0, "id": 1}
+    )
+    assert cursor.size == 50
+    assert result == ["u1", "u2"]
+
+
 # ============================================================================
 # get_users_by_ids Tests
 # ============================================================================
@@ -423,6 +449,58 @@ async def test_get_users_by_ids_empty(mock_db):
     assert result == []
 
 
+# ============================================================================
+# get_user_profiles Tests
+# ============================================================================
+
+
+@patch("app.crud.user.db")
+async def test_get_user_profiles_one_projected_query(
+    mock_db, mock_cursor, clear_profile_cache
+):
+    # GIVEN two users, one of them listed twice, and a deleted one
+    profiles = [
+        {"id": "u1", "username": "ann", "profile_pic": None},
+        {"id": "u2", "username": "bob", "profile_pic": "bob.png"},
+    ]
+    mock_db.users.find = MagicMock(return_value=mock_cursor(profiles))
+
+    # WHEN their profiles are read
+    result = await user_crud.get_user_profiles(["u1", "u2", "u1", "gone"])
+
+    # THEN the distinct ids are read at once, only the public fields
+    query, projection = mock_db.users.find.call_args[0]
+    assert query == {"id": {"$in": ["u1", "u2", "gone"]}}
+    assert projection == {"_id": 0, "id": 1, "username": 1, "profile_pic": 1}
+    assert result == {"u1": profiles[0], "u2": profiles[1]}
+
+    # AND a second read is served from the cache, the deleted user included
+    assert await user_crud.get_user_profiles(["u2", "gone"]) == {"u2": profiles[1]}
+    mock_db.users.find.assert_called_once()
+
+
+@patch("app.crud.user.db")
+async def test_update_user_evicts_cached_profile(
+    mock_db, mock_cursor, clear_profile_cache
+):
+    # GIVEN a cached profile
+    mock_db.users.find = MagicMock(
+        return_value=mock_cursor([{"id": "u1", "username": "ann"}])
+    )
+    await user_crud.get_user_profiles(["u1"])
+    mock_db.users.update_one = AsyncMock(return_value=MagicMock(modified_count=1))
+
+    # WHEN the user is renamed
+    await user_crud.update_user("u1", {"username": "anna"})
+
+    # THEN the next read goes to the database
+    mock_db.users.find = MagicMock(
+        return_value=mock_cursor([{"id": "u1", "username": "anna"}])
+    )
+    result = await user_crud.get_user_profiles(["u1"])
+    assert result["u1"]["username"] == "anna"
+
+
 # ============================================================================
 # update_followed_topics / add / remove Tests
 # ============================================================================
@@ -1,15 +1,33 @@
+from datetime import datetime
 from unittest.mock import AsyncMock, patch
 
 import pytest
-from fastapi import status
+from fastapi import BackgroundTasks, status
 from httpx import ASGITransport, AsyncClient
 
+from app.core.config import settings
 from app.routes.articles import import_article
 from app.schemas.article import ArticleCreate
+from app.utils.view_buffer import ViewBuffer
 
 pytestmark = pytest.mark.anyio
 
 
+@pytest.fixture(autouse=True)
+def mock_affinity_store():
+    with patch("app.routes.articles.affinity_store") as store:
+        store.record = AsyncMock()
+        store.shares = AsyncMock(return_value={})
+        yield store
+
+
+@pytest.fixture(autouse=True)
+def mock_related_index():
+    with patch("app.routes.articles.related_index") as index:
+        index.index_article = AsyncMock(return_value=0)
+        yield index
+
+
 @pytest.fixture
 def app():
     from app.main import app
@@ -21,12 +39,9 @@ def app():
 @patch("app.routes.articles.enrich_article")
 async def test_import_article_updates_content(mock_enrich, mock_article_crud):
     # Setup
-    existing_article = {
-        "id": "123",
-        "source_url": "http://test.com",
-        "content": "Short snippet",
-    }
+    existing_article = {"id": "123", "source_url": "http://test.com"}
     mock_article_crud.get_article_by_url = AsyncMock(return_value=existing_article)
+    mock_article_crud.get_article_content = AsyncMock(return_value="Short snippet")
     mock_article_crud.update_article = AsyncMock()
 
     # Setup enrich to just return the article
@@ -47,7 +62,7 @@ async def test_import_article_updates_content(mock_enrich, mock_article_crud):
     current_user = {"id": "user1"}
 
     # Execute
-    await import_article(article_in, current_user)
+    await import_article(article_in, BackgroundTasks(), current_user)
 
     # Verify
     mock_article_crud.update_article.assert_called_once()
@@ -60,12 +75,10 @@ async def test_import_article_updates_content(mock_enrich, mock_article_crud):
 @patch("app.routes.articles.enrich_article")
 async def test_import_article_does_not_update_if_short(mock_enrich, mock_article_crud):
     # Setup
-    existing_article = {
-        "id": "123",
-        "source_url": "http://test.com",
-        "content": "A" * 500,  # Existing is long
-    }
+    existing_article = {"id": "123", "source_url": "http://test.com"}
     mock_article_crud.get_article_by_url = AsyncMock(return_value=existing_article)
+    # Existing is long
+    mock_article_crud.get_article_content = AsyncMock(return_value="A" * 500)
     mock_article_crud.update_article = AsyncMock()
     mock_enrich.side_effect = lambda a, u: a
 
@@ -84,7 +97,7 @@ async def test_import_article_does_not_update_if_short(mock_enrich, mock_article
     current_user = {"id": "user1"}
 
     # Execute
-    await import_article(article_in, current_user)
+    await import_article(article_in, BackgroundTasks(), current_user)
 
     # Verify
     mock_article_crud.update_article.assert_not_called()
@@ -121,12 +134,132 @@ async def test_get_articles(
     assert data["total"] == 0
 
 
+@patch("app.routes.articles.enrich_articles")
+@patch("app.routes.articles.article_crud")
+@patch("app.dependencies.get_user_by_id")
+@patch("app.dependencies.verify_token")
+async def test_get_articles_returns_next_cursor(
+    mock_verify,
+    mock_get_user,
+    mock_article_crud,
+    mock_enrich,
+    app,
+    test_user,
+    test_article,
+    test_article_2,
+):
+    from app.utils.pagination import decode_cursor
+
+    mock_verify.return_value = {"sub": test_user["id"]}
+    mock_get_user.return_value = test_user
+    mock_article_crud.get_articles = AsyncMock(return_value=[])
+    mock_article_crud.get_articles_count = AsyncMock(return_value=10)
+    mock_enrich.return_value = [test_article_2, test_article]
+
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://test"
+    ) as client:
+        response = await client.get(
+            "/articles/?limit=2", headers={"Authorization": "Bearer valid-token"}
+        )
+
+    assert response.status_code == status.HTTP_200_OK
+    token = response.json()["next_cursor"]
+    assert decode_cursor(token, "published_at") == (
+        test_article["published_at"],
+        test_article["id"],
+    )
+
+
+@patch("app.routes.articles.enrich_articles")
+@patch("app.routes.articles.article_crud")
+@patch("app.dependencies.get_user_by_id")
+@patch("app.dependencies.verify_token")
+async def test_get_articles_count_none(
+    mock_verify, mock_get_user, mock_article_crud, mock_enrich, app, test_user
+):
+    mock_verify.return_value = {"sub": test_user["id"]}
+    mock_get_user.return_value = test_user
+    mock_article_crud.get_articles = AsyncMock(return_value=[])
+    mock_article_crud.get_articles_count = AsyncMock(return_value=None)
+    mock_enrich.return_value = []
+
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://test"
+    ) as client:
+        response = await client.get(
+            "/articles/?count=none", headers={"Authorization": "Bearer valid-token"}
+        )
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["total"] is None
+    mock_article_crud.get_articles_count.assert_awaited_with(
+        topic=None, search=None, language=None, mode="none"
+    )
+
+
+@patch("app.dependencies.get_user_by_id")
+@patch("app.dependencies.verify_token")
+async def test_get_articles_invalid_count_mode(
+    mock_verify, mock_get_user, app, test_user
+):
+    mock_verify.return_value = {"sub": test_user["id"]}
+    mock_get_user.return_value = test_user
+
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://test"
+    ) as client:
+        response = await client.get(
+            "/articles/?count=maybe", headers={"Authorization": "Bearer valid-token"}
+        )
+
+    assert response.status_code == 422
+
+
 # ============================================================================
 # GET /articles/hero Tests
 # ============================================================================
 
 
 @patch("app.routes.articles.enrich_article")
+@patch("app.routes.articles.trending")
+@patch("app.routes.articles.article_crud")
+@patch("app.dependencies.get_user_by_id")
+@patch("app.dependencies.verify_token")
+async def test_get_hero_article_from_trending(
+    mock_verify,
+    mock_get_user,
+    mock_article_crud,
+    mock_trending,
+    mock_enrich,
+    app,
+    test_user,
+    test_article,
+):
+    # GIVEN a trending snapshot
+    mock_verify.return_value = {"sub": test_user["id"]}
+    mock_get_user.return_value = test_user
+    mock_trending.top = AsyncMock(return_value=[test_article])
+    mock_article_crud.get_hero_article = AsyncMock()
+    mock_enrich.side_effect = lambda article, user: article
+
+    # WHEN the hero is requested
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://test"
+    ) as client:
+        response = await client.get(
+            "/articles/hero", headers={"Authorization": "Bearer valid-token"}
+        )
+
+    # THEN the top trending article is served without querying articles
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["id"] == test_article["id"]
+    mock_trending.top.assert_awaited_once_with(limit=1)
+    mock_article_crud.get_hero_article.assert_not_awaited()
+
+
+@patch("app.routes.articles.enrich_article")
+@patch("app.routes.articles.trending")
 @patch("app.routes.articles.article_crud")
 @patch("app.dependencies.get_user_by_id")
 @patch("app.dependencies.verify_token")
@@ -134,6 +267,7 @@ async def test_get_hero_article(
     mock_verify,
     mock_get_user,
     mock_article_crud,
+    mock_trending,
     mock_enrich,
     app,
     test_user,
@@ -141,6 +275,7 @@ async def test_get_hero_article(
 ):
     mock_verify.return_value = {"sub": test_user["id"]}
     mock_get_user.return_value = test_user
+    mock_trending.top = AsyncMock(return_value=[])
     mock_article_crud.get_hero_article = AsyncMock(return_value=test_article)
     mock_enrich.return_value = test_article
 
@@ -155,14 +290,16 @@ async def test_get_hero_article(
     assert response.json()["id"] == test_article["id"]
 
 
+@patch("app.routes.articles.trending")
 @patch("app.routes.articles.article_crud")
 @patch("app.dependencies.get_user_by_id")
 @patch("app.dependencies.verify_token")
 async def test_get_hero_article_not_found(
-    mock_verify, mock_get_user, mock_article_crud, app, test_user
+    mock_verify, mock_get_user, mock_article_crud, mock_trending, app, test_user
 ):
     mock_verify.return_value = {"sub": test_user["id"]}
     mock_get_user.return_value = test_user
+    mock_trending.top = AsyncMock(return_value=[])
     mock_article_crud.get_hero_article = AsyncMock(return_value=None)
 
     async with AsyncClient(
@@ -175,12 +312,85 @@ async def test_get_hero_article_not_found(
     assert response.status_code == status.HTTP_404_NOT_FOUND
 
 
+# ============================================================================
+# GET /articles/trending Tests
+# ============================================================================
+
+
+@patch("app.routes.articles.enrich_articles")
+@patch("app.routes.articles.trending")
+@patch("app.dependencies.get_user_by_id")
+@patch("app.dependencies.verify_token")
+async def test_get_trending_articles_by_topic(
+    mock_verify,
+    mock_get_user,
+    mock_trending,
+    mock_enrich,
+    app,
+    test_user,
+    test_article,
+):
+    mock_verify.return_value = {"sub": test_user["id"]}
+    mock_get_user.return_value = test_user
+    mock_trending.top = AsyncMock(return_value=[test_article])
+    mock_enrich.return_value = [test_article]
+
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://test"
+    ) as client:
+        response = await client.get(
+            "/articles/trending?topic=tech&limit=5",
+            headers={"Authorization": "Bearer valid-token"},
+        )
+
+    # The static path is matched before /articles/{article_id}.
+    assert response.status_code == status.HTTP_200_OK
+    assert [a["id"] for a in response.json()] == [test_article["id"]]
+    mock_trending.top.assert_awaited_once_with(topic="tech", limit=5)
+
+
+@patch("app.routes.articles.enrich_articles")
+@patch("app.routes.articles.recommendation_crud")
+@patch("app.dependencies.get_user_by_id")
+@patch("app.dependencies.verify_token")
+async def test_get_recommended_articles(
+    mock_verify,
+    mock_get_user,
+    mock_recommendation_crud,
+    mock_enrich,
+    app,
+    test_user,
+    test_article,
+):
+    mock_verify.return_value = {"sub": test_user["id"]}
+    mock_get_user.return_value = test_user
+    mock_recommendation_crud.get_recommended_articles = AsyncMock(
+        return_value=[test_article]
+    )
+    mock_enrich.return_value = [test_article]
+
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://test"
+    ) as client:
+        response = await client.get(
+            "/articles/recommended?limit=5",
+            headers={"Authorization": "Bearer valid-token"},
+        )
+
+    assert response.status_code == status.HTTP_200_OK
+    assert [a["id"] for a in response.json()] == [test_article["id"]]
+    mock_recommendation_crud.get_recommended_articles.assert_awaited_once_with(
+        test_user["id"], limit=5
+    )
+
+
 # ============================================================================
 # GET /articles/feed Tests
 # ============================================================================
 
 
 @patch("app.routes.articles.enrich_articles")
+@patch("app.routes.articles.timeline_crud")
 @patch("app.routes.articles.article_crud")
 @patch("app.dependencies.get_user_by_id")
 @patch("app.dependencies.verify_token")
@@ -188,6 +398,7 @@ async def test_get_feed_with_topics(
     mock_verify,
     mock_get_user,
     mock_article_crud,
+    mock_timeline_crud,
     mock_enrich,
     app,
     test_user,
@@ -196,18 +407,29 @@ async def test_get_feed_with_topics(
     user = {**test_user, "followed_topics": ["topic-1"]}
     mock_verify.return_value = {"sub": user["id"]}
     mock_get_user.return_value = user
-    mock_article_crud.get_articles_by_topic_ids = AsyncMock(return_value=[test_article])
+    mock_timeline_crud.get_timeline_articles = AsyncMock(return_value=[test_article])
+    mock_article_crud.get_articles_count_by_topic_ids = AsyncMock(return_value=57)
     mock_enrich.return_value = [test_article]
 
     async with AsyncClient(
         transport=ASGITransport(app=app), base_url="http://test"
     ) as client:
         response = await client.get(
-            "/articles/feed", headers={"Authorization": "Bearer valid-token"}
+            "/articles/feed?sort=recent",
+            headers={"Authorization": "Bearer valid-token"},
         )
 
     assert response.status_code == status.HTTP_200_OK
     assert len(response.json()["articles"]) == 1
+    # THEN total counts every matching article, not just this page
+    assert response.json()["total"] == 57
+    mock_article_crud.get_articles_count_by_topic_ids.assert_awaited_with(
+        ["topic-1"], mode="approx"
+    )
+    # AND the page is read from the user's timeline
+    mock_timeline_crud.get_timeline_articles.assert_awaited_once_with(
+        user["id"], ["topic-1"], skip=0, limit=20, cursor=None
+    )
 
 
 @patch("app.routes.articles.enrich_articles")
@@ -240,6 +462,7 @@ async def test_get_feed_no_topics(
 # ============================================================================
 
 
+@patch("app.routes.articles.view_buffer")
 @patch("app.routes.articles.enrich_article")
 @patch("app.routes.articles.article_crud")
 @patch("app.dependencies.get_user_by_id")
@@ -249,14 +472,17 @@ async def test_get_article_by_id(
     mock_get_user,
     mock_article_crud,
     mock_enrich,
+    mock_view_buffer,
     app,
     test_user,
     test_article,
 ):
     mock_verify.return_value = {"sub": test_user["id"]}
     mock_get_user.return_value = test_user
-    mock_article_crud.get_article_by_id = AsyncMock(return_value=test_article)
-    mock_enrich.return_value = test_article
+    mock_article_crud.get_article_by_id = AsyncMock(return_value={**test_article})
+    mock_article_crud.get_article_content = AsyncMock(return_value="Full body")
+    mock_enrich.side_effect = lambda article, user: article
+    mock_view_buffer.pending.return_value = 1
 
     async with AsyncClient(
         transport=ASGITransport(app=app), base_url="http://test"
@@ -268,9 +494,69 @@ async def test_get_article_by_id(
 
     assert response.status_code == status.HTTP_200_OK
     assert response.json()["id"] == test_article["id"]
-    mock_article_crud.get_article_by_id.assert_awaited_with(
-        test_article["id"], increment_view=True
+    mock_article_crud.get_article_by_id.assert_awaited_with(test_article["id"])
+    # AND the body is loaded from the content collection
+    assert response.json()["content"] == "Full body"
+    # AND the view is buffered, and counted in the response
+    mock_view_buffer.record.assert_called_once_with(test_article["id"], test_user["id"])
+    assert response.json()["view_count"] == test_article["view_count"] + 1
+
+
+@patch("app.routes.articles.view_buffer", new_callable=ViewBuffer)
+@patch("app.routes.articles.enrich_article")
+@patch("app.routes.articles.article_crud")
+@patch("app.dependencies.get_user_by_id")
+@patch("app.dependencies.verify_token")
+async def test_get_article_not_modified(
+    mock_verify,
+    mock_get_user,
+    mock_article_crud,
+    mock_enrich,
+    view_buffer,
+    app,
+    test_user,
+    test_article,
+):
+    # GIVEN a client holding the current copy of an article
+    mock_verify.return_value = {"sub": test_user["id"]}
+    mock_get_user.return_value = test_user
+    mock_article_crud.get_article_by_id = AsyncMock(
+        side_effect=lambda article_id: {**test_article}
     )
+    mock_article_crud.get_article_content = AsyncMock(return_value="Full body")
+    mock_enrich.side_effect = lambda article, user: {**article, "liked": False}
+    url = f"/articles/{test_article['id']}"
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://test"
+    ) as client:
+        first = await client.get(url, headers={"Authorization": "Bearer valid-token"})
+        assert first.headers["cache-control"] == "private, no-cache"
+
+        # WHEN it revalidates
+        response = await client.get(
+            url,
+            headers={
+                "Authorization": "Bearer valid-token",
+                "If-None-Match": first.headers["etag"],
+            },
+        )
+        # THEN 304 is returned without reading the body, though both
+        # requests were counted as views
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+        mock_article_crud.get_article_content.assert_awaited_once()
+        assert view_buffer.pending(test_article["id"]) == 2
+
+        # AND the caller liking the article changes the tag
+        mock_enrich.side_effect = lambda article, user: {**article, "liked": True}
+        response = await client.get(
+            url,
+            headers={
+                "Authorization": "Bearer valid-token",
+                "If-None-Match": first.headers["etag"],
+            },
+        )
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["liked"] is True
 
 
 @patch("app.routes.articles.article_crud")
@@ -294,17 +580,218 @@ async def test_get_article_not_found(
     assert response.status_code == status.HTTP_404_NOT_FOUND
 
 
+@patch("app.routes.articles.enrich_articles")
+@patch("app.routes.articles.timeline_crud")
+@patch("app.routes.articles.article_crud")
+@patch("app.dependencies.get_user_by_id")
+@patch("app.dependencies.verify_token")
+async def test_get_feed_ranked_by_default(
+    mock_verify,
+    mock_get_user,
+    mock_article_crud,
+    mock_timeline_crud,
+    mock_enrich,
+    mock_affinity_store,
+    app,
+    test_user,
+    test_article,
+):
+    # GIVEN newer candidates and an older one from the user's favourite topic
+    user = {**test_user, "followed_topics": ["topic-1", "topic-2"]}
+    mock_verify.return_value = {"sub": user["id"]}
+    mock_get_user.return_value = user
+    newer = [
+        {**test_article, "id": f"new-{i}", "topics": ["topic-1"], "publisher": f"P{i}"}
+        for i in range(3)
+    ]
+    favourite = {
+        **test_article,
+        "id": "favourite",
+        "topics": ["topic-2"],
+        "published_at": datetime(2024, 1, 14),
+    }
+    mock_timeline_crud.get_timeline_articles = AsyncMock(
+        return_value=newer + [favourite]
+    )
+    mock_affinity_store.shares = AsyncMock(return_value={"topic-2": 1.0})
+    mock_article_crud.get_articles_count_by_topic_ids = AsyncMock(return_value=4)
+    mock_enrich.side_effect = lambda articles, user: articles
+
+    # WHEN the feed is requested without a sort
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://test"
+    ) as client:
+        response = await client.get(
+            "/articles/feed?limit=2", headers={"Authorization": "Bearer valid-token"}
+        )
+
+    # THEN the candidates are re-ranked and paged by skip only
+    assert response.status_code == status.HTTP_200_OK
+    body = response.json()
+    assert body["articles"][0]["id"] == "favourite"
+    assert len(body["articles"]) == 2
+    assert body["next_cursor"] is None
+    mock_timeline_crud.get_timeline_articles.assert_awaited_once_with(
+        user["id"], user["followed_topics"], limit=settings.RANK_CANDIDATES
+    )
+
+
+@pytest.mark.parametrize(
+    "skip,limit,tail_skip,tail_limit,ranked_ids",
+    [
+        # A page past the window goes on newest first.
+        (4, 2, 4, 2, []),
+        # A page across its end is topped up from there.
+        (2, 3, 3, 2, ["a-2"]),
+    ],
+)
+@patch("app.routes.articles.enrich_articles")
+@patch("app.routes.articles.timeline_crud")
+@patch("app.routes.articles.article_crud")
+@patch("app.dependencies.get_user_by_id")
+@patch("app.dependencies.verify_token")
+async def test_get_feed_ranked_past_candidate_window(
+    mock_verify,
+    mock_get_user,
+    mock_article_crud,
+    mock_timeline_crud,
+    mock_enrich,
+    mock_affinity_store,
+    monkeypatch,
+    app,
+    test_user,
+    test_article,
+    skip,
+    limit,
+    tail_skip,
+    tail_limit,
+    ranked_ids,
+):
+    # GIVEN a full candidate window of 3 and older articles after it
+    monkeypatch.setattr(settings, "RANK_CANDIDATES", 3)
+    user = {**test_user, "followed_topics": ["topic-1"]}
+    mock_verify.return_value = {"sub": user["id"]}
+    mock_get_user.return_value = user
+    candidates = [
+        {
+            **test_article,
+            "id": f"a-{i}",
+            "publisher": f"P{i}",
+            "published_at": datetime(2024, 1, 20 - i),
+        }
+        for i in range(3)
+    ]
+    older = [
+        {**test_article, "id": f"old-{i}", "published_at": datetime(2024, 1, 10 - i)}
+        for i in range(tail_limit)
+    ]
+    mock_timeline_crud.get_timeline_articles = AsyncMock(
+        side_effect=[candidates, older]
+    )
+    mock_affinity_store.shares = AsyncMock(return_value={})
+    mock_article_crud.get_articles_count_by_topic_ids = AsyncMock(return_value=10)
+    mock_enrich.side_effect = lambda articles, user: articles
+
+    # WHEN a page reaching past the window is requested
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://test"
+    ) as client:
+        response = await client.get(
+            f"/articles/feed?skip={skip}&limit={limit}",
+            headers={"Authorization": "Bearer valid-token"},
+        )
+
+    # THEN the page is filled from the timeline right after the window
+    assert response.status_code == status.HTTP_200_OK
+    body = response.json()
+    assert [a["id"] for a in body["articles"]] == ranked_ids + [a["id"] for a in older]
+    mock_timeline_crud.get_timeline_articles.assert_awaited_with(
+        user["id"], user["followed_topics"], skip=tail_skip, limit=tail_limit
+    )
+    # AND the next page can go on from its cursor
+    assert body["next_cursor"] is not None
+
+
+# ============================================================================
+# GET /articles/{article_id}/related Tests
+# ============================================================================
+
+
+@patch("app.routes.articles.enrich_articles")
+@patch("app.routes.articles.related_crud")
+@patch("app.dependencies.get_user_by_id")
+@patch("app.dependencies.verify_token")
+async def test_get_related_articles(
+    mock_verify,
+    mock_get_user,
+    mock_related_crud,
+    mock_enrich,
+    app,
+    test_user,
+    test_article,
+    test_article_2,
+):
+    mock_verify.return_value = {"sub": test_user["id"]}
+    mock_get_user.return_value = test_user
+    mock_related_crud.get_related_articles = AsyncMock(return_value=[test_article_2])
+    mock_enrich.return_value = [test_article_2]
+
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://test"
+    ) as client:
+        response = await client.get(
+            f"/articles/{test_article['id']}/related?limit=5",
+            headers={"Authorization": "Bearer valid-token"},
+        )
+
+    assert response.status_code == status.HTTP_200_OK
+    assert [a["id"] for a in response.json()] == [test_article_2["id"]]
+    mock_related_crud.get_related_articles.assert_awaited_once_with(
+        test_article["id"], limit=5
+    )
+
+
+@patch("app.routes.articles.related_crud")
+@patch("app.dependencies.get_user_by_id")
+@patch("app.dependencies.verify_token")
+async def test_get_related_articles_not_found(
+    mock_verify, mock_get_user, mock_related_crud, app, test_user
+):
+    mock_verify.return_value = {"sub": test_user["id"]}
+    mock_get_user.return_value = test_user
+    mock_related_crud.get_related_articles = AsyncMock(return_value=None)
+
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://test"
+    ) as client:
+        response = await client.get(
+            "/articles/missing/related",
+            headers={"Authorization": "Bearer valid-token"},
+        )
+
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
 # ============================================================================
 # POST /articles/ Tests
 # ============================================================================
 
 
+@patch("app.routes.articles.timeline_crud")
 @patch("app.routes.articles.article_crud")
 @patch("app.dependencies.get_user_by_id")
 @patch("app.dependencies.verify_token")
 async def test_create_article(
-    mock_verify, mock_get_user, mock_article_crud, app, test_user, test_article
+    mock_verify,
+    mock_get_user,
+    mock_article_crud,
+    mock_timeline_crud,
+    app,
+    test_user,
+    test_article,
+    mock_related_index,
 ):
+    mock_timeline_crud.fan_out_article = AsyncMock(return_value=0)
     mock_verify.return_value = {"sub": test_user["id"]}
     mock_get_user.return_value = test_user
     mock_article_crud.create_article = AsyncMock(return_value=test_article)
@@ -327,6 +814,56 @@ async def test_create_article(
         )
 
     assert response.status_code == status.HTTP_201_CREATED
+    # AND the new article is pushed to followers' timelines
+    mock_timeline_crud.fan_out_article.assert_awaited_once_with(test_article)
+    # AND added to the related-articles index once the response is sent
+    mock_related_index.index_article.assert_awaited_once_with(test_article)
+
+
+@patch("app.routes.articles.timeline_crud")
+@patch("app.routes.articles.article_crud")
+@patch("app.dependencies.get_user_by_id")
+@patch("app.dependencies.verify_token")
+async def test_create_article_when_spreading_fails(
+    mock_verify,
+    mock_get_user,
+    mock_article_crud,
+    mock_timeline_crud,
+    app,
+    test_user,
+    test_article,
+    mock_related_index,
+):
+    # GIVEN neither timelines nor the related-articles index can be updated
+    mock_timeline_crud.fan_out_article = AsyncMock(side_effect=Exception("down"))
+    mock_related_index.index_article.side_effect = Exception("index down")
+    mock_verify.return_value = {"sub": test_user["id"]}
+    mock_get_user.return_value = test_user
+    mock_article_crud.create_article = AsyncMock(return_value=test_article)
+
+    # WHEN an article is created
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://test"
+    ) as client:
+        response = await client.post(
+            "/articles/",
+            json={
+                "title": "Test",
+                "excerpt": "Exc",
+                "content": "Content",
+                "author": "Author",
+                "publisher": "Publisher",
+                "source_url": "http://test.com",
+                "published_at": "2024-01-01T00:00:00",
+            },
+            headers={"Authorization": "Bearer valid-token"},
+        )
+
+    # THEN the stored article is still returned
+    assert response.status_code == status.HTTP_201_CREATED
+    assert response.json()["id"] == test_article["id"]
+    # AND a failed fan-out does not keep it out of the related index
+    mock_related_index.index_article.assert_awaited_once_with(test_article)
 
 
 # ============================================================================
@@ -334,15 +871,25 @@ async def test_create_article(
 # ============================================================================
 
 
+@patch("app.routes.articles.timeline_crud")
 @patch("app.routes.articles.article_crud")
 @patch("app.dependencies.get_user_by_id")
 @patch("app.dependencies.verify_token")
 async def test_import_article_new(
-    mock_verify, mock_get_user, mock_article_crud, app, test_user, test_article
+    mock_verify,
+    mock_get_user,
+    mock_article_crud,
+    mock_timeline_crud,
+    app,
+    test_user,
+    test_article,
 ):
+    mock_timeline_crud.fan_out_article = AsyncMock(return_value=0)
     mock_verify.return_value = {"sub": test_user["id"]}
     mock_get_user.return_value = test_user
     mock_article_crud.get_article_by_url = AsyncMock(return_value=None)
+    mock_article_crud.article_fingerprint.return_value = 0xABC
+    mock_article_crud.find_near_duplicate = AsyncMock(return_value=None)
     mock_article_crud.create_article = AsyncMock(return_value=test_article)
 
     async with AsyncClient(
@@ -363,7 +910,47 @@ async def test_import_article_new(
         )
 
     assert response.status_code == status.HTTP_200_OK
-    mock_article_crud.create_article.assert_awaited_once()
+    mock_article_crud.find_near_duplicate.assert_awaited_once_with(0xABC)
+    # The fingerprint is computed once and stored with the article.
+    assert mock_article_crud.create_article.call_args[1] == {"fingerprint": 0xABC}
+    mock_timeline_crud.fan_out_article.assert_awaited_once_with(test_article)
+
+
+@patch("app.routes.articles.article_crud")
+@patch("app.dependencies.get_user_by_id")
+@patch("app.dependencies.verify_token")
+async def test_import_article_near_duplicate_rejected(
+    mock_verify, mock_get_user, mock_article_crud, app, test_user, test_article
+):
+    # GIVEN the same story already imported from another site
+    mock_verify.return_value = {"sub": test_user["id"]}
+    mock_get_user.return_value = test_user
+    mock_article_crud.get_article_by_url = AsyncMock(return_value=None)
+    mock_article_crud.find_near_duplicate = AsyncMock(return_value=test_article)
+    mock_article_crud.create_article = AsyncMock()
+
+    # WHEN it is imported again under a new URL
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://test"
+    ) as client:
+        response = await client.post(
+            "/articles/import",
+            json={
+                "title": "New",
+                "excerpt": "Exc",
+                "content": "Content",
+                "author": "Author",
+                "publisher": "Wire",
+                "source_url": "http://syndicated.com",
+                "published_at": "2024-01-01T00:00:00",
+            },
+            headers={"Authorization": "Bearer valid-token"},
+        )
+
+    # THEN it is rejected before anything is inserted
+    assert response.status_code == status.HTTP_409_CONFLICT
+    assert test_article["id"] in response.json()["detail"]
+    mock_article_crud.create_article.assert_not_awaited()
 
 
 # ============================================================================
@@ -379,7 +966,6 @@ async def test_update_article(
 ):
     mock_verify.return_value = {"sub": test_user["id"]}
     mock_get_user.return_value = test_user
-    mock_article_crud.get_article_by_id = AsyncMock(return_value=test_article)
     updated = {**test_article, "title": "Updated"}
     mock_article_crud.update_article = AsyncMock(return_value=updated)
 
@@ -403,7 +989,7 @@ async def test_update_article_not_found(
 ):
     mock_verify.return_value = {"sub": test_user["id"]}
     mock_get_user.return_value = test_user
-    mock_article_crud.get_article_by_id = AsyncMock(return_value=None)
+    mock_article_crud.update_article = AsyncMock(return_value=None)
 
     async with AsyncClient(
         transport=ASGITransport(app=app), base_url="http://test"
@@ -430,7 +1016,6 @@ async def test_delete_article(
 ):
     mock_verify.return_value = {"sub": test_user["id"]}
     mock_get_user.return_value = test_user
-    mock_article_crud.get_article_by_id = AsyncMock(return_value=test_article)
     mock_article_crud.delete_article = AsyncMock(return_value=True)
 
     async with AsyncClient(
@@ -442,6 +1027,7 @@ async def test_delete_article(
         )
 
     assert response.status_code == status.HTTP_204_NO_CONTENT
+    mock_article_crud.get_article_by_id.assert_not_called()
 
 
 @patch("app.routes.articles.article_crud")
@@ -452,7 +1038,7 @@ async def test_delete_article_not_found(
 ):
     mock_verify.return_value = {"sub": test_user["id"]}
     mock_get_user.return_value = test_user
-    mock_article_crud.get_article_by_id = AsyncMock(return_value=None)
+    mock_article_crud.delete_article = AsyncMock(return_value=False)
 
     async with AsyncClient(
         transport=ASGITransport(app=app), base_url="http://test"
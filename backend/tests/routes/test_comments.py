@@ -1,4 +1,4 @@
-from unittest.mock import AsyncMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 from fastapi import status
@@ -7,6 +7,14 @@ from httpx import ASGITransport, AsyncClient
 pytestmark = pytest.mark.anyio
 
 
+@pytest.fixture(autouse=True)
+def mock_affinity_store():
+    with patch("app.routes.comments.affinity_store") as store:
+        store.record = AsyncMock()
+        store.shares = AsyncMock(return_value={})
+        yield store
+
+
 @pytest.fixture
 def app():
     from app.main import app
@@ -86,7 +94,7 @@ async def test_get_article_comments_with_pagination(
     # THEN pagination params are passed
     assert response.status_code == status.HTTP_200_OK
     mock_comment_crud.get_comments_by_article.assert_awaited_with(
-        test_article["id"], skip=10, limit=5
+        test_article["id"], skip=10, limit=5, cursor=None
     )
 
 
@@ -402,3 +410,306 @@ async def test_get_user_comments(
     # THEN user's comments are returned
     assert response.status_code == status.HTTP_200_OK
     assert len(response.json()) == 1
+
+
+# ============================================================================
+# Thread Tests
+# ============================================================================
+
+
+@patch("app.routes.comments.article_crud")
+@patch("app.routes.comments.comment_crud")
+async def test_get_article_comment_threads(
+    mock_comment_crud,
+    mock_article_crud,
+    app,
+    test_article,
+    test_comment_with_user,
+):
+    # GIVEN a full page of one thread with a reply
+    reply = {
+        **test_comment_with_user,
+        "id": "reply-id",
+        "parent_id": test_comment_with_user["id"],
+        "depth": 1,
+    }
+    thread = {
+        **test_comment_with_user,
+        "path": "a",
+        "reply_count": 1,
+        "replies": [reply],
+    }
+    mock_article_crud.get_article_by_id = AsyncMock(return_value=test_article)
+    mock_comment_crud.get_threads = AsyncMock(return_value=[thread])
+
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://test"
+    ) as client:
+        # WHEN threads are requested
+        response = await client.get(
+            f"/articles/{test_article['id']}/comments/threads?limit=1&replies=5"
+        )
+
+    # THEN the thread comes with its replies and a cursor to the next page
+    assert response.status_code == status.HTTP_200_OK
+    body = response.json()
+    assert body[0]["replies"][0]["parent_id"] == test_comment_with_user["id"]
+    assert body[0]["replies"][0]["depth"] == 1
+    assert "path" not in body[0]
+    assert "X-Next-Cursor" in response.headers
+    mock_comment_crud.get_threads.assert_awaited_once_with(
+        {"article_id": test_article["id"]}, limit=1, replies=5, cursor=None
+    )
+
+
+@patch("app.routes.comments.comment_crud")
+async def test_get_comment_replies(mock_comment_crud, app, test_comment_with_user):
+    # GIVEN a threaded comment with replies
+    comment = {**test_comment_with_user, "path": "a"}
+    reply = {**test_comment_with_user, "id": "reply-id", "path": "a/b", "depth": 1}
+    mock_comment_crud.get_comment_by_id = AsyncMock(return_value=comment)
+    mock_comment_crud.get_replies = AsyncMock(return_value=[reply])
+
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://test"
+    ) as client:
+        # WHEN its replies are paged one at a time
+        response = await client.get(f"/comments/{comment['id']}/replies?limit=1")
+
+    # THEN a page is returned with a cursor to the rest of the subtree
+    assert response.status_code == status.HTTP_200_OK
+    assert [reply["id"] for reply in response.json()] == ["reply-id"]
+    assert "X-Next-Cursor" in response.headers
+    mock_comment_crud.get_replies.assert_awaited_once_with(
+        comment, limit=1, cursor=None
+    )
+
+
+@patch("app.routes.comments.comment_crud")
+async def test_get_comment_replies_unthreaded(mock_comment_crud, app, test_comment):
+    # GIVEN a comment written before comments were threaded
+    mock_comment_crud.get_comment_by_id = AsyncMock(return_value=test_comment)
+    mock_comment_crud.get_replies = AsyncMock()
+
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://test"
+    ) as client:
+        # WHEN its replies are requested
+        response = await client.get(f"/comments/{test_comment['id']}/replies")
+
+    # THEN it has none, without a query
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == []
+    mock_comment_crud.get_replies.assert_not_called()
+
+
+@patch("app.routes.comments.article_crud")
+@patch("app.routes.comments.comment_crud")
+@patch("app.dependencies.get_user_by_id")
+@patch("app.dependencies.verify_token")
+async def test_create_reply(
+    mock_verify,
+    mock_get_user,
+    mock_comment_crud,
+    mock_article_crud,
+    app,
+    test_user,
+    test_article,
+    test_comment,
+    test_comment_with_user,
+):
+    # GIVEN a comment to reply to on the same article
+    mock_verify.return_value = {"sub": test_user["id"]}
+    mock_get_user.return_value = test_user
+    mock_article_crud.get_article_by_id = AsyncMock(return_value=test_article)
+    mock_article_crud.increment_comment_count = AsyncMock()
+    mock_comment_crud.get_reply_parent = AsyncMock(return_value=test_comment)
+    mock_comment_crud.create_comment = AsyncMock(return_value=test_comment_with_user)
+
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://test"
+    ) as client:
+        # WHEN a reply is posted
+        response = await client.post(
+            f"/articles/{test_article['id']}/comments",
+            json={"content": "Reply", "parent_id": test_comment["id"]},
+            headers={"Authorization": "Bearer valid-token"},
+        )
+
+    # THEN it is created under the parent and counted as a comment
+    assert response.status_code == status.HTTP_201_CREATED
+    mock_comment_crud.get_reply_parent.assert_awaited_once_with(
+        test_comment["id"], {"article_id": test_article["id"]}
+    )
+    assert mock_comment_crud.create_comment.call_args.kwargs["parent"] == test_comment
+    mock_article_crud.increment_comment_count.assert_awaited_with(test_article["id"], 1)
+
+
+@pytest.mark.parametrize(
+    "parent, expected",
+    [
+        (None, status.HTTP_404_NOT_FOUND),
+        ({"id": "deep", "depth": 10}, status.HTTP_400_BAD_REQUEST),
+    ],
+)
+@patch("app.routes.comments.article_crud")
+@patch("app.routes.comments.comment_crud")
+@patch("app.dependencies.get_user_by_id")
+@patch("app.dependencies.verify_token")
+async def test_create_reply_rejected(
+    mock_verify,
+    mock_get_user,
+    mock_comment_crud,
+    mock_article_crud,
+    parent,
+    expected,
+    app,
+    test_user,
+    test_article,
+):
+    # GIVEN a parent that is missing or already nested too deeply
+    mock_verify.return_value = {"sub": test_user["id"]}
+    mock_get_user.return_value = test_user
+    mock_article_crud.get_article_by_id = AsyncMock(return_value=test_article)
+    mock_comment_crud.get_reply_parent = AsyncMock(return_value=parent)
+    mock_comment_crud.create_comment = AsyncMock()
+
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://test"
+    ) as client:
+        # WHEN a reply is posted
+        response = await client.post(
+            f"/articles/{test_article['id']}/comments",
+            json={"content": "Reply", "parent_id": "parent-id"},
+            headers={"Authorization": "Bearer valid-token"},
+        )
+
+    # THEN it is refused
+    assert response.status_code == expected
+    mock_comment_crud.create_comment.assert_not_called()
+
+
+@patch("app.routes.comments.article_crud")
+@patch("app.routes.comments.comment_crud")
+@patch("app.dependencies.get_user_by_id")
+@patch("app.dependencies.verify_token")
+@pytest.mark.parametrize("replied", [True, False])
+async def test_delete_reply(
+    mock_verify,
+    mock_get_user,
+    mock_comment_crud,
+    mock_article_crud,
+    replied,
+    app,
+    test_user,
+    test_comment,
+):
+    # GIVEN a reply of the user's, with or without replies below it
+    reply = {
+        **test_comment,
+        "parent_id": "root-id",
+        "thread_id": "root-id",
+        "path": "a/b",
+        "depth": 1,
+    }
+    mock_verify.return_value = {"sub": test_user["id"]}
+    mock_get_user.return_value = test_user
+    mock_comment_crud.get_comment_by_id = AsyncMock(return_value=reply)
+    mock_comment_crud.has_replies = AsyncMock(return_value=replied)
+    mock_comment_crud.delete_comment = AsyncMock()
+    mock_comment_crud.tombstone_comment = AsyncMock()
+    mock_comment_crud.increment_reply_count = AsyncMock()
+    mock_article_crud.increment_comment_count = AsyncMock()
+
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://test"
+    ) as client:
+        # WHEN it is deleted
+        response = await client.delete(
+            f"/comments/{reply['id']}",
+            headers={"Authorization": "Bearer valid-token"},
+        )
+
+    # THEN replies below it, possibly other users', are kept under a blanked
+    # out comment, and only the deleted one leaves both counts
+    assert response.status_code == status.HTTP_204_NO_CONTENT
+    assert mock_comment_crud.tombstone_comment.await_count == int(replied)
+    assert mock_comment_crud.delete_comment.await_count == int(not replied)
+    mock_comment_crud.increment_reply_count.assert_awaited_once_with("root-id", -1)
+    mock_article_crud.increment_comment_count.assert_awaited_with(
+        reply["article_id"], -1
+    )
+
+
+@patch("app.routes.comments.comment_crud")
+@patch("app.dependencies.get_user_by_id")
+@patch("app.dependencies.verify_token")
+async def test_delete_comment_already_deleted(
+    mock_verify, mock_get_user, mock_comment_crud, app, test_user, test_comment
+):
+    # GIVEN a comment blanked out when it was deleted
+    mock_verify.return_value = {"sub": test_user["id"]}
+    mock_get_user.return_value = test_user
+    mock_comment_crud.get_comment_by_id = AsyncMock(
+        return_value={**test_comment, "content": "", "deleted": True}
+    )
+    mock_comment_crud.tombstone_comment = AsyncMock()
+
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://test"
+    ) as client:
+        # WHEN it is deleted again
+        response = await client.delete(
+            f"/comments/{test_comment['id']}",
+            headers={"Authorization": "Bearer valid-token"},
+        )
+
+    # THEN it is gone as far as the API is concerned
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+    mock_comment_crud.tombstone_comment.assert_not_called()
+
+
+# ============================================================================
+# GET /articles/{article_id}/comments/stream Tests
+# ============================================================================
+
+
+@patch("app.routes.comments.event_hub")
+@patch("app.routes.comments.article_crud")
+async def test_stream_article_comments(
+    mock_article_crud, mock_event_hub, app, test_article
+):
+    # GIVEN a stream with one event before it ends
+    async def stream(channels):
+        yield 'event: comment\ndata: {"id":"c1"}\n\n'
+
+    mock_article_crud.get_article_by_id = AsyncMock(return_value=test_article)
+    mock_event_hub.stream = MagicMock(side_effect=stream)
+
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://test"
+    ) as client:
+        # WHEN the article's comments are streamed
+        response = await client.get(f"/articles/{test_article['id']}/comments/stream")
+
+    # THEN the article's channel is sent as Server-Sent Events
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-type"].startswith("text/event-stream")
+    assert response.headers["cache-control"] == "no-cache"
+    assert response.text == 'event: comment\ndata: {"id":"c1"}\n\n'
+    mock_event_hub.stream.assert_called_once_with([f"article:{test_article['id']}"])
+
+
+@patch("app.routes.comments.article_crud")
+async def test_stream_article_comments_not_found(mock_article_crud, app):
+    # GIVEN the article doesn't exist
+    mock_article_crud.get_article_by_id = AsyncMock(return_value=None)
+
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://test"
+    ) as client:
+        # WHEN its comments are streamed
+        response = await client.get("/articles/nonexistent-id/comments/stream")
+
+    # THEN 404 is returned
+    assert response.status_code == status.HTTP_404_NOT_FOUND
@@ -4,9 +4,20 @@ import pytest
 from fastapi import status
 from httpx import ASGITransport, AsyncClient
 
+from app.schemas.interaction import MAX_BATCH_ACTIONS
+from app.utils.events import event_hub
+
 pytestmark = pytest.mark.anyio
 
 
+@pytest.fixture(autouse=True)
+def mock_affinity_store():
+    with patch("app.routes.interactions.affinity_store") as store:
+        store.record = AsyncMock()
+        store.shares = AsyncMock(return_value={})
+        yield store
+
+
 @pytest.fixture
 def app():
     from app.main import app
@@ -28,13 +39,14 @@ async def test_toggle_like_article(
     mock_get_user,
     mock_interaction_crud,
     mock_article_crud,
+    mock_affinity_store,
     app,
     test_user,
     test_article,
 ):
     mock_verify.return_value = {"sub": test_user["id"]}
     mock_get_user.return_value = test_user
-    mock_article_crud.get_article_by_id = AsyncMock(return_value=test_article)
+    mock_article_crud.get_article_topics = AsyncMock(return_value=["technology"])
     mock_interaction_crud.toggle_like = AsyncMock(
         return_value=({"is_liked": True, "is_saved": False}, 1)
     )
@@ -53,7 +65,58 @@ async def test_toggle_like_article(
     assert data["article_id"] == test_article["id"]
     assert data["is_liked"] is True
     assert data["is_saved"] is False
-    mock_article_crud.increment_like_count.assert_awaited_once()
+    mock_article_crud.increment_like_count.assert_awaited_once_with(
+        test_article["id"], 1
+    )
+    mock_affinity_store.record.assert_awaited_once_with(
+        test_user["id"], ["technology"], "like", 1
+    )
+
+
+@patch("app.routes.interactions.article_crud")
+@patch("app.routes.interactions.interaction_crud")
+@patch("app.dependencies.get_user_by_id")
+@patch("app.dependencies.verify_token")
+async def test_like_article_publishes_events(
+    mock_verify,
+    mock_get_user,
+    mock_interaction_crud,
+    mock_article_crud,
+    app,
+    test_user,
+    test_article,
+):
+    mock_verify.return_value = {"sub": test_user["id"]}
+    mock_get_user.return_value = test_user
+    mock_article_crud.get_article_topics = AsyncMock(return_value=["technology"])
+    mock_interaction_crud.set_like = AsyncMock(
+        return_value=({"is_liked": True, "is_saved": False}, 1)
+    )
+    mock_article_crud.increment_like_count = AsyncMock()
+
+    with (
+        event_hub.subscribe([f"article:{test_article['id']}"]) as article_events,
+        event_hub.subscribe([f"user:{test_user['id']}"]) as user_events,
+    ):
+        async with AsyncClient(
+            transport=ASGITransport(app=app), base_url="http://test"
+        ) as client:
+            await client.put(
+                f"/articles/{test_article['id']}/like",
+                headers={"Authorization": "Bearer valid-token"},
+            )
+
+        likes = article_events.receive_nowait()
+        status_event = user_events.receive_nowait()
+
+    assert likes["type"] == "likes"
+    assert likes["data"] == {"article_id": test_article["id"], "change": 1}
+    assert status_event["type"] == "interaction"
+    assert status_event["data"] == {
+        "article_id": test_article["id"],
+        "is_liked": True,
+        "is_saved": False,
+    }
 
 
 @patch("app.routes.interactions.article_crud")
@@ -64,7 +127,7 @@ async def test_toggle_like_article_not_found(
 ):
     mock_verify.return_value = {"sub": test_user["id"]}
     mock_get_user.return_value = test_user
-    mock_article_crud.get_article_by_id = AsyncMock(return_value=None)
+    mock_article_crud.get_article_topics = AsyncMock(return_value=None)
 
     async with AsyncClient(
         transport=ASGITransport(app=app), base_url="http://test"
@@ -86,6 +149,146 @@ async def test_toggle_like_unauthorized(app):
     assert response.status_code == status.HTTP_401_UNAUTHORIZED
 
 
+# ============================================================================
+# PUT/DELETE /articles/{article_id}/like Tests
+# ============================================================================
+
+
+@patch("app.routes.interactions.article_crud")
+@patch("app.routes.interactions.interaction_crud")
+@patch("app.dependencies.get_user_by_id")
+@patch("app.dependencies.verify_token")
+async def test_put_like_article(
+    mock_verify,
+    mock_get_user,
+    mock_interaction_crud,
+    mock_article_crud,
+    app,
+    test_user,
+    test_article,
+):
+    mock_verify.return_value = {"sub": test_user["id"]}
+    mock_get_user.return_value = test_user
+    mock_article_crud.get_article_topics = AsyncMock(return_value=["technology"])
+    mock_interaction_crud.set_like = AsyncMock(
+        return_value=({"is_liked": True, "is_saved": False}, 1)
+    )
+    mock_article_crud.increment_like_count = AsyncMock()
+
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://test"
+    ) as client:
+        response = await client.put(
+            f"/articles/{test_article['id']}/like",
+            headers={"Authorization": "Bearer valid-token"},
+        )
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["is_liked"] is True
+    mock_interaction_crud.set_like.assert_awaited_once_with(
+        test_user["id"], test_article["id"], True
+    )
+    mock_article_crud.increment_like_count.assert_awaited_once_with(
+        test_article["id"], 1
+    )
+
+
+@patch("app.routes.interactions.article_crud")
+@patch("app.routes.interactions.interaction_crud")
+@patch("app.dependencies.get_user_by_id")
+@patch("app.dependencies.verify_token")
+async def test_put_like_article_retry_leaves_count(
+    mock_verify,
+    mock_get_user,
+    mock_interaction_crud,
+    mock_article_crud,
+    app,
+    test_user,
+    test_article,
+):
+    # GIVEN the article is already liked (a retried request)
+    mock_verify.return_value = {"sub": test_user["id"]}
+    mock_get_user.return_value = test_user
+    mock_article_crud.get_article_topics = AsyncMock(return_value=["technology"])
+    mock_interaction_crud.set_like = AsyncMock(
+        return_value=({"is_liked": True, "is_saved": False}, 0)
+    )
+    mock_article_crud.increment_like_count = AsyncMock()
+
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://test"
+    ) as client:
+        response = await client.put(
+            f"/articles/{test_article['id']}/like",
+            headers={"Authorization": "Bearer valid-token"},
+        )
+
+    # THEN the state is reported and the counter is untouched
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["is_liked"] is True
+    mock_article_crud.increment_like_count.assert_not_awaited()
+
+
+@patch("app.routes.interactions.article_crud")
+@patch("app.routes.interactions.interaction_crud")
+@patch("app.dependencies.get_user_by_id")
+@patch("app.dependencies.verify_token")
+async def test_delete_like_article(
+    mock_verify,
+    mock_get_user,
+    mock_interaction_crud,
+    mock_article_crud,
+    app,
+    test_user,
+    test_article,
+):
+    mock_verify.return_value = {"sub": test_user["id"]}
+    mock_get_user.return_value = test_user
+    mock_article_crud.get_article_topics = AsyncMock(return_value=["technology"])
+    mock_interaction_crud.set_like = AsyncMock(
+        return_value=({"is_liked": False, "is_saved": False}, -1)
+    )
+    mock_article_crud.increment_like_count = AsyncMock()
+
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://test"
+    ) as client:
+        response = await client.delete(
+            f"/articles/{test_article['id']}/like",
+            headers={"Authorization": "Bearer valid-token"},
+        )
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["is_liked"] is False
+    mock_interaction_crud.set_like.assert_awaited_once_with(
+        test_user["id"], test_article["id"], False
+    )
+    mock_article_crud.increment_like_count.assert_awaited_once_with(
+        test_article["id"], -1
+    )
+
+
+@patch("app.routes.interactions.article_crud")
+@patch("app.dependencies.get_user_by_id")
+@patch("app.dependencies.verify_token")
+async def test_delete_like_article_not_found(
+    mock_verify, mock_get_user, mock_article_crud, app, test_user
+):
+    mock_verify.return_value = {"sub": test_user["id"]}
+    mock_get_user.return_value = test_user
+    mock_article_crud.get_article_topics = AsyncMock(return_value=None)
+
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://test"
+    ) as client:
+        response = await client.delete(
+            "/articles/nonexistent/like",
+            headers={"Authorization": "Bearer valid-token"},
+        )
+
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
 # ============================================================================
 # POST /articles/{article_id}/save Tests
 # ============================================================================
@@ -106,9 +309,9 @@ async def test_toggle_save_article(
 ):
     mock_verify.return_value = {"sub": test_user["id"]}
     mock_get_user.return_value = test_user
-    mock_article_crud.get_article_by_id = AsyncMock(return_value=test_article)
+    mock_article_crud.get_article_topics = AsyncMock(return_value=["technology"])
     mock_interaction_crud.toggle_save = AsyncMock(
-        return_value={"is_liked": False, "is_saved": True}
+        return_value=({"is_liked": False, "is_saved": True}, 1)
     )
 
     async with AsyncClient(
@@ -132,7 +335,7 @@ async def test_toggle_save_article_not_found(
 ):
     mock_verify.return_value = {"sub": test_user["id"]}
     mock_get_user.return_value = test_user
-    mock_article_crud.get_article_by_id = AsyncMock(return_value=None)
+    mock_article_crud.get_article_topics = AsyncMock(return_value=None)
 
     async with AsyncClient(
         transport=ASGITransport(app=app), base_url="http://test"
@@ -145,6 +348,283 @@ async def test_toggle_save_article_not_found(
     assert response.status_code == status.HTTP_404_NOT_FOUND
 
 
+# ============================================================================
+# PUT/DELETE /articles/{article_id}/save Tests
+# ============================================================================
+
+
+@patch("app.routes.interactions.article_crud")
+@patch("app.routes.interactions.interaction_crud")
+@patch("app.dependencies.get_user_by_id")
+@patch("app.dependencies.verify_token")
+async def test_put_save_article(
+    mock_verify,
+    mock_get_user,
+    mock_interaction_crud,
+    mock_article_crud,
+    app,
+    test_user,
+    test_article,
+):
+    mock_verify.return_value = {"sub": test_user["id"]}
+    mock_get_user.return_value = test_user
+    mock_article_crud.get_article_topics = AsyncMock(return_value=["technology"])
+    mock_interaction_crud.set_save = AsyncMock(
+        return_value=({"is_liked": False, "is_saved": True}, 1)
+    )
+
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://test"
+    ) as client:
+        response = await client.put(
+            f"/articles/{test_article['id']}/save",
+            headers={"Authorization": "Bearer valid-token"},
+        )
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["is_saved"] is True
+    mock_interaction_crud.set_save.assert_awaited_once_with(
+        test_user["id"], test_article["id"], True
+    )
+
+
+@pytest.mark.parametrize("increment, recorded", [(1, True), (0, False)])
+@patch("app.routes.interactions.trending")
+@patch("app.routes.interactions.article_crud")
+@patch("app.routes.interactions.interaction_crud")
+@patch("app.dependencies.get_user_by_id")
+@patch("app.dependencies.verify_token")
+async def test_put_save_records_signals_only_when_saved_now(
+    mock_verify,
+    mock_get_user,
+    mock_interaction_crud,
+    mock_article_crud,
+    mock_trending,
+    mock_affinity_store,
+    increment,
+    recorded,
+    app,
+    test_user,
+    test_article,
+):
+    mock_verify.return_value = {"sub": test_user["id"]}
+    mock_get_user.return_value = test_user
+    mock_article_crud.get_article_topics = AsyncMock(return_value=["technology"])
+    mock_interaction_crud.set_save = AsyncMock(
+        return_value=({"is_liked": False, "is_saved": True}, increment)
+    )
+
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://test"
+    ) as client:
+        response = await client.put(
+            f"/articles/{test_article['id']}/save",
+            headers={"Authorization": "Bearer valid-token"},
+        )
+
+    assert response.status_code == status.HTTP_200_OK
+    assert mock_trending.record.called is recorded
+    assert mock_affinity_store.record.called is recorded
+
+
+@patch("app.routes.interactions.article_crud")
+@patch("app.routes.interactions.interaction_crud")
+@patch("app.dependencies.get_user_by_id")
+@patch("app.dependencies.verify_token")
+async def test_delete_save_article(
+    mock_verify,
+    mock_get_user,
+    mock_interaction_crud,
+    mock_article_crud,
+    app,
+    test_user,
+    test_article,
+):
+    mock_verify.return_value = {"sub": test_user["id"]}
+    mock_get_user.return_value = test_user
+    mock_article_crud.get_article_topics = AsyncMock(return_value=["technology"])
+    mock_interaction_crud.set_save = AsyncMock(
+        return_value=({"is_liked": False, "is_saved": False}, -1)
+    )
+
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://test"
+    ) as client:
+        response = await client.delete(
+            f"/articles/{test_article['id']}/save",
+            headers={"Authorization": "Bearer valid-token"},
+        )
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["is_saved"] is False
+    mock_interaction_crud.set_save.assert_awaited_once_with(
+        test_user["id"], test_article["id"], False
+    )
+
+
+# ============================================================================
+# POST /interactions/batch Tests
+# ============================================================================
+
+
+@patch("app.routes.interactions.interaction_crud")
+@patch("app.dependencies.get_user_by_id")
+@patch("app.dependencies.verify_token")
+async def test_sync_interactions(
+    mock_verify, mock_get_user, mock_interaction_crud, app, test_user
+):
+    mock_verify.return_value = {"sub": test_user["id"]}
+    mock_get_user.return_value = test_user
+    mock_interaction_crud.apply_interaction_batch = AsyncMock(
+        return_value=(
+            [{"article_id": "a1", "is_liked": True, "is_saved": False}],
+            ["gone"],
+            [],
+        )
+    )
+
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://test"
+    ) as client:
+        response = await client.post(
+            "/interactions/batch",
+            json={
+                "actions": [
+                    {
+                        "article_id": "a1",
+                        "action": "like",
+                        "timestamp": "2024-01-01T12:00:00Z",
+                    },
+                    {
+                        "article_id": "gone",
+                        "action": "save",
+                        "timestamp": "2024-01-01T12:01:00Z",
+                    },
+                ]
+            },
+            headers={"Authorization": "Bearer valid-token"},
+        )
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == {
+        "states": [{"article_id": "a1", "is_liked": True, "is_saved": False}],
+        "skipped": ["gone"],
+    }
+    user_id, actions = mock_interaction_crud.apply_interaction_batch.call_args[0]
+    assert user_id == test_user["id"]
+    assert [a.action for a in actions] == ["like", "save"]
+
+
+@patch("app.routes.interactions.trending")
+@patch("app.routes.interactions.interaction_crud")
+@patch("app.dependencies.get_user_by_id")
+@patch("app.dependencies.verify_token")
+async def test_sync_interactions_signals_flips(
+    mock_verify,
+    mock_get_user,
+    mock_interaction_crud,
+    mock_trending,
+    mock_affinity_store,
+    app,
+    test_user,
+):
+    # GIVEN a batch that liked a1, and unliked and saved a2
+    mock_verify.return_value = {"sub": test_user["id"]}
+    mock_get_user.return_value = test_user
+    mock_interaction_crud.apply_interaction_batch = AsyncMock(
+        return_value=(
+            [
+                {"article_id": "a1", "is_liked": True, "is_saved": False},
+                {"article_id": "a2", "is_liked": False, "is_saved": True},
+            ],
+            [],
+            [
+                {"article_id": "a1", "topics": ["t1"], "like": 1, "save": 0},
+                {"article_id": "a2", "topics": ["t2"], "like": -1, "save": 1},
+            ],
+        )
+    )
+    action = {"article_id": "a1", "action": "like", "timestamp": "2024-01-01T12:00:00"}
+
+    with event_hub.subscribe(["article:a1", "article:a2"]) as receive:
+        # WHEN it is synced
+        async with AsyncClient(
+            transport=ASGITransport(app=app), base_url="http://test"
+        ) as client:
+            response = await client.post(
+                "/interactions/batch",
+                json={"actions": [action]},
+                headers={"Authorization": "Bearer valid-token"},
+            )
+
+        # THEN each flip is signalled as a single request would signal it
+        events = [receive.receive_nowait()["data"] for _ in range(2)]
+    assert response.status_code == status.HTTP_200_OK
+    assert events == [
+        {"article_id": "a1", "change": 1},
+        {"article_id": "a2", "change": -1},
+    ]
+    assert [c.args for c in mock_trending.record.call_args_list] == [
+        ("a1", "like", 1),
+        ("a2", "like", -1),
+        ("a2", "save"),
+    ]
+    assert [c.args for c in mock_affinity_store.record.call_args_list] == [
+        (test_user["id"], ["t1"], "like", 1),
+        (test_user["id"], ["t2"], "like", -1),
+        (test_user["id"], ["t2"], "save"),
+    ]
+
+
+@patch("app.dependencies.get_user_by_id")
+@patch("app.dependencies.verify_token")
+async def test_sync_interactions_rejects_unknown_action(
+    mock_verify, mock_get_user, app, test_user
+):
+    mock_verify.return_value = {"sub": test_user["id"]}
+    mock_get_user.return_value = test_user
+
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://test"
+    ) as client:
+        response = await client.post(
+            "/interactions/batch",
+            json={
+                "actions": [
+                    {
+                        "article_id": "a1",
+                        "action": "share",
+                        "timestamp": "2024-01-01T12:00:00Z",
+                    }
+                ]
+            },
+            headers={"Authorization": "Bearer valid-token"},
+        )
+
+    assert response.status_code == 422
+
+
+@patch("app.dependencies.get_user_by_id")
+@patch("app.dependencies.verify_token")
+async def test_sync_interactions_rejects_oversized_batch(
+    mock_verify, mock_get_user, app, test_user
+):
+    mock_verify.return_value = {"sub": test_user["id"]}
+    mock_get_user.return_value = test_user
+    action = {"article_id": "a1", "action": "like", "timestamp": "2024-01-01T12:00:00"}
+
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://test"
+    ) as client:
+        response = await client.post(
+            "/interactions/batch",
+            json={"actions": [action] * (MAX_BATCH_ACTIONS + 1)},
+            headers={"Authorization": "Bearer valid-token"},
+        )
+
+    assert response.status_code == 422
+
+
 # ============================================================================
 # GET /articles/{article_id}/status Tests
 # ============================================================================
@@ -210,17 +690,15 @@ async def test_get_interaction_status_not_exists(
 # ============================================================================
 
 
-@patch("app.routes.interactions.enrich_articles")
 @patch("app.routes.interactions.interaction_crud")
 @patch("app.dependencies.get_user_by_id")
 @patch("app.dependencies.verify_token")
 async def test_get_liked_articles(
-    mock_verify, mock_get_user, mock_interaction_crud, mock_enrich, app, test_user
+    mock_verify, mock_get_user, mock_interaction_crud, app, test_user
 ):
     mock_verify.return_value = {"sub": test_user["id"]}
     mock_get_user.return_value = test_user
     mock_interaction_crud.get_user_liked_articles = AsyncMock(return_value=[])
-    mock_enrich.return_value = []
 
     async with AsyncClient(
         transport=ASGITransport(app=app), base_url="http://test"
@@ -239,17 +717,15 @@ async def test_get_liked_articles(
 # ============================================================================
 
 
-@patch("app.routes.interactions.enrich_articles")
 @patch("app.routes.interactions.interaction_crud")
 @patch("app.dependencies.get_user_by_id")
 @patch("app.dependencies.verify_token")
 async def test_get_saved_articles(
-    mock_verify, mock_get_user, mock_interaction_crud, mock_enrich, app, test_user
+    mock_verify, mock_get_user, mock_interaction_crud, app, test_user
 ):
     mock_verify.return_value = {"sub": test_user["id"]}
     mock_get_user.return_value = test_user
     mock_interaction_crud.get_user_saved_articles = AsyncMock(return_value=[])
-    mock_enrich.return_value = []
 
     async with AsyncClient(
         transport=ASGITransport(app=app), base_url="http://test"
@@ -261,3 +737,31 @@ async def test_get_saved_articles(
 
     assert response.status_code == status.HTTP_200_OK
     assert response.json() == []
+
+
+@patch("app.routes.interactions.interaction_crud")
+@patch("app.dependencies.get_user_by_id")
+@patch("app.dependencies.verify_token")
+async def test_get_saved_articles_keeps_flags(
+    mock_verify, mock_get_user, mock_interaction_crud, app, test_user, test_article
+):
+    # GIVEN the aggregation already attached the interaction flags
+    mock_verify.return_value = {"sub": test_user["id"]}
+    mock_get_user.return_value = test_user
+    saved = {**test_article, "liked": True, "saved": True, "interaction_id": "i-1"}
+    mock_interaction_crud.get_user_saved_articles = AsyncMock(return_value=[saved])
+
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://test"
+    ) as client:
+        response = await client.get(
+            "/me/saved",
+            headers={"Authorization": "Bearer valid-token"},
+        )
+
+    # THEN they are returned as-is, with no extra interaction lookup
+    assert response.status_code == status.HTTP_200_OK
+    data = response.json()
+    assert data[0]["liked"] is True
+    assert data[0]["saved"] is True
+    mock_interaction_crud.get_interaction_state.assert_not_called()
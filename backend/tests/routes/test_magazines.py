@@ -104,6 +104,9 @@ async def test_get_magazine(
     # GIVEN authenticated user and magazine exists
     mock_verify.return_value = {"sub": test_user["id"]}
     mock_get_user.return_value = test_user
+    mock_magazine_crud.get_magazine_version = AsyncMock(
+        return_value={"updated_at": test_magazine["updated_at"]}
+    )
     mock_magazine_crud.get_magazine_by_id = AsyncMock(return_value=test_magazine)
     mock_magazine_crud.enrich_magazines_with_covers = AsyncMock(
         return_value=[test_magazine]
@@ -118,9 +121,22 @@ async def test_get_magazine(
             headers={"Authorization": "Bearer valid-token"},
         )
 
-    # THEN magazine is returned
-    assert response.status_code == status.HTTP_200_OK
-    assert response.json()["id"] == test_magazine["id"]
+        # THEN magazine is returned
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()["id"] == test_magazine["id"]
+        assert response.headers["cache-control"] == "private, no-cache"
+
+        # AND revalidating skips the magazine and cover reads
+        response = await client.get(
+            f"/magazines/{test_magazine['id']}",
+            headers={
+                "Authorization": "Bearer valid-token",
+                "If-None-Match": response.headers["etag"],
+            },
+        )
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+    mock_magazine_crud.get_magazine_by_id.assert_awaited_once()
+    mock_magazine_crud.enrich_magazines_with_covers.assert_awaited_once()
 
 
 @patch("app.routes.magazines.crud_magazine")
@@ -132,7 +148,7 @@ async def test_get_magazine_not_found(
     # GIVEN magazine doesn't exist
     mock_verify.return_value = {"sub": test_user["id"]}
     mock_get_user.return_value = test_user
-    mock_magazine_crud.get_magazine_by_id = AsyncMock(return_value=None)
+    mock_magazine_crud.get_magazine_version = AsyncMock(return_value=None)
 
     async with AsyncClient(
         transport=ASGITransport(app=app), base_url="http://test"
@@ -313,6 +329,7 @@ async def test_delete_magazine_not_owner(
 # ============================================================================
 
 
+@patch("app.routes.magazines.notification_fanout")
 @patch("app.routes.magazines.crud_article")
 @patch("app.routes.magazines.crud_magazine")
 @patch("app.dependencies.get_user_by_id")
@@ -322,6 +339,7 @@ async def test_add_article_to_magazine(
     mock_get_user,
     mock_magazine_crud,
     mock_article_crud,
+    mock_fanout,
     app,
     test_user,
     test_magazine,
@@ -343,9 +361,18 @@ async def test_add_article_to_magazine(
             headers={"Authorization": "Bearer valid-token"},
         )
 
-    # THEN article is added
+    # THEN article is added and followers are notified in the background
     assert response.status_code == status.HTTP_200_OK
     mock_magazine_crud.add_article_to_magazine.assert_awaited_once()
+    mock_fanout.submit.assert_called_once_with(
+        magazine_id=test_magazine["id"],
+        article_id=test_article["id"],
+        message=(
+            f"New article '{test_article['title']}' added to "
+            f"'{test_magazine['name']}' magazine."
+        ),
+        exclude_user_id=test_user["id"],
+    )
 
 
 @patch("app.routes.magazines.crud_article")
@@ -591,7 +618,7 @@ async def test_get_explore_magazines(
     assert len(response.json()) == 1
     # THEN get_all_magazines was called with correct exclude_user_id
     mock_magazine_crud.get_all_magazines.assert_awaited_once_with(
-        skip=0, limit=100, exclude_user_id=test_user["id"]
+        skip=0, limit=100, exclude_user_id=test_user["id"], cursor=None
     )
 
 
@@ -634,7 +661,7 @@ async def test_get_explore_magazines_excludes_current_user(
         assert magazine["user_id"] != test_user["id"]
     # THEN get_all_magazines was called with exclude_user_id
     mock_magazine_crud.get_all_magazines.assert_awaited_once_with(
-        skip=0, limit=100, exclude_user_id=test_user["id"]
+        skip=0, limit=100, exclude_user_id=test_user["id"], cursor=None
     )
 
 
@@ -662,7 +689,7 @@ async def test_get_explore_magazines_with_pagination(
     # THEN pagination params are passed to crud function
     assert response.status_code == status.HTTP_200_OK
     mock_magazine_crud.get_all_magazines.assert_awaited_once_with(
-        skip=10, limit=20, exclude_user_id=test_user["id"]
+        skip=10, limit=20, exclude_user_id=test_user["id"], cursor=None
     )
 
 
@@ -762,6 +789,40 @@ async def test_get_magazine_comments(
     assert len(response.json()) == 1
 
 
+@patch("app.routes.magazines.crud_comment")
+@patch("app.routes.magazines.crud_magazine")
+async def test_get_magazine_comment_threads(
+    mock_magazine_crud, mock_comment_crud, app, test_user, test_magazine
+):
+    mock_magazine_crud.get_magazine_by_id = AsyncMock(return_value=test_magazine)
+    thread = {
+        "id": "c1",
+        "magazine_id": test_magazine["id"],
+        "user_id": test_user["id"],
+        "content": "Great magazine",
+        "path": "a",
+        "reply_count": 4,
+        "created_at": "2024-01-01T00:00:00",
+        "user": {"id": test_user["id"], "username": test_user["username"]},
+        "replies": [],
+    }
+    mock_comment_crud.get_threads = AsyncMock(return_value=[thread])
+
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://test"
+    ) as client:
+        response = await client.get(
+            f"/magazines/{test_magazine['id']}/comments/threads?limit=1"
+        )
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()[0]["reply_count"] == 4
+    assert "X-Next-Cursor" in response.headers
+    mock_comment_crud.get_threads.assert_awaited_once_with(
+        {"magazine_id": test_magazine["id"]}, limit=1, replies=3, cursor=None
+    )
+
+
 @patch("app.routes.magazines.crud_magazine")
 async def test_get_magazine_comments_not_found(mock_magazine_crud, app):
     mock_magazine_crud.get_magazine_by_id = AsyncMock(return_value=None)
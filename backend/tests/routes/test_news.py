@@ -4,11 +4,29 @@ import pytest
 from fastapi import HTTPException, status
 from httpx import ASGITransport, AsyncClient
 
-from app.models.news import NewsPost, NewsResponse
+from app.crud.interaction import InteractionState
+from app.models.news import NewsPost, NewsResponse, Thread
+from app.utils.near_duplicates import news_fingerprints
 
 pytestmark = pytest.mark.anyio
 
 
+@pytest.fixture(autouse=True)
+def clear_fingerprints():
+    news_fingerprints.clear()
+    yield
+    news_fingerprints.clear()
+
+
+@pytest.fixture(autouse=True)
+def clear_content_etags():
+    from app.routes.news import _content_etags
+
+    _content_etags.clear()
+    yield
+    _content_etags.clear()
+
+
 @pytest.fixture
 def app():
     from app.main import app
@@ -107,6 +125,67 @@ async def test_get_news_feed_with_topics(
     mock_news_crud.fetch_news_feed.assert_awaited_once()
 
 
+@patch("app.routes.news.topic_crud")
+@patch("app.routes.news.news_crud")
+@patch("app.dependencies.get_user_by_id")
+@patch("app.dependencies.verify_token")
+async def test_get_news_feed_collapses_syndicated_posts(
+    mock_verify, mock_get_user, mock_news_crud, mock_topic_crud, app, test_user
+):
+    # GIVEN the same wire story from two sites
+    story = (
+        "The central bank raised its benchmark rate by a quarter point on "
+        "Wednesday, citing persistent inflation and a strong labor market."
+    )
+    user = {**test_user, "followed_topics": ["topic-1"]}
+    mock_verify.return_value = {"sub": user["id"]}
+    mock_get_user.return_value = user
+    mock_topic_crud.get_topics_by_ids = AsyncMock(
+        return_value=[{"id": "topic-1", "name": "Economy"}]
+    )
+    mock_news_crud.fetch_news_feed = AsyncMock(
+        return_value=NewsResponse(
+            posts=[
+                NewsPost(
+                    url="https://a.com/rates",
+                    title="Central bank raises rates",
+                    text=story,
+                    thread=Thread(site="a.com"),
+                ),
+                NewsPost(
+                    url="https://b.com/rates",
+                    title="Central bank raises rates",
+                    text=story + " (AP)",
+                    thread=Thread(site="b.com"),
+                ),
+            ],
+            totalResults=2,
+        )
+    )
+
+    # WHEN the feed is fetched (no stored articles match the URLs)
+    with patch("app.routes.news.article_crud") as mock_article_crud:
+        mock_article_crud.get_articles_by_urls = AsyncMock(return_value=[])
+        async with AsyncClient(
+            transport=ASGITransport(app=app), base_url="http://test"
+        ) as client:
+            response = await client.get(
+                "/news/feed", headers={"Authorization": "Bearer valid-token"}
+            )
+
+    # THEN one post is shown, listing the other site
+    assert response.status_code == status.HTTP_200_OK
+    posts = response.json()["posts"]
+    assert [post["url"] for post in posts] == ["https://a.com/rates"]
+    assert posts[0]["also_covered_by"] == [
+        {
+            "site": "b.com",
+            "url": "https://b.com/rates",
+            "title": "Central bank raises rates",
+        }
+    ]
+
+
 @patch("app.routes.news.enrich_news_response")
 @patch("app.routes.news.news_crud")
 @patch("app.dependencies.get_user_by_id")
@@ -310,6 +389,37 @@ async def test_get_article_content(
 
     assert response.status_code == status.HTTP_200_OK
     assert response.json()["content"] == "<article>Content</article>"
+    assert response.headers["cache-control"] == "private, max-age=3600"
+
+
+@patch("app.routes.news.scrape_article_content")
+@patch("app.dependencies.get_user_by_id")
+@patch("app.dependencies.verify_token")
+async def test_get_article_content_not_modified(
+    mock_verify, mock_get_user, mock_scrape, app, test_user
+):
+    # GIVEN a page scraped once
+    mock_verify.return_value = {"sub": test_user["id"]}
+    mock_get_user.return_value = test_user
+    mock_scrape.return_value = "<article>Content</article>"
+    url = "/news/content?url=http://example.com/article"
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://test"
+    ) as client:
+        first = await client.get(url, headers={"Authorization": "Bearer valid-token"})
+
+        # WHEN the client revalidates its copy
+        response = await client.get(
+            url,
+            headers={
+                "Authorization": "Bearer valid-token",
+                "If-None-Match": first.headers["etag"],
+            },
+        )
+
+    # THEN 304 is returned without scraping the page again
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+    mock_scrape.assert_awaited_once()
 
 
 @patch("app.routes.news.scrape_article_content")
@@ -401,7 +511,7 @@ async def test_enrich_news_response_no_existing_articles(
 
     result = await enrich_news_response(response, {"id": "u1"})
     assert result == response
-    mock_interaction_crud.get_user_interactions_for_articles.assert_not_called()
+    mock_interaction_crud.get_interaction_state.assert_not_called()
 
 
 @patch("app.routes.news.interaction_crud")
@@ -415,10 +525,120 @@ async def test_enrich_news_response_with_interactions(
     mock_article_crud.get_articles_by_urls = AsyncMock(
         return_value=[{"id": "art-1", "source_url": "http://test.com"}]
     )
-    mock_interaction_crud.get_user_interactions_for_articles = AsyncMock(
-        return_value={"art-1": {"is_liked": True, "is_saved": False}}
+    mock_interaction_crud.get_interaction_state = AsyncMock(
+        return_value=InteractionState(liked=["art-1"])
     )
 
     result = await enrich_news_response(response, {"id": "u1"})
     assert result.posts[0].liked is True
     assert result.posts[0].saved is False
+
+
+# ============================================================================
+# Entity index Tests
+# ============================================================================
+
+
+@patch("app.routes.news.news_crud")
+@patch("app.routes.news.entity_crud")
+@patch("app.dependencies.get_user_by_id")
+@patch("app.dependencies.verify_token")
+async def test_get_entity_news(
+    mock_verify, mock_get_user, mock_entity_crud, mock_news_crud, app, test_user
+):
+    mock_verify.return_value = {"sub": test_user["id"]}
+    mock_get_user.return_value = test_user
+    mock_entity_crud.get_entity = AsyncMock(
+        return_value={
+            "name": "ACME",
+            "key": "acme",
+            "type": "organization",
+            "mentions": 1,
+            "sentiment": {"positive": 1, "negative": 0, "neutral": 0},
+            "posts": [NewsPost(uuid="p1", url="https://a.com/1")],
+        }
+    )
+
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://test"
+    ) as client:
+        response = await client.get(
+            "/news/entity/ACME?type=organization&limit=5",
+            headers={"Authorization": "Bearer valid-token"},
+        )
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["posts"][0]["uuid"] == "p1"
+    mock_entity_crud.get_entity.assert_awaited_once_with(
+        "ACME", entity_type="organization", limit=5
+    )
+    # Served from the index alone.
+    assert not mock_news_crud.method_calls
+
+
+@patch("app.routes.news.entity_crud")
+@patch("app.dependencies.get_user_by_id")
+@patch("app.dependencies.verify_token")
+async def test_get_entity_news_not_found(
+    mock_verify, mock_get_user, mock_entity_crud, app, test_user
+):
+    mock_verify.return_value = {"sub": test_user["id"]}
+    mock_get_user.return_value = test_user
+    mock_entity_crud.get_entity = AsyncMock(return_value=None)
+
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://test"
+    ) as client:
+        response = await client.get(
+            "/news/entity/nobody", headers={"Authorization": "Bearer valid-token"}
+        )
+
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+@patch("app.routes.news.entity_crud")
+@patch("app.dependencies.get_user_by_id")
+@patch("app.dependencies.verify_token")
+async def test_get_trending_entities(
+    mock_verify, mock_get_user, mock_entity_crud, app, test_user
+):
+    mock_verify.return_value = {"sub": test_user["id"]}
+    mock_get_user.return_value = test_user
+    mock_entity_crud.get_trending_entities = AsyncMock(
+        return_value=[{"name": "Paris", "key": "paris", "type": "location"}]
+    )
+
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://test"
+    ) as client:
+        response = await client.get(
+            "/news/entities/trending?days=7&type=location",
+            headers={"Authorization": "Bearer valid-token"},
+        )
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()[0]["key"] == "paris"
+    mock_entity_crud.get_trending_entities.assert_awaited_once_with(
+        days=7, entity_type="location", limit=10
+    )
+
+
+@patch("app.routes.news.entity_crud")
+@patch("app.dependencies.get_user_by_id")
+@patch("app.dependencies.verify_token")
+async def test_search_entities(
+    mock_verify, mock_get_user, mock_entity_crud, app, test_user
+):
+    mock_verify.return_value = {"sub": test_user["id"]}
+    mock_get_user.return_value = test_user
+    mock_entity_crud.search_entities = AsyncMock(return_value=[])
+
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://test"
+    ) as client:
+        response = await client.get(
+            "/news/entities?prefix=ma", headers={"Authorization": "Bearer valid-token"}
+        )
+
+    assert response.status_code == status.HTTP_200_OK
+    mock_entity_crud.search_entities.assert_awaited_once_with("ma", limit=10)
@@ -1,3 +1,4 @@
+from datetime import datetime
 from unittest.mock import AsyncMock, patch
 
 import pytest
@@ -22,6 +23,9 @@ def app():
 @patch("app.routes.topics.topic_crud")
 async def test_get_topics(mock_topic_crud, app, test_topic, test_topic_2):
     # GIVEN topics exist
+    mock_topic_crud.get_topics_version = AsyncMock(
+        return_value=(2, datetime(2024, 1, 1))
+    )
     mock_topic_crud.get_topics = AsyncMock(return_value=[test_topic, test_topic_2])
 
     async with AsyncClient(
@@ -34,11 +38,52 @@ async def test_get_topics(mock_topic_crud, app, test_topic, test_topic_2):
     assert response.status_code == status.HTTP_200_OK
     data = response.json()
     assert len(data) == 2
+    # AND they can be revalidated
+    assert response.headers["etag"].startswith('W/"')
+    assert response.headers["cache-control"] == "public, max-age=60"
+    assert response.headers["last-modified"] == "Mon, 01 Jan 2024 00:00:00 GMT"
+
+
+@patch("app.routes.topics.topic_crud")
+async def test_get_topics_not_modified(mock_topic_crud, app, test_topic):
+    # GIVEN a client holding the current list
+    mock_topic_crud.get_topics_version = AsyncMock(
+        return_value=(1, datetime(2024, 1, 1))
+    )
+    mock_topic_crud.get_topics = AsyncMock(return_value=[test_topic])
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://test"
+    ) as client:
+        first = await client.get("/topics/")
+
+        # WHEN it revalidates its copy
+        response = await client.get(
+            "/topics/", headers={"If-None-Match": first.headers["etag"]}
+        )
+
+    # THEN 304 is returned without reading the list again
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+    assert response.content == b""
+    assert response.headers["etag"] == first.headers["etag"]
+    assert mock_topic_crud.get_topics.await_count == 1
+
+    # AND a changed topic invalidates the copy
+    mock_topic_crud.get_topics_version = AsyncMock(
+        return_value=(1, datetime(2024, 2, 1))
+    )
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://test"
+    ) as client:
+        response = await client.get(
+            "/topics/", headers={"If-None-Match": first.headers["etag"]}
+        )
+    assert response.status_code == status.HTTP_200_OK
 
 
 @patch("app.routes.topics.topic_crud")
 async def test_get_topics_with_search(mock_topic_crud, app, test_topic):
     # GIVEN search term provided
+    mock_topic_crud.get_topics_version = AsyncMock(return_value=(1, None))
     mock_topic_crud.get_topics = AsyncMock(return_value=[test_topic])
 
     async with AsyncClient(
@@ -55,6 +100,7 @@ async def test_get_topics_with_search(mock_topic_crud, app, test_topic):
 @patch("app.routes.topics.topic_crud")
 async def test_get_topics_with_pagination(mock_topic_crud, app):
     # GIVEN pagination params
+    mock_topic_crud.get_topics_version = AsyncMock(return_value=(0, None))
     mock_topic_crud.get_topics = AsyncMock(return_value=[])
 
     async with AsyncClient(
@@ -76,6 +122,9 @@ async def test_get_topics_with_pagination(mock_topic_crud, app):
 @patch("app.routes.topics.topic_crud")
 async def test_get_topic(mock_topic_crud, app, test_topic):
     # GIVEN topic exists
+    mock_topic_crud.get_topic_version = AsyncMock(
+        return_value={"created_at": test_topic["created_at"]}
+    )
     mock_topic_crud.get_topic_by_id = AsyncMock(return_value=test_topic)
 
     async with AsyncClient(
@@ -89,10 +138,32 @@ async def test_get_topic(mock_topic_crud, app, test_topic):
     assert response.json()["id"] == test_topic["id"]
 
 
+@patch("app.routes.topics.topic_crud")
+async def test_get_topic_not_modified_since(mock_topic_crud, app, test_topic):
+    # GIVEN a topic unchanged since the client's copy
+    mock_topic_crud.get_topic_version = AsyncMock(
+        return_value={"updated_at": datetime(2024, 1, 1, 12, 0, 0, 500)}
+    )
+    mock_topic_crud.get_topic_by_id = AsyncMock(return_value=test_topic)
+
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://test"
+    ) as client:
+        # WHEN the client revalidates by date
+        response = await client.get(
+            f"/topics/{test_topic['id']}",
+            headers={"If-Modified-Since": "Mon, 01 Jan 2024 12:00:00 GMT"},
+        )
+
+    # THEN 304 is returned without reading the topic
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+    mock_topic_crud.get_topic_by_id.assert_not_awaited()
+
+
 @patch("app.routes.topics.topic_crud")
 async def test_get_topic_not_found(mock_topic_crud, app):
     # GIVEN topic doesn't exist
-    mock_topic_crud.get_topic_by_id = AsyncMock(return_value=None)
+    mock_topic_crud.get_topic_version = AsyncMock(return_value=None)
 
     async with AsyncClient(
         transport=ASGITransport(app=app), base_url="http://test"
@@ -192,6 +263,43 @@ async def test_bulk_follow_topics(
     mock_user_crud.update_followed_topics.assert_awaited_once()
 
 
+@patch("app.routes.topics.topic_crud")
+@patch("app.routes.topics.user_crud")
+@patch("app.dependencies.get_user_by_id")
+@patch("app.dependencies.verify_token")
+async def test_bulk_follow_topics_counts_only_changes(
+    mock_verify,
+    mock_get_user,
+    mock_user_crud,
+    mock_topic_crud,
+    app,
+    test_user,
+    test_topic,
+):
+    # GIVEN the user already follows topic-1 and topic-old
+    user = {**test_user, "followed_topics": ["topic-1", "topic-old"]}
+    mock_verify.return_value = {"sub": user["id"]}
+    mock_get_user.return_value = user
+    mock_topic_crud.get_topic_by_id = AsyncMock(return_value=test_topic)
+    mock_user_crud.update_followed_topics = AsyncMock()
+    mock_topic_crud.increment_follower_count = AsyncMock()
+
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://test"
+    ) as client:
+        # WHEN the followed list is replaced
+        response = await client.post(
+            "/topics/bulk-follow",
+            json={"topic_ids": ["topic-1", "topic-2", "topic-3"]},
+            headers={"Authorization": "Bearer valid-token"},
+        )
+
+    # THEN only added and removed topics have their counters moved
+    assert response.status_code == status.HTTP_200_OK
+    calls = [c.args for c in mock_topic_crud.increment_follower_count.await_args_list]
+    assert calls == [("topic-2", 1), ("topic-3", 1), ("topic-old", -1)]
+
+
 @patch("app.dependencies.get_user_by_id")
 @patch("app.dependencies.verify_token")
 async def test_bulk_follow_topics_minimum_required(
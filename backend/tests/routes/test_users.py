@@ -22,6 +22,9 @@ def app():
 @patch("app.routes.users.user_crud")
 async def test_get_user_by_username(mock_user_crud, app, test_user):
     # GIVEN user exists
+    mock_user_crud.get_user_version = AsyncMock(
+        return_value={"id": test_user["id"], "created_at": test_user["created_at"]}
+    )
     mock_user_crud.get_user_by_username = AsyncMock(return_value=test_user)
 
     async with AsyncClient(
@@ -30,15 +33,24 @@ async def test_get_user_by_username(mock_user_crud, app, test_user):
         # WHEN get user by username is called
         response = await client.get(f"/users/{test_user['username']}")
 
-    # THEN user is returned
-    assert response.status_code == status.HTTP_200_OK
-    assert response.json()["username"] == test_user["username"]
+        # THEN user is returned
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()["username"] == test_user["username"]
+        assert response.headers["cache-control"] == "public, no-cache"
+
+        # AND revalidating the same version skips reading the profile
+        response = await client.get(
+            f"/users/{test_user['username']}",
+            headers={"If-None-Match": response.headers["etag"]},
+        )
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+    mock_user_crud.get_user_by_username.assert_awaited_once()
 
 
 @patch("app.routes.users.user_crud")
 async def test_get_user_by_username_not_found(mock_user_crud, app):
     # GIVEN user doesn't exist
-    mock_user_crud.get_user_by_username = AsyncMock(return_value=None)
+    mock_user_crud.get_user_version = AsyncMock(return_value=None)
 
     async with AsyncClient(
         transport=ASGITransport(app=app), base_url="http://test"
@@ -29,3 +29,15 @@ async def test_health_check(app):
 
     assert response.status_code == 200
     assert response.json() == {"status": "healthy"}
+
+
+async def test_metrics_reports_cache_stats(app):
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://test"
+    ) as client:
+        response = await client.get("/metrics")
+
+    assert response.status_code == 200
+    caches = response.json()["caches"]
+    assert "hit_rate" in caches["article_counts"]
+    assert "avg_bytes_per_user" in caches["interaction_state"]
@@ -0,0 +1,159 @@
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import numpy as np
+import pytest
+from bson import Binary
+
+from app.utils.affinity import AffinityProfile, AffinityStore
+from app.utils.trending import EVENT_WEIGHTS
+
+pytestmark = pytest.mark.anyio
+
+DAY = 86400.0
+NOW = 1_700_000_000.0
+
+
+def _store(**overrides):
+    options = {"half_life": DAY, "max_topics": 64, "cache_size": 100}
+    options.update(overrides)
+    return AffinityStore(**options)
+
+
+# ============================================================================
+# AffinityProfile Tests
+# ============================================================================
+
+
+def test_profile_add_decays_previous_weights():
+    profile = AffinityProfile()
+
+    profile.add(["tech"], 4.0, NOW, DAY, 64)
+    profile.add(["tech", "science"], 1.0, NOW + DAY, DAY, 64)
+
+    assert profile.topics == ["tech", "science"]
+    assert profile.weights.tolist() == pytest.approx([3.0, 1.0])
+    assert profile.shares(NOW + DAY, DAY) == pytest.approx(
+        {"tech": 0.75, "science": 0.25}
+    )
+
+
+def test_profile_negative_weight_is_floored():
+    profile = AffinityProfile()
+    profile.add(["tech"], 1.0, NOW, DAY, 64)
+
+    profile.add(["tech"], -3.0, NOW, DAY, 64)
+
+    assert profile.weights.tolist() == [0.0]
+    assert profile.shares(NOW, DAY) == {}
+
+
+def test_profile_keeps_strongest_topics():
+    profile = AffinityProfile()
+    profile.add(["a"], 3.0, NOW, DAY, 2)
+    profile.add(["b"], 1.0, NOW, DAY, 2)
+
+    profile.add(["c"], 2.0, NOW, DAY, 2)
+
+    assert profile.topics == ["a", "c"]
+
+
+def test_profile_document_round_trip_is_compact():
+    profile = AffinityProfile(["tech", "science"], np.array([1.5, 0.25]), NOW)
+
+    doc = profile.to_document("user-1")
+    restored = AffinityProfile.from_document(doc)
+
+    assert isinstance(doc["weights"], Binary)
+    assert len(doc["weights"]) == 8
+    assert restored.topics == ["tech", "science"]
+    assert restored.weights.tolist() == [1.5, 0.25]
+    assert restored.updated_at == NOW
+
+
+# ============================================================================
+# AffinityStore Tests
+# ============================================================================
+
+
+@patch("app.utils.affinity.interaction_crud")
+@patch("app.utils.affinity.db")
+async def test_store_loads_stored_profile_once(mock_db, mock_interaction_crud):
+    # GIVEN a stored profile
+    stored = AffinityProfile(["tech"], np.array([2.0]), NOW).to_document("user-1")
+    mock_db.topic_affinity.find_one = AsyncMock(return_value=stored)
+    mock_interaction_crud.get_topic_affinity = AsyncMock()
+    store = _store()
+
+    # WHEN the shares are read twice
+    first = await store.shares("user-1")
+    second = await store.shares("user-1")
+
+    # THEN the profile is read once and the history is never scanned
+    assert first == second == {"tech": 1.0}
+    mock_db.topic_affinity.find_one.assert_awaited_once()
+    mock_interaction_crud.get_topic_affinity.assert_not_awaited()
+
+
+@patch("app.utils.affinity.interaction_crud")
+@patch("app.utils.affinity.db")
+async def test_store_bootstraps_from_history(mock_db, mock_interaction_crud):
+    mock_db.topic_affinity.find_one = AsyncMock(return_value=None)
+    mock_interaction_crud.get_topic_affinity = AsyncMock(
+        return_value={"tech": 0.75, "science": 0.25}
+    )
+    store = _store()
+
+    shares = await store.shares("user-1")
+
+    assert shares == pytest.approx({"tech": 0.75, "science": 0.25})
+    # The bootstrapped profile is persisted on the next flush.
+    assert store.stats()["pending"] == 1
+
+
+@patch("app.utils.affinity.interaction_crud")
+@patch("app.utils.affinity.db")
+async def test_record_then_flush_upserts_profiles(mock_db, mock_interaction_crud):
+    # GIVEN events recorded for a new user
+    mock_db.topic_affinity.find_one = AsyncMock(return_value=None)
+    mock_db.topic_affinity.bulk_write = AsyncMock()
+    mock_interaction_crud.get_topic_affinity = AsyncMock(return_value={})
+    store = _store()
+    await store.record("user-1", ["tech"], "like", now=NOW)
+    await store.record("user-1", ["tech", "science"], "view", now=NOW)
+    await store.record("user-1", [], "view", now=NOW)
+
+    # WHEN the store is flushed
+    flushed = await store.flush()
+
+    # THEN one upsert carries the whole profile
+    assert flushed == 1
+    operations = mock_db.topic_affinity.bulk_write.call_args[0][0]
+    assert operations[0]._filter == {"user_id": "user-1"}
+    assert operations[0]._upsert is True
+    profile = AffinityProfile.from_document(operations[0]._doc["$set"])
+    expected = [EVENT_WEIGHTS["like"] + EVENT_WEIGHTS["view"], EVENT_WEIGHTS["view"]]
+    assert profile.weights.tolist() == pytest.approx(expected)
+    assert mock_db.topic_affinity.bulk_write.call_args[1]["ordered"] is False
+    assert await store.flush() == 0
+
+
+@patch("app.utils.affinity.db")
+async def test_flush_failure_keeps_profiles_pending(mock_db):
+    mock_db.topic_affinity.bulk_write = AsyncMock(side_effect=Exception("down"))
+    store = _store()
+    store._dirty["user-1"] = AffinityProfile(["tech"], np.array([1.0]), NOW)
+
+    with pytest.raises(Exception):
+        await store.flush()
+
+    assert store.stats()["pending"] == 1
+    assert store.stats()["flushed"] == 0
+
+
+async def test_record_without_topics_skips_lookup():
+    store = _store()
+    store.profile = MagicMock()
+
+    await store.record("user-1", None, "view")
+
+    store.profile.assert_not_called()
@@ -2,6 +2,7 @@ from unittest.mock import AsyncMock, patch
 
 import pytest
 
+from app.crud.interaction import InteractionState
 from app.utils.article_enricher import enrich_article, enrich_articles
 
 pytestmark = pytest.mark.anyio
@@ -19,34 +20,36 @@ async def test_enrich_article_no_user(mock_interaction_crud):
     result = await enrich_article(article, None)
 
     assert result == article
-    mock_interaction_crud.get_interaction.assert_not_called()
+    mock_interaction_crud.get_interaction_state.assert_not_called()
 
 
 @patch("app.utils.article_enricher.interaction_crud")
 async def test_enrich_article_with_interaction(mock_interaction_crud):
     article = {"id": "a1", "title": "Test"}
     user = {"id": "u1"}
-    mock_interaction_crud.get_interaction = AsyncMock(
-        return_value={"is_liked": True, "is_saved": False}
+    mock_interaction_crud.get_interaction_state = AsyncMock(
+        return_value=InteractionState(liked=["a1"])
     )
 
     result = await enrich_article(article, user)
 
     assert result["liked"] is True
     assert result["saved"] is False
-    mock_interaction_crud.get_interaction.assert_awaited_once_with("u1", "a1")
+    mock_interaction_crud.get_interaction_state.assert_awaited_once_with("u1")
 
 
 @patch("app.utils.article_enricher.interaction_crud")
 async def test_enrich_article_no_interaction(mock_interaction_crud):
     article = {"id": "a1", "title": "Test"}
     user = {"id": "u1"}
-    mock_interaction_crud.get_interaction = AsyncMock(return_value=None)
+    mock_interaction_crud.get_interaction_state = AsyncMock(
+        return_value=InteractionState()
+    )
 
     result = await enrich_article(article, user)
 
-    assert "liked" not in result
-    assert "saved" not in result
+    assert result["liked"] is False
+    assert result["saved"] is False
 
 
 # ============================================================================
@@ -61,18 +64,15 @@ async def test_enrich_articles_no_user(mock_interaction_crud):
     result = await enrich_articles(articles, None)
 
     assert result == articles
-    mock_interaction_crud.get_user_interactions_for_articles.assert_not_called()
+    mock_interaction_crud.get_interaction_state.assert_not_called()
 
 
 @patch("app.utils.article_enricher.interaction_crud")
 async def test_enrich_articles_with_interactions(mock_interaction_crud):
     articles = [{"id": "a1"}, {"id": "a2"}]
     user = {"id": "u1"}
-    mock_interaction_crud.get_user_interactions_for_articles = AsyncMock(
-        return_value={
-            "a1": {"is_liked": True, "is_saved": False},
-            "a2": {"is_liked": False, "is_saved": True},
-        }
+    mock_interaction_crud.get_interaction_state = AsyncMock(
+        return_value=InteractionState(liked=["a1"], saved=["a2"])
     )
 
     result = await enrich_articles(articles, user)
@@ -81,14 +81,15 @@ async def test_enrich_articles_with_interactions(mock_interaction_crud):
     assert result[0]["saved"] is False
     assert result[1]["liked"] is False
     assert result[1]["saved"] is True
+    mock_interaction_crud.get_interaction_state.assert_awaited_once_with("u1")
 
 
 @patch("app.utils.article_enricher.interaction_crud")
 async def test_enrich_articles_empty_interactions(mock_interaction_crud):
     articles = [{"id": "a1"}]
     user = {"id": "u1"}
-    mock_interaction_crud.get_user_interactions_for_articles = AsyncMock(
-        return_value={}
+    mock_interaction_crud.get_interaction_state = AsyncMock(
+        return_value=InteractionState()
     )
 
     result = await enrich_articles(articles, user)
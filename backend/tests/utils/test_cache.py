@@ -0,0 +1,50 @@
+from unittest.mock import patch
+
+from app.utils.cache import TTLCache
+
+
+def test_get_and_set():
+    cache = TTLCache(maxsize=2)
+
+    cache.set("a", 1)
+
+    assert cache.get("a") == 1
+    assert cache.get("missing") is None
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_evicts_least_recently_used():
+    cache = TTLCache(maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+
+    cache.set("c", 3)
+
+    assert "a" in cache
+    assert "b" not in cache
+    assert cache.stats()["evictions"] == 1
+
+
+def test_entries_expire():
+    cache = TTLCache(maxsize=10, ttl=5)
+    with patch("app.utils.cache.time.monotonic", return_value=100.0):
+        cache.set("a", 1)
+
+    with patch("app.utils.cache.time.monotonic", return_value=104.0):
+        assert cache.get("a") == 1
+    with patch("app.utils.cache.time.monotonic", return_value=106.0):
+        assert cache.get("a") is None
+        assert len(cache) == 0
+
+
+def test_pop_and_clear():
+    cache = TTLCache(maxsize=10)
+    cache.set("a", 1)
+    cache.set("b", 2)
+
+    assert cache.pop("a") == 1
+    assert cache.pop("a") is None
+    cache.clear()
+    assert len(cache) == 0
@@ -0,0 +1,167 @@
+from datetime import datetime
+from unittest.mock import AsyncMock, patch
+
+import anyio
+import pytest
+
+from app.utils import events
+from app.utils.events import HEARTBEAT, EventHub, format_event
+
+pytestmark = pytest.mark.anyio
+
+
+def _event(channel, n=0):
+    return {"channel": channel, "type": "comment", "data": {"n": n}}
+
+
+async def _read(stream, count):
+    return [await stream.__anext__() for _ in range(count)]
+
+
+# ============================================================================
+# dispatch Tests
+# ============================================================================
+
+
+def test_dispatch_reaches_subscribers_of_channel_only():
+    hub = EventHub(queue_size=10, heartbeat=15)
+
+    with hub.subscribe(["article:a1"]) as first, hub.subscribe(["article:a2"]) as other:
+        delivered = hub.dispatch(_event("article:a1"))
+
+        assert delivered == 1
+        assert first.receive_nowait() == _event("article:a1")
+        with pytest.raises(anyio.WouldBlock):
+            other.receive_nowait()
+
+
+def test_unsubscribes_when_context_closes():
+    hub = EventHub(queue_size=10, heartbeat=15)
+
+    with hub.subscribe(["user:u1", "article:a1"]):
+        assert hub.stats()["channels"] == 2
+        assert hub.stats()["connections"] == 1
+
+    assert hub.stats()["channels"] == 0
+    assert hub.dispatch(_event("user:u1")) == 0
+
+
+def test_slow_consumer_is_disconnected_after_draining():
+    hub = EventHub(queue_size=2, heartbeat=15)
+
+    with hub.subscribe(["article:a1"]) as slow:
+        for n in range(3):
+            hub.dispatch(_event("article:a1", n))
+
+        # The queued events are still delivered, then the stream ends.
+        assert slow.receive_nowait()["data"] == {"n": 0}
+        assert slow.receive_nowait()["data"] == {"n": 1}
+        with pytest.raises(anyio.EndOfStream):
+            slow.receive_nowait()
+        assert hub.stats()["disconnected"] == 1
+        assert hub.dispatch(_event("article:a1")) == 0
+
+
+# ============================================================================
+# stream Tests
+# ============================================================================
+
+
+def test_format_event():
+    event = {"type": "count", "data": {"at": datetime(2024, 1, 1), "unread": 2}}
+
+    assert format_event(event) == (
+        'event: count\ndata: {"at":"2024-01-01T00:00:00","unread":2}\n\n'
+    )
+
+
+async def test_stream_sends_snapshot_then_events():
+    hub = EventHub(queue_size=10, heartbeat=15)
+    snapshot = AsyncMock(return_value=[{"type": "count", "data": {"unread": 3}}])
+    stream = hub.stream(["user:u1"], snapshot=snapshot)
+
+    first = await stream.__anext__()
+    # Subscribed before the snapshot was taken.
+    assert hub.stats()["connections"] == 1
+    hub.dispatch({"channel": "user:u1", "type": "notification", "data": {"id": "n1"}})
+    second = await stream.__anext__()
+    await stream.aclose()
+
+    assert first == 'event: count\ndata: {"unread":3}\n\n'
+    assert second == 'event: notification\ndata: {"id":"n1"}\n\n'
+    assert hub.stats()["connections"] == 0
+
+
+async def test_stream_sends_heartbeat_when_idle():
+    hub = EventHub(queue_size=10, heartbeat=0.01)
+    stream = hub.stream(["user:u1"])
+
+    assert await _read(stream, 2) == [HEARTBEAT, HEARTBEAT]
+    await stream.aclose()
+
+
+async def test_stream_resets_when_closed():
+    hub = EventHub(queue_size=10, heartbeat=0.01)
+    stream = hub.stream(["user:u1"])
+    assert await _read(stream, 1) == [HEARTBEAT]
+
+    hub.close()
+
+    assert await _read(stream, 1) == [format_event(events.RESET_EVENT)]
+    with pytest.raises(StopAsyncIteration):
+        await stream.__anext__()
+
+
+# ============================================================================
+# publish Tests
+# ============================================================================
+
+
+async def test_publish_dispatches_locally():
+    hub = EventHub(queue_size=10, heartbeat=15)
+
+    with (
+        patch("app.utils.events.event_hub", hub),
+        hub.subscribe(["user:u1"]) as receive,
+    ):
+        await events.publish("user:u1", "notification", {"_id": 1, "id": "n1"})
+
+        assert receive.receive_nowait() == {
+            "channel": "user:u1",
+            "type": "notification",
+            "data": {"id": "n1"},
+        }
+
+
+@patch("app.utils.events.db")
+async def test_publish_goes_through_collection_for_relay(mock_db):
+    hub = EventHub(queue_size=10, heartbeat=15)
+    mock_db.events.insert_many = AsyncMock()
+
+    with (
+        patch("app.utils.events.event_hub", hub),
+        patch.object(events.settings, "EVENTS_CHANGE_STREAM", True),
+        hub.subscribe(["user:u1"]) as receive,
+    ):
+        await events.publish("user:u1", "notification", {"id": "n1"})
+
+        # Left to the relay, so this worker does not see it twice.
+        with pytest.raises(anyio.WouldBlock):
+            receive.receive_nowait()
+    [stored] = mock_db.events.insert_many.call_args[0][0]
+    assert stored["channel"] == "user:u1"
+    assert stored["data"] == {"id": "n1"}
+    assert stored["expires_at"] > stored["created_at"]
+
+
+@patch("app.utils.events.db")
+async def test_publish_when_relay_fails(mock_db):
+    # GIVEN the events collection cannot be written
+    mock_db.events.insert_many = AsyncMock(side_effect=Exception("down"))
+
+    # WHEN an event is published through the relay
+    with patch.object(events.settings, "EVENTS_CHANGE_STREAM", True):
+        await events.publish("user:u1", "notification", {"id": "n1"})
+
+    # THEN the failure stays with the relay and the caller goes on
+    mock_db.events.insert_many.assert_awaited_once()
@@ -0,0 +1,91 @@
+from datetime import datetime
+
+from fastapi import Response
+from starlette.requests import Request
+
+from app.utils.http_cache import make_etag, not_modified, version
+
+
+def _request(**headers):
+    return Request(
+        {
+            "type": "http",
+            "method": "GET",
+            "headers": [
+                (name.replace("_", "-").lower().encode(), value.encode())
+                for name, value in headers.items()
+            ],
+        }
+    )
+
+
+# ============================================================================
+# make_etag / version Tests
+# ============================================================================
+
+
+def test_make_etag_is_weak_and_stable():
+    tag = make_etag("a1", datetime(2024, 1, 1), 3)
+
+    assert tag.startswith('W/"') and tag.endswith('"')
+    assert tag == make_etag("a1", datetime(2024, 1, 1), 3)
+    assert tag != make_etag("a1", datetime(2024, 1, 1), 4)
+
+
+def test_version_falls_back_to_created_at():
+    created = datetime(2024, 1, 1)
+    updated = datetime(2024, 2, 1)
+
+    assert version({"created_at": created}) == created
+    assert version({"created_at": created, "updated_at": updated}) == updated
+
+
+# ============================================================================
+# not_modified Tests
+# ============================================================================
+
+
+def test_not_modified_sets_validators():
+    response = Response()
+    modified = datetime(2024, 1, 1, 12, 0, 0)
+
+    result = not_modified(_request(), response, 'W/"abc"', "public, no-cache", modified)
+
+    assert result is None
+    assert response.headers["etag"] == 'W/"abc"'
+    assert response.headers["cache-control"] == "public, no-cache"
+    assert response.headers["last-modified"] == "Mon, 01 Jan 2024 12:00:00 GMT"
+
+
+def test_not_modified_matches_any_listed_tag():
+    request = _request(If_None_Match='"other", "abc"')
+
+    result = not_modified(request, Response(), 'W/"abc"', "private, no-cache")
+
+    assert result.status_code == 304
+    assert result.headers["etag"] == 'W/"abc"'
+    assert result.body == b""
+
+
+def test_not_modified_etag_takes_precedence_over_date():
+    # A stale tag wins over a date that would still be current.
+    request = _request(
+        If_None_Match='W/"old"', If_Modified_Since="Tue, 02 Jan 2024 00:00:00 GMT"
+    )
+
+    result = not_modified(
+        request, Response(), 'W/"new"', "public, no-cache", datetime(2024, 1, 1)
+    )
+
+    assert result is None
+
+
+def test_not_modified_since():
+    modified = datetime(2024, 1, 1, 12, 0, 0, 250000)
+    current = _request(If_Modified_Since="Mon, 01 Jan 2024 12:00:00 GMT")
+    stale = _request(If_Modified_Since="Mon, 01 Jan 2024 11:59:59 GMT")
+    invalid = _request(If_Modified_Since="yesterday")
+
+    assert not_modified(current, Response(), 'W/"a"', "", modified).status_code == 304
+    assert not_modified(stale, Response(), 'W/"a"', "", modified) is None
+    assert not_modified(invalid, Response(), 'W/"a"', "", modified) is None
@@ -0,0 +1,130 @@
+from unittest.mock import patch
+
+from app.models.news import NewsPost, Thread
+from app.utils.near_duplicates import (
+    BANDS,
+    BLOCKS,
+    MAX_DISTANCE,
+    NearDuplicateIndex,
+    bands,
+    distance,
+    simhash,
+    to_signed,
+)
+
+WIRE_TITLE = "Fed raises interest rates by a quarter point"
+WIRE_TEXT = (
+    "The Federal Reserve raised its benchmark interest rate by a quarter "
+    "percentage point on Wednesday, citing persistent inflation and a strong "
+    "labor market. Officials signaled further increases may follow this year "
+    "as they try to cool the economy."
+)
+REWRITTEN_TITLE = "Fed raises interest rates by quarter point"
+REWRITTEN_TEXT = WIRE_TEXT.replace("may follow", "could follow") + " (Reuters)"
+OTHER_TITLE = "Local team wins championship"
+OTHER_TEXT = (
+    "The city celebrated as the home team won the championship game in "
+    "overtime on Sunday night before a sold out crowd."
+)
+
+
+def _post(url, title, text, site="site.com"):
+    return NewsPost(url=url, title=title, text=text, thread=Thread(site=site))
+
+
+# ============================================================================
+# Fingerprint Tests
+# ============================================================================
+
+
+def test_simhash_is_close_for_rewritten_story():
+    wire = simhash(WIRE_TITLE, WIRE_TEXT)
+
+    assert distance(wire, simhash(REWRITTEN_TITLE, REWRITTEN_TEXT)) <= MAX_DISTANCE
+    assert distance(wire, simhash(OTHER_TITLE, OTHER_TEXT)) > MAX_DISTANCE
+    assert simhash(WIRE_TITLE, WIRE_TEXT) == wire
+
+
+def test_simhash_without_words_is_zero():
+    assert simhash("", None) == 0
+
+
+def test_close_fingerprints_share_a_band():
+    fingerprint = simhash(WIRE_TITLE, WIRE_TEXT)
+    # Flip MAX_DISTANCE bits, one in each of the first blocks.
+    nearby = fingerprint
+    for block in range(MAX_DISTANCE):
+        nearby ^= 1 << (block * 64 // BLOCKS)
+
+    assert len(bands(fingerprint)) == BANDS
+    assert len(set(bands(fingerprint)) & set(bands(nearby))) == 1
+
+
+def test_band_keys_are_wide():
+    # A key differs as soon as any bit of its two blocks does.
+    keys = {tuple(bands(1 << bit)) for bit in range(64)}
+
+    assert len(keys) == 64
+    assert len(set(bands(0))) == BANDS
+
+
+def test_to_signed_fits_int64():
+    assert to_signed((1 << 64) - 1) == -1
+    assert to_signed(5) == 5
+
+
+# ============================================================================
+# NearDuplicateIndex Tests
+# ============================================================================
+
+
+def test_collapse_keeps_first_post_and_lists_the_others():
+    # GIVEN the same wire story from two sites and an unrelated post
+    index = NearDuplicateIndex(maxsize=100, ttl=60)
+    posts = [
+        _post("https://a.com/1", WIRE_TITLE, WIRE_TEXT, site="a.com"),
+        _post("https://c.com/1", OTHER_TITLE, OTHER_TEXT, site="c.com"),
+        _post("https://b.com/1", REWRITTEN_TITLE, REWRITTEN_TEXT, site="b.com"),
+    ]
+
+    # WHEN the posts are collapsed
+    kept = index.collapse(posts)
+
+    # THEN the first copy stands for the story, in its original position
+    assert [post.url for post in kept] == ["https://a.com/1", "https://c.com/1"]
+    coverage = kept[0].also_covered_by
+    assert [(c.site, c.url) for c in coverage] == [("b.com", "https://b.com/1")]
+    assert kept[1].also_covered_by == []
+    assert index.stats()["collapsed"] == 1
+
+
+def test_clusters_are_shared_across_requests():
+    index = NearDuplicateIndex(maxsize=100, ttl=60)
+    index.collapse([_post("https://a.com/1", WIRE_TITLE, WIRE_TEXT)])
+
+    # A later request holding only the copy still maps it to the first post.
+    assert (
+        index.cluster("https://b.com/1", REWRITTEN_TITLE, REWRITTEN_TEXT)
+        == "https://a.com/1"
+    )
+
+
+def test_posts_without_text_are_never_merged():
+    index = NearDuplicateIndex(maxsize=100, ttl=60)
+
+    kept = index.collapse(
+        [_post("https://a.com", "", ""), _post("https://b.com", "", "")]
+    )
+
+    assert len(kept) == 2
+
+
+def test_fingerprints_expire():
+    index = NearDuplicateIndex(maxsize=100, ttl=60)
+    with patch("app.utils.cache.time.monotonic", return_value=100.0):
+        index.cluster("https://a.com/1", WIRE_TITLE, WIRE_TEXT)
+
+    with patch("app.utils.cache.time.monotonic", return_value=200.0):
+        cluster = index.cluster("https://b.com/1", REWRITTEN_TITLE, REWRITTEN_TEXT)
+
+    assert cluster == "https://b.com/1"
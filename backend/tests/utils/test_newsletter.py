@@ -8,6 +8,14 @@ from app.utils.newsletter import process_weekly_newsletter
 pytestmark = pytest.mark.anyio
 
 
+@pytest.fixture(autouse=True)
+def mock_affinity_store():
+    with patch("app.utils.newsletter.affinity_store") as store:
+        store.record = AsyncMock()
+        store.shares = AsyncMock(return_value={})
+        yield store
+
+
 # ============================================================================
 # process_weekly_newsletter Tests
 # ============================================================================
@@ -0,0 +1,103 @@
+from unittest.mock import AsyncMock, patch
+
+import anyio
+import pytest
+
+from app.utils.notification_fanout import NotificationFanout
+
+pytestmark = pytest.mark.anyio
+
+
+def _followers(*user_ids):
+    async def iter_ids(magazine_id, batch_size):
+        for user_id in user_ids:
+            yield user_id
+
+    return iter_ids
+
+
+# ============================================================================
+# submit Tests
+# ============================================================================
+
+
+def test_submit_rejects_when_queue_full():
+    fanout = NotificationFanout(chunk_size=10, max_pending=1)
+
+    assert fanout.submit("m1", "a1", "New article") is True
+    assert fanout.submit("m2", "a2", "New article") is False
+
+    assert fanout.stats()["queued"] == 1
+    assert fanout.stats()["rejected"] == 1
+
+
+# ============================================================================
+# run Tests
+# ============================================================================
+
+
+@patch("app.utils.notification_fanout.notification_crud")
+@patch("app.utils.notification_fanout.user_crud")
+async def test_run_writes_followers_in_chunks(mock_user_crud, mock_notification_crud):
+    # GIVEN five followers, one of them the magazine's owner
+    fanout = NotificationFanout(chunk_size=2, max_pending=10)
+    mock_user_crud.iter_magazine_follower_ids = _followers(
+        "u1", "owner", "u2", "u3", "u4"
+    )
+    mock_notification_crud.create_notifications = AsyncMock(
+        side_effect=lambda chunk: len(chunk)
+    )
+    job = {
+        "magazine_id": "m1",
+        "article_id": "a1",
+        "message": "New article",
+        "exclude_user_id": "owner",
+    }
+
+    # WHEN the job runs
+    notified = await fanout.run(job)
+
+    # THEN the others are notified in full chunks, then the remainder
+    chunks = [
+        [notification.user_id for notification in call.args[0]]
+        for call in mock_notification_crud.create_notifications.await_args_list
+    ]
+    assert chunks == [["u1", "u2"], ["u3", "u4"], []]
+    first = mock_notification_crud.create_notifications.await_args_list[0].args[0][0]
+    assert (first.magazine_id, first.article_id, first.message) == (
+        "m1",
+        "a1",
+        "New article",
+    )
+    assert notified == 4
+    assert fanout.stats()["notified"] == 4
+
+
+@patch("app.utils.notification_fanout.notification_crud")
+@patch("app.utils.notification_fanout.user_crud")
+async def test_work_runs_queued_jobs_and_survives_failures(
+    mock_user_crud, mock_notification_crud
+):
+    # GIVEN a job whose writes fail, then a job that succeeds
+    fanout = NotificationFanout(chunk_size=10, max_pending=10)
+    mock_user_crud.iter_magazine_follower_ids = _followers("u1")
+    mock_notification_crud.create_notifications = AsyncMock(
+        side_effect=[ConnectionError("down"), 1, 0]
+    )
+    fanout.submit("m1", "a1", "New article")
+    fanout.submit("m2", "a2", "New article")
+
+    # WHEN the worker runs until the queue is empty
+    async with anyio.create_task_group() as tg:
+        tg.start_soon(fanout.work)
+        while fanout.completed + fanout.failed < 2:
+            await anyio.sleep(0.001)
+        tg.cancel_scope.cancel()
+
+    # THEN the failure is counted and the next job still ran
+    stats = fanout.stats()
+    assert stats["failed"] == 1
+    assert stats["completed"] == 1
+    assert stats["notified"] == 1
+    assert stats["queued"] == 0
+    assert stats["running"] is None
@@ -0,0 +1,142 @@
+import base64
+import json
+from datetime import datetime
+
+import pytest
+from fastapi import HTTPException
+
+from app.utils.pagination import (
+    apply_keyset,
+    decode_cursor,
+    encode_cursor,
+    keyset_filter,
+    next_cursor,
+)
+
+# ============================================================================
+# encode_cursor / decode_cursor Tests
+# ============================================================================
+
+
+def test_cursor_round_trip_datetime():
+    value = datetime(2024, 1, 15, 12, 0, 0)
+
+    cursor = encode_cursor("published_at", value, "article-1")
+
+    assert decode_cursor(cursor, "published_at") == (value, "article-1")
+
+
+def test_cursor_round_trip_int():
+    cursor = encode_cursor("view_count", 42, "article-1")
+
+    assert decode_cursor(cursor, "view_count") == (42, "article-1")
+
+
+def test_decode_cursor_invalid():
+    with pytest.raises(HTTPException) as exc_info:
+        decode_cursor("not-a-cursor", "published_at")
+
+    assert exc_info.value.status_code == 400
+
+
+@pytest.mark.parametrize(
+    "value, item_id",
+    [
+        ({"t": "raw", "v": {"$gt": ""}}, "article-1"),
+        ({"t": "raw", "v": [1, 2]}, "article-1"),
+        ({"t": "other", "v": 42}, "article-1"),
+        ({"t": "raw", "v": 42}, {"$ne": None}),
+    ],
+)
+def test_decode_cursor_rejects_non_scalar_values(value, item_id):
+    # GIVEN a forged cursor carrying query operators
+    raw = json.dumps({"k": "view_count", "v": value, "id": item_id}).encode()
+    cursor = base64.urlsafe_b64encode(raw).decode()
+
+    # THEN it is refused before reaching a query
+    with pytest.raises(HTTPException) as exc_info:
+        decode_cursor(cursor, "view_count")
+
+    assert exc_info.value.status_code == 400
+
+
+def test_decode_cursor_wrong_sort_key():
+    cursor = encode_cursor("view_count", 42, "article-1")
+
+    with pytest.raises(HTTPException) as exc_info:
+        decode_cursor(cursor, "published_at")
+
+    assert exc_info.value.status_code == 400
+
+
+# ============================================================================
+# keyset_filter / apply_keyset Tests
+# ============================================================================
+
+
+def test_keyset_filter_descending():
+    value = datetime(2024, 1, 15, 12, 0, 0)
+    cursor = encode_cursor("created_at", value, "c-1")
+
+    result = keyset_filter(cursor, "created_at", -1)
+
+    assert result == {
+        "$or": [
+            {"created_at": {"$lt": value}},
+            {"created_at": value, "id": {"$lt": "c-1"}},
+        ]
+    }
+
+
+def test_apply_keyset_merges_into_query():
+    cursor = encode_cursor("created_at", datetime(2024, 1, 1), "c-1")
+
+    result = apply_keyset({"article_id": "a1"}, cursor, "created_at")
+
+    assert result["article_id"] == "a1"
+    assert "$or" in result
+
+
+def test_apply_keyset_keeps_existing_or():
+    cursor = encode_cursor("published_at", datetime(2024, 1, 1), "a-1")
+    query = {"$or": [{"title": "x"}, {"excerpt": "x"}]}
+
+    result = apply_keyset(query, cursor, "published_at")
+
+    assert result["$and"][0] == query
+
+
+def test_apply_keyset_without_cursor():
+    query = {"article_id": "a1"}
+
+    assert apply_keyset(query, None, "created_at") is query
+
+
+# ============================================================================
+# next_cursor Tests
+# ============================================================================
+
+
+def test_next_cursor_full_page():
+    items = [
+        {"id": "a1", "published_at": datetime(2024, 1, 2)},
+        {"id": "a2", "published_at": datetime(2024, 1, 1)},
+    ]
+
+    cursor = next_cursor(items, "published_at", limit=2)
+
+    assert decode_cursor(cursor, "published_at") == (datetime(2024, 1, 1), "a2")
+
+
+def test_next_cursor_last_page():
+    items = [{"id": "a1", "published_at": datetime(2024, 1, 2)}]
+
+    assert next_cursor(items, "published_at", limit=2) is None
+
+
+def test_next_cursor_custom_id_field():
+    items = [{"id": "article-1", "interaction_id": "i-1", "liked_at": 5}]
+
+    cursor = next_cursor(items, "liked_at", limit=1, id_field="interaction_id")
+
+    assert decode_cursor(cursor, "liked_at") == (5, "i-1")
@@ -0,0 +1,119 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from app.core.config import settings
+from app.utils.ranking import _publisher_occurrence, rank_articles, score_articles
+
+NOW = datetime(2024, 1, 15, 12, 0, 0)
+
+
+def _article(article_id, hours_old=0, publisher=None, topics=(), **counts):
+    return {
+        "id": article_id,
+        "published_at": NOW - timedelta(hours=hours_old),
+        "publisher": publisher or article_id,
+        "topics": list(topics),
+        "view_count": counts.get("views", 0),
+        "like_count": counts.get("likes", 0),
+        "comment_count": counts.get("comments", 0),
+    }
+
+
+@pytest.fixture
+def weights(monkeypatch):
+    def set_weights(recency=0.0, affinity=0.0, popularity=0.0, penalty=0.0):
+        monkeypatch.setattr(settings, "RANK_WEIGHT_RECENCY", recency)
+        monkeypatch.setattr(settings, "RANK_WEIGHT_AFFINITY", affinity)
+        monkeypatch.setattr(settings, "RANK_WEIGHT_POPULARITY", popularity)
+        monkeypatch.setattr(settings, "RANK_PUBLISHER_PENALTY", penalty)
+
+    return set_weights
+
+
+# ============================================================================
+# score_articles Tests
+# ============================================================================
+
+
+def test_recency_halves_every_half_life(weights):
+    weights(recency=1.0)
+    articles = [_article("a", 0), _article("b", settings.RANK_RECENCY_HALF_LIFE_HOURS)]
+
+    scores = score_articles(articles, {}, now=NOW)
+
+    assert scores == pytest.approx([1.0, 0.5])
+
+
+def test_affinity_sums_topic_shares_capped_at_one(weights):
+    weights(affinity=1.0)
+    articles = [
+        _article("a", topics=["tech", "science"]),
+        _article("b", topics=["sports"]),
+        _article("c", topics=["tech", "world"]),
+    ]
+
+    scores = score_articles(articles, {"tech": 0.7, "science": 0.6}, now=NOW)
+
+    assert scores == pytest.approx([1.0, 0.0, 0.7])
+
+
+def test_popularity_is_log_scaled_and_normalized(weights):
+    weights(popularity=1.0)
+    articles = [
+        _article("a", views=1000, likes=50, comments=10),
+        _article("b", views=10),
+        _article("c"),
+    ]
+
+    scores = score_articles(articles, {}, now=NOW)
+
+    assert scores[0] == pytest.approx(1.0)
+    assert 0 < scores[1] < scores[0]
+    assert scores[2] == 0
+
+
+# ============================================================================
+# rank_articles Tests
+# ============================================================================
+
+
+def test_rank_returns_top_k_by_score(weights):
+    weights(recency=1.0, affinity=1.0)
+    articles = [
+        _article("old-favourite", hours_old=48, topics=["tech"]),
+        _article("fresh"),
+        _article("stale", hours_old=72),
+    ]
+
+    ranked = rank_articles(articles, {"tech": 1.0}, k=2, now=NOW)
+
+    assert [a["id"] for a in ranked] == ["old-favourite", "fresh"]
+
+
+def test_rank_penalizes_repeated_publishers(weights):
+    # GIVEN the three freshest articles all come from one publisher
+    weights(recency=1.0, penalty=0.5)
+    articles = [
+        _article("p1", 0, publisher="P"),
+        _article("p2", 1, publisher="P"),
+        _article("p3", 2, publisher="P"),
+        _article("q1", 3, publisher="Q"),
+    ]
+
+    # WHEN they are ranked
+    ranked = rank_articles(articles, {}, now=NOW)
+
+    # THEN another publisher is interleaved before P's second article
+    assert [a["id"] for a in ranked] == ["p1", "q1", "p2", "p3"]
+
+
+def test_rank_empty_candidates():
+    assert rank_articles([], {}) == []
+
+
+def test_publisher_occurrence():
+    codes = np.array([0, 1, 0, 2, 0, 1])
+
+    assert _publisher_occurrence(codes).tolist() == [0, 0, 1, 0, 2, 1]
@@ -0,0 +1,131 @@
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from app.utils.recommendations import (
+    _block_neighbours,
+    _InteractionMatrix,
+    _normalize_columns,
+    build_article_neighbours,
+    recommendation_stats,
+)
+
+pytestmark = pytest.mark.anyio
+
+
+def _interactions(pairs, start=0):
+    return [
+        {"_id": start + i, "user_id": user, "article_id": article}
+        for i, (user, article) in enumerate(pairs)
+    ]
+
+
+def _paged_find(chunks):
+    """A `find` whose successive cursors return `chunks` in turn."""
+    cursors = []
+    for chunk in chunks:
+        cursor = MagicMock()
+        cursor.sort.return_value = cursor
+        cursor.limit.return_value = cursor
+        cursor.to_list = AsyncMock(return_value=chunk)
+        cursors.append(cursor)
+    return MagicMock(side_effect=cursors)
+
+
+# ============================================================================
+# Similarity Tests
+# ============================================================================
+
+
+def test_matrix_counts_like_and_save_once():
+    matrix = _InteractionMatrix()
+    matrix.add_chunk(_interactions([("u1", "a"), ("u1", "a"), ("u2", "b")]))
+
+    csr = matrix.to_csr()
+
+    assert csr.shape == (2, 2)
+    assert csr.toarray().tolist() == [[1.0, 0.0], [0.0, 1.0]]
+
+
+def test_block_neighbours_are_cosine_ranked_without_self():
+    # GIVEN readers of a who mostly also read b, and once c
+    matrix = _InteractionMatrix()
+    matrix.add_chunk(
+        _interactions(
+            [("u1", "a"), ("u1", "b"), ("u2", "a"), ("u2", "b"), ("u3", "a")]
+            + [("u3", "c"), ("u4", "c"), ("u5", "d")]
+        )
+    )
+    normalized = _normalize_columns(matrix.to_csr())
+
+    # WHEN the neighbours of every article are computed in blocks of two
+    neighbours = _block_neighbours(
+        normalized.T.tocsr(), normalized, 0, 2, top_n=5
+    ) + _block_neighbours(normalized.T.tocsr(), normalized, 2, 4, top_n=5)
+
+    # THEN b is a's closest neighbour, and no article lists itself
+    index = matrix.articles
+    assert [row for row, _ in neighbours[index["a"]]] == [index["b"], index["c"]]
+    assert neighbours[index["a"]][0][1] == pytest.approx(2 / (3**0.5 * 2**0.5))
+    assert neighbours[index["d"]] == []
+    for article, row in index.items():
+        assert row not in [r for r, _ in neighbours[row]]
+
+
+def test_block_neighbours_keeps_top_n():
+    matrix = _InteractionMatrix()
+    matrix.add_chunk(_interactions([("u1", x) for x in "abcde"] + [("u2", "b")]))
+    normalized = _normalize_columns(matrix.to_csr())
+
+    neighbours = _block_neighbours(normalized.T.tocsr(), normalized, 0, 1, top_n=2)
+
+    assert len(neighbours[0]) == 2
+
+
+# ============================================================================
+# build_article_neighbours Tests
+# ============================================================================
+
+
+@patch("app.utils.recommendations.db")
+async def test_build_reads_in_chunks_and_replaces_lists(mock_db):
+    # GIVEN two full chunks of interactions and an empty third page
+    first = _interactions([("u1", "a"), ("u1", "b")])
+    second = _interactions([("u2", "a"), ("u2", "b")], start=2)
+    mock_db.user_interactions.find = _paged_find([first, second, []])
+    mock_db.article_neighbours.bulk_write = AsyncMock()
+    mock_db.article_neighbours.delete_many = AsyncMock()
+
+    # WHEN the neighbours are rebuilt
+    written = await build_article_neighbours(chunk_size=2, block_size=1, top_n=5)
+
+    # THEN paging is keyed on _id, not skip
+    queries = [c[0][0] for c in mock_db.user_interactions.find.call_args_list]
+    assert "_id" not in queries[0]
+    assert queries[1]["_id"] == {"$gt": 1}
+    assert queries[2]["_id"] == {"$gt": 3}
+
+    # AND each article's list is replaced in one bulk write per block
+    assert written == 2
+    assert mock_db.article_neighbours.bulk_write.await_count == 2
+    operation = mock_db.article_neighbours.bulk_write.call_args_list[0][0][0][0]
+    assert operation._filter == {"article_id": "a"}
+    assert operation._upsert is True
+    assert operation._doc["neighbours"] == [{"id": "b", "score": 1.0}]
+
+    # AND lists not rewritten by this run are removed
+    stale = mock_db.article_neighbours.delete_many.call_args[0][0]
+    assert stale == {"updated_at": {"$lt": operation._doc["updated_at"]}}
+    assert recommendation_stats()["last_run"]["interactions"] == 4
+
+
+@patch("app.utils.recommendations.db")
+async def test_build_without_interactions_clears_lists(mock_db):
+    mock_db.user_interactions.find = _paged_find([[]])
+    mock_db.article_neighbours.bulk_write = AsyncMock()
+    mock_db.article_neighbours.delete_many = AsyncMock()
+
+    assert await build_article_neighbours() == 0
+
+    mock_db.article_neighbours.bulk_write.assert_not_awaited()
+    mock_db.article_neighbours.delete_many.assert_awaited_once()
@@ -0,0 +1,174 @@
+from datetime import datetime
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from app.utils import reconciliation
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture(autouse=True)
+def reset_resume_points():
+    reconciliation._resume_after.update({"articles": None, "topics": None})
+    yield
+    reconciliation._resume_after.update({"articles": None, "topics": None})
+
+
+def _cursor(items):
+    cursor = MagicMock()
+    cursor.sort = MagicMock(return_value=cursor)
+    cursor.limit = MagicMock(return_value=cursor)
+    cursor.to_list = AsyncMock(return_value=items)
+    return cursor
+
+
+def _collection(find_items=None, aggregate_rows=None):
+    collection = MagicMock()
+    collection.find = MagicMock(return_value=_cursor(find_items or []))
+    collection.aggregate = MagicMock(return_value=_cursor(aggregate_rows or []))
+    collection.bulk_write = AsyncMock()
+    return collection
+
+
+def _mock_db(mock_db, collections):
+    mock_db.__getitem__.side_effect = lambda name: collections[name]
+    for name, collection in collections.items():
+        setattr(mock_db, name, collection)
+
+
+# ============================================================================
+# reconcile_article_batch Tests
+# ============================================================================
+
+
+@patch("app.utils.reconciliation.db")
+async def test_reconcile_article_batch_corrects_drift(mock_db):
+    # GIVEN a1 has drifted like/comment counts and a2 is correct
+    articles = _collection(
+        find_items=[
+            {"id": "a1", "like_count": 5, "comment_count": 0, "view_count": 3},
+            {"id": "a2", "like_count": 1, "comment_count": 2, "view_count": 7},
+        ]
+    )
+    interactions = _collection(
+        aggregate_rows=[{"_id": "a1", "count": 3}, {"_id": "a2", "count": 1}]
+    )
+    comments = _collection(
+        aggregate_rows=[{"_id": "a1", "count": 1}, {"_id": "a2", "count": 2}]
+    )
+    _mock_db(
+        mock_db,
+        {"articles": articles, "user_interactions": interactions, "comments": comments},
+    )
+
+    # WHEN a batch is reconciled
+    scanned = await reconciliation.reconcile_article_batch(10)
+
+    # THEN only a1 is corrected, guarded on the values that were read
+    assert scanned == 2
+    operations = articles.bulk_write.call_args[0][0]
+    assert len(operations) == 1
+    assert operations[0]._filter == {"id": "a1", "like_count": 5, "comment_count": 0}
+    assert operations[0]._doc == {"$set": {"like_count": 3, "comment_count": 1}}
+    assert articles.bulk_write.call_args[1]["ordered"] is False
+    # AND the counts are computed from the batch ids only
+    match = interactions.aggregate.call_args[0][0][0]["$match"]
+    assert match == {"article_id": {"$in": ["a1", "a2"]}, "is_liked": True}
+    # AND tombstoned comments are not counted
+    match = comments.aggregate.call_args[0][0][0]["$match"]
+    assert match == {"article_id": {"$in": ["a1", "a2"]}, "deleted": {"$ne": True}}
+
+
+@patch("app.utils.reconciliation.db")
+async def test_reconcile_article_batch_repairs_negative_views(mock_db):
+    articles = _collection(
+        find_items=[{"id": "a1", "like_count": 0, "comment_count": 0, "view_count": -2}]
+    )
+    _mock_db(
+        mock_db,
+        {
+            "articles": articles,
+            "user_interactions": _collection(),
+            "comments": _collection(),
+        },
+    )
+
+    await reconciliation.reconcile_article_batch(10)
+
+    operation = articles.bulk_write.call_args[0][0][0]
+    assert operation._doc == {"$set": {"view_count": 0}}
+
+
+@patch("app.utils.reconciliation.db")
+async def test_reconcile_article_batch_resumes_after_full_batch(mock_db):
+    # GIVEN a full batch
+    articles = _collection(
+        find_items=[
+            {"id": "a1", "like_count": 0, "comment_count": 0, "view_count": 0},
+            {"id": "a2", "like_count": 0, "comment_count": 0, "view_count": 0},
+        ]
+    )
+    _mock_db(
+        mock_db,
+        {
+            "articles": articles,
+            "user_interactions": _collection(),
+            "comments": _collection(),
+        },
+    )
+
+    # WHEN it is reconciled
+    await reconciliation.reconcile_article_batch(2)
+
+    # THEN nothing is written and the next batch starts after a2
+    articles.bulk_write.assert_not_awaited()
+    assert reconciliation._resume_after["articles"] == "a2"
+    await reconciliation.reconcile_article_batch(2)
+    assert articles.find.call_args[0][0] == {"id": {"$gt": "a2"}}
+
+
+# ============================================================================
+# reconcile_topic_batch Tests
+# ============================================================================
+
+
+@patch("app.utils.reconciliation.db")
+async def test_reconcile_topic_batch(mock_db):
+    topics = _collection(
+        find_items=[{"id": "t1", "follower_count": 4}, {"id": "t2"}],
+    )
+    users = _collection(aggregate_rows=[{"_id": "t1", "count": 2}])
+    _mock_db(mock_db, {"topics": topics, "users": users})
+
+    scanned = await reconciliation.reconcile_topic_batch(10)
+
+    assert scanned == 2
+    operations = topics.bulk_write.call_args[0][0]
+    assert [op._doc["$set"]["follower_count"] for op in operations] == [2, 0]
+    assert operations[1]._filter == {"id": "t2", "follower_count": None}
+    # AND updated_at moves, so the topic's ETag changes with the count
+    assert all(isinstance(op._doc["$set"]["updated_at"], datetime) for op in operations)
+
+
+# ============================================================================
+# reconcile_counters Tests
+# ============================================================================
+
+
+@patch("app.utils.reconciliation.reconcile_topic_batch", new_callable=AsyncMock)
+@patch("app.utils.reconciliation.reconcile_article_batch", new_callable=AsyncMock)
+async def test_reconcile_counters_bounded_batches(mock_articles, mock_topics):
+    # GIVEN a large article collection and a small topic collection
+    mock_articles.return_value = 10
+    mock_topics.return_value = 3
+
+    # WHEN one run is made
+    await reconciliation.reconcile_counters(batch_size=10, max_batches=4)
+
+    # THEN articles stop at the batch cap and topics at the end of the scan
+    assert mock_articles.await_count == 4
+    assert mock_topics.await_count == 1
+    stats = reconciliation.reconciliation_stats()
+    assert stats["runs"] >= 1
+    assert "like_count" in stats["drift"]
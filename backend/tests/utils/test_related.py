@@ -0,0 +1,219 @@
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import numpy as np
+import pytest
+from bson import Binary
+
+from app.utils.related import (
+    MAX_CONTENT_CHARS,
+    RelatedIndex,
+    fit_idf,
+    top_neighbours,
+    vectorize,
+    weigh,
+)
+
+pytestmark = pytest.mark.anyio
+
+FEATURES = 1 << 12
+
+
+def _index(**overrides):
+    options = {
+        "n_features": FEATURES,
+        "max_terms": 64,
+        "max_df": 1.0,
+        "top_k": 2,
+        "chunk_size": 2,
+        "block_size": 2,
+        "candidates": 10,
+    }
+    options.update(overrides)
+    return RelatedIndex(**options)
+
+
+def _article(article_id, title, content="", _id=0):
+    return {
+        "_id": _id,
+        "id": article_id,
+        "title": title,
+        "excerpt": "",
+        "content": content,
+    }
+
+
+def _cursor(result):
+    cursor = MagicMock()
+    cursor.sort.return_value = cursor
+    cursor.limit.return_value = cursor
+    cursor.to_list = AsyncMock(return_value=result)
+    return cursor
+
+
+CORPUS = [
+    _article("rocket", "Rocket launch delayed", "orbit satellite rocket", 1),
+    _article("orbit", "Satellite reaches orbit", "rocket orbit launch", 2),
+    _article("election", "Election results announced", "votes parliament", 3),
+    _article("budget", "Parliament votes budget", "election budget votes", 4),
+]
+
+
+@pytest.fixture(autouse=True)
+def mock_contents():
+    # Bodies live in the content collection, not in the articles read.
+    bodies = {article["id"]: article["content"] for article in CORPUS}
+    with patch("app.utils.related.article_crud") as mock:
+        mock.get_article_contents = AsyncMock(
+            side_effect=lambda ids, max_chars: {
+                i: bodies[i] for i in ids if i in bodies
+            }
+        )
+        yield mock
+
+
+# ============================================================================
+# Vectorizing Tests
+# ============================================================================
+
+
+def test_vectorize_weights_title_words_higher():
+    counts = vectorize([_article("a", "rocket", "rocket orbit")], FEATURES)
+
+    weights = sorted(counts.data.tolist())
+
+    # "orbit" once in the body; "rocket" in the title (3) and the body (1).
+    assert weights == [1.0, 4.0]
+
+
+def test_vectorize_is_stable_across_batches():
+    together = vectorize(CORPUS, FEATURES)
+    alone = vectorize(CORPUS[2:3], FEATURES)
+
+    assert (together[2] != alone[0]).nnz == 0
+
+
+def test_weigh_prunes_and_normalizes():
+    counts = vectorize([_article("a", "alpha beta gamma delta")], FEATURES)
+
+    matrix = weigh(counts, fit_idf(counts), max_terms=2)
+
+    assert matrix.nnz == 2
+    assert np.linalg.norm(matrix.data) == pytest.approx(1.0)
+
+
+def test_top_neighbours_finds_similar_articles_not_self():
+    counts = vectorize(CORPUS, FEATURES)
+    matrix = weigh(counts, fit_idf(counts), max_terms=64)
+
+    indices, scores = top_neighbours(matrix, 0, 4, k=1)
+
+    assert indices.ravel().tolist() == [1, 0, 3, 2]
+    assert (scores > 0).all()
+
+
+def test_top_neighbours_single_article():
+    counts = vectorize(CORPUS[:1], FEATURES)
+    matrix = weigh(counts, fit_idf(counts), max_terms=64)
+
+    indices, scores = top_neighbours(matrix, 0, 1, k=5)
+
+    assert indices.shape == (1, 0)
+
+
+# ============================================================================
+# RelatedIndex Tests
+# ============================================================================
+
+
+@patch("app.utils.related.db")
+async def test_build_writes_lists_and_idf(mock_db, mock_contents):
+    # GIVEN the corpus read back in two chunks
+    mock_db.articles.find = MagicMock(
+        side_effect=[_cursor(CORPUS[:2]), _cursor(CORPUS[2:]), _cursor([])]
+    )
+    mock_db.related_articles.bulk_write = AsyncMock()
+    mock_db.related_articles.delete_many = AsyncMock()
+    mock_db.related_idf.replace_one = AsyncMock()
+    index = _index()
+
+    # WHEN the index is built
+    written = await index.build()
+
+    # THEN chunks are paged by _id
+    queries = [c[0][0] for c in mock_db.articles.find.call_args_list]
+    assert queries[1] == {"_id": {"$gt": 2}}
+
+    # AND bodies are read separately, cut to the vectorized length
+    assert "content" not in mock_db.articles.find.call_args[0][1]
+    ids, max_chars = mock_contents.get_article_contents.call_args_list[0][0]
+    assert ids == ["rocket", "orbit"]
+    assert max_chars == MAX_CONTENT_CHARS
+
+    # AND every article gets its list, best match first
+    assert written == 4
+    operations = [
+        op for c in mock_db.related_articles.bulk_write.call_args_list for op in c[0][0]
+    ]
+    lists = {op._doc["article_id"]: op._doc["related"] for op in operations}
+    assert lists["rocket"][0]["id"] == "orbit"
+    assert lists["budget"][0]["id"] == "election"
+    assert all(len(related) <= 2 for related in lists.values())
+
+    # AND stale lists are dropped and the IDF weights are kept
+    mock_db.related_articles.delete_many.assert_awaited_once()
+    idf_doc = mock_db.related_idf.replace_one.call_args[0][1]
+    assert isinstance(idf_doc["idf"], Binary)
+    assert len(idf_doc["idf"]) == FEATURES * 4
+    assert index.stats()["last_run"]["articles"] == 4
+
+
+@patch("app.utils.related.db")
+async def test_index_article_before_first_build(mock_db):
+    mock_db.related_idf.find_one = AsyncMock(return_value=None)
+    mock_db.related_articles.bulk_write = AsyncMock()
+
+    assert await _index().index_article(CORPUS[0]) == 0
+
+    mock_db.related_articles.bulk_write.assert_not_awaited()
+
+
+@patch("app.utils.related.db")
+async def test_index_article_links_new_article_both_ways(mock_db):
+    # GIVEN IDF weights from a previous build
+    counts = vectorize(CORPUS, FEATURES)
+    mock_db.related_idf.find_one = AsyncMock(
+        return_value={
+            "n_features": FEATURES,
+            "idf": Binary(fit_idf(counts).astype("<f4").tobytes()),
+        }
+    )
+    mock_db.articles.find = MagicMock(return_value=_cursor(CORPUS))
+    mock_db.related_articles.bulk_write = AsyncMock()
+    new = {**_article("probe", "Rocket probe reaches orbit"), "language": "english"}
+
+    # WHEN a new article is indexed
+    await _index().index_article(new)
+
+    # THEN candidates come from a text search on its own words
+    query = mock_db.articles.find.call_args[0][0]
+    assert query["id"] == {"$ne": "probe"}
+    assert set(query["$text"]["$search"].split()) == {
+        "rocket",
+        "probe",
+        "reaches",
+        "orbit",
+    }
+    assert query["$text"]["$language"] == "english"
+
+    # AND its own list holds the closest candidates
+    operations = mock_db.related_articles.bulk_write.call_args[0][0]
+    own = operations[-1]._doc
+    assert own["article_id"] == "probe"
+    assert {r["id"] for r in own["related"]} == {"rocket", "orbit"}
+
+    # AND it is pushed into matching candidates' lists, once
+    pushed = [op._filter for op in operations[:-1]]
+    assert {f["article_id"] for f in pushed} == {"rocket", "orbit"}
+    assert all(f["related.id"] == {"$ne": "probe"} for f in pushed)
+    push = operations[0]._doc["$push"]["related"]
+    assert push["$slice"] == 2
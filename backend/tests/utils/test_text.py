@@ -0,0 +1,68 @@
+from app.utils.text import (
+    detect_language,
+    has_search_terms,
+    normalize,
+    search_language,
+    tokenize,
+)
+
+# ============================================================================
+# normalize / tokenize Tests
+# ============================================================================
+
+
+def test_normalize_strips_accents():
+    assert normalize("Économie Française") == "economie francaise"
+
+
+def test_tokenize_english_drops_stopwords():
+    tokens = tokenize("The market's rally and the Fed's decision")
+
+    assert tokens == ["market", "rally", "fed", "decision"]
+
+
+def test_tokenize_french_elisions():
+    tokens = tokenize("L'économie qu'il défend et l'Europe")
+
+    assert tokens == ["economie", "defend", "europe"]
+
+
+def test_tokenize_keep_stopwords():
+    assert tokenize("the cat", drop_stopwords=False) == ["the", "cat"]
+
+
+def test_tokenize_empty():
+    assert tokenize(None) == []
+    assert tokenize("") == []
+
+
+def test_has_search_terms():
+    assert has_search_terms("l'économie")
+    assert has_search_terms("the")
+    assert has_search_terms("G7 2024")
+    assert not has_search_terms(" -?! ")
+    assert not has_search_terms(None)
+
+
+# ============================================================================
+# detect_language / search_language Tests
+# ============================================================================
+
+
+def test_detect_language_french():
+    assert detect_language("Les élections dans la région sont reportées") == "french"
+
+
+def test_detect_language_english():
+    assert detect_language("The elections in the region are postponed") == "english"
+
+
+def test_detect_language_no_signal():
+    assert detect_language("Bitcoin") is None
+
+
+def test_search_language_codes():
+    assert search_language("fr") == "french"
+    assert search_language("EN") == "english"
+    assert search_language("de") is None
+    assert search_language(None) is None
@@ -0,0 +1,158 @@
+from datetime import datetime, timezone
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from app.utils.trending import EVENT_WEIGHTS, TrendingEngine
+
+pytestmark = pytest.mark.anyio
+
+HOUR = 3600.0
+NOW = 1_700_000_000.0
+
+
+def _utc(timestamp):
+    return datetime.fromtimestamp(timestamp, timezone.utc).replace(tzinfo=None)
+
+
+def _cursor(items):
+    cursor = MagicMock()
+    cursor.sort = MagicMock(return_value=cursor)
+    cursor.limit = MagicMock(return_value=cursor)
+
+    async def to_list(length=None):
+        return items
+
+    cursor.to_list = to_list
+    return cursor
+
+
+def _article(article_id, topics=()):
+    return {"id": article_id, "title": article_id, "topics": list(topics)}
+
+
+# ============================================================================
+# record / score Tests
+# ============================================================================
+
+
+def test_score_halves_every_half_life():
+    engine = TrendingEngine(half_life=HOUR)
+
+    engine.record("a1", "like", now=NOW)
+
+    assert engine.score("a1", now=NOW) == EVENT_WEIGHTS["like"]
+    assert engine.score("a1", now=NOW + HOUR) == pytest.approx(
+        EVENT_WEIGHTS["like"] / 2
+    )
+    assert engine.score("unknown", now=NOW) == 0
+
+
+def test_recent_activity_outranks_older_activity():
+    # GIVEN a1 got 10 views two half-lives ago and a2 got 3 views just now
+    engine = TrendingEngine(half_life=HOUR)
+    engine.record("a1", "view", amount=10, now=NOW - 2 * HOUR)
+    engine.record("a2", "view", amount=3, now=NOW)
+
+    # THEN a2 trends higher (3 > 10 / 4)
+    assert engine.score("a2", now=NOW) > engine.score("a1", now=NOW)
+
+
+def test_unlike_takes_weight_back_without_going_negative():
+    engine = TrendingEngine(half_life=HOUR)
+    engine.record("a1", "like", now=NOW)
+
+    engine.record("a1", "like", amount=-1, now=NOW)
+    engine.record("a1", "like", amount=-1, now=NOW)
+
+    assert engine.score("a1", now=NOW) == 0
+
+
+# ============================================================================
+# refresh / top Tests
+# ============================================================================
+
+
+@patch("app.utils.trending.db")
+async def test_refresh_builds_overall_and_topic_snapshots(mock_db):
+    # GIVEN three scored articles, one of which has since been deleted
+    engine = TrendingEngine(half_life=HOUR, top_k=2)
+    engine.record("a1", "view", amount=5, now=NOW)
+    engine.record("a2", "comment", amount=2, now=NOW)
+    engine.record("a3", "view", now=NOW)
+    engine.record("gone", "like", amount=10, now=NOW)
+    mock_db.articles.find = MagicMock(
+        return_value=_cursor(
+            [
+                _article("a1", ["tech"]),
+                _article("a2", ["tech", "sports"]),
+                _article("a3", ["tech"]),
+            ]
+        )
+    )
+
+    # WHEN the snapshot is refreshed
+    await engine.refresh(now=NOW)
+
+    # THEN the candidates are loaded in one query, in score order
+    mock_db.articles.find.assert_called_once()
+    assert [a["id"] for a in await engine.top()] == ["a2", "a1"]
+    assert [a["id"] for a in await engine.top(topic="tech")] == ["a2", "a1"]
+    assert [a["id"] for a in await engine.top(topic="sports")] == ["a2"]
+    assert await engine.top(topic="unknown") == []
+    # AND deleted articles are forgotten
+    assert engine.stats()["tracked"] == 3
+
+
+@patch("app.utils.trending.db")
+async def test_top_returns_copies(mock_db):
+    engine = TrendingEngine(half_life=HOUR)
+    engine.record("a1", "view", now=NOW)
+    mock_db.articles.find = MagicMock(return_value=_cursor([_article("a1")]))
+    await engine.refresh(now=NOW)
+
+    (article,) = await engine.top(limit=1)
+    article["liked"] = True
+
+    assert "liked" not in (await engine.top(limit=1))[0]
+
+
+@patch("app.utils.trending.db")
+async def test_refresh_bounds_tracked_articles(mock_db):
+    engine = TrendingEngine(half_life=HOUR, max_tracked=2)
+    for amount, article_id in enumerate(["a1", "a2", "a3"], start=1):
+        engine.record(article_id, "view", amount=amount, now=NOW)
+    mock_db.articles.find = MagicMock(
+        return_value=_cursor([_article("a2"), _article("a3")])
+    )
+
+    await engine.refresh(now=NOW)
+
+    assert engine.score("a1", now=NOW) == 0
+    assert engine.stats()["tracked"] == 2
+
+
+@patch("app.utils.trending.db")
+async def test_first_refresh_seeds_from_recent_articles(mock_db):
+    # GIVEN a fresh engine and an article published one half-life ago
+    engine = TrendingEngine(half_life=HOUR, seed_window=48 * HOUR)
+    seeded = {
+        "id": "a1",
+        "published_at": _utc(NOW - HOUR),
+        "view_count": 4,
+        "like_count": 2,
+        "comment_count": 0,
+    }
+    mock_db.articles.find = MagicMock(
+        side_effect=[_cursor([seeded]), _cursor([_article("a1")])]
+    )
+
+    # WHEN it is refreshed for the first time
+    await engine.refresh(now=NOW)
+
+    # THEN the stored counters give a starting score, decayed since publishing
+    expected = (4 * EVENT_WEIGHTS["view"] + 2 * EVENT_WEIGHTS["like"]) / 2
+    assert engine.score("a1", now=NOW) == pytest.approx(expected)
+    assert [a["id"] for a in await engine.top()] == ["a1"]
+    seed_query = mock_db.articles.find.call_args_list[0][0][0]
+    assert seed_query == {"published_at": {"$gte": _utc(NOW - 48 * HOUR)}}
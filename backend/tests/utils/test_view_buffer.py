@@ -0,0 +1,106 @@
+import time
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from app.utils.view_buffer import ViewBuffer
+
+pytestmark = pytest.mark.anyio
+
+
+# ============================================================================
+# record Tests
+# ============================================================================
+
+
+def test_record_counts_views_per_article():
+    buffer = ViewBuffer()
+
+    buffer.record("a1", "u1")
+    buffer.record("a1", "u1")
+    buffer.record("a2")
+
+    assert buffer.pending("a1") == 2
+    assert buffer.pending("a2") == 1
+    assert buffer.pending("a3") == 0
+
+
+def test_record_dedupes_within_window():
+    buffer = ViewBuffer(dedupe_window=60)
+
+    assert buffer.record("a1", "u1") is True
+    assert buffer.record("a1", "u1") is False
+    assert buffer.record("a1", "u2") is True
+    # Anonymous views cannot be attributed, so they are never deduplicated.
+    assert buffer.record("a1") is True
+    assert buffer.record("a1") is True
+
+    assert buffer.pending("a1") == 4
+    assert buffer.stats()["deduplicated"] == 1
+
+
+def test_record_counts_again_after_window(monkeypatch):
+    buffer = ViewBuffer(dedupe_window=60)
+    now = time.monotonic()
+    buffer.record("a1", "u1")
+
+    monkeypatch.setattr(time, "monotonic", lambda: now + 61)
+
+    assert buffer.record("a1", "u1") is True
+
+
+# ============================================================================
+# flush Tests
+# ============================================================================
+
+
+@patch("app.utils.view_buffer.db")
+async def test_flush_writes_one_unordered_bulk(mock_db):
+    # GIVEN views buffered for two articles
+    mock_db.articles = MagicMock()
+    mock_db.articles.bulk_write = AsyncMock()
+    buffer = ViewBuffer()
+    for _ in range(3):
+        buffer.record("a1")
+    buffer.record("a2")
+
+    # WHEN the buffer is flushed
+    written = await buffer.flush()
+
+    # THEN one $inc per article is sent in a single unordered bulk write
+    assert written == 4
+    mock_db.articles.bulk_write.assert_awaited_once()
+    operations = mock_db.articles.bulk_write.call_args[0][0]
+    assert {op._filter["id"]: op._doc["$inc"]["view_count"] for op in operations} == {
+        "a1": 3,
+        "a2": 1,
+    }
+    assert mock_db.articles.bulk_write.call_args[1]["ordered"] is False
+    assert buffer.pending("a1") == 0
+
+
+@patch("app.utils.view_buffer.db")
+async def test_flush_empty_buffer_skips_write(mock_db):
+    mock_db.articles = MagicMock()
+    mock_db.articles.bulk_write = AsyncMock()
+
+    assert await ViewBuffer().flush() == 0
+    mock_db.articles.bulk_write.assert_not_awaited()
+
+
+@patch("app.utils.view_buffer.db")
+async def test_flush_failure_keeps_views(mock_db):
+    # GIVEN the database rejects the write
+    mock_db.articles = MagicMock()
+    mock_db.articles.bulk_write = AsyncMock(side_effect=Exception("down"))
+    buffer = ViewBuffer()
+    buffer.record("a1")
+
+    # WHEN the flush fails
+    with pytest.raises(Exception):
+        await buffer.flush()
+
+    # THEN the views stay buffered, merged with any recorded meanwhile
+    buffer.record("a1")
+    assert buffer.pending("a1") == 2
+    assert buffer.stats()["flushes"] == 0